@@ -1,7 +1,9 @@
 """Acoriss Payment Gateway Python SDK."""
 
-from acoriss_payment_gateway.client import PaymentGatewayClient
-from acoriss_payment_gateway.errors import APIError
+import importlib
+from typing import TYPE_CHECKING, Any, Dict, List
+
+from acoriss_payment_gateway.errors import APIError, ValidationError
 from acoriss_payment_gateway.types import (
     ClientConfig,
     CustomerInfo,
@@ -14,6 +16,9 @@ from acoriss_payment_gateway.types import (
     ServiceItem,
 )
 
+if TYPE_CHECKING:
+    from acoriss_payment_gateway.client import PaymentGatewayClient
+
 __version__ = "0.1.3"
 
 __all__ = [
@@ -28,4 +33,25 @@ __all__ = [
     "PaymentStatus",
     "RetrievePaymentResponse",
     "ServiceItem",
+    "ValidationError",
 ]
+
+# Attributes whose modules pull in the HTTP stack; imported on first access
+_LAZY_ATTRS: Dict[str, str] = {
+    "PaymentGatewayClient": "acoriss_payment_gateway.client",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Import heavy attributes on first access."""
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    """List module attributes, including lazily imported ones."""
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
@@ -0,0 +1,404 @@
+"""Asynchronous audit log of gateway exchanges.
+
+:class:`AuditingTransport` wraps a transport and hands every exchange to an
+:class:`AuditSink`. The sink provided, :class:`AuditLog`, keeps the request
+path free of I/O: ``record`` redacts the exchange (credential headers and the
+signature removed, customer email, name and phone masked, see :func:`redact`)
+and appends the entry to a bounded in-memory buffer, so no credentials or
+customer PII wait there. A background writer takes entries off in batches
+and appends them as JSON lines to gzip-compressed files, starting a new file
+past ``max_file_bytes`` and deleting this process's oldest beyond
+``max_files``.
+
+When the buffer is full, ``when_full="drop"`` discards new entries (counted
+in ``dropped``) so requests never wait on the disk, while ``"block"`` makes
+requests wait for the writer so no entry is lost.
+"""
+
+import gzip
+import json
+import os
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Mapping, NamedTuple, Optional
+
+from acoriss_payment_gateway import forking
+from acoriss_payment_gateway.errors import APIError
+from acoriss_payment_gateway.redaction import REDACTED, REDACTED_HEADERS
+from acoriss_payment_gateway.sync import ShardedCounters
+from acoriss_payment_gateway.transport import Transport, TransportResponse
+
+#: Headers left out of audit entries (signatures can be replayed until they expire)
+DROPPED_HEADERS = frozenset({"x-signature"})
+
+# Customer fields masked in request and response bodies
+_PII_FIELDS = frozenset({"email", "name", "phone"})
+
+
+class AuditRecord(NamedTuple):
+    """An exchange as handed to an audit sink, before redaction."""
+
+    time: float  # wall-clock time the request was sent
+    elapsed: float  # seconds until the response (or error) arrived
+    method: str
+    url: str
+    request_headers: Mapping[str, str]
+    request_body: Optional[str]
+    status: Optional[int]  # None if no response was received
+    response_body: bytes
+    error: Optional[str] = None
+
+
+class AuditSink(ABC):
+    """Receives every exchange made through an :class:`AuditingTransport`."""
+
+    @abstractmethod
+    def record(self, record: AuditRecord) -> None:
+        """Accept an exchange; called on the request path, so it must not block on I/O."""
+
+    def close(self) -> None:  # noqa: B027
+        """Release resources held by the sink."""
+
+
+def _mask(value: Any) -> Any:
+    if not isinstance(value, str):
+        return REDACTED
+    if "@" in value:
+        local, _, domain = value.partition("@")
+        return f"{local[:1]}***@{domain}"
+    return f"***{value[-2:]}" if len(value) > 4 else "***"
+
+
+def _redact_pii(data: Any, in_customer: bool = False) -> Any:
+    if isinstance(data, dict):
+        return {
+            key: _mask(value)
+            if in_customer and key in _PII_FIELDS
+            else _redact_pii(value, in_customer or key == "customer")
+            for key, value in data.items()
+        }
+    if isinstance(data, list):
+        return [_redact_pii(item, in_customer) for item in data]
+    return data
+
+
+def _redact_body(body: Optional[bytes]) -> Any:
+    if not body:
+        return None
+    try:
+        return _redact_pii(json.loads(body))
+    except ValueError:
+        # Free text could contain anything; keep only its size
+        return f"{REDACTED} {len(body)} bytes"
+
+
+def redact(record: AuditRecord) -> Dict[str, Any]:
+    """Turn an exchange into a JSON-serializable audit entry without credentials or customer PII."""
+    headers = {}
+    for name, value in record.request_headers.items():
+        lowered = name.lower()
+        if lowered not in DROPPED_HEADERS:
+            headers[name] = REDACTED if lowered in REDACTED_HEADERS else value
+    entry: Dict[str, Any] = {
+        "time": record.time,
+        "elapsed": record.elapsed,
+        "method": record.method,
+        "url": record.url,
+        "request_headers": headers,
+        "request_body": _redact_body(record.request_body.encode("utf-8") if record.request_body else None),
+        "status": record.status,
+        "response_body": _redact_body(record.response_body),
+    }
+    if record.error is not None:
+        entry["error"] = record.error
+    return entry
+
+
+class AuditLog(AuditSink):
+    """Buffers exchanges and writes them to rotating gzip files from a background thread. Thread-safe."""
+
+    def __init__(
+        self,
+        directory: str,
+        capacity: int = 10000,
+        when_full: str = "drop",
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_file_bytes: int = 64 * 1024 * 1024,
+        max_files: int = 20,
+        compresslevel: int = 6,
+        redactor: Callable[[AuditRecord], Dict[str, Any]] = redact,
+        prefix: str = "audit",
+    ) -> None:
+        """Create the directory if needed and start the background writer.
+
+        Args:
+            directory: Directory the log files are written to
+            capacity: Entries buffered before ``when_full`` applies
+            when_full: "drop" to discard new entries while the buffer is full,
+                "block" to make requests wait for the writer
+            batch_size: Entries written per batch
+            flush_interval: Longest time, in seconds, an entry waits in the buffer
+            max_file_bytes: Compressed size after which a new file is started
+            max_files: Files of this process kept; its oldest are deleted. Files
+                written by other processes, earlier ones included, are left alone
+            compresslevel: gzip compression level (1-9)
+            redactor: Turns a record into the JSON entry written; called from
+                ``record``, on the request path
+            prefix: File name prefix
+
+        Raises:
+            ValueError: If ``when_full`` is not "drop" or "block"
+        """
+        if when_full not in ("drop", "block"):
+            raise ValueError('when_full must be "drop" or "block"')
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.capacity = capacity
+        self.when_full = when_full
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self.compresslevel = compresslevel
+        self.redactor = redactor
+        self.prefix = prefix
+        self.counters = ShardedCounters(("recorded", "dropped", "written", "write_errors"))
+
+        # deque appends and pops are atomic, so producers never take a lock; with several producers
+        # racing past the length check the buffer can briefly exceed capacity by their number
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._file: Optional[gzip.GzipFile] = None
+        self._file_seq = 0
+        self._inherited_files: List[gzip.GzipFile] = []
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._space = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        forking.register(self)
+        self.start()
+
+    def _after_fork(self) -> None:
+        # Buffered entries are the parent's to write. Its open file is kept referenced but never
+        # written or closed here: gzip trailers from two processes would corrupt it.
+        self._buffer = deque()
+        if self._file is not None:
+            self._inherited_files.append(self._file)
+            self._file = None
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._space = threading.Event()
+        self._stopping = threading.Event()
+        # Only the forking thread survives; restart the writer if this process had one running
+        if self._thread is not None:
+            self._thread = None
+            self.start()
+
+    def record(self, record: AuditRecord) -> None:
+        """Redact an exchange and buffer the entry, or drop it if the buffer is full and ``when_full`` is "drop"."""
+        buffer = self._buffer
+        if len(buffer) >= self.capacity:
+            self._wakeup.set()
+            if self.when_full == "drop" or not self._wait_for_space():
+                self.counters.add("dropped")
+                return
+        try:
+            entry = self.redactor(record)
+        except Exception:  # a faulty redactor must not fail the request
+            self.counters.add("write_errors")
+            return
+        buffer.append(entry)
+        self.counters.add("recorded")
+        if len(buffer) >= self.batch_size and not self._wakeup.is_set():
+            self._wakeup.set()
+
+    def _wait_for_space(self) -> bool:
+        while len(self._buffer) >= self.capacity:
+            if self._stopping.is_set() or self._thread is None:
+                return False
+            self._space.clear()
+            if len(self._buffer) < self.capacity:
+                break
+            self._space.wait(self.flush_interval)
+        return True
+
+    def start(self) -> None:
+        """Start the background writer if it is not running."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="acoriss-audit-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            with self._write_lock:
+                self._write_pending()
+
+    def _write_pending(self) -> None:
+        # Called with the write lock held
+        while self._buffer:
+            batch: List[Dict[str, Any]] = []
+            while self._buffer and len(batch) < self.batch_size:
+                batch.append(self._buffer.popleft())
+            self._space.set()
+            self._write_batch(batch)
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        lines = []
+        for entry in batch:
+            try:
+                lines.append(json.dumps(entry, separators=(",", ":"), default=str))
+            except Exception:  # an entry that cannot be serialized must not stop the writer
+                self.counters.add("write_errors")
+        data = ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+        try:
+            stream = self._open()
+            stream.write(data)
+            # Sync-flush each batch so a crash loses at most the batch in progress
+            stream.flush()
+        except OSError:
+            self.counters.add("write_errors", len(lines))
+            self._file = None  # the next batch starts a new file
+            return
+        self.counters.add("written", len(lines))
+        if self._raw_size() >= self.max_file_bytes:
+            self._rotate()
+
+    def _open(self) -> gzip.GzipFile:
+        if self._file is None:
+            self._file_seq += 1
+            stamp = time.strftime("%Y%m%dT%H%M%S")
+            path = self.directory / f"{self.prefix}-{stamp}-{os.getpid()}-{self._file_seq:04d}.ndjson.gz"
+            self._file = gzip.open(path, "ab", compresslevel=self.compresslevel)
+            self._prune()
+        return self._file
+
+    def _raw_size(self) -> int:
+        # Bytes written to disk so far: compressed data, up to the last flush
+        return self._file.fileobj.tell() if self._file is not None else 0  # type: ignore[union-attr]
+
+    def _rotate(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _prune(self) -> None:
+        # Only this process's files: another process may still be writing to its own
+        own = re.compile(rf"{re.escape(self.prefix)}-\d{{8}}T\d{{6}}-{os.getpid()}-\d+\.ndjson\.gz")
+        files = [path for path in self.files() if own.fullmatch(path.name)]
+        for path in files[: max(0, len(files) - self.max_files)]:
+            try:
+                path.unlink()
+            except OSError:
+                pass  # removed by another process
+
+    def files(self) -> List[Path]:
+        """Return the log files in the directory, oldest first."""
+        return sorted(
+            self.directory.glob(f"{self.prefix}-*.ndjson.gz"), key=lambda path: (path.stat().st_mtime, path.name)
+        )
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Write every entry buffered so far, in the calling thread.
+
+        Args:
+            timeout: Maximum time to wait for a batch the writer is writing,
+                in seconds (default: forever)
+
+        Returns:
+            True once the entries are written (or counted in ``write_errors``),
+            False on timeout
+        """
+        if not self._write_lock.acquire(timeout=-1 if timeout is None else timeout):
+            return False
+        try:
+            self._write_pending()
+        finally:
+            self._write_lock.release()
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        """Return entries recorded, dropped, written and lost to write errors, and the number buffered."""
+        stats = self.counters.totals()
+        stats["buffered"] = len(self._buffer)
+        return stats
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the background writer after it writes what is buffered.
+
+        Args:
+            timeout: Maximum time to wait for the writer
+        """
+        self._stopping.set()
+        self._wakeup.set()
+        self._space.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush(timeout)
+
+    def close(self) -> None:
+        """Stop the writer, write what is buffered and close the current file."""
+        self.stop()
+        with self._write_lock:
+            self._rotate()
+
+    def __enter__(self) -> "AuditLog":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class AuditingTransport(Transport):
+    """Transport that hands every exchange made through another transport to an audit sink."""
+
+    def __init__(self, transport: Transport, sink: AuditSink, close_sink: bool = True) -> None:
+        """Initialize the transport.
+
+        Args:
+            transport: Transport that sends the requests
+            sink: Sink receiving each exchange
+            close_sink: Close the sink with the transport
+        """
+        self.transport = transport
+        self.sink = sink
+        self.close_sink = close_sink
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        body: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> TransportResponse:
+        sent_at = time.time()
+        start = time.perf_counter()
+        try:
+            response = self.transport.request(method, url, headers, body=body, timeout=timeout)
+        except APIError as e:
+            elapsed = time.perf_counter() - start
+            self.sink.record(AuditRecord(sent_at, elapsed, method.upper(), url, headers, body, None, b"", str(e)))
+            raise
+        elapsed = time.perf_counter() - start
+        self.sink.record(
+            AuditRecord(sent_at, elapsed, method.upper(), url, headers, body, response.status, response.content)
+        )
+        return response
+
+    def warmup(self, url: str, connections: int = 1) -> int:
+        return self.transport.warmup(url, connections)
+
+    def close(self) -> None:
+        self.transport.close()
+        if self.close_sink:
+            self.sink.close()
@@ -0,0 +1,249 @@
+"""Cached payment lookups with stale-while-revalidate refresh.
+
+:class:`PaymentCache` sits in front of ``PaymentGatewayClient.get_payment``.
+A cached payment is served as is while fresh. Once it enters the last
+``refresh_ahead`` share of its lifetime, or has expired less than
+``stale_ttl`` seconds ago, it is still served immediately, and one background
+refresh fetches the current state, so callers of a popular payment never wait
+for the gateway and never all go to it at once.
+
+Pending payments, which change, live for ``ttl`` seconds; succeeded and
+canceled ones for ``settled_ttl``. Each entry's lifetime is shortened by a
+random share of up to ``jitter``, so entries cached together do not all
+refresh at the same moment. Refreshes run on at most ``max_workers`` threads
+with low priority (see :mod:`acoriss_payment_gateway.scheduling`); when
+``max_pending`` refreshes are already queued, stale entries are served
+without queueing another until one completes.
+
+With a :class:`~acoriss_payment_gateway.shm.SharedPaymentStore`, misses and
+refreshes look in the store shared by the host's processes before going to
+the gateway, and payments fetched from the gateway are added to it.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, NamedTuple, Optional, Set
+
+from acoriss_payment_gateway import forking
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.errors import APIError
+from acoriss_payment_gateway.shm import SharedPaymentStore
+from acoriss_payment_gateway.sync import ShardedCounters
+from acoriss_payment_gateway.types import Priority, RetrievePaymentResponse
+
+# Statuses after which a payment no longer changes
+_SETTLED_STATUSES = frozenset({"S", "C"})
+
+
+class _Entry(NamedTuple):
+    payment: RetrievePaymentResponse
+    refresh_at: float  # served as is until then
+    expires_at: float  # served while refreshing until then, and stale_ttl after that
+
+
+class PaymentCache:
+    """Cache of ``get_payment`` results refreshed in the background. Thread-safe."""
+
+    def __init__(
+        self,
+        client: PaymentGatewayClient,
+        ttl: float = 30.0,
+        settled_ttl: float = 300.0,
+        stale_ttl: float = 60.0,
+        refresh_ahead: float = 0.2,
+        jitter: float = 0.1,
+        max_entries: int = 10000,
+        max_workers: int = 4,
+        max_pending: int = 64,
+        shared: Optional[SharedPaymentStore] = None,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            client: Client used to look payments up
+            ttl: Seconds a pending payment is cached
+            settled_ttl: Seconds a succeeded or canceled payment is cached
+            stale_ttl: Seconds past expiry an entry may still be served while
+                it is refreshed, or when refreshing fails
+            refresh_ahead: Share of an entry's lifetime, at its end, during which
+                a lookup triggers a background refresh (0-1)
+            jitter: Largest share by which an entry's lifetime is randomly shortened (0-1)
+            max_entries: Entries kept; the oldest are dropped first
+            max_workers: Threads refreshing entries
+            max_pending: Refreshes queued or running at most
+            shared: Store shared with the other processes on the host, checked
+                before the gateway on misses and refreshes
+
+        Raises:
+            ValueError: If ``refresh_ahead`` or ``jitter`` is outside 0-1
+        """
+        if not 0 <= refresh_ahead <= 1 or not 0 <= jitter <= 1:
+            raise ValueError("refresh_ahead and jitter must be between 0 and 1")
+        self.client = client
+        self.ttl = ttl
+        self.settled_ttl = settled_ttl
+        self.stale_ttl = stale_ttl
+        self.refresh_ahead = refresh_ahead
+        self.jitter = jitter
+        self.max_entries = max_entries
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.shared = shared
+        self.counters = ShardedCounters(("hits", "stale_hits", "misses", "shared_hits", "refreshes", "refresh_errors"))
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future[RetrievePaymentResponse]] = {}
+        self._refreshing: Set[str] = set()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        forking.register(self)
+
+    def _after_fork(self) -> None:
+        # Cached payments stay valid; refresh threads and their bookkeeping did not survive the fork
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._refreshing = set()
+        self._pool = None
+
+    def get_payment(self, payment_id: str, priority: Optional[Priority] = None) -> RetrievePaymentResponse:
+        """Return a payment, from the cache when possible.
+
+        The returned mapping is shared with other callers and must not be modified.
+
+        Args:
+            payment_id: The payment ID
+            priority: Scheduling priority of a lookup made on a miss
+
+        Returns:
+            Payment details, possibly up to the entry's lifetime (plus
+            ``stale_ttl`` while refreshing) old
+
+        Raises:
+            APIError: If the payment is not cached and the lookup fails
+        """
+        entry = self._entries.get(payment_id)
+        now = time.monotonic()
+        if entry is not None:
+            if now < entry.refresh_at:
+                self.counters.add("hits")
+                return entry.payment
+            if now < entry.expires_at + self.stale_ttl:
+                self.counters.add("hits" if now < entry.expires_at else "stale_hits")
+                self._schedule_refresh(payment_id)
+                return entry.payment
+
+        self.counters.add("misses")
+        return self._fetch(payment_id, priority, refreshing=False)
+
+    def _fetch(self, payment_id: str, priority: Optional[Priority], refreshing: bool) -> RetrievePaymentResponse:
+        # Concurrent misses and refreshes of a payment share one lookup
+        with self._lock:
+            pending = self._inflight.get(payment_id)
+            if pending is None:
+                future: Future[RetrievePaymentResponse] = Future()
+                self._inflight[payment_id] = future
+        if pending is not None:
+            return pending.result()
+        try:
+            shared = self.shared.get(payment_id) if self.shared is not None else None
+            # A refresh takes the shared copy only if another process has refreshed it already
+            if shared is not None and (not refreshing or shared.refresh_in > 0):
+                self.counters.add("shared_hits")
+                # Stagger refreshes across processes; the first to refresh shares the result
+                start = max(shared.refresh_in, 0.0)
+                refresh_in = start + (shared.expires_in - start) * random.random()  # nosec B311
+                self._store(payment_id, shared.payment, refresh_in, shared.expires_in)
+                future.set_result(shared.payment)
+                return shared.payment
+            payment = self.client.get_payment(payment_id, priority=priority)
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(payment_id, None)
+                if isinstance(e, APIError) and e.status == 404:
+                    self._entries.pop(payment_id, None)
+            if isinstance(e, APIError) and e.status == 404 and self.shared is not None:
+                self.shared.invalidate(payment_id)
+            future.set_exception(e)
+            raise
+        lifetime = self.settled_ttl if payment.get("status") in _SETTLED_STATUSES else self.ttl
+        lifetime *= 1 - self.jitter * random.random()  # nosec B311 - spreads expiry, no security use
+        refresh_in = lifetime * (1 - self.refresh_ahead)
+        if self.shared is not None:
+            self.shared.put(payment_id, payment, lifetime, refresh_in)
+        self._store(payment_id, payment, refresh_in, lifetime)
+        future.set_result(payment)
+        return payment
+
+    def _store(self, payment_id: str, payment: RetrievePaymentResponse, refresh_in: float, expires_in: float) -> None:
+        now = time.monotonic()
+        entry = _Entry(payment, now + refresh_in, now + expires_in)
+        with self._lock:
+            self._entries.pop(payment_id, None)  # re-insert so dict order follows age
+            self._entries[payment_id] = entry
+            self._inflight.pop(payment_id, None)
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+
+    def _schedule_refresh(self, payment_id: str) -> None:
+        with self._lock:
+            if payment_id in self._refreshing or len(self._refreshing) >= self.max_pending:
+                return
+            self._refreshing.add(payment_id)
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="acoriss-refresh")
+            pool = self._pool
+        try:
+            pool.submit(self._refresh, payment_id)
+        except RuntimeError:  # closed
+            with self._lock:
+                self._refreshing.discard(payment_id)
+
+    def _refresh(self, payment_id: str) -> None:
+        try:
+            self._fetch(payment_id, "low", refreshing=True)
+            self.counters.add("refreshes")
+        except APIError:
+            # Keep serving the cached payment until it is too stale
+            self.counters.add("refresh_errors")
+        finally:
+            with self._lock:
+                self._refreshing.discard(payment_id)
+
+    def invalidate(self, payment_id: Optional[str] = None) -> None:
+        """Drop cached payments, including from the shared store (for every process).
+
+        Args:
+            payment_id: Payment to drop; all payments when omitted
+        """
+        with self._lock:
+            if payment_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(payment_id, None)
+        if self.shared is not None:
+            self.shared.invalidate(payment_id)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the lookup and refresh counters, and the entries and refreshes pending."""
+        stats = self.counters.totals()
+        stats["entries"] = len(self._entries)
+        with self._lock:
+            stats["refreshing"] = len(self._refreshing)
+        return stats
+
+    def close(self) -> None:
+        """Wait for refreshes in progress and stop the refresh threads."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def __enter__(self) -> "PaymentCache":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,514 @@
+"""Recording and replay of gateway traffic.
+
+:class:`RecordingTransport` wraps a real transport and appends every exchange
+to a cassette file. API keys and other credential headers are redacted, and
+request signatures are replaced by signatures made with a replay secret
+(:data:`REPLAY_SECRET` by default), so a cassette can be shared without
+exposing credentials while replays can still check that requests are signed
+correctly.
+
+:class:`ReplayTransport` serves a cassette in-process and
+:class:`ReplayServer` serves it over HTTP, optionally with the recorded
+latencies (scaled by ``speedup``) and a cap on concurrent requests.
+
+Cassette layout: a magic line, then one length-prefixed, zlib-compressed
+JSON record per exchange, then a compressed index of record offsets and
+routes and a fixed-size footer pointing at it. Records share a preset zlib
+dictionary, which keeps small gateway exchanges compact. A cassette whose
+writer was not closed is still readable; its index is rebuilt by scanning.
+"""
+
+import json
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import IO, Any, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+from acoriss_payment_gateway.errors import APIError
+from acoriss_payment_gateway.redaction import REDACTED, REDACTED_HEADERS
+from acoriss_payment_gateway.signer import HmacSha256Signer, SignerInterface
+from acoriss_payment_gateway.transport import Transport, TransportResponse
+
+MAGIC = b"ACSTv1\n"
+REPLAY_SECRET = "acoriss-replay-secret"
+"""Secret used to re-sign recorded requests unless another signer is given."""
+
+# Headers describing the recorded wire encoding; replayed bodies are already decoded
+_HOP_HEADERS = frozenset({"content-length", "content-encoding", "transfer-encoding", "connection", "keep-alive"})
+
+_RECORD = struct.Struct("<I")
+_FOOTER = struct.Struct("<QI")
+
+# Preset dictionary of strings common to gateway exchanges
+_ZDICT = (
+    b'"Content-Type","application/json","X-API-KEY","X-SIGNATURE","[REDACTED]","Date","Server",'
+    b'"POST","GET","/api/v1/sessions","checkoutUrl","createdAt","transactionId","customer","email",'
+    b'"phone","name","services","quantity","price","currency","amount","description","status",'
+    b'"expired","serviceId","sessionId","callbackUrl","cancelUrl","successUrl","message","USD","CDF"'
+)
+
+
+class Exchange(NamedTuple):
+    """A recorded request and its response."""
+
+    offset: float  # seconds between the start of the recording and the request
+    elapsed: float  # seconds until the response (or error) arrived
+    method: str
+    path: str  # URL path and query, without scheme and host
+    request_headers: Dict[str, str]
+    request_body: Optional[str]
+    status: Optional[int]  # None if no response was received
+    response_headers: Dict[str, str]
+    response_body: bytes
+    error: Optional[str] = None
+
+    def response(self) -> TransportResponse:
+        """Rebuild the recorded response.
+
+        Raises:
+            APIError: If the recorded request failed without a response
+        """
+        if self.status is None:
+            raise APIError(message=self.error or "Recorded request failed")
+        return TransportResponse(self.status, dict(self.response_headers), self.response_body)
+
+
+def _encode(exchange: Exchange) -> bytes:
+    record = list(exchange)
+    # Bodies are stored as text; surrogateescape round-trips any non-UTF-8 bytes
+    record[8] = exchange.response_body.decode("utf-8", "surrogateescape")
+    compressor = zlib.compressobj(zdict=_ZDICT)
+    data = compressor.compress(json.dumps(record, separators=(",", ":")).encode("utf-8", "surrogatepass"))
+    return data + compressor.flush()
+
+
+def _decode(data: bytes) -> Exchange:
+    decompressor = zlib.decompressobj(zdict=_ZDICT)
+    record = json.loads((decompressor.decompress(data) + decompressor.flush()).decode("utf-8", "surrogatepass"))
+    record[8] = record[8].encode("utf-8", "surrogateescape")
+    return Exchange(*record)
+
+
+def _signed_data(method: str, path: str, body: Optional[str]) -> str:
+    """Return what the client signs: the body, or the payment ID for lookups."""
+    if body is not None:
+        return body
+    return urlsplit(path).path.rsplit("/", 1)[-1]
+
+
+class CassetteWriter:
+    """Appends exchanges to a cassette file. Thread-safe."""
+
+    def __init__(self, path: str) -> None:
+        """Create (or truncate) the cassette.
+
+        Args:
+            path: Cassette file path
+        """
+        self.path = path
+        self._file: IO[bytes] = open(path, "wb")
+        self._file.write(MAGIC)
+        self._index: List[Tuple[int, str, str]] = []
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+
+    def write(self, exchange: Exchange) -> None:
+        """Append an exchange."""
+        data = _encode(exchange)
+        with self._lock:
+            self._index.append((self._file.tell(), exchange.method, exchange.path))
+            self._file.write(_RECORD.pack(len(data)) + data)
+
+    def close(self) -> None:
+        """Write the index and close the file."""
+        with self._lock:
+            if self._file.closed:
+                return
+            index = zlib.compress(json.dumps(self._index, separators=(",", ":")).encode("utf-8"))
+            offset = self._file.tell()
+            self._file.write(index + _FOOTER.pack(offset, len(index)) + MAGIC)
+            self._file.close()
+
+    def __enter__(self) -> "CassetteWriter":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+class Cassette:
+    """Random-access reader for a cassette file."""
+
+    def __init__(self, path: str) -> None:
+        """Open the cassette and load its index.
+
+        Args:
+            path: Cassette file path
+
+        Raises:
+            ValueError: If the file is not a cassette
+        """
+        self.path = path
+        self._file: IO[bytes] = open(path, "rb")
+        self._lock = threading.Lock()
+        if self._file.read(len(MAGIC)) != MAGIC:
+            self._file.close()
+            raise ValueError(f"{path} is not a cassette file")
+        self._index = self._read_index()
+
+    def _read_index(self) -> List[Tuple[int, str, str]]:
+        size = self._file.seek(0, 2)
+        tail = len(MAGIC) + _FOOTER.size
+        if size >= 2 * len(MAGIC) + _FOOTER.size:
+            self._file.seek(size - tail)
+            footer = self._file.read(tail)
+            if footer.endswith(MAGIC):
+                offset, length = _FOOTER.unpack(footer[: _FOOTER.size])
+                self._file.seek(offset)
+                return [tuple(entry) for entry in json.loads(zlib.decompress(self._file.read(length)))]
+
+        # No footer: the writer was not closed, rebuild the index from the records
+        index: List[Tuple[int, str, str]] = []
+        offset = len(MAGIC)
+        self._file.seek(offset)
+        while True:
+            header = self._file.read(_RECORD.size)
+            if len(header) < _RECORD.size:
+                break
+            (length,) = _RECORD.unpack(header)
+            data = self._file.read(length)
+            if len(data) < length:
+                break  # truncated last record
+            exchange = _decode(data)
+            index.append((offset, exchange.method, exchange.path))
+            offset += _RECORD.size + length
+        return index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __getitem__(self, i: int) -> Exchange:
+        offset = self._index[i][0]
+        with self._lock:
+            self._file.seek(offset)
+            (length,) = _RECORD.unpack(self._file.read(_RECORD.size))
+            data = self._file.read(length)
+        return _decode(data)
+
+    def __iter__(self) -> Iterator[Exchange]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def routes(self) -> Dict[Tuple[str, str], List[int]]:
+        """Return the positions of the exchanges recorded for each ``(method, path)``."""
+        routes: Dict[Tuple[str, str], List[int]] = {}
+        for i, (_, method, path) in enumerate(self._index):
+            routes.setdefault((method, path), []).append(i)
+        return routes
+
+    def close(self) -> None:
+        """Close the file."""
+        self._file.close()
+
+    def __enter__(self) -> "Cassette":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+class RecordingTransport(Transport):
+    """Transport that records the exchanges made through another transport."""
+
+    def __init__(
+        self,
+        transport: Transport,
+        cassette: Union[str, CassetteWriter],
+        redact_headers: Iterable[str] = REDACTED_HEADERS,
+        signer: Optional[SignerInterface] = None,
+    ) -> None:
+        """Initialize the transport.
+
+        Args:
+            transport: Transport that sends the requests
+            cassette: Cassette path or writer; a path is closed with the transport
+            redact_headers: Header names (case-insensitive) whose values are not recorded
+            signer: Signer used to re-sign recorded requests
+                (default: HMAC-SHA256 with :data:`REPLAY_SECRET`)
+        """
+        self.transport = transport
+        self._owns_writer = isinstance(cassette, str)
+        self.writer = CassetteWriter(cassette) if isinstance(cassette, str) else cassette
+        self.redact_headers = frozenset(name.lower() for name in redact_headers)
+        self.signer = signer or HmacSha256Signer(REPLAY_SECRET)
+
+    def _redact(self, headers: Any) -> Dict[str, str]:
+        return {
+            name: REDACTED if name.lower() in self.redact_headers else value for name, value in dict(headers).items()
+        }
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        body: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> TransportResponse:
+        start = time.monotonic()
+        parts = urlsplit(url)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        request_headers = self._redact(headers)
+        for name in request_headers:
+            if name.lower() == "x-signature":
+                request_headers[name] = self.signer.sign(_signed_data(method, path, body))
+        offset = start - self.writer.started
+
+        try:
+            response = self.transport.request(method, url, headers, body=body, timeout=timeout)
+        except APIError as e:
+            elapsed = time.monotonic() - start
+            self.writer.write(
+                Exchange(offset, elapsed, method.upper(), path, request_headers, body, None, {}, b"", str(e))
+            )
+            raise
+        elapsed = time.monotonic() - start
+        response_headers = self._redact(response.headers)
+        self.writer.write(
+            Exchange(
+                offset,
+                elapsed,
+                method.upper(),
+                path,
+                request_headers,
+                body,
+                response.status,
+                response_headers,
+                response.content,
+            )
+        )
+        return response
+
+    def warmup(self, url: str, connections: int = 1) -> int:
+        return self.transport.warmup(url, connections)
+
+    def close(self) -> None:
+        self.transport.close()
+        if self._owns_writer:
+            self.writer.close()
+
+
+def _not_found(method: str, path: str) -> TransportResponse:
+    return TransportResponse.from_json({"message": f"No recorded response for {method} {path}"}, status=404)
+
+
+class _Replayer:
+    """Picks recorded responses for incoming requests."""
+
+    def __init__(
+        self,
+        cassette: Union[str, Cassette],
+        speedup: Optional[float],
+        verify_signatures: Optional[SignerInterface],
+        cache_size: int,
+    ) -> None:
+        self.cassette = Cassette(cassette) if isinstance(cassette, str) else cassette
+        self.speedup = speedup
+        self.verify_signatures = verify_signatures
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        # Decoded exchanges by position, least recently used first
+        self._cache: Dict[int, Exchange] = {}
+        self._routes = self.cassette.routes()
+        # Fallback for IDs that were not recorded: any exchange with the same method and parent path
+        self._parents: Dict[Tuple[str, str], List[int]] = {}
+        for (method, path), positions in self._routes.items():
+            self._parents.setdefault((method, _parent(path)), []).extend(positions)
+        self._next: Dict[Tuple[str, str], int] = {}
+
+    def _pick(self, method: str, path: str) -> Optional[Exchange]:
+        key = (method, path)
+        positions = self._routes.get(key)
+        if positions is None:
+            key = (method, _parent(path))
+            positions = self._parents.get(key)
+            if positions is None:
+                return None
+        with self._lock:
+            # Cycle through the recordings of a route in order
+            turn = self._next.get(key, 0)
+            self._next[key] = turn + 1
+            position = positions[turn % len(positions)]
+            exchange = self._cache.pop(position, None)
+            if exchange is not None:
+                self._cache[position] = exchange
+                return exchange
+        # Decoded outside the lock; concurrent misses of one position decode it twice
+        exchange = self.cassette[position]
+        with self._lock:
+            self._cache.pop(position, None)
+            self._cache[position] = exchange
+            while len(self._cache) > self.cache_size:
+                del self._cache[next(iter(self._cache))]
+        return exchange
+
+    def respond(self, method: str, url: str, headers: Mapping[str, str], body: Optional[str]) -> TransportResponse:
+        method = method.upper()
+        parts = urlsplit(url)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        if self.verify_signatures is not None:
+            signature = next((value for name, value in headers.items() if name.lower() == "x-signature"), None)
+            if signature != self.verify_signatures.sign(_signed_data(method, path, body)):
+                return TransportResponse.from_json({"message": "Invalid signature"}, status=401)
+
+        exchange = self._pick(method, path)
+        if exchange is None:
+            return _not_found(method, path)
+        if self.speedup:
+            time.sleep(exchange.elapsed / self.speedup)
+        return exchange.response()
+
+
+def _parent(path: str) -> str:
+    return urlsplit(path).path.rsplit("/", 1)[0] + "/*"
+
+
+class ReplayTransport(Transport):
+    """Transport answering requests from a cassette.
+
+    Requests are matched on method and path; repeated requests cycle through
+    the responses recorded for them. A request for a path that was not
+    recorded (e.g. another payment ID) gets a response recorded for a sibling
+    path, and a 404 if there is none.
+    """
+
+    def __init__(
+        self,
+        cassette: Union[str, Cassette],
+        speedup: Optional[float] = None,
+        verify_signatures: Optional[SignerInterface] = None,
+        cache_size: int = 256,
+    ) -> None:
+        """Initialize the transport.
+
+        Args:
+            cassette: Cassette path or reader
+            speedup: Replay recorded latencies divided by this factor
+                (default: respond immediately)
+            verify_signatures: Signer whose signatures requests must carry, or
+                they are answered with 401 (e.g. ``HmacSha256Signer(REPLAY_SECRET)``)
+            cache_size: Decoded recordings kept in memory; the least recently
+                used are dropped first
+        """
+        self._replayer = _Replayer(cassette, speedup, verify_signatures, cache_size)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        body: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> TransportResponse:
+        return self._replayer.respond(method, url, headers, body)
+
+    def close(self) -> None:
+        self._replayer.cassette.close()
+
+
+class ReplayServer:
+    """Local HTTP server answering requests from a cassette.
+
+    Matching is the same as :class:`ReplayTransport`. Point a client (or the
+    service under test) at ``url`` plus the recorded base path, e.g.
+    ``PaymentGatewayClient(base_url=server.url + "/api/v1")``.
+    """
+
+    def __init__(
+        self,
+        cassette: Union[str, Cassette],
+        host: str = "127.0.0.1",
+        port: int = 0,
+        speedup: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        verify_signatures: Optional[SignerInterface] = None,
+        cache_size: int = 256,
+    ) -> None:
+        """Initialize the server.
+
+        Args:
+            cassette: Cassette path or reader
+            host: Address to listen on
+            port: Port to listen on (default: any free port)
+            speedup: Replay recorded latencies divided by this factor
+                (default: respond immediately)
+            max_concurrency: Maximum number of requests answered at once;
+                further requests wait (default: unlimited)
+            verify_signatures: Signer whose signatures requests must carry
+            cache_size: Decoded recordings kept in memory; the least recently
+                used are dropped first
+        """
+        replayer = _Replayer(cassette, speedup, verify_signatures, cache_size)
+        slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format: str, *args: object) -> None:
+                pass
+
+            def _replay(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length).decode("utf-8") if length else None
+                headers = dict(self.headers.items())
+                if slots is not None:
+                    with slots:
+                        response = replayer.respond(self.command, self.path, headers, body)
+                else:
+                    response = replayer.respond(self.command, self.path, headers, body)
+                content = response.content
+                self.send_response(response.status)
+                for name, value in response.headers.items():
+                    if name.lower() not in _HOP_HEADERS:
+                        self.send_header(name, value)
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _replay  # noqa: N815
+
+        self.host = host
+        self._replayer = replayer
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Server URL, without a trailing slash."""
+        return f"http://{self.host}:{self._server.server_address[1]}"
+
+    def start(self) -> "ReplayServer":
+        """Start serving on a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the cassette."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        self._replayer.cassette.close()
+
+    def __enter__(self) -> "ReplayServer":
+        return self.start()
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
@@ -0,0 +1,529 @@
+"""Command-line tool for bulk gateway operations.
+
+``acoriss-payments get`` looks up payment IDs (one per line) and
+``acoriss-payments create`` creates sessions from NDJSON or CSV requests.
+Input is read as a stream from a file or stdin; requests run on a thread
+pool with optional rate limiting, and each result is written (NDJSON or CSV)
+as soon as it completes, so output order follows completion.
+
+With ``--checkpoint``, the position of every completed record is appended to
+a file; rerunning the same command skips those records and appends to the
+output. An item completed just before a crash but not yet checkpointed is
+sent again, so use ``transaction_id`` to make ``create`` retries safe.
+
+``split``, ``work`` and ``merge`` run the same operations as a sharded job
+that any number of processes and hosts can work on together (see
+:mod:`acoriss_payment_gateway.sharding`).
+
+Credentials come from ``ACORISS_API_KEY`` and ``ACORISS_API_SECRET``.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import IO, Any, Callable, Deque, Dict, Iterator, List, NamedTuple, Optional, Sequence, Set
+
+from acoriss_payment_gateway.client import BASE_URLS, PaymentGatewayClient
+from acoriss_payment_gateway.errors import APIError
+from acoriss_payment_gateway.limits import ConcurrencyLimiter, GradientLimit
+from acoriss_payment_gateway.timeouts import AdaptiveTimeout
+
+# CSV columns for create requests; customer_* columns fill the customer object
+CREATE_COLUMNS = (
+    "amount",
+    "currency",
+    "customer_email",
+    "customer_name",
+    "customer_phone",
+    "description",
+    "transaction_id",
+    "callback_url",
+    "cancel_url",
+    "success_url",
+    "service_id",
+)
+
+# Response fields written as CSV columns; NDJSON output carries the whole response
+RESULT_FIELDS = {
+    "get": ("id", "transaction_id", "amount", "currency", "status", "expired"),
+    "create": ("id", "transaction_id", "amount", "currency", "checkout_url"),
+}
+
+
+class Item(NamedTuple):
+    """An input record: its position in the input and the parsed value (or parse error)."""
+
+    position: int
+    key: str
+    value: Any
+    error: Optional[str] = None
+
+
+class Result(NamedTuple):
+    """Outcome of one operation."""
+
+    position: int
+    key: str
+    ok: bool
+    http_status: Optional[int]  # for failed requests
+    latency_ms: float
+    error: Optional[str]
+    response: Optional[Dict[str, Any]]
+
+
+def read_ids(lines: Iterator[str]) -> Iterator[Item]:
+    """Yield payment IDs, one per non-empty line."""
+    position = 0
+    for line in lines:
+        payment_id = line.strip()
+        if payment_id and not payment_id.startswith("#"):
+            position += 1
+            yield Item(position, payment_id, payment_id)
+
+
+def read_requests(lines: Iterator[str], input_format: str) -> Iterator[Item]:
+    """Yield ``create_session`` arguments from NDJSON or CSV lines."""
+    if input_format == "csv":
+        for position, row in enumerate(csv.DictReader(lines), 1):
+            try:
+                request = _request_from_row(row)
+            except (KeyError, ValueError) as e:
+                yield Item(position, str(row.get("transaction_id") or position), None, f"Invalid row: {e}")
+                continue
+            yield Item(position, str(request.get("transaction_id") or position), request)
+        return
+
+    position = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        position += 1
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("expected an object")
+        except ValueError as e:
+            yield Item(position, str(position), None, f"Invalid JSON: {e}")
+            continue
+        yield Item(position, str(request.get("transaction_id") or position), request)
+
+
+def _request_from_row(row: Dict[str, str]) -> Dict[str, Any]:
+    request: Dict[str, Any] = {"amount": int(row["amount"]), "currency": row["currency"]}
+    customer = {name: row[f"customer_{name}"] for name in ("email", "name", "phone") if row.get(f"customer_{name}")}
+    request["customer"] = customer
+    for name in CREATE_COLUMNS[5:]:
+        if row.get(name):
+            request[name] = row[name]
+    return request
+
+
+class RateLimiter:
+    """Token bucket allowing ``rate`` acquisitions per second, with bursts up to ``burst``."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None) -> None:
+        """Initialize the limiter.
+
+        Args:
+            rate: Sustained acquisitions per second
+            burst: Bucket size (default: one second worth of tokens, at least 1)
+        """
+        self.rate = rate
+        self.capacity = float(burst if burst is not None else max(1, int(rate)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Wait for a token."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            # Reserve the token now and sleep off the debt outside the lock
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if delay:
+            time.sleep(delay)
+
+
+class Stats:
+    """Throughput and latency over the run, with percentiles over recent requests."""
+
+    def __init__(self, window: int = 1000, limiter: Optional[ConcurrencyLimiter] = None) -> None:
+        self.limiter = limiter
+        self.started = time.monotonic()
+        self.done = 0
+        self.failed = 0
+        self.skipped = 0
+        self._latencies: Deque[float] = deque(maxlen=window)
+
+    def add(self, result: Result) -> None:
+        self.done += 1
+        self.failed += not result.ok
+        self._latencies.append(result.latency_ms)
+
+    def line(self) -> str:
+        elapsed = time.monotonic() - self.started
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> float:
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else 0.0
+
+        return (
+            f"{self.done} done, {self.failed} failed"
+            + (f", {self.skipped} skipped" if self.skipped else "")
+            + f" | {self.done / elapsed if elapsed else 0.0:.1f}/s"
+            + f" | p50 {percentile(0.5):.0f} ms, p95 {percentile(0.95):.0f} ms, p99 {percentile(0.99):.0f} ms"
+            + (f" | limit {self.limiter.limit}" if self.limiter is not None else "")
+        )
+
+
+class Checkpoint:
+    """Append-only log of completed input positions."""
+
+    def __init__(self, path: str) -> None:
+        self.done: Set[int] = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                self.done = {int(line) for line in file if line.strip().isdigit()}
+        self._file = open(path, "a", encoding="utf-8")
+
+    def mark(self, position: int) -> None:
+        self._file.write(f"{position}\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _Output:
+    """Writes results as NDJSON or CSV, flushing each record."""
+
+    def __init__(self, file: IO[str], output_format: str, fields: Sequence[str]) -> None:
+        self.file = file
+        self.fields = fields
+        self._csv = None
+        if output_format == "csv":
+            self._csv = csv.writer(file)
+            # Resumed runs append to the same file, which already has a header
+            if not file.seekable() or file.tell() == 0:
+                self._csv.writerow(("position", "key", "ok", "http_status", "latency_ms", "error", *fields))
+
+    def write(self, result: Result) -> None:
+        if self._csv is not None:
+            response = result.response or {}
+            self._csv.writerow(
+                (
+                    result.position,
+                    result.key,
+                    int(result.ok),
+                    result.http_status or "",
+                    f"{result.latency_ms:.1f}",
+                    result.error or "",
+                    *(_csv_value(response.get(field)) for field in self.fields),
+                )
+            )
+        else:
+            record = result._asdict()
+            record["latency_ms"] = round(result.latency_ms, 1)
+            self.file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self.file.flush()
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+def run(
+    operation: Callable[[Any], Any],
+    items: Iterator[Item],
+    output: Callable[[Result], None],
+    concurrency: int = 8,
+    rate: Optional[float] = None,
+    checkpoint: Optional[Checkpoint] = None,
+    stats: Optional[Stats] = None,
+) -> Stats:
+    """Run ``operation`` over ``items`` concurrently, reporting each result as it completes.
+
+    At most ``2 * concurrency`` items are read ahead of the requests in flight,
+    so memory does not grow with the input.
+
+    Args:
+        operation: Called with each item's value; an exception marks the item failed
+        items: Input records
+        output: Called with each result, from the calling thread
+        concurrency: Number of requests in flight
+        rate: Maximum requests per second (default: unlimited)
+        checkpoint: Completed positions to skip, updated as items complete
+        stats: Statistics to update (default: a new ``Stats``)
+
+    Returns:
+        The statistics for the run
+    """
+    stats = stats or Stats()
+    limiter = RateLimiter(rate) if rate else None
+
+    def call(item: Item) -> Result:
+        if item.error is not None:
+            return Result(item.position, item.key, False, None, 0.0, item.error, None)
+        if limiter is not None:
+            limiter.acquire()
+        start = time.perf_counter()
+        try:
+            response = operation(item.value)
+        except APIError as e:
+            return Result(
+                item.position, item.key, False, e.status, (time.perf_counter() - start) * 1000, e.message, None
+            )
+        except (TypeError, ValueError) as e:
+            # Requests the client rejects before sending (missing fields, validation)
+            return Result(item.position, item.key, False, None, 0.0, str(e), None)
+        except Exception as e:
+            # Anything else (e.g. a network error outside the client's handling) fails this item, not the run
+            error = f"{type(e).__name__}: {e}"
+            return Result(item.position, item.key, False, None, (time.perf_counter() - start) * 1000, error, None)
+        return Result(item.position, item.key, True, None, (time.perf_counter() - start) * 1000, None, dict(response))
+
+    # Quoted: Future is not subscriptable at runtime before Python 3.9
+    def finish(futures: "Set[Future[Result]]") -> None:
+        for future in futures:
+            result = future.result()
+            output(result)
+            stats.add(result)
+            if checkpoint is not None:
+                checkpoint.mark(result.position)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        pending: Set[Future[Result]] = set()
+        for item in items:
+            if checkpoint is not None and item.position in checkpoint.done:
+                stats.skipped += 1
+                continue
+            if len(pending) >= 2 * concurrency:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                finish(finished)
+            pending.add(pool.submit(call, item))
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            finish(finished)
+    return stats
+
+
+def operation_for(client: PaymentGatewayClient, command: str) -> Callable[[Any], Any]:
+    """Return the client call made for each record of ``command`` (``"get"`` or ``"create"``)."""
+    if command == "get":
+        return client.get_payment
+
+    def create(request: Dict[str, Any]) -> Any:
+        return client.create_session(**request)
+
+    return create
+
+
+def _report(stats: Stats, interval: float, stop: threading.Event, stream: IO[str]) -> None:
+    end = "\r" if stream.isatty() else "\n"
+    while not stop.wait(interval):
+        stream.write(stats.line() + end)
+        stream.flush()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser."""
+    parser = argparse.ArgumentParser(prog="acoriss-payments", description="Bulk Acoriss Payment Gateway operations.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    get = commands.add_parser("get", help="look up payments by ID (one per line)")
+    create = commands.add_parser("create", help="create payment sessions from NDJSON or CSV requests")
+    split = commands.add_parser("split", help="split get or create input into the shards of a job directory")
+    work = commands.add_parser("work", help="process shards of a job; run any number of these")
+    merge = commands.add_parser("merge", help="combine the results of a job's shards in input order")
+    for command in (split, work, merge):
+        command.add_argument("job", help="job directory")
+    split.add_argument("job_command", choices=("get", "create"), help="operation of the job")
+    split.add_argument("--shards", type=int, default=64, help="number of shards (default: 64)")
+    work.add_argument(
+        "--lease-ttl", type=float, default=60.0, help="seconds before a dead worker's shard is taken over"
+    )
+    work.add_argument("--no-wait", action="store_true", help="exit when all unfinished shards are leased")
+    merge.add_argument("--partial", action="store_true", help="merge even if some shards are unfinished")
+    for command in (create, split):
+        command.add_argument("--input-format", choices=("ndjson", "csv"), help="default: from the file extension")
+    for command in (get, create, split):
+        command.add_argument("input", nargs="?", default="-", help="input file (default: stdin)")
+    for command in (get, create, merge):
+        command.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+        command.add_argument("--format", choices=("ndjson", "csv"), default="ndjson", help="output format")
+    for command in (get, create, work):
+        command.add_argument("-c", "--concurrency", type=int, default=8, help="requests in flight (default: 8)")
+        command.add_argument(
+            "--adaptive", action="store_true", help="adapt requests in flight to gateway latency, up to --concurrency"
+        )
+        command.add_argument("--rate", type=float, help="maximum requests per second")
+        if command is not work:
+            command.add_argument("--checkpoint", help="file recording completed records, to resume from")
+        command.add_argument("--progress", type=float, default=2.0, help="seconds between stats lines (0: off)")
+        command.add_argument("--environment", choices=tuple(BASE_URLS), default="sandbox")
+        command.add_argument(
+            "--base-url",
+            action="append",
+            help="override the gateway URL; repeat to route across equivalent endpoints",
+        )
+        command.add_argument("--timeout", type=float, default=15.0, help="request timeout in seconds")
+        command.add_argument(
+            "--adaptive-timeout",
+            action="store_true",
+            help="time out calls at 3x the recent p99 latency, up to --timeout",
+        )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None, client: Optional[PaymentGatewayClient] = None) -> int:
+    """Run the command line tool.
+
+    Args:
+        argv: Arguments (default: ``sys.argv[1:]``)
+        client: Client to use instead of one built from the environment (not closed)
+
+    Returns:
+        Exit status: 0 if every record succeeded, 1 if any failed, 2 on usage errors
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command in ("split", "merge"):
+        try:
+            return _split(args) if args.command == "split" else _merge(args)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.command == "work":
+        # Imported here: sharding builds on this module
+        from acoriss_payment_gateway import sharding
+
+        try:
+            job = sharding.load_job(args.job)
+        except ValueError as e:
+            parser.error(str(e))
+    owns_client = client is None
+    if client is None:
+        api_key = os.environ.get("ACORISS_API_KEY")
+        if not api_key:
+            parser.error("ACORISS_API_KEY is not set")
+        client = PaymentGatewayClient(
+            api_key=api_key,
+            api_secret=os.environ.get("ACORISS_API_SECRET"),
+            environment=args.environment,
+            base_url=args.base_url[0] if args.base_url and len(args.base_url) == 1 else args.base_url,
+            timeout=args.timeout,
+        )
+
+    if args.adaptive and client.limiter is None:
+        client.limiter = ConcurrencyLimiter(GradientLimit(initial=min(4, args.concurrency), max_limit=args.concurrency))
+    if args.adaptive_timeout and client.adaptive_timeout is None:
+        client.adaptive_timeout = AdaptiveTimeout(min_timeout=min(1.0, args.timeout), max_timeout=args.timeout)
+
+    stats = Stats(limiter=client.limiter)
+    stop = threading.Event()
+    files: List[IO[str]] = []
+    checkpoint = None
+    try:
+        if args.progress > 0:
+            threading.Thread(target=_report, args=(stats, args.progress, stop, sys.stderr), daemon=True).start()
+        if args.command == "work":
+            sharding.work(
+                args.job,
+                client,
+                concurrency=args.concurrency,
+                rate=args.rate,
+                lease_ttl=args.lease_ttl,
+                wait=not args.no_wait,
+                stats=stats,
+            )
+            status = sharding.job_status(args.job)
+            sys.stderr.write(f"{status['done']} of {status['shards']} shards of the {job['command']} job finished\n")
+            return 1 if stats.failed else 0
+
+        input_file = _open_input(args.input)
+        files.append(input_file)
+        items = _read_items(args.command, input_file, args.input, getattr(args, "input_format", None))
+        checkpoint = Checkpoint(args.checkpoint) if args.checkpoint else None
+        # Resumed runs append to the output of the previous attempt
+        output_file = _open_output(args.output, "a" if checkpoint is not None else "w")
+        files.append(output_file)
+        output = _Output(output_file, args.format, RESULT_FIELDS[args.command])
+        run(operation_for(client, args.command), items, output.write, args.concurrency, args.rate, checkpoint, stats)
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        stop.set()
+        sys.stderr.write(stats.line() + "\n")
+        for file in files:
+            if file not in (sys.stdin, sys.stdout):
+                file.close()
+        if checkpoint is not None:
+            checkpoint.close()
+        if owns_client:
+            client.close()
+    return 1 if stats.failed else 0
+
+
+def _open_input(path: str) -> IO[str]:
+    return sys.stdin if path == "-" else open(path, encoding="utf-8", newline="")
+
+
+def _open_output(path: str, mode: str = "w") -> IO[str]:
+    return sys.stdout if path == "-" else open(path, mode, encoding="utf-8", newline="")
+
+
+def _read_items(command: str, file: IO[str], path: str, input_format: Optional[str]) -> Iterator[Item]:
+    if command == "get":
+        return read_ids(file)
+    return read_requests(file, input_format or ("csv" if path.endswith(".csv") else "ndjson"))
+
+
+def _split(args: argparse.Namespace) -> int:
+    from acoriss_payment_gateway import sharding
+
+    input_file = _open_input(args.input)
+    try:
+        items = _read_items(args.job_command, input_file, args.input, args.input_format)
+        count = sharding.create_job(args.job, args.job_command, items, shards=args.shards)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+    sys.stderr.write(f"{count} records in {args.shards} shards\n")
+    return 0
+
+
+def _merge(args: argparse.Namespace) -> int:
+    from acoriss_payment_gateway import sharding
+
+    job = sharding.load_job(args.job)
+    output_file = _open_output(args.output)
+    failed = 0
+    try:
+        output = _Output(output_file, args.format, RESULT_FIELDS[job["command"]])
+
+        def write(result: Result) -> None:
+            nonlocal failed
+            failed += not result.ok
+            output.write(result)
+
+        count = sharding.merge(args.job, write, partial=args.partial)
+    finally:
+        if output_file is not sys.stdout:
+            output_file.close()
+    sys.stderr.write(f"{count} results, {failed} failed\n")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
@@ -1,18 +1,32 @@
 """Main client for the Acoriss Payment Gateway SDK."""
 
 import json
-from typing import Any, Dict, Optional
-
-import requests
-from requests.exceptions import RequestException
-
-from acoriss_payment_gateway.errors import APIError
+import os
+import threading
+import time
+from itertools import repeat
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Mapping, NoReturn, Optional, Sequence, Tuple, Union
+
+from acoriss_payment_gateway import forking
+from acoriss_payment_gateway.errors import APIError, ValidationError
+from acoriss_payment_gateway.limits import ConcurrencyLimiter, is_overload
+from acoriss_payment_gateway.metrics import ClientMetrics
+from acoriss_payment_gateway.routing import Endpoint, EndpointRouter
+from acoriss_payment_gateway.scheduling import PriorityScheduler
 from acoriss_payment_gateway.signer import HmacSha256Signer, SignerInterface
+from acoriss_payment_gateway.timeouts import AdaptiveTimeout
+from acoriss_payment_gateway.transport import RequestsTransport, Transport, TransportResponse
 from acoriss_payment_gateway.types import (
     Environment,
+    PaymentSessionRequest,
     PaymentSessionResponse,
+    Priority,
     RetrievePaymentResponse,
 )
+from acoriss_payment_gateway.validation import SessionValidator
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
 
 BASE_URLS: Dict[Environment, str] = {
     "sandbox": "https://sandbox.checkout.rdcard.net/api/v1",
@@ -20,6 +34,65 @@ BASE_URLS: Dict[Environment, str] = {
 }
 
 
+#: ``create_session`` arguments that control the call and are not payload fields
+_SESSION_OPTIONS = frozenset({"signature_override", "priority"})
+
+
+def _build_session_payload(
+    amount: int,
+    currency: str,
+    customer: Mapping[str, Any],
+    description: Optional[str] = None,
+    callback_url: Optional[str] = None,
+    cancel_url: Optional[str] = None,
+    success_url: Optional[str] = None,
+    transaction_id: Optional[str] = None,
+    services: Optional[list] = None,
+    service_id: Optional[str] = None,
+    **extra: Any,
+) -> Dict[str, Any]:
+    """Build the camelCase request payload for a payment session."""
+    payload: Dict[str, Any] = {
+        "amount": amount,
+        "currency": currency,
+        "customer": customer,
+        "serviceId": service_id,
+    }
+
+    if description is not None:
+        payload["description"] = description
+    if callback_url is not None:
+        payload["callbackUrl"] = callback_url
+    if cancel_url is not None:
+        payload["cancelUrl"] = cancel_url
+    if success_url is not None:
+        payload["successUrl"] = success_url
+    if transaction_id is not None:
+        payload["transactionId"] = transaction_id
+    if services is not None:
+        payload["services"] = services
+    if service_id is not None:
+        payload["serviceId"] = service_id
+
+    # Add any extra fields
+    payload.update(extra)
+    return payload
+
+
+def _serialize_payload(payload: Dict[str, Any]) -> str:
+    """Serialize a request payload to the compact JSON body that gets signed."""
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+
+
+def _encode_session(payload: Dict[str, Any], signer: SignerInterface) -> Tuple[str, str]:
+    """Serialize and sign a session payload.
+
+    Kept at module level so it can be pickled into a process pool.
+    """
+    raw_body = _serialize_payload(payload)
+    return raw_body, signer.sign(raw_body)
+
+
 class PaymentGatewayClient:
     """Client for interacting with the Acoriss Payment Gateway API."""
 
@@ -28,9 +101,16 @@ class PaymentGatewayClient:
         api_key: str,
         api_secret: Optional[str] = None,
         environment: Environment = "sandbox",
-        base_url: Optional[str] = None,
+        base_url: Optional[Union[str, Sequence[str]]] = None,
         signer: Optional[SignerInterface] = None,
-        timeout: float = 15.0,
+        timeout: Union[float, AdaptiveTimeout] = 15.0,
+        transport: Optional[Transport] = None,
+        validate: Union[bool, SessionValidator] = False,
+        limiter: Optional[ConcurrencyLimiter] = None,
+        warmup_after_fork: int = 0,
+        router: Optional[EndpointRouter] = None,
+        scheduler: Optional[PriorityScheduler] = None,
+        priority: Optional[Priority] = None,
     ) -> None:
         """Initialize the Payment Gateway client.
 
@@ -38,16 +118,49 @@ class PaymentGatewayClient:
             api_key: API key for authentication
             api_secret: Optional API secret for HMAC-SHA256 signing
             environment: Environment to use ("sandbox" or "live")
-            base_url: Optional override for base URL (ignores environment if provided)
+            base_url: Optional override for base URL (ignores environment if provided);
+                a list of equivalent URLs routes each request to the fastest healthy one
             signer: Optional custom signer implementation
-            timeout: Request timeout in seconds (default: 15.0)
+            timeout: Request timeout in seconds (default: 15.0), or an
+                ``AdaptiveTimeout`` deriving each call's timeout from recent latency
+            transport: Optional HTTP transport (default: ``RequestsTransport()``)
+            validate: Check session requests locally before signing them; pass a
+                ``SessionValidator`` to customize the rules (default: False)
+            limiter: Optional adaptive cap on requests in flight, shared by
+                every thread using this client
+            warmup_after_fork: Connections to open in the background in each
+                process forked from this one (default: 0, connect on first use)
+            router: Optional configured router across several endpoints
+                (overrides ``base_url`` and ``environment``)
+            scheduler: Optional priority scheduler admitting requests to the
+                transport; share it (and the transport) between clients to
+                give each its own default priority
+            priority: Default priority of this client's requests (default:
+                "high" for ``create_session``, "normal" for ``get_payment``,
+                "low" for ``create_sessions`` and ``get_payments``)
 
         Raises:
             ValueError: If neither api_secret nor signer is provided
         """
         self.api_key = api_key
-        self.base_url = base_url or BASE_URLS[environment]
-        self.timeout = timeout
+        if router is None and base_url is not None and not isinstance(base_url, str):
+            router = EndpointRouter(base_url)
+        self.router = router
+        if router is not None:
+            self.base_url = router.endpoints[0].url
+        else:
+            self.base_url = base_url if isinstance(base_url, str) and base_url else BASE_URLS[environment]
+        self.adaptive_timeout = timeout if isinstance(timeout, AdaptiveTimeout) else None
+        self.timeout = timeout.max_timeout if isinstance(timeout, AdaptiveTimeout) else timeout
+        self.transport = transport or RequestsTransport()
+        self.metrics = ClientMetrics()
+        self.limiter = limiter
+        self.scheduler = scheduler
+        self.priority = priority
+        self.warmup_after_fork = warmup_after_fork
+        self.validator: Optional[SessionValidator] = (
+            validate if isinstance(validate, SessionValidator) else SessionValidator() if validate else None
+        )
 
         # Set up signer
         if signer:
@@ -56,6 +169,19 @@ class PaymentGatewayClient:
             self.signer = HmacSha256Signer(api_secret)
         else:
             self.signer = None
+        forking.register(self)
+
+    def _after_fork(self) -> None:
+        # The transport, limiter and caches reset themselves; each process counts its own traffic
+        self.metrics = ClientMetrics()
+        if self.warmup_after_fork:
+            threading.Thread(target=self._warmup_after_fork, name="acoriss-fork-warmup", daemon=True).start()
+
+    def _warmup_after_fork(self) -> None:
+        try:
+            self.warmup(self.warmup_after_fork)
+        except APIError:
+            pass  # the first requests connect as usual
 
     def create_session(
         self,
@@ -70,6 +196,7 @@ class PaymentGatewayClient:
         services: Optional[list] = None,
         service_id: Optional[str] = None,
         signature_override: Optional[str] = None,
+        priority: Optional[Priority] = None,
         **extra: Any,
     ) -> PaymentSessionResponse:
         """Create a payment session.
@@ -86,6 +213,7 @@ class PaymentGatewayClient:
             services: Optional list of service items
             service_id: Optional categorization of the payment
             signature_override: Optional pre-computed signature
+            priority: Scheduling priority (default: the client's, else "high")
             **extra: Additional fields for forward compatibility
 
         Returns:
@@ -93,34 +221,40 @@ class PaymentGatewayClient:
 
         Raises:
             APIError: If the request fails
+            ValidationError: If validation is enabled and the request is invalid
             ValueError: If no signature is available
         """
-        payload: Dict[str, Any] = {
-            "amount": amount,
-            "currency": currency,
-            "customer": customer,
-            "serviceId": service_id,
-        }
+        if self.validator is not None:
+            self.validator.validate(
+                {
+                    "amount": amount,
+                    "currency": currency,
+                    "customer": customer,
+                    "description": description,
+                    "callback_url": callback_url,
+                    "cancel_url": cancel_url,
+                    "success_url": success_url,
+                    "transaction_id": transaction_id,
+                    "services": services,
+                    "service_id": service_id,
+                }
+            )
 
-        if description is not None:
-            payload["description"] = description
-        if callback_url is not None:
-            payload["callbackUrl"] = callback_url
-        if cancel_url is not None:
-            payload["cancelUrl"] = cancel_url
-        if success_url is not None:
-            payload["successUrl"] = success_url
-        if transaction_id is not None:
-            payload["transactionId"] = transaction_id
-        if services is not None:
-            payload["services"] = services
-        if service_id is not None:
-            payload["serviceId"] = service_id
-
-        # Add any extra fields
-        payload.update(extra)
-
-        raw_body = json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+        payload = _build_session_payload(
+            amount,
+            currency,
+            customer,
+            description=description,
+            callback_url=callback_url,
+            cancel_url=cancel_url,
+            success_url=success_url,
+            transaction_id=transaction_id,
+            services=services,
+            service_id=service_id,
+            **extra,
+        )
+
+        raw_body = _serialize_payload(payload)
         signature = signature_override or (self.signer.sign(raw_body) if self.signer else None)
 
         if not signature:
@@ -129,38 +263,145 @@ class PaymentGatewayClient:
                 "a custom signer, or pass signature_override."
             )
 
+        return self._send_session(raw_body, signature, priority or self.priority or "high")
+
+    def create_sessions(
+        self,
+        sessions: Iterable[PaymentSessionRequest],
+        executor: Optional["Executor"] = None,
+        max_workers: int = 1,
+        return_exceptions: bool = False,
+        priority: Optional[Priority] = None,
+    ) -> List[Union[PaymentSessionResponse, APIError]]:
+        """Create several payment sessions.
+
+        Request bodies are built, serialized and signed first, optionally on
+        ``executor`` (e.g. a ``ProcessPoolExecutor`` so large ``services`` lists
+        are signed on all cores). Sending always happens in this process.
+
+        Args:
+            sessions: Session requests using the payload keys of ``create_session``
+            executor: Optional executor used to serialize and sign request bodies
+            max_workers: Number of threads used to send requests (default: 1)
+            return_exceptions: Return ``APIError`` instances in place of failed
+                sessions instead of raising the first error
+            priority: Scheduling priority (default: the client's, else "low")
+
+        Returns:
+            Session responses (or errors) in the same order as ``sessions``
+
+        Raises:
+            APIError: If a request fails and ``return_exceptions`` is False
+            ValidationError: If validation is enabled and any session is invalid
+                (raised before anything is sent)
+            ValueError: If the client has no signer, or a session holds
+                ``signature_override`` or ``priority``
+        """
+        prepared = self._prepare_sessions(sessions, executor)
+        priority = priority or self.priority or "low"
+
+        def send(item: Tuple[str, str]) -> Union[PaymentSessionResponse, APIError]:
+            try:
+                return self._send_session(*item, priority)
+            except APIError as e:
+                if not return_exceptions:
+                    raise
+                return e
+
+        if max_workers <= 1:
+            return [send(item) for item in prepared]
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(send, prepared))
+
+    def _prepare_sessions(
+        self,
+        sessions: Iterable[PaymentSessionRequest],
+        executor: Optional["Executor"] = None,
+    ) -> List[Tuple[str, str]]:
+        """Build, serialize and sign session request bodies.
+
+        Args:
+            sessions: Session requests using the payload keys of ``create_session``
+            executor: Optional executor to run the CPU-bound work on
+
+        Returns:
+            ``(raw_body, signature)`` pairs in input order
+
+        Raises:
+            ValidationError: If validation is enabled and any session is invalid
+            ValueError: If the client has no signer, or a session holds a key
+                that is not a payload field (e.g. ``priority``)
+        """
+        if not self.signer:
+            raise ValueError("No signer available. Provide api_secret or a custom signer at client init.")
+
+        sessions = list(sessions)
+        for i, session in enumerate(sessions):
+            # Per-call options would otherwise be sent, and signed, as extra payload fields
+            options = sorted(_SESSION_OPTIONS.intersection(session))
+            if options:
+                raise ValueError(f"sessions[{i}] has keys that are not payload fields: {', '.join(options)}")
+
+        if self.validator is not None:
+            errors = [
+                error
+                for i, session in enumerate(sessions)
+                for error in self.validator.errors(session, f"sessions[{i}]")
+            ]
+            if errors:
+                raise ValidationError(errors)
+
+        payloads = [_build_session_payload(**session) for session in sessions]
+        if executor is None:
+            return [_encode_session(payload, self.signer) for payload in payloads]
+
+        # Ship payloads in chunks so process pools don't pay one IPC round trip per session
+        chunksize = max(1, len(payloads) // (4 * (os.cpu_count() or 1)))
+        return list(executor.map(_encode_session, payloads, repeat(self.signer), chunksize=chunksize))
+
+    def _send_session(self, raw_body: str, signature: str, priority: Priority = "high") -> PaymentSessionResponse:
+        """Send a serialized and signed session request.
+
+        Args:
+            raw_body: JSON request body
+            signature: Signature of ``raw_body``
+            priority: Scheduling priority
+
+        Returns:
+            Payment session response with checkout URL
+
+        Raises:
+            APIError: If the request fails
+        """
+        return self._send_session_with_status(raw_body, signature, priority)[1]
+
+    def _send_session_with_status(
+        self, raw_body: str, signature: str, priority: Priority = "high"
+    ) -> Tuple[int, PaymentSessionResponse]:
+        """Send a serialized and signed session request, returning the HTTP status with the response."""
         headers = {
             "Content-Type": "application/json",
             "X-API-KEY": self.api_key,
             "X-SIGNATURE": signature,
         }
 
-        try:
-            response = requests.post(
-                f"{self.base_url}/sessions",
-                data=raw_body,
-                headers=headers,
-                timeout=self.timeout,
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            # Convert snake_case to camelCase for consistency with API
-            return self._convert_keys_to_snake_case(data)  # type: ignore
-        except RequestException as e:
-            self._raise_api_error(e)
-            raise  # This line is unreachable but makes mypy happy
+        return self._request_with_status("POST", "/sessions", headers, body=raw_body, priority=priority)
 
     def get_payment(
         self,
         payment_id: str,
         signature_override: Optional[str] = None,
+        priority: Optional[Priority] = None,
     ) -> RetrievePaymentResponse:
         """Retrieve a payment by ID.
 
         Args:
             payment_id: The payment ID (e.g., 'pay_1234567890')
             signature_override: Optional pre-computed signature
+            priority: Scheduling priority (default: the client's, else "normal")
 
         Returns:
             Payment details including status, services, and customer info
@@ -182,20 +423,220 @@ class PaymentGatewayClient:
             "X-SIGNATURE": signature,
         }
 
+        priority = priority or self.priority or "normal"
+        return self._request("GET", f"/sessions/{payment_id}", headers, priority=priority)  # type: ignore[no-any-return]
+
+    def get_payments(
+        self,
+        payment_ids: Iterable[str],
+        max_workers: int = 8,
+        return_exceptions: bool = False,
+        priority: Optional[Priority] = None,
+    ) -> List[Union[RetrievePaymentResponse, APIError]]:
+        """Retrieve several payments concurrently.
+
+        Args:
+            payment_ids: Payment IDs to look up
+            max_workers: Number of threads used to send requests (default: 8)
+            return_exceptions: Return ``APIError`` instances in place of failed
+                lookups (e.g. 404 for unknown IDs) instead of raising the first error
+            priority: Scheduling priority (default: the client's, else "low")
+
+        Returns:
+            Payments (or errors) in the same order as ``payment_ids``
+
+        Raises:
+            APIError: If a lookup fails and ``return_exceptions`` is False
+            ValueError: If the client has no signer
+        """
+        if not self.signer:
+            raise ValueError("No signer available. Provide api_secret or a custom signer at client init.")
+
+        priority = priority or self.priority or "low"
+
+        def fetch(payment_id: str) -> Union[RetrievePaymentResponse, APIError]:
+            try:
+                return self.get_payment(payment_id, priority=priority)
+            except APIError as e:
+                if not return_exceptions:
+                    raise
+                return e
+
+        payment_ids = list(payment_ids)
+        if max_workers <= 1 or len(payment_ids) <= 1:
+            return [fetch(payment_id) for payment_id in payment_ids]
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(payment_ids))) as pool:
+            return list(pool.map(fetch, payment_ids))
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        headers: Dict[str, str],
+        body: Optional[str] = None,
+        priority: Priority = "normal",
+    ) -> Any:
+        """Send a request through the transport and decode its JSON body.
+
+        Args:
+            method: HTTP method
+            path: Path relative to the base URL
+            headers: Request headers
+            body: Optional serialized request body
+            priority: Scheduling priority, if the client has a scheduler
+
+        Returns:
+            The response body with keys converted to snake_case
+
+        Raises:
+            APIError: If the request fails or returns an error status
+        """
+        return self._request_with_status(method, path, headers, body, priority)[1]
+
+    def _request_with_status(
+        self,
+        method: str,
+        path: str,
+        headers: Dict[str, str],
+        body: Optional[str] = None,
+        priority: Priority = "normal",
+    ) -> Tuple[int, Any]:
+        """Like ``_request``, also returning the HTTP status of the response."""
+        scheduler = self.scheduler
+        if scheduler is not None:
+            scheduler.acquire(priority)
         try:
-            response = requests.get(
-                f"{self.base_url}/sessions/{payment_id}",
+            if self.router is None:
+                response = self._send(method, self.base_url, path, headers, body)
+            else:
+                response = self._send_routed(self.router, method, path, headers, body)
+        finally:
+            if scheduler is not None:
+                scheduler.release(priority)
+
+        if response.status >= 400:
+            self._raise_api_error(response)
+
+        try:
+            data = response.json()
+        except ValueError as e:
+            raise APIError(
+                message=f"Invalid JSON in response: {e}",
+                status=response.status,
+                headers=response.headers,
+                body=response.content,
+            ) from e
+
+        # Convert camelCase to snake_case
+        return response.status, self._convert_keys_to_snake_case(data)
+
+    def _send(
+        self, method: str, base_url: str, path: str, headers: Dict[str, str], body: Optional[str]
+    ) -> TransportResponse:
+        """Send one request through the limiter and transport, recording metrics."""
+        limiter = self.limiter
+        adaptive = self.adaptive_timeout
+        timeout = adaptive.timeout(base_url) if adaptive is not None else self.timeout
+        if limiter is not None:
+            limiter.acquire()
+        start = time.perf_counter()
+        try:
+            response = self.transport.request(
+                method,
+                f"{base_url}{path}",
                 headers=headers,
-                timeout=self.timeout,
+                body=body,
+                timeout=timeout,
             )
-            response.raise_for_status()
-            data = response.json()
+        except APIError:
+            elapsed = time.perf_counter() - start
+            if limiter is not None:
+                limiter.release(elapsed, dropped=True)
+            if adaptive is not None:
+                adaptive.record(base_url, elapsed, timeout, responded=False)
+            self.metrics.record_response(None)
+            raise
+        except BaseException:
+            if limiter is not None:
+                limiter.release(time.perf_counter() - start)
+            raise
+        elapsed = time.perf_counter() - start
+        if limiter is not None:
+            limiter.release(elapsed, dropped=is_overload(response.status))
+        if adaptive is not None:
+            adaptive.record(base_url, elapsed, timeout, responded=True)
+        self.metrics.record_response(response.status, response.wire_size, response.decoded_size)
+        return response
+
+    def _send_routed(
+        self, router: EndpointRouter, method: str, path: str, headers: Dict[str, str], body: Optional[str]
+    ) -> TransportResponse:
+        """Send a request to the endpoint chosen by ``router``, failing lookups over to others."""
+        # Only lookups are retried elsewhere: a session create that got no answer may still have been processed
+        attempts = min(len(router.endpoints), 1 + router.failover) if method == "GET" else 1
+        tried: List[Endpoint] = []
+        while True:
+            endpoint = router.acquire(exclude=tried)
+            tried.append(endpoint)
+            start = time.perf_counter()
+            try:
+                response = self._send(method, endpoint.url, path, headers, body)
+            except APIError:
+                router.release(endpoint, time.perf_counter() - start, failed=True)
+                if len(tried) >= attempts:
+                    raise
+                continue
+            except BaseException:
+                router.release(endpoint, time.perf_counter() - start, failed=None)
+                raise
+            failed = is_overload(response.status)
+            router.release(endpoint, time.perf_counter() - start, failed=failed)
+            if not failed or len(tried) >= attempts:
+                return response
+
+    def warmup(self, connections: int = 1) -> int:
+        """Resolve the gateway host and pre-open pooled connections.
+
+        Call after start-up (e.g. before a worker starts taking traffic) so the
+        first requests do not pay for DNS, TCP and TLS setup.
+
+        Args:
+            connections: Number of connections to open (capped by the pool size)
+
+        Returns:
+            Number of connections opened; 0 if the transport does not pool
+
+        Raises:
+            APIError: If the gateway cannot be reached (with several endpoints:
+                if none can)
+        """
+        if self.router is None:
+            return self.transport.warmup(self.base_url, connections)
+
+        opened = reached = 0
+        error: Optional[APIError] = None
+        for endpoint in self.router.endpoints:
+            try:
+                opened += self.transport.warmup(endpoint.url, connections)
+                reached += 1
+            except APIError as e:
+                error = e
+        if error is not None and not reached:
+            raise error
+        return opened
 
-            # Convert camelCase to snake_case
-            return self._convert_keys_to_snake_case(data)  # type: ignore
-        except RequestException as e:
-            self._raise_api_error(e)
-            raise  # This line is unreachable but makes mypy happy
+    def close(self) -> None:
+        """Release connections held by the transport."""
+        self.transport.close()
+
+    def __enter__(self) -> "PaymentGatewayClient":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
 
     def _convert_keys_to_snake_case(self, obj: Any) -> Any:
         """Convert camelCase keys to snake_case recursively."""
@@ -217,28 +658,14 @@ class PaymentGatewayClient:
                 result.append(char.lower())
         return "".join(result)
 
-    def _raise_api_error(self, exc: RequestException) -> None:
-        """Convert a requests exception to an APIError and raise it.
+    def _raise_api_error(self, response: TransportResponse) -> NoReturn:
+        """Convert an error response to an APIError and raise it.
 
         Args:
-            exc: The requests exception to convert
+            response: The error response to convert
 
         Raises:
             APIError: Always raises
         """
-        if exc.response is not None:
-            try:
-                data = exc.response.json()
-                message = data.get("message", str(exc))
-            except (ValueError, KeyError):
-                data = exc.response.text
-                message = str(exc)
-
-            raise APIError(
-                message=message,
-                status=exc.response.status_code,
-                data=data,
-                headers=dict(exc.response.headers),
-            ) from exc
-        else:
-            raise APIError(message=str(exc)) from exc
+        # Body and headers are decoded lazily, only if the caller looks at them
+        raise APIError(status=response.status, headers=response.headers, body=response.content)
@@ -0,0 +1,189 @@
+"""Response compression negotiation and streamed decompression.
+
+gzip and deflate use the standard library. Brotli (``brotli`` or
+``brotlicffi``) and zstd (``zstandard``) are used when installed.
+"""
+
+import zlib
+from typing import Any, Callable, Iterable, Optional, Sequence, Tuple, Union
+
+from acoriss_payment_gateway.optional import optional_module
+
+# Size of the raw chunks read from the socket while decoding
+CHUNK_SIZE = 16 * 1024
+
+
+class DecompressionError(ValueError):
+    """Raised when a response body cannot be decoded or is too large."""
+
+
+def _brotli_module() -> Any:
+    return optional_module("brotli", "brotlicffi")
+
+
+def _zstd_module() -> Any:
+    return optional_module("zstandard")
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Return the content encodings this installation can decode, best first."""
+    encodings = []
+    if _zstd_module() is not None:
+        encodings.append("zstd")
+    if _brotli_module() is not None:
+        encodings.append("br")
+    encodings.extend(["gzip", "deflate"])
+    return tuple(encodings)
+
+
+def accept_encoding_header(encodings: Union[str, Sequence[str]] = "auto") -> str:
+    """Build an ``Accept-Encoding`` header value.
+
+    Args:
+        encodings: Encodings to offer, or ``"auto"`` for every available one
+
+    Returns:
+        The header value
+
+    Raises:
+        ValueError: If an encoding is not supported by this installation
+    """
+    if encodings == "auto":
+        return ", ".join(available_encodings())
+    if isinstance(encodings, str):
+        encodings = [encodings]
+    unsupported = [e for e in encodings if e not in available_encodings()]
+    if unsupported:
+        raise ValueError(f"Unsupported content encoding(s): {', '.join(unsupported)}")
+    return ", ".join(encodings)
+
+
+class _LimitReached(Exception):
+    """Raised by :class:`_LimitedSink` to stop a zstd stream writer."""
+
+
+class _LimitedSink:
+    """Collects zstd output, stopping once it holds more than ``limit`` bytes."""
+
+    def __init__(self) -> None:
+        self.out = bytearray()
+        self.limit = 0
+
+    def write(self, data: bytes) -> int:
+        self.out += data
+        if self.limit and len(self.out) > self.limit:
+            raise _LimitReached
+        return len(data)
+
+
+def _decompressor(encoding: str) -> Callable[[bytes, int], bytes]:
+    """Return ``decompress(chunk, limit)`` for an encoding.
+
+    ``limit`` is the number of output bytes still allowed (0: no limit).
+    Output stops shortly after going over it, so a small chunk cannot expand
+    to a large body in memory before the caller's size check.
+    """
+    if encoding in ("gzip", "x-gzip", "deflate"):
+        # 47 auto-detects gzip/zlib headers; raw deflate is retried below
+        state = {"obj": zlib.decompressobj(47)}
+
+        def decompress_zlib(chunk: bytes, limit: int) -> bytes:
+            try:
+                out = state["obj"].decompress(chunk, limit)
+            except zlib.error:
+                if encoding != "deflate":
+                    raise
+                state["obj"] = zlib.decompressobj(-zlib.MAX_WBITS)
+                out = state["obj"].decompress(chunk, limit)
+            if state["obj"].unconsumed_tail:
+                # Output was cut at ``limit``: one more byte proves the body is too large
+                out += state["obj"].decompress(state["obj"].unconsumed_tail, 1)
+            return out
+
+        return decompress_zlib
+
+    if encoding == "br":
+        brotli = _brotli_module()
+        if brotli is not None:
+            decompressor = brotli.Decompressor()
+            if not hasattr(decompressor, "can_accept_more_data"):
+                # brotlicffi and brotli < 1.2 cannot bound their output
+                return lambda chunk, limit: decompressor.process(chunk)
+
+            def decompress_br(chunk: bytes, limit: int) -> bytes:
+                if not limit:
+                    return decompressor.process(chunk)  # type: ignore[no-any-return]
+                out: bytes = decompressor.process(chunk, output_buffer_limit=limit + 1)
+                # Input is held back once the output buffer is full; drain it up to the limit
+                while len(out) <= limit and not decompressor.can_accept_more_data():
+                    more = decompressor.process(b"", output_buffer_limit=limit + 1 - len(out))
+                    if not more:
+                        break
+                    out += more
+                return out
+
+            return decompress_br
+
+    if encoding == "zstd":
+        zstandard = _zstd_module()
+        if zstandard is not None:
+            sink = _LimitedSink()
+            writer = zstandard.ZstdDecompressor().stream_writer(sink)
+
+            def decompress_zstd(chunk: bytes, limit: int) -> bytes:
+                # The writer passes output to the sink a block at a time, so it
+                # stops within one block (128 KB) of the limit
+                sink.limit = limit
+                try:
+                    writer.write(chunk)
+                except _LimitReached:
+                    pass
+                out = bytes(sink.out)
+                sink.out.clear()
+                return out
+
+            return decompress_zstd
+
+    raise DecompressionError(f"Unsupported content encoding: {encoding}")
+
+
+def read_body(
+    chunks: Iterable[bytes],
+    content_encoding: Optional[str] = None,
+    max_size: Optional[int] = None,
+) -> Tuple[bytes, int]:
+    """Read and decode a response body from raw wire chunks.
+
+    Args:
+        chunks: Raw (still encoded) body chunks as received
+        content_encoding: Value of the ``Content-Encoding`` header
+        max_size: Optional limit on the decoded body size in bytes
+
+    Returns:
+        ``(decoded_body, wire_bytes)``
+
+    Raises:
+        DecompressionError: If the encoding is unsupported, the data is corrupt,
+            or the decoded body exceeds ``max_size``
+    """
+    encoding = (content_encoding or "identity").strip().lower()
+    decompress = None if encoding == "identity" else _decompressor(encoding)
+    limit = max_size if max_size is not None else -1
+    body = bytearray()
+    wire = 0
+
+    try:
+        for chunk in chunks:
+            wire += len(chunk)
+            if decompress is None:
+                body += chunk
+            else:
+                body += decompress(chunk, max(limit - len(body), 1) if limit >= 0 else 0)
+            if 0 <= limit < len(body):
+                raise DecompressionError(f"Response body exceeds max_response_size ({max_size} bytes)")
+    except DecompressionError:
+        raise
+    except Exception as e:
+        raise DecompressionError(f"Could not decode {encoding} response body: {e}") from e
+
+    return bytes(body), wire
@@ -0,0 +1,162 @@
+"""In-process DNS cache with background refresh."""
+
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from acoriss_payment_gateway import forking
+from acoriss_payment_gateway.sync import StripedLock
+
+Resolver = Callable[..., List[Tuple[Any, ...]]]
+
+
+class _Entry(NamedTuple):
+    addresses: List[str]
+    expires_at: float
+
+
+class DNSCache:
+    """Cache of host name resolutions.
+
+    ``getaddrinfo`` does not expose record TTLs, so entries live for a fixed
+    ``ttl``. With ``refresh=True`` a background thread re-resolves hosts
+    shortly before their entries expire, so lookups on the request path are
+    dictionary hits. When a refresh fails, the previous addresses keep being
+    served for up to ``stale_ttl`` seconds. Concurrent misses for the same
+    host wait for a single resolution instead of each calling the resolver.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 60.0,
+        stale_ttl: float = 300.0,
+        refresh: bool = True,
+        resolver: Resolver = socket.getaddrinfo,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            ttl: Seconds a resolution is considered fresh
+            stale_ttl: Seconds past expiry a resolution may still be served
+                when re-resolving fails
+            refresh: Refresh entries in a background thread before they expire
+            resolver: ``getaddrinfo``-compatible function
+        """
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.refresh = refresh
+        self._resolver = resolver
+        self._entries: Dict[Tuple[str, int], _Entry] = {}
+        self._lock = threading.Lock()
+        self._resolving = StripedLock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        forking.register(self)
+
+    def _after_fork(self) -> None:
+        # Cached entries stay valid; the refresh thread did not survive the fork
+        self._lock = threading.Lock()
+        self._resolving = StripedLock()
+        self._stop = threading.Event()
+        self._thread = None
+        if self.refresh and self._entries:
+            self.start()
+
+    def resolve(self, host: str, port: int) -> str:
+        """Return an IP address for ``host``.
+
+        Args:
+            host: Host name
+            port: Port number
+
+        Returns:
+            The first resolved address
+
+        Raises:
+            OSError: If the host cannot be resolved and no stale entry is usable
+        """
+        return self.resolve_all(host, port)[0]
+
+    def resolve_all(self, host: str, port: int) -> List[str]:
+        """Return all IP addresses for ``host``, resolving on a miss.
+
+        Args:
+            host: Host name
+            port: Port number
+
+        Returns:
+            Resolved addresses in resolver order
+
+        Raises:
+            OSError: If the host cannot be resolved and no stale entry is usable
+        """
+        key = (host, port)
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() < entry.expires_at:
+            return entry.addresses
+
+        with self._resolving.for_key(key):
+            # Another thread may have resolved the host while this one waited
+            entry = self._entries.get(key)
+            now = time.monotonic()
+            if entry is not None and now < entry.expires_at:
+                return entry.addresses
+            try:
+                return self._update(key)
+            except OSError:
+                if entry is not None and now < entry.expires_at + self.stale_ttl:
+                    return entry.addresses
+                raise
+
+    def _update(self, key: Tuple[str, int]) -> List[str]:
+        """Resolve ``key`` and store the result."""
+        infos = self._resolver(key[0], key[1], 0, socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(str(info[4][0]) for info in infos))
+        if not addresses:
+            raise OSError(f"No addresses found for {key[0]}")
+        with self._lock:
+            self._entries[key] = _Entry(addresses, time.monotonic() + self.ttl)
+        if self.refresh:
+            self.start()
+        return addresses
+
+    def invalidate(self, host: Optional[str] = None) -> None:
+        """Drop cached entries.
+
+        Args:
+            host: Host to drop; all hosts when omitted
+        """
+        with self._lock:
+            for key in list(self._entries):
+                if host is None or key[0] == host:
+                    del self._entries[key]
+
+    def start(self) -> None:
+        """Start the background refresh thread if it is not running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="acoriss-dns-refresh", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        interval = max(self.ttl / 4, 0.01)
+        while not self._stop.wait(interval):
+            with self._lock:
+                keys = list(self._entries.items())
+            for key, entry in keys:
+                if entry.expires_at - time.monotonic() <= interval * 2:
+                    try:
+                        self._update(key)
+                    except OSError:
+                        pass
+
+    def stop(self) -> None:
+        """Stop the background refresh thread."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self._thread = None
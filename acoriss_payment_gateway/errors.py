@@ -1,31 +1,122 @@
 """Error classes for the Acoriss Payment Gateway SDK."""
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Mapping, Optional
+
+# Statuses worth retrying: timeouts, rate limiting and server-side failures
+_RETRYABLE_STATUSES = frozenset({408, 425, 429})
+
+# Longest data/headers representation included in repr()
+_REPR_LIMIT = 200
+
+
+def _short_repr(value: Any) -> str:
+    text = repr(value)
+    return text if len(text) <= _REPR_LIMIT else f"{text[:_REPR_LIMIT]}...<{len(text)} chars>"
 
 
 class APIError(Exception):
-    """Exception raised when API requests fail."""
+    """Exception raised when API requests fail.
+
+    Errors built from a gateway response keep the raw body bytes (up to
+    ``max_body_size``) and the transport's header mapping; ``data``,
+    ``message``, ``code`` and ``headers`` are decoded on first access, so
+    raising and catching an error stays cheap when only ``status`` or
+    ``retryable`` is inspected.
+    """
+
+    #: Response bytes kept on the error; longer bodies are truncated
+    max_body_size = 8 * 1024
 
     def __init__(
         self,
-        message: str,
+        message: Optional[str] = None,
         status: Optional[int] = None,
         data: Optional[Any] = None,
-        headers: Optional[Dict[str, str]] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        body: Optional[bytes] = None,
+        code: Optional[str] = None,
     ) -> None:
         """Initialize APIError.
 
         Args:
-            message: Error message
+            message: Error message (default: the body's ``message`` field or
+                "HTTP <status> error")
             status: HTTP status code
-            data: Response data
-            headers: Response headers
+            data: Response data (default: decoded from ``body`` on access)
+            headers: Response headers, converted to a dict on access
+            body: Raw response body
+            code: Gateway error code (default: the body's ``code`` field)
         """
         super().__init__(message)
-        self.message = message
         self.status = status
-        self.data = data
-        self.headers = headers
+        self.body = body[: self.max_body_size] if body is not None else None
+        self.body_truncated = body is not None and len(body) > self.max_body_size
+        self._message = message
+        self._data = data
+        self._data_loaded = data is not None or body is None
+        self._headers = headers
+        self._code = code
+
+    @property
+    def data(self) -> Optional[Any]:
+        """Response data: parsed JSON, or text if the body is not JSON."""
+        if not self._data_loaded:
+            import json
+
+            assert self.body is not None
+            try:
+                self._data = json.loads(self.body)
+            except ValueError:
+                self._data = self.body.decode("utf-8", errors="replace")
+            self._data_loaded = True
+        return self._data
+
+    @data.setter
+    def data(self, value: Optional[Any]) -> None:
+        self._data = value
+        self._data_loaded = True
+
+    @property
+    def message(self) -> str:
+        """Error message."""
+        if self._message is None:
+            data = self.data
+            message = data.get("message") if isinstance(data, dict) else None
+            self._message = str(message) if message is not None else f"HTTP {self.status} error"
+        return self._message
+
+    @message.setter
+    def message(self, value: str) -> None:
+        self._message = value
+
+    @property
+    def headers(self) -> Optional[Dict[str, str]]:
+        """Response headers."""
+        if self._headers is not None and type(self._headers) is not dict:
+            self._headers = dict(self._headers)
+        return self._headers
+
+    @headers.setter
+    def headers(self, value: Optional[Mapping[str, str]]) -> None:
+        self._headers = value
+
+    @property
+    def code(self) -> Optional[str]:
+        """Gateway error code from the response body, if any."""
+        if self._code is None and self.body is not None:
+            data = self.data
+            code = data.get("code") if isinstance(data, dict) else None
+            self._code = str(code) if code is not None else None
+        return self._code
+
+    @property
+    def retryable(self) -> bool:
+        """Whether retrying the request may succeed.
+
+        True for network failures (no status), 408, 425, 429 and 5xx responses.
+        """
+        status = self.status
+        return status is None or status >= 500 or status in _RETRYABLE_STATUSES
 
     def __str__(self) -> str:
         """Return string representation of the error."""
@@ -36,5 +127,19 @@ class APIError(Exception):
     def __repr__(self) -> str:
         """Return detailed representation of the error."""
         return (
-            f"APIError(message={self.message!r}, status={self.status!r}, data={self.data!r}, headers={self.headers!r})"
+            f"APIError(message={self.message!r}, status={self.status!r}, "
+            f"data={_short_repr(self.data)}, headers={_short_repr(self.headers)})"
         )
+
+
+class ValidationError(ValueError):
+    """Exception raised when a request payload fails client-side validation."""
+
+    def __init__(self, errors: List[str]) -> None:
+        """Initialize ValidationError.
+
+        Args:
+            errors: One message per problem, prefixed with the field path
+        """
+        super().__init__("Invalid payload: " + "; ".join(errors))
+        self.errors = errors
@@ -0,0 +1,466 @@
+"""Columnar export of payment records for analytics.
+
+Payments (as returned by ``get_payment``) are appended to per-column buffers
+and emitted in batches of at most ``chunk_size`` rows, with ``services``
+flattened into a second table. Batches convert to NumPy arrays or Arrow
+record batches and stream to CSV, NDJSON or Parquet writers, so memory stays
+bounded by the chunk size however many payments are exported.
+
+NumPy and pyarrow are optional (``pip install acoriss-payment-gateway[analytics]``);
+CSV and NDJSON export and the aggregations work without them.
+"""
+
+import csv
+import json
+from abc import ABC, abstractmethod
+from array import array
+from typing import IO, Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+from acoriss_payment_gateway.optional import optional_module
+
+# Column name -> kind: "int" (int64), "bool" or "str" (nullable string)
+PAYMENT_SCHEMA: Dict[str, str] = {
+    "id": "str",
+    "transaction_id": "str",
+    "amount": "int",
+    "currency": "str",
+    "status": "str",
+    "expired": "bool",
+    "service_id": "str",
+    "created_at": "str",
+    "day": "str",
+    "description": "str",
+    "customer_email": "str",
+    "customer_phone": "str",
+    "service_count": "int",
+}
+
+SERVICE_SCHEMA: Dict[str, str] = {
+    "payment_id": "str",
+    "id": "str",
+    "name": "str",
+    "description": "str",
+    "quantity": "int",
+    "price": "int",
+    "total": "int",
+    "currency": "str",
+    "service_id": "str",
+    "created_at": "str",
+    "day": "str",
+}
+
+_ARRAY_CODES = {"int": "q", "bool": "b"}
+
+
+def _require(name: str) -> Any:
+    module = optional_module(name)
+    if module is None:
+        raise ImportError(f"{name} is required for this export; install acoriss-payment-gateway[analytics]")
+    return module
+
+
+class ColumnBatch:
+    """A chunk of rows stored column by column.
+
+    Integer and boolean columns are ``array.array`` buffers, string columns
+    are lists of ``str`` or None.
+    """
+
+    def __init__(self, schema: Mapping[str, str], columns: Mapping[str, Sequence[Any]]) -> None:
+        """Initialize the batch.
+
+        Args:
+            schema: Column name to kind ("int", "bool" or "str")
+            columns: Column name to values, all of the same length
+        """
+        self.schema = dict(schema)
+        self.columns = dict(columns)
+
+    @property
+    def num_rows(self) -> int:
+        """Number of rows in the batch."""
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    def rows(self) -> Iterator[Dict[str, Any]]:
+        """Yield the batch row by row as dicts (booleans as ``bool``)."""
+        names = list(self.columns)
+        values = [
+            map(bool, self.columns[name]) if self.schema[name] == "bool" else self.columns[name] for name in names
+        ]
+        for row in zip(*values):
+            yield dict(zip(names, row))
+
+    def to_numpy(self) -> Dict[str, Any]:
+        """Return the columns as NumPy arrays.
+
+        Integer buffers are wrapped without copying; string columns become
+        object arrays.
+
+        Raises:
+            ImportError: If NumPy is not installed
+        """
+        np = _require("numpy")
+        arrays: Dict[str, Any] = {}
+        for name, values in self.columns.items():
+            kind = self.schema[name]
+            if kind == "int":
+                arrays[name] = np.frombuffer(values, dtype=np.int64) if len(values) else np.empty(0, np.int64)
+            elif kind == "bool":
+                arrays[name] = np.frombuffer(values, dtype=np.int8).astype(bool) if len(values) else np.empty(0, bool)
+            else:
+                column = np.empty(len(values), dtype=object)
+                column[:] = values
+                arrays[name] = column
+        return arrays
+
+    def to_arrow(self) -> Any:
+        """Return the batch as a ``pyarrow.RecordBatch``.
+
+        Raises:
+            ImportError: If pyarrow is not installed
+        """
+        pa = _require("pyarrow")
+        arrays = []
+        for name, kind in self.schema.items():
+            values = self.columns[name]
+            if kind == "bool":
+                arrays.append(pa.array(values, type=pa.int8()).cast(pa.bool_()))
+            else:
+                arrays.append(pa.array(values, type=_arrow_type(pa, kind)))
+        return pa.RecordBatch.from_arrays(arrays, schema=arrow_schema(self.schema))
+
+
+def _arrow_type(pa: Any, kind: str) -> Any:
+    return {"int": pa.int64(), "bool": pa.bool_(), "str": pa.string()}[kind]
+
+
+def arrow_schema(schema: Mapping[str, str]) -> Any:
+    """Build the ``pyarrow.Schema`` for ``PAYMENT_SCHEMA`` or ``SERVICE_SCHEMA``.
+
+    Raises:
+        ImportError: If pyarrow is not installed
+    """
+    pa = _require("pyarrow")
+    return pa.schema([(name, _arrow_type(pa, kind)) for name, kind in schema.items()])
+
+
+class _ColumnBuffer:
+    """Row buffer for one schema, transposed into columns when flushed."""
+
+    def __init__(self, schema: Mapping[str, str]) -> None:
+        self.schema = schema
+        self.rows: List[Tuple[Any, ...]] = []
+        self.append = self.rows.append
+
+    @property
+    def size(self) -> int:
+        return len(self.rows)
+
+    def flush(self) -> ColumnBatch:
+        # zip(*rows) transposes in C; rows are dropped as soon as the columns exist
+        transposed = list(zip(*self.rows)) or [() for _ in self.schema]
+        self.rows.clear()
+        columns: Dict[str, Any] = {}
+        for (name, kind), values in zip(self.schema.items(), transposed):
+            columns[name] = array(_ARRAY_CODES[kind], values) if kind in _ARRAY_CODES else list(values)
+        return ColumnBatch(self.schema, columns)
+
+
+def _day(timestamp: Optional[str]) -> Optional[str]:
+    return timestamp[:10] if timestamp else None
+
+
+def iter_batches(
+    payments: Iterable[Mapping[str, Any]], chunk_size: int = 10_000
+) -> Iterator[Tuple[ColumnBatch, ColumnBatch]]:
+    """Convert payments to columnar batches.
+
+    Args:
+        payments: Payment records as returned by ``get_payment`` (snake_case keys)
+        chunk_size: Maximum payments per batch
+
+    Yields:
+        ``(payments, services)`` batch pairs; the services batch holds the
+        flattened ``services`` of the payments in the payments batch
+    """
+    payment_buffer = _ColumnBuffer(PAYMENT_SCHEMA)
+    service_buffer = _ColumnBuffer(SERVICE_SCHEMA)
+    for payment in payments:
+        customer = payment.get("customer") or {}
+        services = payment.get("services") or ()
+        created_at = payment.get("created_at")
+        payment_id = payment.get("id")
+        currency = payment.get("currency")
+        payment_buffer.append(
+            (
+                payment_id,
+                payment.get("transaction_id"),
+                payment.get("amount") or 0,
+                currency,
+                payment.get("status"),
+                bool(payment.get("expired")),
+                payment.get("service_id"),
+                created_at,
+                _day(created_at),
+                payment.get("description"),
+                customer.get("email"),
+                customer.get("phone"),
+                len(services),
+            )
+        )
+        for service in services:
+            quantity = service.get("quantity") or 0
+            price = service.get("price") or 0
+            service_created_at = service.get("created_at") or created_at
+            service_buffer.append(
+                (
+                    payment_id,
+                    service.get("id"),
+                    service.get("name"),
+                    service.get("description"),
+                    quantity,
+                    price,
+                    quantity * price,
+                    service.get("currency") or currency,
+                    service.get("service_id") or payment.get("service_id"),
+                    service_created_at,
+                    _day(service_created_at),
+                )
+            )
+        if payment_buffer.size >= chunk_size:
+            yield payment_buffer.flush(), service_buffer.flush()
+    if payment_buffer.size:
+        yield payment_buffer.flush(), service_buffer.flush()
+
+
+class BatchWriter(ABC):
+    """Base class for batch writers; subclasses implement ``write``."""
+
+    @abstractmethod
+    def write(self, batch: ColumnBatch) -> None:
+        """Write one batch.
+
+        Args:
+            batch: Batch to append to the output
+        """
+
+    def close(self) -> None:  # noqa: B027
+        """Flush and close the output."""
+
+    def __enter__(self) -> "BatchWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class _FileWriter(BatchWriter):
+    """Writer for text outputs given as a path or an open file."""
+
+    def __init__(self, output: Union[str, IO[str]]) -> None:
+        self._owned = isinstance(output, str)
+        self.file: IO[str] = open(output, "w", encoding="utf-8", newline="") if isinstance(output, str) else output
+
+    def close(self) -> None:
+        if self._owned:
+            self.file.close()
+        else:
+            self.file.flush()
+
+
+class CSVWriter(_FileWriter):
+    """Write batches as CSV with a header row; nulls are empty fields and booleans 0/1."""
+
+    def __init__(self, output: Union[str, IO[str]]) -> None:
+        """Initialize the writer.
+
+        Args:
+            output: File path or open text file
+        """
+        super().__init__(output)
+        self._writer = csv.writer(self.file)
+        self._header_written = False
+
+    def write(self, batch: ColumnBatch) -> None:
+        if not self._header_written:
+            self._writer.writerow(batch.columns)
+            self._header_written = True
+        self._writer.writerows(zip(*batch.columns.values()))
+
+
+class NDJSONWriter(_FileWriter):
+    """Write batches as newline-delimited JSON objects."""
+
+    def __init__(self, output: Union[str, IO[str]]) -> None:
+        """Initialize the writer.
+
+        Args:
+            output: File path or open text file
+        """
+        super().__init__(output)
+
+    def write(self, batch: ColumnBatch) -> None:
+        dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+        self.file.writelines(dumps(row) + "\n" for row in batch.rows())
+
+
+class ParquetWriter(BatchWriter):
+    """Write batches to a Parquet file, one row group per batch (requires pyarrow)."""
+
+    def __init__(self, path: str, schema: Mapping[str, str], compression: str = "zstd") -> None:
+        """Initialize the writer.
+
+        Args:
+            path: Output file path
+            schema: ``PAYMENT_SCHEMA`` or ``SERVICE_SCHEMA``
+            compression: Parquet compression codec
+
+        Raises:
+            ImportError: If pyarrow is not installed
+        """
+        _require("pyarrow")
+        parquet = _require("pyarrow.parquet")
+        self._writer = parquet.ParquetWriter(path, arrow_schema(schema), compression=compression)
+
+    def write(self, batch: ColumnBatch) -> None:
+        if batch.num_rows:
+            self._writer.write_batch(batch.to_arrow())
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+def export_payments(
+    payments: Iterable[Mapping[str, Any]],
+    writer: BatchWriter,
+    services_writer: Optional[BatchWriter] = None,
+    chunk_size: int = 10_000,
+    aggregations: Sequence["Totals"] = (),
+) -> int:
+    """Stream payments to writers in bounded chunks.
+
+    Args:
+        payments: Payment records as returned by ``get_payment``
+        writer: Destination for the payments table
+        services_writer: Optional destination for the flattened services table
+        chunk_size: Maximum payments held in memory at once
+        aggregations: ``Totals`` updated with each payments batch on the way
+
+    Returns:
+        Number of payments exported
+    """
+    count = 0
+    for payment_batch, service_batch in iter_batches(payments, chunk_size):
+        writer.write(payment_batch)
+        if services_writer is not None:
+            services_writer.write(service_batch)
+        for totals in aggregations:
+            totals.update(payment_batch)
+        count += payment_batch.num_rows
+    return count
+
+
+class Totals:
+    """Running sums of an integer column grouped by one or more key columns.
+
+    Works on whole columns: with NumPy installed, each batch is grouped with
+    ``numpy.unique`` and summed per group with ``numpy.add.reduceat``; otherwise
+    with a single pass over the zipped columns. Keys are the column values
+    either way. Amounts are summed in integer minor units, so group by
+    ``currency`` as well unless all payments share one.
+    """
+
+    def __init__(self, by: Union[str, Sequence[str]], value: str = "amount") -> None:
+        """Initialize the aggregation.
+
+        Args:
+            by: Key column name(s), e.g. ``("currency", "day")``
+            value: Integer column to sum (default: "amount"; "total" for services)
+        """
+        self.by = (by,) if isinstance(by, str) else tuple(by)
+        self.value = value
+        self.sums: Dict[Any, int] = {}
+        self.counts: Dict[Any, int] = {}
+
+    def update(self, batch: ColumnBatch) -> None:
+        """Add a batch to the running totals.
+
+        Args:
+            batch: Batch containing the key and value columns
+        """
+        if not batch.num_rows:
+            return
+        np = optional_module("numpy")
+        keys = [batch.columns[name] for name in self.by]
+        values = batch.columns[self.value]
+        if np is None:
+            self._update_python(keys, values)
+        else:
+            self._update_numpy(np, keys, values)
+
+    def _update_python(self, keys: List[Sequence[Any]], values: Sequence[int]) -> None:
+        sums, counts = self.sums, self.counts
+        group_keys: Iterable[Any] = keys[0] if len(keys) == 1 else zip(*keys)
+        for key, value in zip(group_keys, values):
+            sums[key] = sums.get(key, 0) + value
+            counts[key] = counts.get(key, 0) + 1
+
+    def _update_numpy(self, np: Any, keys: List[Sequence[Any]], values: Any) -> None:
+        # Encode each key column to integer codes, then combine them into one group code
+        codes = np.zeros(len(values), dtype=np.int64)
+        uniques = []
+        for column in keys:
+            objects = np.array(column, dtype=object)
+            none_mask = objects == None  # noqa: E711 - elementwise comparison
+            objects[none_mask] = ""
+            # Group on the text form, but key the totals by each group's original value
+            unique, first, inverse = np.unique(objects.astype(str), return_index=True, return_inverse=True)
+            labels = objects[first]
+            if none_mask.any():
+                # Keep None distinct from an empty string
+                labels = np.append(labels, None)
+                inverse = np.where(none_mask, len(unique), inverse.reshape(-1))
+            codes = codes * len(labels) + inverse.reshape(-1)
+            uniques.append(labels)
+
+        weights = np.frombuffer(values, dtype=np.int64) if isinstance(values, array) else np.asarray(values)
+        # Sort by group and reduce each run with integer arithmetic (bincount would sum in float64)
+        order = np.argsort(codes, kind="stable")
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        sums = np.add.reduceat(weights[order].astype(np.int64), starts)
+        counts = np.diff(np.r_[starts, len(codes)])
+
+        for code, total, count in zip(sorted_codes[starts].tolist(), sums.tolist(), counts.tolist()):
+            parts = []
+            for labels in reversed(uniques):
+                code, index = divmod(code, len(labels))
+                parts.append(labels[index])
+            parts.reverse()
+            key = parts[0] if len(parts) == 1 else tuple(parts)
+            self.sums[key] = self.sums.get(key, 0) + total
+            self.counts[key] = self.counts.get(key, 0) + count
+
+    def result(self) -> Dict[Any, int]:
+        """Return sums per key (a tuple of values when grouping by several columns)."""
+        return dict(self.sums)
+
+
+def totals(batches: Iterable[ColumnBatch], by: Union[str, Sequence[str]], value: str = "amount") -> Dict[Any, int]:
+    """Sum ``value`` per key over batches.
+
+    Args:
+        batches: Payment (or service) batches
+        by: Key column name(s)
+        value: Integer column to sum
+
+    Returns:
+        Sums per key
+    """
+    aggregation = Totals(by, value)
+    for batch in batches:
+        aggregation.update(batch)
+    return aggregation.result()
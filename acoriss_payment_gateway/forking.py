@@ -0,0 +1,88 @@
+"""Reset process-local state in children of ``os.fork()``.
+
+Pre-forking servers (gunicorn or uWSGI with preload) create a client in the
+master and fork workers that inherit it. Sockets, locks and background
+threads must not be shared that way: two processes reading one connection
+corrupt it, a lock held by another thread at fork time is never released in
+the child, and threads do not survive the fork at all.
+
+Objects owning such state call :func:`register`; right after a fork, each
+child calls their ``_after_fork()`` methods in registration order (so an
+object's dependencies, created first, are reset first) to reopen pools, replace
+locks and restart background threads. Everything else, such as prepared HMAC
+keys, compiled validators and cached DNS answers, is left alone and stays
+shared with the master copy-on-write.
+
+Objects whose libraries keep their own locks (e.g. SQLite) can also define
+``_before_fork()`` and ``_after_fork_in_parent()`` to pause that work while
+the fork happens, so the child does not inherit a library lock held by a
+thread that no longer exists.
+"""
+
+import itertools
+import os
+import threading
+import warnings
+import weakref
+from typing import Any, List
+
+_lock = threading.Lock()
+_objects: "weakref.WeakValueDictionary[int, Any]" = weakref.WeakValueDictionary()
+_order = itertools.count()
+# Objects whose _before_fork() succeeded, for the current fork only
+_prepared: List[Any] = []
+
+
+def register(obj: Any) -> None:
+    """Call ``obj._after_fork()`` in child processes forked from now on.
+
+    Only a weak reference is kept. Does nothing useful on platforms without
+    ``os.fork`` (Windows).
+
+    Args:
+        obj: Object with an ``_after_fork()`` method
+    """
+    with _lock:
+        _objects[next(_order)] = obj
+
+
+def _registered() -> List[Any]:
+    return [obj for _, obj in sorted(_objects.items(), key=lambda item: item[0])]
+
+
+def _before_fork() -> None:
+    _lock.acquire()
+    for obj in _registered():
+        if hasattr(obj, "_before_fork"):
+            try:
+                obj._before_fork()
+            except Exception as e:
+                # Its locks were not taken, so they must not be released after the fork
+                warnings.warn(f"Preparing {type(obj).__name__} for fork failed: {e!r}", RuntimeWarning, stacklevel=1)
+                continue
+            _prepared.append(obj)
+
+
+def _after_fork_in_parent() -> None:
+    # Only undo the hooks that ran, newest first
+    while _prepared:
+        obj = _prepared.pop()
+        if hasattr(obj, "_after_fork_in_parent"):
+            obj._after_fork_in_parent()
+    _lock.release()
+
+
+def _after_fork_in_child() -> None:
+    global _lock
+    _lock = threading.Lock()
+    _prepared.clear()
+    for obj in _registered():
+        try:
+            obj._after_fork()
+        except Exception as e:
+            # One failure must not leave the remaining objects shared with the parent
+            warnings.warn(f"Resetting {type(obj).__name__} after fork failed: {e!r}", RuntimeWarning, stacklevel=1)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(before=_before_fork, after_in_parent=_after_fork_in_parent, after_in_child=_after_fork_in_child)
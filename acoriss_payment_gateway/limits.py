@@ -0,0 +1,243 @@
+"""Adaptive concurrency limits.
+
+A :class:`ConcurrencyLimiter` caps the number of requests a client has in
+flight and moves the cap with what it observes: it grows while latency stays
+flat and shrinks when latency rises or the gateway signals overload (429,
+408, 5xx or no response). The cap is computed by a :class:`LimitAlgorithm`:
+
+- :class:`AIMDLimit` adds one slot per window of successful requests and
+  multiplies the limit by ``backoff`` on overload (as TCP congestion control).
+- :class:`GradientLimit` compares recent latency with the no-load latency
+  and scales the limit by their ratio, so it backs off as soon as queues
+  build up, before the gateway starts failing requests.
+
+Thread pools used with a limiter should be sized for the largest acceptable
+concurrency (e.g. ``get_payments(ids, max_workers=64)``); the limiter decides
+how many of those threads send at once.
+"""
+
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from acoriss_payment_gateway import forking
+
+# Statuses meaning the gateway (or something in front of it) is overloaded
+_OVERLOAD_STATUSES = frozenset({408, 429})
+
+
+def is_overload(status: Optional[int]) -> bool:
+    """Whether a response status (None: no response) signals overload."""
+    return status is None or status >= 500 or status in _OVERLOAD_STATUSES
+
+
+class LimitAlgorithm(ABC):
+    """Computes a concurrency limit from request outcomes."""
+
+    def __init__(self, initial: float, min_limit: float, max_limit: float) -> None:
+        if not 1 <= min_limit <= initial <= max_limit:
+            raise ValueError("limits must satisfy 1 <= min_limit <= initial <= max_limit")
+        self.limit = float(initial)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self._decreased_at = 0.0
+
+    @abstractmethod
+    def update(self, latency: float, in_flight: int, dropped: bool) -> float:
+        """Record a completed request and return the new limit.
+
+        Args:
+            latency: Seconds the request took
+            in_flight: Requests in flight when it completed, itself included
+            dropped: Whether the request failed with an overload signal
+
+        Returns:
+            The new limit
+        """
+
+    def _clamp(self, limit: float) -> float:
+        return min(self.max_limit, max(self.min_limit, limit))
+
+    def _backoff(self, factor: float, latency: float) -> None:
+        now = time.monotonic()
+        # Requests that overlapped the last decrease were sent under the old limit; back off once per round trip
+        if now - self._decreased_at >= latency:
+            self.limit = self._clamp(self.limit * factor)
+            self._decreased_at = now
+
+
+class AIMDLimit(LimitAlgorithm):
+    """Additive increase, multiplicative decrease."""
+
+    def __init__(
+        self,
+        initial: float = 4,
+        min_limit: float = 1,
+        max_limit: float = 256,
+        backoff: float = 0.9,
+        latency_threshold: Optional[float] = None,
+    ) -> None:
+        """Initialize the algorithm.
+
+        Args:
+            initial: Starting limit
+            min_limit: Lowest limit
+            max_limit: Highest limit
+            backoff: Factor applied to the limit on overload
+            latency_threshold: Treat requests slower than this many seconds as
+                overload (default: only failures are)
+        """
+        super().__init__(initial, min_limit, max_limit)
+        self.backoff = backoff
+        self.latency_threshold = latency_threshold
+
+    def update(self, latency: float, in_flight: int, dropped: bool) -> float:
+        if dropped or (self.latency_threshold is not None and latency > self.latency_threshold):
+            self._backoff(self.backoff, latency)
+        elif in_flight * 2 >= self.limit:
+            # +1 per limit's worth of successes; idle capacity (few in flight) is not evidence for more
+            self.limit = self._clamp(self.limit + 1 / self.limit)
+        return self.limit
+
+
+class GradientLimit(LimitAlgorithm):
+    """Latency-gradient limit in the style of TCP Vegas.
+
+    Compares recent latency (a short exponential average) with the no-load
+    latency (the lowest seen, allowed to drift up slowly so it follows lasting
+    changes). While recent latency stays within ``tolerance`` times the
+    baseline the limit grows by about ``sqrt(limit)`` per round trip; beyond
+    that it is scaled by their ratio (at most halved per round trip), which
+    settles it where queueing at the gateway starts to add latency.
+    """
+
+    def __init__(
+        self,
+        initial: float = 4,
+        min_limit: float = 1,
+        max_limit: float = 256,
+        tolerance: float = 1.5,
+        smoothing: float = 0.5,
+        short_window: int = 10,
+        baseline_drift: float = 0.00001,
+        backoff: float = 0.9,
+    ) -> None:
+        """Initialize the algorithm.
+
+        Args:
+            initial: Starting limit
+            min_limit: Lowest limit
+            max_limit: Highest limit
+            tolerance: Ratio of recent to no-load latency accepted without backing off
+            smoothing: Share of each round trip's target applied to the limit (0-1)
+            short_window: Requests averaged for recent latency
+            baseline_drift: Relative increase of the no-load latency per request
+            backoff: Factor applied to the limit on overload
+        """
+        super().__init__(initial, min_limit, max_limit)
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.baseline_drift = baseline_drift
+        self.backoff = backoff
+        self._short_alpha = 2 / (short_window + 1)
+        self.short_latency: Optional[float] = None
+        self.baseline_latency: Optional[float] = None
+
+    def update(self, latency: float, in_flight: int, dropped: bool) -> float:
+        if dropped:
+            self._backoff(self.backoff, latency)
+            return self.limit
+
+        if self.short_latency is None or self.baseline_latency is None:
+            self.short_latency = self.baseline_latency = latency
+        else:
+            self.short_latency += self._short_alpha * (latency - self.short_latency)
+            self.baseline_latency = min(self.baseline_latency * (1 + self.baseline_drift), latency)
+
+        gradient = max(0.5, min(1.0, self.tolerance * self.baseline_latency / self.short_latency))
+        if gradient < 1.0:
+            target = self.limit * gradient
+        elif in_flight * 2 >= self.limit:
+            target = self.limit + math.sqrt(self.limit)
+        else:
+            # Few requests in flight: latency says nothing about more capacity
+            return self.limit
+        # Each completion carries 1/limit of a round trip's worth of adjustment
+        self.limit = self._clamp(self.limit + (target - self.limit) * self.smoothing / self.limit)
+        return self.limit
+
+
+class ConcurrencyLimiter:
+    """Blocks callers while the number of requests in flight is at the limit. Thread-safe."""
+
+    def __init__(self, algorithm: Optional[LimitAlgorithm] = None, samples: int = 1000) -> None:
+        """Initialize the limiter.
+
+        Args:
+            algorithm: Limit algorithm (default: ``GradientLimit()``)
+            samples: Number of recent ``(time, latency, limit)`` samples kept
+        """
+        self.algorithm = algorithm or GradientLimit()
+        self.in_flight = 0
+        self.dropped = 0
+        self._cond = threading.Condition()
+        self._samples: Deque[Tuple[float, float, int]] = deque(maxlen=samples)
+        forking.register(self)
+
+    def _after_fork(self) -> None:
+        # Requests in flight belong to the parent; the learned limit carries over
+        self._cond = threading.Condition()
+        self.in_flight = 0
+
+    @property
+    def limit(self) -> int:
+        """Current number of requests allowed in flight."""
+        return max(1, int(self.algorithm.limit))
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a free slot.
+
+        Args:
+            timeout: Seconds to wait at most (default: no limit)
+
+        Returns:
+            True once a slot is held, False on timeout
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.in_flight < self.limit, timeout):
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, latency: float, dropped: bool = False) -> None:
+        """Free a slot and feed the request's outcome to the algorithm.
+
+        Args:
+            latency: Seconds the request took
+            dropped: Whether it failed with an overload signal (see :func:`is_overload`)
+        """
+        with self._cond:
+            in_flight = self.in_flight
+            self.in_flight -= 1
+            self.dropped += dropped
+            self.algorithm.update(latency, in_flight, dropped)
+            limit = self.limit
+            self._samples.append((time.monotonic(), latency, limit))
+            self._cond.notify(max(1, limit - self.in_flight))
+
+    def samples(self) -> List[Tuple[float, float, int]]:
+        """Return recent ``(monotonic time, latency, limit after the update)`` samples."""
+        with self._cond:
+            return list(self._samples)
+
+    def snapshot(self) -> Dict[str, float]:
+        """Return the current limit, requests in flight and recent latency percentiles (seconds)."""
+        with self._cond:
+            latencies = sorted(latency for _, latency, _ in self._samples)
+            snapshot: Dict[str, float] = {"limit": self.limit, "in_flight": self.in_flight, "dropped": self.dropped}
+        for name, p in (("latency_p50", 0.5), ("latency_p99", 0.99)):
+            snapshot[name] = latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else 0.0
+        return snapshot
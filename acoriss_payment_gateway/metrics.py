@@ -0,0 +1,188 @@
+"""Client instrumentation counters and latency histograms."""
+
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from acoriss_payment_gateway import forking
+from acoriss_payment_gateway.sync import ShardedCounters
+
+_REQUESTS, _ERRORS, _BYTES_RECEIVED, _BYTES_DECODED = range(4)
+
+
+class ClientMetrics:
+    """Counters describing the traffic a client has exchanged with the gateway.
+
+    ``bytes_received`` counts response body bytes as they came over the wire
+    (compressed, when the server compressed them); ``bytes_decoded`` counts
+    them after decompression. Their ratio is the bandwidth saved.
+
+    Counters are sharded per thread, so recording a response never waits on
+    other threads; reading them sums the shards.
+    """
+
+    def __init__(self) -> None:
+        """Initialize all counters to zero."""
+        self._counters = ShardedCounters(("requests", "errors", "bytes_received", "bytes_decoded"))
+
+    def record_response(self, status: Optional[int], wire_size: int = 0, decoded_size: int = 0) -> None:
+        """Record a completed exchange.
+
+        Args:
+            status: HTTP status code, or None if no response was received
+            wire_size: Response body bytes received on the wire
+            decoded_size: Response body bytes after decompression
+        """
+        shard = self._counters.shard()
+        shard[_REQUESTS] += 1
+        if status is None or status >= 400:
+            shard[_ERRORS] += 1
+        shard[_BYTES_RECEIVED] += wire_size
+        shard[_BYTES_DECODED] += decoded_size
+
+    @property
+    def requests(self) -> int:
+        """Exchanges recorded, failed ones included."""
+        return self._counters.value("requests")
+
+    @property
+    def errors(self) -> int:
+        """Exchanges with no response or an error status."""
+        return self._counters.value("errors")
+
+    @property
+    def bytes_received(self) -> int:
+        """Response body bytes received on the wire."""
+        return self._counters.value("bytes_received")
+
+    @property
+    def bytes_decoded(self) -> int:
+        """Response body bytes after decompression."""
+        return self._counters.value("bytes_decoded")
+
+    @property
+    def compression_ratio(self) -> float:
+        """Decoded bytes per wire byte (1.0 when nothing was compressed)."""
+        totals = self._counters.totals()
+        if not totals["bytes_received"]:
+            return 1.0
+        return totals["bytes_decoded"] / totals["bytes_received"]
+
+    def snapshot(self) -> Dict[str, float]:
+        """Return a point-in-time copy of all counters."""
+        snapshot: Dict[str, float] = {}
+        snapshot.update(self._counters.totals())
+        return snapshot
+
+
+class LatencyHistogram:
+    """Streaming histogram of recent latencies with bounded relative error. Thread-safe.
+
+    Buckets grow geometrically by ``1 + precision`` from ``lowest`` to
+    ``highest`` seconds (as in HDR histograms), so any percentile is known to
+    within ``precision`` at a fixed memory cost. Samples are kept for one to two
+    ``window`` lengths: the current window and the previous one are combined,
+    so percentiles follow changes in latency without jumping at window edges.
+    """
+
+    def __init__(
+        self, lowest: float = 0.0001, highest: float = 120.0, precision: float = 0.02, window: float = 60.0
+    ) -> None:
+        """Initialize an empty histogram.
+
+        Args:
+            lowest: Smallest latency told apart, in seconds
+            highest: Largest latency told apart, in seconds; longer ones count as this
+            precision: Relative width of each bucket
+            window: Seconds after which samples start to age out
+        """
+        self.lowest = lowest
+        self.highest = highest
+        self.window = window
+        self._log_growth = math.log1p(precision)
+        self._size = int(math.ceil(math.log(highest / lowest) / self._log_growth)) + 1
+        self._lock = threading.Lock()
+        self._current = [0] * self._size
+        self._previous = [0] * self._size
+        self._max = (0.0, 0.0)  # (current, previous) window maxima
+        self._rotated_at = time.monotonic()
+        forking.register(self)
+
+    def _after_fork(self) -> None:
+        self._lock = threading.Lock()
+
+    def _index(self, value: float) -> int:
+        if value <= self.lowest:
+            return 0
+        return min(self._size - 1, int(math.log(value / self.lowest) / self._log_growth) + 1)
+
+    def _upper_bound(self, index: int) -> float:
+        return float(self.lowest * math.exp(index * self._log_growth))
+
+    def _rotate(self, now: float) -> None:
+        # Called with the lock held
+        elapsed = now - self._rotated_at
+        if elapsed < self.window:
+            return
+        if elapsed < 2 * self.window:
+            self._previous, self._max = self._current, (0.0, self._max[0])
+        else:
+            self._previous, self._max = [0] * self._size, (0.0, 0.0)
+        self._current = [0] * self._size
+        self._rotated_at = now
+
+    def record(self, latency: float) -> None:
+        """Add a latency, in seconds."""
+        index = self._index(latency)
+        with self._lock:
+            self._rotate(time.monotonic())
+            self._current[index] += 1
+            if latency > self._max[0]:
+                self._max = (latency, self._max[1])
+
+    def _counts(self) -> Tuple[List[int], float]:
+        with self._lock:
+            self._rotate(time.monotonic())
+            counts = [a + b for a, b in zip(self._current, self._previous)]
+            return counts, max(self._max)
+
+    @property
+    def count(self) -> int:
+        """Number of recent samples."""
+        with self._lock:
+            self._rotate(time.monotonic())
+            return sum(self._current) + sum(self._previous)
+
+    def percentiles(self, *quantiles: float) -> List[float]:
+        """Return recent latencies at the given quantiles (0-1), in seconds; 0.0 when empty."""
+        counts, largest = self._counts()
+        total = sum(counts)
+        if not total:
+            return [0.0] * len(quantiles)
+        results = []
+        for quantile in quantiles:
+            rank = max(1, math.ceil(quantile * total))
+            seen = 0
+            for index, count in enumerate(counts):
+                seen += count
+                if seen >= rank:
+                    # The last bucket also holds everything above ``highest``: only the maximum bounds it
+                    results.append(largest if index == self._size - 1 else min(self._upper_bound(index), largest))
+                    break
+        return results
+
+    def percentile(self, quantile: float) -> float:
+        """Return the recent latency at ``quantile`` (0-1), in seconds; 0.0 when empty."""
+        return self.percentiles(quantile)[0]
+
+    def buckets(self) -> List[Tuple[float, int]]:
+        """Return ``(upper bound in seconds, count)`` for every non-empty bucket, in increasing order."""
+        counts, _ = self._counts()
+        return [(self._upper_bound(index), count) for index, count in enumerate(counts) if count]
+
+    def snapshot(self) -> Dict[str, float]:
+        """Return the recent sample count, p50, p90, p99, p99.9 and maximum (seconds)."""
+        counts, largest = self._counts()
+        p50, p90, p99, p999 = self.percentiles(0.5, 0.9, 0.99, 0.999)
+        return {"count": sum(counts), "p50": p50, "p90": p90, "p99": p99, "p999": p999, "max": largest}
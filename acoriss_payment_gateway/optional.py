@@ -0,0 +1,19 @@
+"""Lookup of optional dependencies.
+
+Features built on packages outside the core requirements (brotli, zstandard,
+NumPy, pyarrow) import them through :func:`optional_module`, so the SDK
+imports and runs without them and only the feature needing one is affected.
+"""
+
+import importlib
+from typing import Any
+
+
+def optional_module(*names: str) -> Any:
+    """Return the first importable module among ``names``, or None."""
+    for name in names:
+        try:
+            return importlib.import_module(name)
+        except ImportError:
+            continue
+    return None
@@ -0,0 +1,414 @@
+"""Durable store-and-forward outbox for payment session creation.
+
+``SessionOutbox.enqueue`` signs a session request and appends it to a local
+SQLite queue, returning as soon as the row is committed. A background sender
+drains the queue in batches, retrying transient failures with exponential
+backoff. Entries sharing a ``transaction_id`` are sent strictly in the order
+they were enqueued.
+
+Several processes may open the same file and run senders: each sender claims
+a batch in the transaction that selects it, so other senders skip it until
+the claim runs out after ``claim_ttl`` seconds.
+
+Delivery is at-least-once: an entry sent just before a crash, but not yet
+marked as sent, is sent again on restart or once its claim runs out.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple
+
+from acoriss_payment_gateway import forking
+from acoriss_payment_gateway.client import PaymentGatewayClient, _build_session_payload, _serialize_payload
+from acoriss_payment_gateway.errors import APIError
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+SENT = "sent"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    transaction_id TEXT,
+    body TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    status INTEGER,
+    response TEXT,
+    error TEXT,
+    claimed_by TEXT,
+    claimed_until REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (state, next_attempt_at, id);
+CREATE INDEX IF NOT EXISTS outbox_transaction ON outbox (transaction_id, state, id);
+"""
+
+# Pending entries that are due, not claimed by another sender, and are the oldest
+# pending entry for their transaction_id
+_SELECT_READY = """
+SELECT id, body, signature, attempts FROM outbox AS o
+WHERE o.state = 'pending' AND o.next_attempt_at <= ? AND o.claimed_until <= ?
+  AND (o.transaction_id IS NULL OR NOT EXISTS (
+      SELECT 1 FROM outbox AS p
+      WHERE p.transaction_id = o.transaction_id AND p.state = 'pending' AND p.id < o.id))
+ORDER BY o.id
+LIMIT ?
+"""
+
+
+class OutboxEntry(NamedTuple):
+    """State of an outbox entry."""
+
+    id: int
+    transaction_id: Optional[str]
+    state: str  # "pending", "sent" or "failed"
+    attempts: int
+    status: Optional[int]
+    response: Optional[Any]  # session response once sent
+    error: Optional[str]
+
+
+class SessionOutbox:
+    """Durable queue of signed ``create_session`` requests.
+
+    A process forked from the one that opened the outbox gets its own database
+    connection and can enqueue, but sends nothing unless ``start()`` is called
+    there: the parent's sender keeps draining the shared queue. Senders in
+    several processes claim the entries they send, so none is sent twice while
+    its claim holds.
+    """
+
+    def __init__(
+        self,
+        client: PaymentGatewayClient,
+        path: str,
+        batch_size: int = 50,
+        max_workers: int = 4,
+        max_attempts: int = 5,
+        retry_backoff: float = 1.0,
+        poll_interval: float = 1.0,
+        on_result: Optional[Callable[[OutboxEntry], None]] = None,
+        synchronous: str = "NORMAL",
+        autostart: bool = True,
+        claim_ttl: float = 300.0,
+    ) -> None:
+        """Open (or create) the outbox and start the background sender.
+
+        Args:
+            client: Client used to sign and send sessions
+            path: SQLite database file
+            batch_size: Maximum entries sent per batch
+            max_workers: Concurrent sends within a batch
+            max_attempts: Attempts before a retryable failure becomes final
+            retry_backoff: Base delay in seconds, doubled after each failed attempt
+            poll_interval: Idle wait between queue scans, in seconds
+            on_result: Optional callback invoked with each sent or failed entry
+            synchronous: SQLite ``synchronous`` pragma; "NORMAL" survives process
+                crashes, "FULL" also survives power loss at the cost of an fsync per enqueue
+            autostart: Start the background sender immediately
+            claim_ttl: Seconds a batch stays claimed by this sender; entries claimed by a
+                sender that died are sent by another one after this. Keep it above the
+                longest time a batch can take to send, retries included
+
+        Raises:
+            ValueError: If ``synchronous`` is not a valid SQLite level
+        """
+        if synchronous.upper() not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+            raise ValueError(f"Invalid synchronous level: {synchronous!r}")
+
+        self.client = client
+        self.path = path
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.poll_interval = poll_interval
+        self.on_result = on_result
+        self.claim_ttl = claim_ttl
+
+        self._lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self._synchronous = synchronous.upper()
+        self._db = self._connect()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._owner = self._new_owner()
+        self._inherited_dbs: List[sqlite3.Connection] = []
+
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        forking.register(self)
+        if autostart:
+            self.start()
+
+    @staticmethod
+    def _new_owner() -> str:
+        return f"{os.getpid()}-{uuid.uuid4().hex}"
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        db.execute(f"PRAGMA synchronous={self._synchronous}")
+        return db
+
+    def _before_fork(self) -> None:
+        # Every database call holds the lock: forking mid-call could leave SQLite's own mutexes
+        # locked in the child, where no thread would ever release them
+        self._lock.acquire()
+
+    def _after_fork_in_parent(self) -> None:
+        self._lock.release()
+
+    def _after_fork(self) -> None:
+        # SQLite connections must not be used across a fork. The inherited one is kept
+        # referenced, never closed: closing it from the child could release the parent's locks.
+        self._inherited_dbs.append(self._db)
+        self._db = self._connect()
+        self._owner = self._new_owner()
+        self._lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        # The sender keeps running in the parent; a second one here would send entries twice
+        self._thread = None
+
+    def enqueue(self, signature_override: Optional[str] = None, **session: Any) -> int:
+        """Sign a session request and store it for sending.
+
+        Args:
+            signature_override: Optional pre-computed signature
+            **session: Session fields, as accepted by ``create_session``
+
+        Returns:
+            The entry id, for use with ``result``
+
+        Raises:
+            ValidationError: If the client validates sessions and this one is invalid
+            ValueError: If no signature is available
+        """
+        if self.client.validator is not None:
+            self.client.validator.validate(session)
+        raw_body = _serialize_payload(_build_session_payload(**session))
+        signature = signature_override or (self.client.signer.sign(raw_body) if self.client.signer else None)
+        if not signature:
+            raise ValueError(
+                "No signature available. Provide api_secret at client init, "
+                "a custom signer, or pass signature_override."
+            )
+
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO outbox (transaction_id, body, signature, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (session.get("transaction_id"), raw_body, signature, now, now),
+            )
+        self._wakeup.set()
+        return int(cursor.lastrowid or 0)
+
+    def result(self, entry_id: int) -> Optional[OutboxEntry]:
+        """Look up an entry.
+
+        Args:
+            entry_id: Id returned by ``enqueue``
+
+        Returns:
+            The entry, or None if it does not exist
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, transaction_id, state, attempts, status, response, error FROM outbox WHERE id = ?",
+                (entry_id,),
+            ).fetchone()
+        return self._entry(row) if row else None
+
+    def pending(self) -> int:
+        """Return the number of entries not yet sent or failed."""
+        with self._lock:
+            return int(self._db.execute("SELECT COUNT(*) FROM outbox WHERE state = 'pending'").fetchone()[0])
+
+    def drain_once(self) -> int:
+        """Send one batch of due entries.
+
+        Returns:
+            Number of entries attempted
+        """
+        with self._drain_lock:
+            return self._drain_batch()
+
+    def _claim(self) -> List[Tuple[int, str, str, int]]:
+        """Select a batch of ready entries and claim it for this sender, in one transaction."""
+        now = time.time()
+        with self._lock:
+            # IMMEDIATE takes the write lock first, so no other sender selects the same entries
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                batch: List[Tuple[int, str, str, int]] = self._db.execute(
+                    _SELECT_READY, (now, now, self.batch_size)
+                ).fetchall()
+                self._db.executemany(
+                    "UPDATE outbox SET claimed_by = ?, claimed_until = ? WHERE id = ?",
+                    [(self._owner, now + self.claim_ttl, item[0]) for item in batch],
+                )
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+        return batch
+
+    def _drain_batch(self) -> int:
+        batch = self._claim()
+        if not batch:
+            return 0
+
+        # Background delivery, so it stays out of the slots reserved for checkout traffic
+        priority = self.client.priority or "low"
+
+        def send(item: Tuple[int, str, str, int]) -> Tuple[int, int, Any]:
+            entry_id, body, signature, attempts = item
+            try:
+                return entry_id, attempts, self.client._send_session_with_status(body, signature, priority)
+            except APIError as e:
+                return entry_id, attempts, e
+            except Exception as e:
+                # Counted as a failed attempt and retried, like a network error
+                logger.exception("Sending outbox entry %d failed", entry_id)
+                return entry_id, attempts, e
+
+        if self.max_workers > 1 and len(batch) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batch))) as pool:
+                outcomes = list(pool.map(send, batch))
+        else:
+            outcomes = [send(item) for item in batch]
+
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN")
+            for entry_id, attempts, outcome in outcomes:
+                self._db.execute(*self._update_for(entry_id, attempts + 1, outcome, now))
+            self._db.execute("COMMIT")
+
+        if self.on_result is not None:
+            for entry_id, _, _ in outcomes:
+                entry = self.result(entry_id)
+                if entry is not None and entry.state != PENDING:
+                    try:
+                        self.on_result(entry)
+                    except Exception:
+                        # A faulty callback must not stop the sender
+                        logger.exception("Outbox on_result callback failed for entry %d", entry_id)
+        return len(outcomes)
+
+    def _update_for(self, entry_id: int, attempts: int, outcome: Any, now: float) -> Tuple[str, Tuple[Any, ...]]:
+        """Build the UPDATE statement recording a send outcome and releasing the claim.
+
+        ``outcome`` is ``(status, response)`` or the exception the send raised. The
+        entry is only updated while this sender's claim on it holds.
+        """
+        if not isinstance(outcome, Exception):
+            status, response = outcome
+            return (
+                "UPDATE outbox SET state = 'sent', attempts = ?, status = ?, response = ?, error = NULL,"
+                " claimed_by = NULL, claimed_until = 0, updated_at = ? WHERE id = ? AND claimed_by = ?",
+                (attempts, status, json.dumps(response), now, entry_id, self._owner),
+            )
+        if isinstance(outcome, APIError):
+            status, retryable = outcome.status, outcome.retryable
+        else:
+            status, retryable = None, True
+        retry = retryable and attempts < self.max_attempts
+        return (
+            "UPDATE outbox SET state = ?, attempts = ?, status = ?, error = ?, next_attempt_at = ?,"
+            " claimed_by = NULL, claimed_until = 0, updated_at = ? WHERE id = ? AND claimed_by = ?",
+            (
+                PENDING if retry else FAILED,
+                attempts,
+                status,
+                str(outcome) if isinstance(outcome, APIError) else f"{type(outcome).__name__}: {outcome}",
+                now + self.retry_backoff * 2 ** (attempts - 1),
+                now,
+                entry_id,
+                self._owner,
+            ),
+        )
+
+    @staticmethod
+    def _entry(row: Tuple[Any, ...]) -> OutboxEntry:
+        entry_id, transaction_id, state, attempts, status, response, error = row
+        return OutboxEntry(
+            entry_id, transaction_id, state, attempts, status, json.loads(response) if response else None, error
+        )
+
+    def start(self) -> None:
+        """Start the background sender if it is not running."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="acoriss-outbox-sender", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                sent = self.drain_once()
+            except sqlite3.Error:
+                sent = 0
+            except Exception:
+                # Keep sending later batches rather than silently stopping for good
+                logger.exception("Outbox sender failed to send a batch")
+                sent = 0
+            if not sent:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until no entries are pending.
+
+        Args:
+            timeout: Maximum time to wait in seconds (default: forever)
+
+        Returns:
+            True if the queue drained, False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.pending():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            self._wakeup.set()
+            time.sleep(0.01)
+        return True
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the background sender; pending entries stay queued.
+
+        Args:
+            timeout: Maximum time to wait for the current batch
+        """
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def close(self) -> None:
+        """Stop the sender and close the database."""
+        self.stop()
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "SessionOutbox":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
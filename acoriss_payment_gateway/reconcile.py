@@ -0,0 +1,296 @@
+"""Reconciliation of a merchant ledger against gateway payments.
+
+Both sides are keyed by ``transaction_id``. :class:`Reconciler` indexes the
+gateway side in a hash table and streams the ledger past it, yielding
+:class:`Mismatch` records as they are found. With ``partitions > 1`` both
+inputs are first spilled to temporary files by hash of the key, and each
+partition is joined on its own, so memory is bounded by the largest partition
+rather than by the whole gateway export.
+
+:func:`reconcile_with_client` instead looks gateway payments up by
+``payment_id`` in concurrent batches, for ledgers that store the session id.
+"""
+
+import json
+import os
+import tempfile
+import zlib
+from collections import Counter
+from typing import IO, Any, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Tuple
+
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.errors import APIError
+
+MISSING_AT_GATEWAY = "missing_at_gateway"
+MISSING_IN_LEDGER = "missing_in_ledger"
+AMOUNT_MISMATCH = "amount_mismatch"
+CURRENCY_MISMATCH = "currency_mismatch"
+STATUS_DRIFT = "status_drift"
+EXPIRED_BUT_PAID = "expired_but_paid"
+DUPLICATE_PAYMENT = "duplicate_payment"  # more than one succeeded session for a transaction
+DUPLICATE_LEDGER_ENTRY = "duplicate_ledger_entry"
+LOOKUP_FAILED = "lookup_failed"
+
+# Preference when several gateway sessions share a transaction_id: succeeded, pending, canceled
+_STATUS_RANK = {"S": 2, "P": 1, "C": 0}
+
+
+class LedgerEntry(NamedTuple):
+    """Merchant ledger row."""
+
+    transaction_id: str
+    amount: int
+    currency: str
+    status: Optional[str] = None  # expected gateway status ("P", "S" or "C"); not compared if None
+    payment_id: Optional[str] = None
+
+    @classmethod
+    def from_mapping(cls, row: Mapping[str, Any]) -> "LedgerEntry":
+        """Build an entry from a row with the same keys as the fields."""
+        return cls(
+            str(row["transaction_id"]),
+            int(row["amount"]),
+            str(row["currency"]),
+            row.get("status"),
+            row.get("payment_id"),
+        )
+
+
+class GatewayEntry(NamedTuple):
+    """The fields of a gateway payment used for reconciliation."""
+
+    transaction_id: str
+    amount: int
+    currency: str
+    status: str
+    expired: bool
+    payment_id: str
+
+    @classmethod
+    def from_payment(cls, payment: Mapping[str, Any]) -> "GatewayEntry":
+        """Build an entry from a payment as returned by ``get_payment``."""
+        return cls(
+            str(payment["transaction_id"]),
+            int(payment["amount"]),
+            str(payment["currency"]),
+            str(payment["status"]),
+            bool(payment.get("expired")),
+            str(payment["id"]),
+        )
+
+
+class Mismatch(NamedTuple):
+    """A difference between the ledger and the gateway."""
+
+    kind: str
+    transaction_id: str
+    ledger: Optional[LedgerEntry]
+    gateway: Optional[GatewayEntry]
+    detail: str = ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a JSON-serializable representation."""
+        return {
+            "kind": self.kind,
+            "transaction_id": self.transaction_id,
+            "ledger": self.ledger._asdict() if self.ledger else None,
+            "gateway": self.gateway._asdict() if self.gateway else None,
+            "detail": self.detail,
+        }
+
+
+def compare(ledger: LedgerEntry, gateway: GatewayEntry) -> List[Mismatch]:
+    """Compare a ledger entry with the gateway payment for the same transaction.
+
+    Args:
+        ledger: Ledger entry
+        gateway: Gateway payment
+
+    Returns:
+        The mismatches found; empty if both sides agree
+    """
+    tx = ledger.transaction_id
+    mismatches = []
+    if ledger.currency != gateway.currency:
+        detail = f"ledger {ledger.currency}, gateway {gateway.currency}"
+        mismatches.append(Mismatch(CURRENCY_MISMATCH, tx, ledger, gateway, detail))
+    elif ledger.amount != gateway.amount:
+        detail = f"ledger {ledger.amount}, gateway {gateway.amount}"
+        mismatches.append(Mismatch(AMOUNT_MISMATCH, tx, ledger, gateway, detail))
+    if ledger.status is not None and ledger.status != gateway.status:
+        detail = f"ledger {ledger.status}, gateway {gateway.status}"
+        mismatches.append(Mismatch(STATUS_DRIFT, tx, ledger, gateway, detail))
+    if gateway.expired and gateway.status == "S":
+        mismatches.append(Mismatch(EXPIRED_BUT_PAID, tx, ledger, gateway, "session expired after payment succeeded"))
+    return mismatches
+
+
+class Reconciler:
+    """Hash join of ledger rows and gateway payments on ``transaction_id``."""
+
+    def __init__(self, partitions: int = 1, spill_dir: Optional[str] = None) -> None:
+        """Initialize the reconciler.
+
+        Args:
+            partitions: Number of hash partitions; above 1, inputs are spilled
+                to disk and joined one partition at a time
+            spill_dir: Directory for partition files (default: system temp dir)
+        """
+        if partitions < 1:
+            raise ValueError("partitions must be at least 1")
+        self.partitions = partitions
+        self.spill_dir = spill_dir
+        self.summary: Counter = Counter()
+
+    def run(
+        self,
+        ledger: Iterable[Mapping[str, Any]],
+        gateway: Iterable[Mapping[str, Any]],
+    ) -> Iterator[Mismatch]:
+        """Reconcile the two sides.
+
+        ``summary`` counts matched transactions and each mismatch kind, and is
+        complete once the iterator is exhausted.
+
+        Args:
+            ledger: Ledger rows (mappings with ``LedgerEntry`` keys)
+            gateway: Gateway payments as returned by ``get_payment``
+
+        Yields:
+            Mismatches, ledger-side ones first for each partition, then
+            transactions only the gateway knows about
+        """
+        self.summary = Counter()
+        ledger_entries = (LedgerEntry.from_mapping(row) for row in ledger)
+        gateway_entries = (GatewayEntry.from_payment(payment) for payment in gateway)
+        if self.partitions == 1:
+            yield from self._join(ledger_entries, gateway_entries)
+            return
+
+        with tempfile.TemporaryDirectory(prefix="acoriss-reconcile-", dir=self.spill_dir) as directory:
+            ledger_paths = self._spill(ledger_entries, directory, "ledger")
+            gateway_paths = self._spill(gateway_entries, directory, "gateway")
+            for ledger_path, gateway_path in zip(ledger_paths, gateway_paths):
+                yield from self._join(
+                    (LedgerEntry(*row) for row in _read_rows(ledger_path)),
+                    (GatewayEntry(*row) for row in _read_rows(gateway_path)),
+                )
+
+    def _spill(self, entries: Iterable[Tuple[Any, ...]], directory: str, name: str) -> List[str]:
+        """Write entries to one file per partition, by hash of the transaction id."""
+        paths = [os.path.join(directory, f"{name}-{i}.jsonl") for i in range(self.partitions)]
+        files: List[IO[str]] = [open(path, "w", encoding="utf-8") for path in paths]
+        try:
+            dumps = json.JSONEncoder(separators=(",", ":")).encode
+            for entry in entries:
+                partition = zlib.crc32(entry[0].encode("utf-8")) % self.partitions
+                files[partition].write(dumps(entry) + "\n")
+        finally:
+            for file in files:
+                file.close()
+        return paths
+
+    def _join(self, ledger: Iterable[LedgerEntry], gateway: Iterable[GatewayEntry]) -> Iterator[Mismatch]:
+        index: Dict[str, GatewayEntry] = {}
+        for entry in gateway:
+            current = index.get(entry.transaction_id)
+            if current is None:
+                index[entry.transaction_id] = entry
+                continue
+            if entry.status == "S" and current.status == "S":
+                self.summary[DUPLICATE_PAYMENT] += 1
+                yield Mismatch(
+                    DUPLICATE_PAYMENT,
+                    entry.transaction_id,
+                    None,
+                    entry,
+                    f"sessions {current.payment_id} and {entry.payment_id} both succeeded",
+                )
+            if _STATUS_RANK.get(entry.status, -1) > _STATUS_RANK.get(current.status, -1):
+                index[entry.transaction_id] = entry
+
+        seen = set()
+        for ledger_entry in ledger:
+            tx = ledger_entry.transaction_id
+            if tx in seen:
+                self.summary[DUPLICATE_LEDGER_ENTRY] += 1
+                yield Mismatch(DUPLICATE_LEDGER_ENTRY, tx, ledger_entry, index.get(tx))
+                continue
+            seen.add(tx)
+            gateway_entry = index.get(tx)
+            if gateway_entry is None:
+                self.summary[MISSING_AT_GATEWAY] += 1
+                yield Mismatch(MISSING_AT_GATEWAY, tx, ledger_entry, None)
+                continue
+            mismatches = compare(ledger_entry, gateway_entry)
+            if not mismatches:
+                self.summary["matched"] += 1
+            for mismatch in mismatches:
+                self.summary[mismatch.kind] += 1
+                yield mismatch
+
+        for tx, gateway_entry in index.items():
+            if tx not in seen:
+                self.summary[MISSING_IN_LEDGER] += 1
+                yield Mismatch(MISSING_IN_LEDGER, tx, None, gateway_entry)
+
+
+def _read_rows(path: str) -> Iterator[List[Any]]:
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            yield json.loads(line)
+
+
+def reconcile_with_client(
+    client: PaymentGatewayClient,
+    ledger: Iterable[Mapping[str, Any]],
+    batch_size: int = 100,
+    max_workers: int = 8,
+    summary: Optional[Counter] = None,
+) -> Iterator[Mismatch]:
+    """Reconcile ledger rows against live gateway state.
+
+    Rows are read ``batch_size`` at a time and their ``payment_id`` looked up
+    with ``client.get_payments``, so only one batch is held in memory.
+
+    Args:
+        client: Client used for the lookups
+        ledger: Ledger rows with a ``payment_id`` (the gateway session id)
+        batch_size: Rows looked up per batch
+        max_workers: Concurrent lookups per batch
+        summary: Optional counter updated with matched transactions and mismatch kinds
+
+    Yields:
+        Mismatches in ledger order
+    """
+    counts: Counter = summary if summary is not None else Counter()
+    batch: List[LedgerEntry] = []
+
+    def flush() -> Iterator[Mismatch]:
+        lookups = [entry for entry in batch if entry.payment_id]
+        results = client.get_payments(
+            [str(entry.payment_id) for entry in lookups], max_workers=max_workers, return_exceptions=True
+        )
+        found = dict(zip((id(entry) for entry in lookups), results))
+        for entry in batch:
+            result = found.get(id(entry))
+            if result is None:
+                mismatches = [Mismatch(MISSING_AT_GATEWAY, entry.transaction_id, entry, None, "no payment_id")]
+            elif isinstance(result, APIError):
+                kind = MISSING_AT_GATEWAY if result.status == 404 else LOOKUP_FAILED
+                mismatches = [Mismatch(kind, entry.transaction_id, entry, None, str(result))]
+            else:
+                mismatches = compare(entry, GatewayEntry.from_payment(result))
+            if not mismatches:
+                counts["matched"] += 1
+            for mismatch in mismatches:
+                counts[mismatch.kind] += 1
+                yield mismatch
+        batch.clear()
+
+    for row in ledger:
+        batch.append(LedgerEntry.from_mapping(row))
+        if len(batch) >= batch_size:
+            yield from flush()
+    if batch:
+        yield from flush()
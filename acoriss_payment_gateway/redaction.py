@@ -0,0 +1,11 @@
+"""Placeholders and header names shared by the modules that store exchanges.
+
+Cassettes (:mod:`acoriss_payment_gateway.cassette`) and audit logs
+(:mod:`acoriss_payment_gateway.audit`) both keep copies of requests; neither
+may keep credentials.
+"""
+
+REDACTED = "[REDACTED]"
+
+#: Credential headers whose values are replaced by :data:`REDACTED`
+REDACTED_HEADERS = frozenset({"x-api-key", "authorization", "proxy-authorization", "cookie", "set-cookie"})
@@ -0,0 +1,183 @@
+"""Routing requests across equivalent gateway endpoints.
+
+An :class:`EndpointRouter` spreads a client's requests over several base
+URLs serving the same API (e.g. regional edges). Each request goes to the
+endpoint with the lowest cost, its average latency (an exponentially weighted
+moving average) times the requests it has outstanding plus one, so slow or
+busy endpoints get less traffic without being cut off.
+
+Health is checked passively from request outcomes: after
+``failure_threshold`` consecutive failures (no response, or an overload status
+such as 503 or 429) an endpoint is ejected for ``ejection_time`` seconds,
+doubling on each ejection in a row up to ``max_ejection_time``. When the
+ejection ends it is re-admitted on probation: one success restores it, one
+more failure ejects it again. If every endpoint is ejected, requests go to the
+one whose ejection ends first rather than failing outright.
+"""
+
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from acoriss_payment_gateway import forking
+
+# Failed requests count as this many times slower, so an endpoint that fails fast is not preferred
+_FAILURE_PENALTY = 2.0
+
+
+class Endpoint:
+    """Routing state of one base URL."""
+
+    def __init__(self, url: str) -> None:
+        """Initialize the endpoint.
+
+        Args:
+            url: Base URL, as for ``PaymentGatewayClient(base_url=...)``
+        """
+        self.url = url.rstrip("/")
+        self.latency: Optional[float] = None
+        self.sampled_at = 0.0
+        self.outstanding = 0
+        self.failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    def __repr__(self) -> str:
+        return f"Endpoint({self.url!r})"
+
+
+class EndpointRouter:
+    """Chooses an endpoint per request from latency, load and health. Thread-safe."""
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        smoothing: float = 0.3,
+        decay_time: float = 10.0,
+        failure_threshold: int = 3,
+        ejection_time: float = 10.0,
+        max_ejection_time: float = 300.0,
+        failover: int = 1,
+    ) -> None:
+        """Initialize the router.
+
+        Args:
+            urls: Base URLs of equivalent endpoints
+            smoothing: Weight of each new latency sample in the average (0-1)
+            decay_time: Seconds after which an endpoint's latency counts half as
+                much when it has not been sampled, so idle endpoints are retried
+            failure_threshold: Consecutive failures that eject an endpoint
+            ejection_time: Seconds the first ejection lasts
+            max_ejection_time: Longest ejection, in seconds
+            failover: Other endpoints to try when a ``get_payment`` lookup gets no
+                response or an overload status (sessions are never resent)
+
+        Raises:
+            ValueError: If ``urls`` is empty
+        """
+        if not urls:
+            raise ValueError("At least one endpoint URL is required")
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.smoothing = smoothing
+        self.decay_time = decay_time
+        self.failure_threshold = failure_threshold
+        self.ejection_time = ejection_time
+        self.max_ejection_time = max_ejection_time
+        self.failover = failover
+        self._lock = threading.Lock()
+        forking.register(self)
+
+    def _after_fork(self) -> None:
+        # Outstanding requests belong to the parent; latency and health carry over
+        self._lock = threading.Lock()
+        for endpoint in self.endpoints:
+            endpoint.outstanding = 0
+
+    def _cost(self, endpoint: Endpoint, now: float) -> float:
+        if endpoint.latency is None:
+            return 0.0  # unmeasured endpoints are tried first
+        decay: float = 0.5 ** ((now - endpoint.sampled_at) / self.decay_time)
+        return endpoint.latency * decay * (endpoint.outstanding + 1)
+
+    def acquire(self, exclude: Sequence[Endpoint] = ()) -> Endpoint:
+        """Choose an endpoint for a request and count the request as outstanding on it.
+
+        Args:
+            exclude: Endpoints not to choose (e.g. already tried); ignored if
+                that would leave none
+
+        Returns:
+            The endpoint; pass it to :meth:`release` when the request completes
+        """
+        with self._lock:
+            now = time.monotonic()
+            candidates = [e for e in self.endpoints if e not in exclude] or self.endpoints
+            healthy = [e for e in candidates if e.ejected_until <= now]
+            if healthy:
+                costs = [(self._cost(e, now), e.outstanding) for e in healthy]
+                lowest = min(costs)
+                cheapest = [e for e, cost in zip(healthy, costs) if cost == lowest]
+                endpoint = random.choice(cheapest)  # nosec B311 - spreads load, no security use
+            else:
+                endpoint = min(candidates, key=lambda e: e.ejected_until)
+            endpoint.outstanding += 1
+            return endpoint
+
+    def release(self, endpoint: Endpoint, latency: float, failed: Optional[bool]) -> None:
+        """Record the outcome of a request sent to ``endpoint``.
+
+        Args:
+            endpoint: Endpoint returned by :meth:`acquire`
+            latency: Seconds the request took
+            failed: Whether the endpoint failed it (no response or an overload
+                status); None if the request was abandoned without an outcome
+        """
+        with self._lock:
+            endpoint.outstanding -= 1
+            if failed is None:
+                return
+            now = time.monotonic()
+            endpoint.requests += 1
+            if failed:
+                endpoint.errors += 1
+                latency = max(latency, endpoint.latency or 0.0) * _FAILURE_PENALTY
+                if endpoint.ejected_until and endpoint.ejected_until <= now:
+                    # On probation after an ejection: one more failure ejects again
+                    endpoint.failures = self.failure_threshold
+                else:
+                    endpoint.failures += 1
+                if endpoint.failures >= self.failure_threshold and endpoint.ejected_until <= now:
+                    endpoint.ejections += 1
+                    ejection = self.ejection_time * 2 ** (endpoint.ejections - 1)
+                    endpoint.ejected_until = now + min(ejection, self.max_ejection_time)
+            else:
+                endpoint.failures = 0
+                if endpoint.ejected_until <= now:
+                    # Requests sent before an ejection may still succeed; only a re-admitted endpoint is restored
+                    endpoint.ejections = 0
+                    endpoint.ejected_until = 0.0
+            if endpoint.latency is None:
+                endpoint.latency = latency
+            else:
+                endpoint.latency += self.smoothing * (latency - endpoint.latency)
+            endpoint.sampled_at = now
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Return each endpoint's url, latency, outstanding requests, counts and ejection state."""
+        with self._lock:
+            now = time.monotonic()
+            return [
+                {
+                    "url": e.url,
+                    "latency": e.latency,
+                    "outstanding": e.outstanding,
+                    "requests": e.requests,
+                    "errors": e.errors,
+                    "ejected": e.ejected_until > now,
+                    "ejections": e.ejections,
+                }
+                for e in self.endpoints
+            ]
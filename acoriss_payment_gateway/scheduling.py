@@ -0,0 +1,173 @@
+"""Priority scheduling of requests sharing a client.
+
+A :class:`PriorityScheduler` caps the requests a client has in flight and,
+when the cap is reached, hands freed slots to waiting requests by priority
+class ("high", "normal", "low") rather than in arrival order. Interactive
+calls (e.g. checkout ``create_session``) can then share a connection pool with
+bulk work (e.g. reconciliation lookups) without queueing behind it:
+
+- ``reserved`` slots are only used by high-priority requests, so a batch run
+  filling every other slot still leaves room for checkout traffic.
+- A waiting request moves up one class for every ``aging`` seconds it has
+  waited, so low-priority work is delayed under load but never starved.
+
+Queueing delay is recorded per class; see :meth:`PriorityScheduler.snapshot`.
+"""
+
+import threading
+import time
+from collections import deque
+from itertools import count
+from typing import Deque, Dict, List, Optional
+
+from acoriss_payment_gateway import forking
+from acoriss_payment_gateway.types import Priority
+
+#: Priority classes, highest first
+PRIORITIES = ("high", "normal", "low")
+_RANKS: Dict[str, int] = {priority: rank for rank, priority in enumerate(PRIORITIES)}
+
+
+class _Waiter:
+    """A request queued for a slot."""
+
+    __slots__ = ("rank", "seq", "enqueued_at", "granted", "cond")
+
+    def __init__(self, rank: int, seq: int, enqueued_at: float, lock: threading.Lock) -> None:
+        self.rank = rank
+        self.seq = seq
+        self.enqueued_at = enqueued_at
+        self.granted = False
+        self.cond = threading.Condition(lock)
+
+
+class _ClassStats:
+    """Queueing statistics of one priority class."""
+
+    def __init__(self, samples: int) -> None:
+        self.in_flight = 0
+        self.requests = 0
+        self.queued = 0
+        self.max_delay = 0.0
+        self.delays: Deque[float] = deque(maxlen=samples)
+
+
+class PriorityScheduler:
+    """Admits requests up to a number of slots, highest priority first. Thread-safe."""
+
+    def __init__(self, slots: int = 8, reserved: int = 1, aging: float = 1.0, samples: int = 1000) -> None:
+        """Initialize the scheduler.
+
+        Args:
+            slots: Requests allowed in flight at once; at most the transport's
+                pool size, so requests queue here rather than in the pool
+            reserved: Slots only high-priority requests may use
+            aging: Seconds of waiting that move a request up one class
+            samples: Number of recent queueing delays kept per class
+
+        Raises:
+            ValueError: If ``reserved`` does not leave at least one slot for
+                other classes, or ``aging`` is not positive
+        """
+        if not 0 <= reserved < slots:
+            raise ValueError("reserved must satisfy 0 <= reserved < slots")
+        if aging <= 0:
+            raise ValueError("aging must be positive")
+        self.slots = slots
+        self.reserved = reserved
+        self.aging = aging
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._waiters: List[_Waiter] = []
+        self._seq = count()
+        self._stats = {priority: _ClassStats(samples) for priority in PRIORITIES}
+        forking.register(self)
+
+    def _after_fork(self) -> None:
+        # Requests in flight or queued belong to the parent's threads
+        self._lock = threading.Lock()
+        self._waiters = []
+        self.in_flight = 0
+        for stats in self._stats.values():
+            stats.in_flight = 0
+
+    def _admits(self, rank: int) -> bool:
+        limit = self.slots if rank == 0 else self.slots - self.reserved
+        return self.in_flight < limit
+
+    def _grant(self, priority: str, delay: float) -> None:
+        self.in_flight += 1
+        stats = self._stats[priority]
+        stats.in_flight += 1
+        stats.requests += 1
+        stats.max_delay = max(stats.max_delay, delay)
+        stats.delays.append(delay)
+
+    def _dispatch(self, now: float) -> None:
+        # Called with the lock held whenever a slot frees up
+        while self._waiters:
+            eligible = [w for w in self._waiters if self._admits(w.rank)]
+            if not eligible:
+                return
+            waiter = min(eligible, key=lambda w: (w.rank - int((now - w.enqueued_at) / self.aging), w.seq))
+            self._waiters.remove(waiter)
+            self._grant(PRIORITIES[waiter.rank], now - waiter.enqueued_at)
+            waiter.granted = True
+            waiter.cond.notify()
+
+    def acquire(self, priority: Priority = "normal", timeout: Optional[float] = None) -> bool:
+        """Wait for a slot.
+
+        Args:
+            priority: Priority class of the request
+            timeout: Seconds to wait at most (default: no limit)
+
+        Returns:
+            True once a slot is held, False on timeout
+
+        Raises:
+            ValueError: If ``priority`` is not a known class
+        """
+        rank = _RANKS.get(priority)
+        if rank is None:
+            raise ValueError(f"priority must be one of {', '.join(PRIORITIES)}")
+        with self._lock:
+            if not self._waiters and self._admits(rank):
+                self._grant(priority, 0.0)
+                return True
+            waiter = _Waiter(rank, next(self._seq), time.monotonic(), self._lock)
+            self._waiters.append(waiter)
+            # Waiters of other classes may not fit the free slots (e.g. reserved ones) while this one does
+            self._dispatch(waiter.enqueued_at)
+            if waiter.granted:
+                return True
+            self._stats[priority].queued += 1
+            if waiter.cond.wait_for(lambda: waiter.granted, timeout):
+                return True
+            self._waiters.remove(waiter)
+            return False
+
+    def release(self, priority: Priority = "normal") -> None:
+        """Free a slot taken by :meth:`acquire` with the same ``priority``."""
+        with self._lock:
+            self.in_flight -= 1
+            self._stats[priority].in_flight -= 1
+            self._dispatch(time.monotonic())
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Return per-class requests admitted, queued, in flight and queueing delay percentiles (seconds)."""
+        snapshot: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            for priority, stats in self._stats.items():
+                delays = sorted(stats.delays)
+                entry: Dict[str, float] = {
+                    "requests": stats.requests,
+                    "queued": stats.queued,
+                    "in_flight": stats.in_flight,
+                    "waiting": sum(1 for w in self._waiters if PRIORITIES[w.rank] == priority),
+                    "delay_max": stats.max_delay,
+                }
+                for name, p in (("delay_p50", 0.5), ("delay_p99", 0.99)):
+                    entry[name] = delays[min(len(delays) - 1, int(p * len(delays)))] if delays else 0.0
+                snapshot[priority] = entry
+        return snapshot
@@ -0,0 +1,446 @@
+"""Bulk jobs split into shards and processed by any number of workers.
+
+A job lives in a directory. :func:`create_job` reads the input once and
+spreads its records over ``shards`` shard directories with a
+:class:`HashRing` on the record key (the payment ID for ``get``, the
+``transaction_id`` for ``create``), so every record with the same key lands
+in the same shard, is handled by one worker at a time and keeps its order.
+
+:func:`work` runs in as many processes, on as many hosts, as needed; they
+only share the job directory (a network file system for several hosts). A
+worker takes a lease on a shard by creating its ``lease`` file, renews it
+while processing, and moves on to the next free shard when done. Leases of
+workers that died expire after ``lease_ttl`` seconds and are taken over.
+Each worker appends results to a file of its own in the shard directory;
+those files are the shard's checkpoint, so a worker taking over skips the
+records already done. A record completed just before its worker died but not
+yet written is processed again, so use ``transaction_id`` to make ``create``
+retries safe. Finished shards get a ``done`` file.
+
+:func:`merge` then combines the shards' results in input order, one result
+per record. Lease expiry compares wall-clock times written by different
+hosts, so keep their clocks in sync (NTP) and ``lease_ttl`` well above
+their skew.
+"""
+
+import bisect
+import glob
+import hashlib
+import heapq
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from typing import IO, Any, Callable, Dict, Generator, Iterable, Iterator, List, Optional, Sequence
+
+from acoriss_payment_gateway.cli import Item, Result, Stats, _Output, operation_for, run
+from acoriss_payment_gateway.client import PaymentGatewayClient
+
+JOB_FILE = "job.json"
+COMMANDS = ("get", "create")
+
+
+def _hash(value: str) -> int:
+    # Stable across processes and hosts, unlike hash()
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hashing of keys onto nodes.
+
+    Each node owns ``vnodes`` points on a ring of 64-bit hashes, and a key
+    belongs to the node owning the first point at or after the key's hash.
+    Adding or removing a node only moves the keys of that node.
+    """
+
+    def __init__(self, nodes: Sequence[str], vnodes: int = 128) -> None:
+        """Initialize the ring.
+
+        Args:
+            nodes: Node names (e.g. shard names or hosts)
+            vnodes: Points per node; more spread keys more evenly
+
+        Raises:
+            ValueError: If there are no nodes
+        """
+        if not nodes:
+            raise ValueError("a hash ring needs at least one node")
+        self.nodes = list(nodes)
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes))
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def node_for(self, key: str) -> str:
+        """Return the node that ``key`` belongs to."""
+        index = bisect.bisect_left(self._hashes, _hash(key))
+        return self._owners[index % len(self._owners)]
+
+
+def _shard_names(shards: int) -> List[str]:
+    return [f"{shard:04d}" for shard in range(shards)]
+
+
+def create_job(directory: str, command: str, items: Iterable[Item], shards: int = 64, vnodes: int = 128) -> int:
+    """Split input records into the shards of a new job.
+
+    Args:
+        directory: Job directory; created if needed, and must not hold a job already
+        command: ``"get"`` (records are payment IDs) or ``"create"`` (``create_session`` arguments)
+        items: Input records, e.g. from :func:`~acoriss_payment_gateway.cli.read_ids`
+        shards: Number of shards; use several per worker so work evens out
+        vnodes: Hash ring points per shard
+
+    Returns:
+        The number of records
+
+    Raises:
+        ValueError: If the command or shard count is invalid or the job exists
+    """
+    if command not in COMMANDS:
+        raise ValueError(f"command must be one of {', '.join(COMMANDS)}")
+    if shards < 1:
+        raise ValueError("shards must be positive")
+    if os.path.exists(os.path.join(directory, JOB_FILE)):
+        raise ValueError(f"{directory} already holds a job")
+    names = _shard_names(shards)
+    ring = HashRing(names, vnodes)
+    files: Dict[str, IO[str]] = {}
+    count = 0
+    try:
+        for name in names:
+            os.makedirs(os.path.join(directory, name), exist_ok=True)
+            files[name] = open(os.path.join(directory, name, "input.ndjson"), "w", encoding="utf-8")
+        for item in items:
+            files[ring.node_for(item.key)].write(json.dumps(item._asdict(), separators=(",", ":")) + "\n")
+            count += 1
+    finally:
+        for file in files.values():
+            file.close()
+    # Written last: workers ignore a directory until the job file exists
+    job = {"command": command, "shards": shards, "vnodes": vnodes, "items": count}
+    with open(os.path.join(directory, JOB_FILE + ".tmp"), "w", encoding="utf-8") as file:
+        json.dump(job, file)
+    os.replace(os.path.join(directory, JOB_FILE + ".tmp"), os.path.join(directory, JOB_FILE))
+    return count
+
+
+def load_job(directory: str) -> Dict[str, Any]:
+    """Return a job's settings: its command, shard count, hash ring points and record count.
+
+    Raises:
+        ValueError: If the directory holds no job
+    """
+    path = os.path.join(directory, JOB_FILE)
+    if not os.path.exists(path):
+        raise ValueError(f"{directory} holds no job")
+    with open(path, encoding="utf-8") as file:
+        job: Dict[str, Any] = json.load(file)
+    return job
+
+
+class ShardLease:
+    """Time-limited claim on a shard, held through a ``lease`` file.
+
+    The file is created with ``link()``, which fails if it exists, so only one
+    worker acquires a free shard. An expired lease is moved aside with
+    ``rename()``, which only one contender can do, before being re-acquired.
+    Renewal and release move the lease aside the same way before replacing or
+    removing it, so they never touch a lease another worker has taken over.
+    """
+
+    def __init__(self, directory: str, owner: str, ttl: float) -> None:
+        """Initialize the lease (not yet acquired).
+
+        Args:
+            directory: Shard directory
+            owner: Unique worker name
+            ttl: Seconds the lease lasts without renewal
+        """
+        self.path = os.path.join(directory, "lease")
+        self.owner = owner
+        self.ttl = ttl
+
+    def _read(self, path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path or self.path, encoding="utf-8") as file:
+                lease: Dict[str, Any] = json.load(file)
+                return lease
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            return {}  # corrupted: treated as expired
+
+    def _write_temp(self) -> str:
+        temp = f"{self.path}.{self.owner}.tmp"
+        with open(temp, "w", encoding="utf-8") as file:
+            json.dump({"owner": self.owner, "expires": time.time() + self.ttl}, file)
+        return temp
+
+    def acquire(self) -> bool:
+        """Take the lease if it is free or expired.
+
+        Returns:
+            Whether this worker now holds the lease
+        """
+        temp = self._write_temp()
+        try:
+            try:
+                os.link(temp, self.path)
+                return True
+            except FileExistsError:
+                pass
+            current = self._read()
+            if current is None or current.get("expires", 0) > time.time():
+                return False
+            aside = f"{self.path}.{self.owner}.expired"
+            try:
+                os.rename(self.path, aside)
+            except FileNotFoundError:
+                return False  # another worker got there first
+            try:
+                if self._read(aside) != current:
+                    # Another worker re-acquired the lease in between: put its lease back
+                    try:
+                        os.link(aside, self.path)
+                    except FileExistsError:
+                        pass
+                    return False
+            finally:
+                os.unlink(aside)
+            try:
+                os.link(temp, self.path)
+                return True
+            except FileExistsError:
+                return False
+        finally:
+            os.unlink(temp)
+
+    def _take_back(self) -> bool:
+        # Moves the lease aside if this worker holds it. Replacing or deleting it
+        # after a read would race with a worker taking the expired lease over in
+        # between; rename() instead takes whichever file is there, which is then
+        # checked and put back if it belongs to someone else.
+        aside = f"{self.path}.{self.owner}.held"
+        try:
+            os.rename(self.path, aside)
+        except FileNotFoundError:
+            return False
+        try:
+            current = self._read(aside)
+            if current is not None and current.get("owner") == self.owner:
+                return True
+            try:
+                os.link(aside, self.path)
+            except FileExistsError:
+                pass
+            return False
+        finally:
+            os.unlink(aside)
+
+    def renew(self) -> bool:
+        """Extend the lease.
+
+        While the lease is replaced, the shard briefly has no lease file and
+        another worker may acquire it; the lease then counts as lost.
+
+        Returns:
+            False if the lease was lost (taken over after expiring)
+        """
+        if not self._take_back():
+            return False
+        temp = self._write_temp()
+        try:
+            os.link(temp, self.path)
+            return True
+        except FileExistsError:
+            return False
+        finally:
+            os.unlink(temp)
+
+    def release(self) -> None:
+        """Give the lease up, if still held."""
+        self._take_back()
+
+
+def _shard_results(directory: str) -> Iterator[Dict[str, Any]]:
+    # Results of every worker that held the shard; a line cut short by a crash is skipped
+    for path in sorted(glob.glob(os.path.join(directory, "results-*.ndjson"))):
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def _pending_items(directory: str, lost: threading.Event) -> Iterator[Item]:
+    done = {result["position"] for result in _shard_results(directory)}
+    with open(os.path.join(directory, "input.ndjson"), encoding="utf-8") as file:
+        for line in file:
+            if lost.is_set():
+                return
+            item = Item(**json.loads(line))
+            if item.position not in done:
+                yield item
+
+
+def _renew(lease: ShardLease, interval: float, stop: threading.Event, lost: threading.Event) -> None:
+    while not stop.wait(interval):
+        if not lease.renew():
+            lost.set()
+            return
+
+
+def work(
+    directory: str,
+    client: PaymentGatewayClient,
+    owner: Optional[str] = None,
+    concurrency: int = 8,
+    rate: Optional[float] = None,
+    lease_ttl: float = 60.0,
+    wait: bool = True,
+    stats: Optional[Stats] = None,
+) -> Stats:
+    """Process shards of a job until all are finished.
+
+    Args:
+        directory: Job directory
+        client: Client making the requests
+        owner: Unique worker name (default: host name, process ID and a random suffix)
+        concurrency: Requests in flight
+        rate: Maximum requests per second for this worker (default: unlimited)
+        lease_ttl: Seconds after which the shard of a worker that stopped renewing is taken over
+        wait: When the unfinished shards are all leased by other workers, wait for
+            them to finish (taking over any whose lease expires) instead of returning
+        stats: Statistics to update (default: a new ``Stats``)
+
+    Returns:
+        The statistics of this worker
+
+    Raises:
+        ValueError: If the directory holds no job
+    """
+    job = load_job(directory)
+    operation = operation_for(client, job["command"])
+    owner = owner or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    stats = stats or Stats(limiter=client.limiter)
+    names = _shard_names(job["shards"])
+    while True:
+        unfinished = [name for name in names if not os.path.exists(os.path.join(directory, name, "done"))]
+        processed = False
+        for name in unfinished:
+            processed |= _work_shard(
+                os.path.join(directory, name), operation, owner, concurrency, rate, lease_ttl, stats
+            )
+        if not unfinished or (not processed and not wait):
+            return stats
+        if not processed:
+            # Every unfinished shard is leased; wait for them to finish or for a lease to expire
+            time.sleep(min(lease_ttl / 3, 1.0))
+
+
+def _work_shard(
+    shard: str,
+    operation: Callable[[Any], Any],
+    owner: str,
+    concurrency: int,
+    rate: Optional[float],
+    lease_ttl: float,
+    stats: Stats,
+) -> bool:
+    lease = ShardLease(shard, owner, lease_ttl)
+    if os.path.exists(os.path.join(shard, "done")) or not lease.acquire():
+        return False
+    stop, lost = threading.Event(), threading.Event()
+    renewer = threading.Thread(target=_renew, args=(lease, lease_ttl / 3, stop, lost), daemon=True)
+    renewer.start()
+    try:
+        with open(os.path.join(shard, f"results-{owner}.ndjson"), "a", encoding="utf-8") as file:
+            output = _Output(file, "ndjson", ())
+            run(operation, _pending_items(shard, lost), output.write, concurrency, rate, stats=stats)
+        if not lost.is_set():
+            with open(os.path.join(shard, "done"), "w", encoding="utf-8") as file:
+                file.write(owner + "\n")
+    finally:
+        stop.set()
+        renewer.join()
+        if not lost.is_set():
+            lease.release()
+    return True
+
+
+def job_status(directory: str) -> Dict[str, int]:
+    """Return the job's record count and its total, finished and leased shards.
+
+    Raises:
+        ValueError: If the directory holds no job
+    """
+    job = load_job(directory)
+    names = _shard_names(job["shards"])
+    return {
+        "items": job["items"],
+        "shards": len(names),
+        "done": sum(os.path.exists(os.path.join(directory, name, "done")) for name in names),
+        "leased": sum(os.path.exists(os.path.join(directory, name, "lease")) for name in names),
+    }
+
+
+def _sort_shard(directory: str, path: str) -> None:
+    # Writes the shard's results to ``path`` in input order, one per record
+    results: Dict[int, Result] = {}
+    for record in _shard_results(directory):
+        result = Result(**record)
+        # A record processed twice (see the module docs) keeps its successful result
+        if result.position not in results or (result.ok and not results[result.position].ok):
+            results[result.position] = result
+    with open(path, "w", encoding="utf-8") as file:
+        for position in sorted(results):
+            file.write(json.dumps(results[position]._asdict(), separators=(",", ":")) + "\n")
+
+
+def _read_sorted(path: str) -> Generator[Result, None, None]:
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            yield Result(**json.loads(line))
+
+
+def merge(directory: str, output: Callable[[Result], None], partial: bool = False) -> int:
+    """Combine the shards' results in input order, one per record.
+
+    Shards are sorted one at a time into temporary files in the job directory,
+    which are then merged line by line, so memory use is bounded by the
+    largest shard rather than the whole job.
+
+    Args:
+        directory: Job directory
+        output: Called with each result
+        partial: Merge even if some shards are not finished
+
+    Returns:
+        The number of results
+
+    Raises:
+        ValueError: If the directory holds no job, or shards are unfinished and ``partial`` is false
+    """
+    status = job_status(directory)
+    if status["done"] < status["shards"] and not partial:
+        raise ValueError(f"{status['shards'] - status['done']} of {status['shards']} shards are not finished")
+    count = 0
+    with tempfile.TemporaryDirectory(prefix=".merge-", dir=directory) as temp:
+        paths = []
+        for name in _shard_names(status["shards"]):
+            paths.append(os.path.join(temp, name + ".ndjson"))
+            _sort_shard(os.path.join(directory, name), paths[-1])
+        shards = [_read_sorted(path) for path in paths]
+        try:
+            for result in heapq.merge(*shards, key=lambda result: result.position):
+                output(result)
+                count += 1
+        finally:
+            # Close the files before the directory is removed
+            for shard in shards:
+                shard.close()
+    return count
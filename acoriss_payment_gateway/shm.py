@@ -0,0 +1,283 @@
+"""Payment cache shared between processes through a memory-mapped file.
+
+Worker processes on one host each keep their own :class:`PaymentCache`, so a
+hot payment is looked up once per process. :class:`SharedPaymentStore` is a
+fixed-size open-addressing hash table in a memory-mapped file that every
+process maps, so a payment fetched by one worker is served to the others.
+
+Each slot holds a payment ID and its payment as compact JSON (compressed
+with zlib when that is what makes it fit), together with the wall-clock time
+at which it should be refreshed and at which it expires. Payments too large
+for a slot are not shared. Writers take a process-wide lock and an ``fcntl``
+lock on the file, so the store is POSIX only. Readers take no lock: each slot
+starts with a sequence number that writers make odd while they change the
+slot and even again afterwards, and a reader retries when the number was odd
+or changed while it copied the slot (a seqlock).
+"""
+
+import contextlib
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, NamedTuple, Optional, Tuple
+
+from acoriss_payment_gateway import forking
+from acoriss_payment_gateway.sync import ShardedCounters
+from acoriss_payment_gateway.types import RetrievePaymentResponse
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore[assignment]
+
+_MAGIC = b"ACPS"
+_VERSION = 1
+_HEADER = struct.Struct("<4sIII")  # magic, version, slots, slot size
+_HEADER_SIZE = 64
+_SEQ = struct.Struct("<I")
+# seq, key hash (0 = never used), refresh at, expires at, key length, flags, value length
+_SLOT = struct.Struct("<IQddHHI")
+_MAX_KEY = 64
+_VALUE_OFFSET = _SLOT.size + _MAX_KEY
+_COMPRESSED = 1
+# Attempts at reading a slot before a lookup gives up and counts as a miss
+_READ_RETRIES = 100
+
+
+class SharedEntry(NamedTuple):
+    """A payment read from a :class:`SharedPaymentStore`."""
+
+    payment: RetrievePaymentResponse
+    refresh_in: float  # seconds until it should be refreshed (negative when due)
+    expires_in: float  # seconds until it expires
+
+
+class SharedPaymentStore:
+    """Fixed-slot payment hash table in a memory-mapped file. Safe across threads and processes.
+
+    Every process opens the same ``path``; the first one creates the file.
+    """
+
+    def __init__(self, path: str, slots: int = 16384, slot_size: int = 1024, max_probes: int = 8) -> None:
+        """Open the store, creating its file if needed.
+
+        Args:
+            path: File backing the table; put it on a memory file system
+                (e.g. ``/dev/shm``) to keep it off disk
+            slots: Number of slots; ignored when the file exists
+            slot_size: Bytes per slot, including 100 bytes of slot header and
+                key; ignored when the file exists
+            max_probes: Slots searched for a payment ID before giving up; a
+                new payment replaces the one expiring first among them
+
+        Raises:
+            ValueError: If the arguments are out of range or the file is not a store
+            OSError: If the file cannot be opened, or ``fcntl`` is unavailable
+        """
+        if fcntl is None:
+            raise OSError("SharedPaymentStore requires fcntl (POSIX)")
+        if slots < 1 or slot_size < _VALUE_OFFSET + 64 or max_probes < 1:
+            raise ValueError(f"slots and max_probes must be positive and slot_size at least {_VALUE_OFFSET + 64}")
+        self.path = path
+        self.max_probes = max_probes
+        self.counters = ShardedCounters(("hits", "misses", "writes", "evictions", "too_large", "contended"))
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            self.slots, self.slot_size = self._initialize(slots, slot_size)
+            self._mm = mmap.mmap(self._fd, _HEADER_SIZE + self.slots * self.slot_size)
+        except BaseException:
+            os.close(self._fd)
+            raise
+        self._lock = threading.Lock()
+        forking.register(self)
+
+    def _initialize(self, slots: int, slot_size: int) -> Tuple[int, int]:
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            header = os.pread(self._fd, _HEADER.size, 0)
+            if not header:
+                os.ftruncate(self._fd, _HEADER_SIZE + slots * slot_size)
+                os.pwrite(self._fd, _HEADER.pack(_MAGIC, _VERSION, slots, slot_size), 0)
+                return slots, slot_size
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        if len(header) < _HEADER.size:
+            raise ValueError(f"{self.path} is not a payment store")
+        magic, version, slots, slot_size = _HEADER.unpack(header)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{self.path} is not a version {_VERSION} payment store")
+        return slots, slot_size
+
+    def _after_fork(self) -> None:
+        # The mapping stays shared with the parent, which is the point; only the thread lock is replaced
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _hash(key: bytes) -> int:
+        # Stable across processes, unlike hash(); never 0, which marks unused slots
+        return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little") or 1
+
+    def _offset(self, key_hash: int, probe: int) -> int:
+        return _HEADER_SIZE + (key_hash + probe) % self.slots * self.slot_size
+
+    def get(self, payment_id: str) -> Optional[SharedEntry]:
+        """Return a payment unless it is missing or expired.
+
+        Args:
+            payment_id: The payment ID
+
+        Returns:
+            The payment and its refresh and expiry times, or None
+        """
+        key = payment_id.encode("utf-8")
+        key_hash = self._hash(key)
+        mm = self._mm
+        capacity = self.slot_size - _VALUE_OFFSET
+        for probe in range(self.max_probes):
+            offset = self._offset(key_hash, probe)
+            for _ in range(_READ_RETRIES):
+                seq = _SEQ.unpack_from(mm, offset)[0]
+                if seq & 1:
+                    continue  # being written
+                _, slot_hash, refresh_at, expires_at, key_len, flags, value_len = _SLOT.unpack_from(mm, offset)
+                found = False
+                if slot_hash == key_hash:
+                    start = offset + _SLOT.size
+                    found = mm[start : start + min(key_len, _MAX_KEY)] == key
+                    if found:
+                        start = offset + _VALUE_OFFSET
+                        value = mm[start : start + min(value_len, capacity)]
+                if _SEQ.unpack_from(mm, offset)[0] == seq:
+                    break
+            else:
+                self.counters.add("contended")
+                return None
+            if slot_hash == 0:
+                break  # probing never goes past a slot that was never used
+            if found:
+                now = time.time()
+                if now >= expires_at:
+                    break
+                if flags & _COMPRESSED:
+                    value = zlib.decompress(value)
+                self.counters.add("hits")
+                return SharedEntry(json.loads(value), refresh_at - now, expires_at - now)
+        self.counters.add("misses")
+        return None
+
+    def put(
+        self, payment_id: str, payment: RetrievePaymentResponse, expires_in: float, refresh_in: Optional[float] = None
+    ) -> bool:
+        """Store a payment.
+
+        Args:
+            payment_id: The payment ID
+            payment: Payment details
+            expires_in: Seconds until the payment expires
+            refresh_in: Seconds until it should be refreshed; defaults to ``expires_in``
+
+        Returns:
+            Whether it was stored; payments that do not fit in a slot are not
+        """
+        key = payment_id.encode("utf-8")
+        value = json.dumps(payment, separators=(",", ":")).encode("utf-8")
+        flags = 0
+        capacity = self.slot_size - _VALUE_OFFSET
+        if len(value) > capacity:
+            value = zlib.compress(value)
+            flags = _COMPRESSED
+        if len(key) > _MAX_KEY or len(value) > capacity:
+            self.counters.add("too_large")
+            return False
+        now = time.time()
+        refresh_at = now + (expires_in if refresh_in is None else refresh_in)
+        key_hash = self._hash(key)
+        with self._write_lock():
+            offset = self._find_slot(key, key_hash, now)
+            self._write(offset, key_hash, refresh_at, now + expires_in, key, flags, value)
+        self.counters.add("writes")
+        return True
+
+    def _find_slot(self, key: bytes, key_hash: int, now: float) -> int:
+        # Called with the write lock held, so slots do not change underneath
+        mm = self._mm
+        victim, victim_expires = -1, float("inf")
+        for probe in range(self.max_probes):
+            offset = self._offset(key_hash, probe)
+            _, slot_hash, _, expires_at, key_len, _, _ = _SLOT.unpack_from(mm, offset)
+            if slot_hash == 0:
+                return offset if victim < 0 or victim_expires > now else victim
+            if slot_hash == key_hash and mm[offset + _SLOT.size : offset + _SLOT.size + key_len] == key:
+                return offset
+            if expires_at < victim_expires:
+                victim, victim_expires = offset, expires_at
+        if victim_expires > now:
+            self.counters.add("evictions")
+        return victim
+
+    def _write(
+        self, offset: int, key_hash: int, refresh_at: float, expires_at: float, key: bytes, flags: int, value: bytes
+    ) -> None:
+        mm = self._mm
+        writing = (_SEQ.unpack_from(mm, offset)[0] + 1) & 0xFFFFFFFF  # odd until the slot is complete
+        _SEQ.pack_into(mm, offset, writing)
+        _SLOT.pack_into(mm, offset, writing, key_hash, refresh_at, expires_at, len(key), flags, len(value))
+        mm[offset + _SLOT.size : offset + _SLOT.size + len(key)] = key
+        mm[offset + _VALUE_OFFSET : offset + _VALUE_OFFSET + len(value)] = value
+        _SEQ.pack_into(mm, offset, (writing + 1) & 0xFFFFFFFF)
+
+    def invalidate(self, payment_id: Optional[str] = None) -> None:
+        """Drop stored payments.
+
+        Args:
+            payment_id: Payment to drop; all payments when omitted
+        """
+        with self._write_lock():
+            if payment_id is None:
+                for slot in range(self.slots):
+                    self._write(_HEADER_SIZE + slot * self.slot_size, 0, 0.0, 0.0, b"", 0, b"")
+                return
+            key = payment_id.encode("utf-8")
+            key_hash = self._hash(key)
+            for probe in range(self.max_probes):
+                offset = self._offset(key_hash, probe)
+                _, slot_hash, _, _, key_len, _, _ = _SLOT.unpack_from(self._mm, offset)
+                if slot_hash == 0:
+                    break
+                if slot_hash == key_hash and self._mm[offset + _SLOT.size : offset + _SLOT.size + key_len] == key:
+                    # Keep the hash so later slots stay reachable; an expired slot is reused first
+                    self._write(offset, key_hash, 0.0, 0.0, key, 0, b"")
+
+    @contextlib.contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        # Threads queue on the lock, processes on a lockf lock over the file's first byte
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, 0)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, 0)
+
+    def stats(self) -> Dict[str, int]:
+        """Return this process's lookup and write counters.
+
+        ``contended`` counts lookups given up on because the slot kept changing.
+        """
+        return self.counters.totals()
+
+    def close(self) -> None:
+        """Unmap the table and close its file; the file itself is kept for other processes."""
+        if not self._mm.closed:
+            self._mm.close()
+            os.close(self._fd)
+
+    def __enter__(self) -> "SharedPaymentStore":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
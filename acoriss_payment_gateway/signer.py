@@ -3,6 +3,7 @@
 import hashlib
 import hmac
 from abc import ABC, abstractmethod
+from typing import Any, Tuple
 
 
 class SignerInterface(ABC):
@@ -22,7 +23,11 @@ class SignerInterface(ABC):
 
 
 class HmacSha256Signer(SignerInterface):
-    """HMAC-SHA256 signature implementation."""
+    """HMAC-SHA256 signature implementation.
+
+    The keyed hash state is computed once and copied for each signature, so
+    ``sign`` can be called from any number of threads at once.
+    """
 
     def __init__(self, secret: str) -> None:
         """Initialize the signer with a secret key.
@@ -32,6 +37,20 @@ class HmacSha256Signer(SignerInterface):
         """
         self.secret = secret
 
+    @property
+    def secret(self) -> str:
+        """The secret key for HMAC signing."""
+        return self._secret
+
+    @secret.setter
+    def secret(self, secret: str) -> None:
+        self._secret = secret
+        self._mac = hmac.new(secret.encode("utf-8"), digestmod=hashlib.sha256)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # HMAC objects cannot be pickled; rebuild from the secret (e.g. in a process pool)
+        return (type(self), (self._secret,))
+
     def sign(self, data: str) -> str:
         """Sign data using HMAC-SHA256.
 
@@ -41,8 +60,6 @@ class HmacSha256Signer(SignerInterface):
         Returns:
             The HMAC-SHA256 signature as a hex string
         """
-        return hmac.new(
-            self.secret.encode("utf-8"),
-            data.encode("utf-8"),
-            hashlib.sha256,
-        ).hexdigest()
+        mac = self._mac.copy()
+        mac.update(data.encode("utf-8"))
+        return mac.hexdigest()
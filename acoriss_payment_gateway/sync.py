@@ -0,0 +1,106 @@
+"""Low-contention synchronization helpers.
+
+Objects shared by every thread using a client (metrics, caches) must stay
+correct without a global interpreter lock and should not make threads queue
+on one lock for every request. :class:`ShardedCounters` gives each thread its
+own counters and only sums them when read; :class:`StripedLock` serializes
+work per key (e.g. per host) without serializing unrelated keys.
+"""
+
+import threading
+from typing import Dict, Hashable, List, Sequence, Tuple
+
+from acoriss_payment_gateway import forking
+
+
+class ShardedCounters:
+    """Named integer counters updated through per-thread shards.
+
+    Each thread writes only to its own shard, so updates take no lock; reads
+    sum the shards under a lock and may miss increments in progress. Shards
+    of threads that have exited are folded into a running total when new
+    threads register, so short-lived threads do not accumulate.
+    """
+
+    def __init__(self, names: Sequence[str]) -> None:
+        """Initialize all counters to zero.
+
+        Args:
+            names: Counter names; ``shard()`` lists are indexed in this order
+        """
+        self.names = tuple(names)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, List[int]]] = []
+        self._retired = [0] * len(self.names)
+        forking.register(self)
+
+    def shard(self) -> List[int]:
+        """Return the calling thread's counters, indexed like ``names``.
+
+        Only the calling thread may write to the returned list.
+        """
+        try:
+            return self._local.shard  # type: ignore[no-any-return]
+        except AttributeError:
+            pass
+        shard = [0] * len(self.names)
+        with self._lock:
+            self._retire_exited()
+            self._shards.append((threading.current_thread(), shard))
+        self._local.shard = shard
+        return shard
+
+    def add(self, name: str, value: int = 1) -> None:
+        """Add ``value`` to counter ``name``."""
+        self.shard()[self.names.index(name)] += value
+
+    def _after_fork(self) -> None:
+        # Only the forking thread survives in the child; fold the other shards
+        self._lock = threading.Lock()
+        self._retire_exited()
+
+    def _retire_exited(self) -> None:
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                for i, value in enumerate(shard):
+                    self._retired[i] += value
+        self._shards = live
+
+    def totals(self) -> Dict[str, int]:
+        """Return the sum of every counter across threads."""
+        with self._lock:
+            totals = list(self._retired)
+            for _, shard in self._shards:
+                for i, value in enumerate(shard):
+                    totals[i] += value
+        return dict(zip(self.names, totals))
+
+    def value(self, name: str) -> int:
+        """Return the sum of counter ``name`` across threads."""
+        return self.totals()[name]
+
+
+class StripedLock:
+    """A fixed set of locks, one of which is chosen by hashing a key.
+
+    Work on the same key is serialized; work on different keys usually is not
+    (keys sharing a stripe still wait for each other).
+    """
+
+    def __init__(self, stripes: int = 16) -> None:
+        """Initialize the locks.
+
+        Args:
+            stripes: Number of locks
+        """
+        if stripes < 1:
+            raise ValueError("stripes must be at least 1")
+        self._locks = tuple(threading.Lock() for _ in range(stripes))
+
+    def for_key(self, key: Hashable) -> threading.Lock:
+        """Return the lock guarding ``key``."""
+        return self._locks[hash(key) % len(self._locks)]
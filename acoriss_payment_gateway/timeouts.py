@@ -0,0 +1,121 @@
+"""Request timeouts adapted to observed gateway latency.
+
+A fixed timeout has to cover the slowest plausible response, so a call that
+hangs holds its worker for the whole of it. :class:`AdaptiveTimeout` keeps a
+:class:`~acoriss_payment_gateway.metrics.LatencyHistogram` per endpoint and
+gives each call ``multiplier`` times the endpoint's recent ``percentile``
+latency, within ``min_timeout`` and ``max_timeout``. Until an endpoint has
+``min_samples`` recent samples, calls get ``max_timeout``.
+
+Calls that time out are recorded at their timeout, so when the gateway slows
+down the percentile (and the timeout with it) rises instead of cutting off
+ever more requests.
+"""
+
+import threading
+import time
+from typing import Dict, Tuple
+
+from acoriss_payment_gateway import forking
+from acoriss_payment_gateway.metrics import LatencyHistogram
+
+# Failures this close to the timeout are taken to be timeouts rather than e.g. refused connections
+_TIMEOUT_SLACK = 0.9
+
+
+class AdaptiveTimeout:
+    """Per-endpoint timeouts derived from recent latency percentiles. Thread-safe."""
+
+    def __init__(
+        self,
+        percentile: float = 0.99,
+        multiplier: float = 3.0,
+        min_timeout: float = 1.0,
+        max_timeout: float = 15.0,
+        min_samples: int = 50,
+        window: float = 60.0,
+        refresh: float = 1.0,
+    ) -> None:
+        """Initialize the policy.
+
+        Args:
+            percentile: Latency quantile (0-1) the timeout is derived from
+            multiplier: Timeout as a multiple of that latency
+            min_timeout: Shortest timeout, in seconds; leave room for opening
+                new connections, which pooled requests do not pay for
+            max_timeout: Longest timeout, and the timeout used until enough
+                samples are recorded, in seconds
+            min_samples: Recent samples needed before timeouts adapt
+            window: Seconds after which samples start to age out
+            refresh: Seconds between recomputations of an endpoint's timeout
+
+        Raises:
+            ValueError: If the bounds or the percentile are out of range
+        """
+        if not 0 < min_timeout <= max_timeout:
+            raise ValueError("timeouts must satisfy 0 < min_timeout <= max_timeout")
+        if not 0 < percentile <= 1:
+            raise ValueError("percentile must be in (0, 1]")
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.min_samples = min_samples
+        self.window = window
+        self.refresh = refresh
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._timeouts: Dict[str, Tuple[float, float]] = {}  # endpoint -> (timeout, computed at)
+        forking.register(self)
+
+    def _after_fork(self) -> None:
+        self._lock = threading.Lock()
+
+    def histogram(self, endpoint: str) -> LatencyHistogram:
+        """Return the latency histogram of ``endpoint`` (a base URL), creating it if needed."""
+        histogram = self._histograms.get(endpoint)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(endpoint, LatencyHistogram(window=self.window))
+        return histogram
+
+    def timeout(self, endpoint: str) -> float:
+        """Return the timeout for the next call to ``endpoint``, in seconds."""
+        now = time.monotonic()
+        cached = self._timeouts.get(endpoint)
+        if cached is not None and now - cached[1] < self.refresh:
+            return cached[0]
+        histogram = self.histogram(endpoint)
+        if histogram.count < self.min_samples:
+            timeout = self.max_timeout
+        else:
+            timeout = min(
+                self.max_timeout, max(self.min_timeout, self.multiplier * histogram.percentile(self.percentile))
+            )
+        self._timeouts[endpoint] = (timeout, now)
+        return timeout
+
+    def record(self, endpoint: str, latency: float, timeout: float, responded: bool) -> None:
+        """Record the outcome of a call.
+
+        Args:
+            endpoint: Base URL the call went to
+            latency: Seconds until the response (or failure)
+            timeout: Timeout the call was given
+            responded: Whether a response was received
+        """
+        if responded:
+            self.histogram(endpoint).record(latency)
+        elif latency >= timeout * _TIMEOUT_SLACK:
+            self.histogram(endpoint).record(timeout)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Return each endpoint's current timeout and latency histogram summary (seconds)."""
+        with self._lock:
+            endpoints = list(self._histograms)
+        snapshot = {}
+        for endpoint in endpoints:
+            entry = self._histograms[endpoint].snapshot()
+            entry["timeout"] = self.timeout(endpoint)
+            snapshot[endpoint] = entry
+        return snapshot
@@ -0,0 +1,105 @@
+"""TLS session resumption for pooled HTTPS connections."""
+
+import ssl
+import threading
+import weakref
+from typing import Any, Dict, Optional
+
+from acoriss_payment_gateway import forking
+
+
+class _SessionCapturingSocket(ssl.SSLSocket):
+    """SSL socket that hands its session back to the context before closing."""
+
+    context: "SessionResumingContext"
+
+    def close(self) -> None:
+        if isinstance(self.context, SessionResumingContext):
+            self.context._remember(self)
+        super().close()
+
+
+class SessionResumingContext(ssl.SSLContext):
+    """Client ``SSLContext`` that resumes earlier TLS sessions per host.
+
+    New connections to a host offer the most recent session (or TLS 1.3
+    ticket) seen on a previous connection to it, replacing a full handshake
+    with an abbreviated one. Pass it to a transport through ``ssl_context``.
+    """
+
+    sslsocket_class = _SessionCapturingSocket
+
+    def __init__(self, protocol: int = ssl.PROTOCOL_TLS_CLIENT) -> None:
+        """Initialize the context.
+
+        Args:
+            protocol: SSL protocol (default: ``PROTOCOL_TLS_CLIENT``)
+        """
+        self._sessions: Dict[str, ssl.SSLSession] = {}
+        self._sockets: weakref.WeakValueDictionary[str, ssl.SSLSocket] = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        self.handshakes = 0
+        self.resumed = 0
+        forking.register(self)
+
+    def _after_fork(self) -> None:
+        # Sessions can be resumed from any process; the parent's sockets cannot be read
+        self._lock = threading.Lock()
+        self._sockets = weakref.WeakValueDictionary()
+
+    def _remember(self, sock: ssl.SSLSocket) -> None:
+        """Store the session of a live socket for its host."""
+        try:
+            session = sock.session
+        except (ValueError, OSError):
+            return
+        if session is not None and sock.server_hostname:
+            with self._lock:
+                self._sessions[sock.server_hostname] = session
+
+    def _session_for(self, host: str) -> Optional[ssl.SSLSession]:
+        """Return the newest known session for ``host``."""
+        with self._lock:
+            live = self._sockets.get(host)
+        if live is not None:
+            # TLS 1.3 tickets arrive after the handshake, so re-read the latest socket
+            self._remember(live)
+        with self._lock:
+            return self._sessions.get(host)
+
+    def wrap_socket(  # type: ignore[override]
+        self,
+        sock: Any,
+        server_side: bool = False,
+        do_handshake_on_connect: bool = True,
+        suppress_ragged_eofs: bool = True,
+        server_hostname: Optional[str] = None,
+        session: Optional[ssl.SSLSession] = None,
+    ) -> ssl.SSLSocket:
+        if session is None and server_hostname and not server_side:
+            session = self._session_for(server_hostname)
+        ssl_sock = super().wrap_socket(
+            sock,
+            server_side=server_side,
+            do_handshake_on_connect=do_handshake_on_connect,
+            suppress_ragged_eofs=suppress_ragged_eofs,
+            server_hostname=server_hostname,
+            session=session,
+        )
+        if server_hostname and not server_side:
+            with self._lock:
+                self.handshakes += 1
+                self.resumed += int(bool(ssl_sock.session_reused))
+                self._sockets[server_hostname] = ssl_sock
+        return ssl_sock
+
+
+def create_session_resuming_context() -> SessionResumingContext:
+    """Create a verifying client context with TLS session resumption.
+
+    Returns:
+        Context with default CA certificates loaded and hostname checking on
+    """
+    context = SessionResumingContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.load_default_certs()
+    return context
@@ -0,0 +1,627 @@
+"""HTTP transport interface and implementations.
+
+The client talks to the gateway through a :class:`Transport`, so the HTTP
+engine can be chosen per deployment. HTTP libraries are imported when a
+transport is created, never at module import time.
+"""
+
+import json
+import threading
+import time
+import warnings
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from fnmatch import fnmatchcase
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from urllib.parse import urlsplit
+
+from acoriss_payment_gateway import forking
+from acoriss_payment_gateway.compression import CHUNK_SIZE, DecompressionError, accept_encoding_header, read_body
+from acoriss_payment_gateway.dns import DNSCache
+from acoriss_payment_gateway.errors import APIError
+from acoriss_payment_gateway.tls import create_session_resuming_context
+
+if TYPE_CHECKING:
+    import httpx
+    import requests
+    import urllib3
+
+
+class TransportResponse:
+    """HTTP response returned by a transport."""
+
+    def __init__(
+        self,
+        status: int,
+        headers: Mapping[str, str],
+        content: bytes = b"",
+        http_version: str = "HTTP/1.1",
+        wire_size: Optional[int] = None,
+    ) -> None:
+        """Initialize the response.
+
+        Args:
+            status: HTTP status code
+            headers: Response headers
+            content: Response body (decoded)
+            http_version: Protocol the response was received over
+            wire_size: Body bytes received on the wire, if known
+        """
+        self.status = status
+        self.headers = headers
+        self._content = content
+        self.http_version = http_version
+        self._wire_size = wire_size
+
+    @classmethod
+    def from_json(
+        cls,
+        data: Any,
+        status: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> "TransportResponse":
+        """Build a JSON response.
+
+        Args:
+            data: JSON-serializable body
+            status: HTTP status code (default: 200)
+            headers: Optional extra headers
+
+        Returns:
+            The response
+        """
+        return cls(
+            status,
+            {"Content-Type": "application/json", **(headers or {})},
+            json.dumps(data, separators=(",", ":")).encode("utf-8"),
+        )
+
+    @property
+    def content(self) -> bytes:
+        """Response body as bytes."""
+        return self._content
+
+    @property
+    def decoded_size(self) -> int:
+        """Body size in bytes after decompression."""
+        return len(self.content)
+
+    @property
+    def wire_size(self) -> int:
+        """Body bytes received on the wire (the decoded size when unknown)."""
+        return self._wire_size if self._wire_size is not None else self.decoded_size
+
+    @property
+    def text(self) -> str:
+        """Response body decoded as UTF-8."""
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        """Decode the response body as JSON.
+
+        Raises:
+            ValueError: If the body is not valid JSON
+        """
+        return json.loads(self.content)
+
+
+class Transport(ABC):
+    """Abstract base class for HTTP transports."""
+
+    @abstractmethod
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        body: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> TransportResponse:
+        """Send an HTTP request.
+
+        Args:
+            method: HTTP method ("GET" or "POST")
+            url: Absolute request URL
+            headers: Request headers
+            body: Optional request body (already serialized and signed)
+            timeout: Optional timeout in seconds
+
+        Returns:
+            The HTTP response, whatever its status code
+
+        Raises:
+            APIError: If no response could be obtained (connection, timeout, ...)
+        """
+        pass
+
+    def warmup(self, url: str, connections: int = 1) -> int:
+        """Open connections to ``url`` ahead of the first request.
+
+        Args:
+            url: URL whose host should be connected to
+            connections: Number of pooled connections to open
+
+        Returns:
+            Number of connections opened (0 if the transport does not pool)
+
+        Raises:
+            APIError: If a connection cannot be established
+        """
+        return 0
+
+    def close(self) -> None:  # noqa: B027
+        """Release connections held by the transport."""
+
+
+def _warm_pool(pool: Any, connections: int) -> int:
+    """Connect up to ``connections`` idle connections in a urllib3 pool."""
+    import urllib3
+
+    opened: List[Any] = []
+    try:
+        for _ in range(min(connections, pool.pool.maxsize)):
+            conn = pool._get_conn()
+            opened.append(conn)
+            if getattr(conn, "sock", None) is None:
+                conn.connect()
+    except (urllib3.exceptions.HTTPError, OSError) as e:
+        raise APIError(message=f"Connection warm-up failed: {e}") from e
+    finally:
+        for conn in opened:
+            pool._put_conn(conn)
+    return len(opened)
+
+
+def _dns_cached_pool_classes(dns_cache: DNSCache) -> Dict[str, Any]:
+    """Build urllib3 pool classes whose connections resolve hosts through ``dns_cache``."""
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+    from urllib3.exceptions import NewConnectionError
+
+    class CachedResolutionMixin:
+        _dns_host: str
+        port: int
+
+        def _new_conn(self) -> Any:
+            host = self._dns_host
+            try:
+                address = dns_cache.resolve(host, self.port)
+            except OSError as e:
+                raise NewConnectionError(self, f"Failed to resolve {host}: {e}") from e  # type: ignore[arg-type]
+            # Connect to the cached address; TLS still verifies and sends SNI for ``host``
+            self._dns_host = address
+            try:
+                return super()._new_conn()  # type: ignore[misc]
+            finally:
+                self._dns_host = host
+
+    class CachedHTTPConnection(CachedResolutionMixin, HTTPConnection):
+        pass
+
+    class CachedHTTPSConnection(CachedResolutionMixin, HTTPSConnection):
+        pass
+
+    class CachedHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = CachedHTTPConnection
+
+    class CachedHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = CachedHTTPSConnection
+
+    return {"http": CachedHTTPConnectionPool, "https": CachedHTTPSConnectionPool}
+
+
+def _with_accept_encoding(headers: Mapping[str, str], accept_encoding: Optional[str]) -> Mapping[str, str]:
+    """Add an ``Accept-Encoding`` header when compression is configured."""
+    if accept_encoding is None:
+        return headers
+    return {**headers, "Accept-Encoding": accept_encoding}
+
+
+def _read_response_body(
+    status: int,
+    headers: Mapping[str, str],
+    chunks: Iterable[bytes],
+    max_response_size: Optional[int],
+) -> Tuple[bytes, int]:
+    """Decode a streamed response body, converting failures to APIError."""
+    try:
+        return read_body(chunks, headers.get("Content-Encoding"), max_response_size)
+    except DecompressionError as e:
+        raise APIError(message=str(e), status=status, headers=dict(headers)) from e
+
+
+class _RequestsResponse(TransportResponse):
+    """Adapter exposing a ``requests.Response`` as a :class:`TransportResponse`."""
+
+    def __init__(self, response: "requests.Response") -> None:
+        super().__init__(response.status_code, response.headers)
+        self._response = response
+
+    @property
+    def content(self) -> bytes:
+        return self._response.content
+
+    @property
+    def wire_size(self) -> int:
+        # urllib3 counts the bytes it pulled off the socket, before decompression
+        raw = getattr(self._response, "raw", None)
+        wire = raw.tell() if raw is not None and hasattr(raw, "tell") else None
+        return wire if isinstance(wire, int) else self.decoded_size
+
+    @property
+    def text(self) -> str:
+        return self._response.text
+
+    def json(self) -> Any:
+        return self._response.json()
+
+
+class RequestsTransport(Transport):
+    """Transport backed by ``requests``.
+
+    Without a session, every call goes through ``requests.post``/``requests.get``
+    and opens a fresh connection. Pass a ``requests.Session`` to reuse pooled
+    keep-alive connections.
+    """
+
+    def __init__(
+        self,
+        session: Optional["requests.Session"] = None,
+        accept_encoding: Optional[Union[str, Sequence[str]]] = None,
+        max_response_size: Optional[int] = None,
+    ) -> None:
+        """Initialize the transport.
+
+        Args:
+            session: Optional session used to pool connections
+            accept_encoding: Encodings to negotiate (``"auto"`` for all available);
+                responses are then streamed and decoded by the SDK
+            max_response_size: Optional limit on decoded response bodies in bytes
+        """
+        import requests
+
+        self.session = session
+        self._requests = requests
+        self.accept_encoding = accept_encoding_header(accept_encoding) if accept_encoding else None
+        self.max_response_size = max_response_size
+        forking.register(self)
+
+    def _after_fork(self) -> None:
+        if self.session is not None:
+            # Drops the pooled connections inherited from the parent; the session stays usable
+            self.session.close()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        body: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> TransportResponse:
+        http: Any = self.session if self.session is not None else self._requests
+        streamed = self.accept_encoding is not None or self.max_response_size is not None
+        kwargs: Dict[str, Any] = {"headers": _with_accept_encoding(headers, self.accept_encoding), "timeout": timeout}
+        if body is not None:
+            kwargs["data"] = body
+        if streamed:
+            kwargs["stream"] = True
+
+        try:
+            response = getattr(http, method.lower())(url, **kwargs)
+            if not streamed:
+                return _RequestsResponse(response)
+            try:
+                chunks = response.raw.stream(CHUNK_SIZE, decode_content=False)
+                content, wire_size = _read_response_body(
+                    response.status_code, response.headers, chunks, self.max_response_size
+                )
+            finally:
+                response.close()
+        except self._requests.RequestException as e:
+            raise APIError(message=str(e)) from e
+        return TransportResponse(response.status_code, response.headers, content, wire_size=wire_size)
+
+    def warmup(self, url: str, connections: int = 1) -> int:
+        if self.session is None:
+            return 0
+        adapter: Any = self.session.get_adapter(url)
+        if hasattr(adapter, "get_connection_with_tls_context"):
+            # requests >= 2.32 keys pools by the TLS settings of each request
+            settings = self.session.merge_environment_settings(url, {}, None, None, None)
+            prepared = self._requests.Request("GET", url).prepare()
+            pool = adapter.get_connection_with_tls_context(prepared, settings["verify"], cert=settings["cert"])
+        else:
+            pool = adapter.get_connection(url)
+        return _warm_pool(pool, connections)
+
+    def close(self) -> None:
+        if self.session is not None:
+            self.session.close()
+
+
+class Urllib3Transport(Transport):
+    """Transport backed by a ``urllib3.PoolManager``.
+
+    Skips the ``requests`` layer entirely, which trims per-call overhead.
+    """
+
+    def __init__(
+        self,
+        pool_manager: Optional["urllib3.PoolManager"] = None,
+        accept_encoding: Optional[Union[str, Sequence[str]]] = None,
+        max_response_size: Optional[int] = None,
+        dns_cache: Optional[DNSCache] = None,
+        tls_session_resumption: bool = False,
+        **pool_kwargs: Any,
+    ) -> None:
+        """Initialize the transport.
+
+        Args:
+            pool_manager: Optional pre-configured pool manager
+            accept_encoding: Encodings to negotiate (``"auto"`` for all available)
+            max_response_size: Optional limit on decoded response bodies in bytes
+            dns_cache: Optional DNS cache used when opening connections
+            tls_session_resumption: Resume earlier TLS sessions when reconnecting
+                (ignored if ``pool_kwargs`` already has an ``ssl_context``)
+            **pool_kwargs: Arguments for a new ``PoolManager`` (e.g. ``maxsize``)
+        """
+        import urllib3
+
+        self._urllib3 = urllib3
+        if tls_session_resumption:
+            pool_kwargs.setdefault("ssl_context", create_session_resuming_context())
+        self._pool_kwargs = pool_kwargs if pool_manager is None else None
+        self.pool_manager = pool_manager or urllib3.PoolManager(**pool_kwargs)
+        self.dns_cache = dns_cache
+        if dns_cache is not None:
+            self.pool_manager.pool_classes_by_scheme = _dns_cached_pool_classes(dns_cache)
+        self.accept_encoding = accept_encoding_header(accept_encoding) if accept_encoding else None
+        self.max_response_size = max_response_size
+        forking.register(self)
+
+    def _after_fork(self) -> None:
+        if self._pool_kwargs is None:
+            # A caller's pool manager is kept, minus the connections inherited from the parent
+            self.pool_manager.clear()
+            return
+        # A new manager rather than clear(): the old one's lock may have been held at fork time
+        self.pool_manager = self._urllib3.PoolManager(**self._pool_kwargs)
+        if self.dns_cache is not None:
+            self.pool_manager.pool_classes_by_scheme = _dns_cached_pool_classes(self.dns_cache)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        body: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> TransportResponse:
+        try:
+            response = self.pool_manager.request(
+                method,
+                url,
+                body=body.encode("utf-8") if body is not None else None,
+                headers=dict(_with_accept_encoding(headers, self.accept_encoding)),
+                timeout=self._urllib3.Timeout(connect=timeout, read=timeout),
+                retries=False,
+                preload_content=False,
+                decode_content=False,
+            )
+            try:
+                chunks = response.stream(CHUNK_SIZE, decode_content=False)
+                content, wire_size = _read_response_body(
+                    response.status, response.headers, chunks, self.max_response_size
+                )
+            finally:
+                response.release_conn()
+        except self._urllib3.exceptions.HTTPError as e:
+            raise APIError(message=str(e)) from e
+        return TransportResponse(response.status, response.headers, content, wire_size=wire_size)
+
+    def warmup(self, url: str, connections: int = 1) -> int:
+        return _warm_pool(self.pool_manager.connection_from_url(url), connections)
+
+    def close(self) -> None:
+        self.pool_manager.clear()
+        if self.dns_cache is not None:
+            self.dns_cache.stop()
+
+
+class HttpxTransport(Transport):
+    """Transport backed by an ``httpx.Client``.
+
+    With ``http2=True`` (requires ``httpx[http2]``), concurrent calls are
+    multiplexed as streams over a few shared connections when the server
+    negotiates HTTP/2 via ALPN; otherwise the client falls back to HTTP/1.1
+    keep-alive connections.
+    """
+
+    def __init__(
+        self,
+        client: Optional["httpx.Client"] = None,
+        http2: bool = False,
+        max_concurrent_streams: Optional[int] = None,
+        http2_prior_knowledge: bool = False,
+        accept_encoding: Optional[Union[str, Sequence[str]]] = None,
+        max_response_size: Optional[int] = None,
+        **client_kwargs: Any,
+    ) -> None:
+        """Initialize the transport.
+
+        Args:
+            client: Optional pre-configured httpx client
+            http2: Enable HTTP/2 on a new client; falls back to HTTP/1.1 with a
+                warning if the ``h2`` package is not installed
+            max_concurrent_streams: Optional cap on requests in flight through
+                this transport; callers beyond it wait for a free stream
+            http2_prior_knowledge: Speak HTTP/2 without negotiation, e.g. to a
+                cleartext ``http://`` server known to support it (implies ``http2``)
+            accept_encoding: Encodings to negotiate (``"auto"`` for all available);
+                defaults to httpx's own ``Accept-Encoding`` header
+            max_response_size: Optional limit on decoded response bodies in bytes
+            **client_kwargs: Arguments for a new ``httpx.Client`` (e.g. ``limits``)
+        """
+        import httpx
+
+        self._httpx = httpx
+        if client is None:
+            http2 = http2 or http2_prior_knowledge
+            if http2 and not _h2_available():
+                warnings.warn(
+                    "HTTP/2 requires the 'h2' package (pip install httpx[http2]); falling back to HTTP/1.1",
+                    RuntimeWarning,
+                    stacklevel=2,
+                )
+                http2 = http2_prior_knowledge = False
+            if http2_prior_knowledge:
+                client_kwargs["http1"] = False
+            client_kwargs["http2"] = http2
+            self._client_kwargs: Optional[Dict[str, Any]] = client_kwargs
+            client = httpx.Client(**client_kwargs)
+        else:
+            self._client_kwargs = None
+        self.client = client
+        self.max_concurrent_streams = max_concurrent_streams
+        self._streams = threading.BoundedSemaphore(max_concurrent_streams) if max_concurrent_streams else None
+        self.accept_encoding = accept_encoding_header(accept_encoding) if accept_encoding else None
+        self.max_response_size = max_response_size
+        forking.register(self)
+
+    def _after_fork(self) -> None:
+        # httpx cannot drop a client's connections and keep it usable, so only clients this
+        # transport created are replaced; a caller's client must be recreated by the caller
+        if self._client_kwargs is not None:
+            self.client = self._httpx.Client(**self._client_kwargs)
+        if self.max_concurrent_streams:
+            self._streams = threading.BoundedSemaphore(self.max_concurrent_streams)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        body: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> TransportResponse:
+        with self._streams or nullcontext():
+            try:
+                with self.client.stream(
+                    method,
+                    url,
+                    content=body.encode("utf-8") if body is not None else None,
+                    headers=dict(_with_accept_encoding(headers, self.accept_encoding)),
+                    timeout=timeout,
+                ) as response:
+                    content, wire_size = _read_response_body(
+                        response.status_code, response.headers, response.iter_raw(CHUNK_SIZE), self.max_response_size
+                    )
+            except self._httpx.HTTPError as e:
+                raise APIError(message=str(e)) from e
+        return TransportResponse(
+            response.status_code, response.headers, content, response.http_version, wire_size=wire_size
+        )
+
+    def warmup(self, url: str, connections: int = 1) -> int:
+        # httpx has no hook to pre-open pooled connections; one request opens the
+        # first (for HTTP/2, the only) connection and warms DNS and TLS. The client's
+        # own timeout applies, so a gateway that accepts but never answers cannot hang start-up
+        try:
+            self.client.head(url)
+        except self._httpx.HTTPError as e:
+            raise APIError(message=f"Connection warm-up failed: {e}") from e
+        return 1
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def _h2_available() -> bool:
+    """Return whether the ``h2`` package needed for HTTP/2 is installed."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class MockRequest(NamedTuple):
+    """A request received by :class:`MockTransport`."""
+
+    method: str
+    url: str
+    headers: Mapping[str, str]
+    body: Optional[str]
+
+
+MockResponder = Union[TransportResponse, Callable[[MockRequest], TransportResponse]]
+
+
+class MockTransport(Transport):
+    """In-memory transport that replays canned gateway responses.
+
+    Routes are matched on method and a glob pattern against the end of the
+    URL path, e.g. ``("GET", "/sessions/*")``. Useful for tests and for load
+    testing code built on the SDK without any network.
+    """
+
+    def __init__(
+        self,
+        routes: Optional[Mapping[Tuple[str, str], MockResponder]] = None,
+        latency: float = 0.0,
+    ) -> None:
+        """Initialize the transport.
+
+        Args:
+            routes: Optional mapping of ``(method, path pattern)`` to a response
+                or a callable building one from the request
+            latency: Simulated latency added to each call, in seconds
+        """
+        self.routes: Dict[Tuple[str, str], MockResponder] = {}
+        self.latency = latency
+        self.requests: List[MockRequest] = []
+        for (method, pattern), responder in (routes or {}).items():
+            self.add(method, pattern, responder)
+
+    def add(self, method: str, pattern: str, responder: MockResponder) -> None:
+        """Register a response for a route.
+
+        Args:
+            method: HTTP method
+            pattern: Glob pattern matched against the end of the URL path
+            responder: Response, or callable building one from the request
+        """
+        self.routes[(method.upper(), pattern)] = responder
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        body: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> TransportResponse:
+        received = MockRequest(method.upper(), url, dict(headers), body)
+        self.requests.append(received)
+        if self.latency:
+            time.sleep(self.latency)
+
+        path = urlsplit(url).path
+        for (route_method, pattern), responder in self.routes.items():
+            if route_method == received.method and fnmatchcase(path, "*" + pattern):
+                return responder(received) if callable(responder) else responder
+        return TransportResponse.from_json({"message": f"No mock response for {received.method} {path}"}, status=404)
@@ -1,9 +1,10 @@
 """Type definitions for the Acoriss Payment Gateway SDK."""
 
-from typing import List, Literal, Optional, Protocol, TypedDict
+from typing import List, Literal, Optional, Protocol, TypedDict, Union
 
 Environment = Literal["sandbox", "live"]
 PaymentStatus = Literal["P", "S", "C"]  # P = Pending, S = Succeeded, C = Canceled
+Priority = Literal["high", "normal", "low"]
 
 
 class SignerProtocol(Protocol):
@@ -109,6 +110,7 @@ class ClientConfig(TypedDict, total=False):
     api_key: str
     api_secret: Optional[str]
     environment: Optional[Environment]
-    base_url: Optional[str]
+    base_url: Optional[Union[str, List[str]]]
     signer: Optional[SignerProtocol]
     timeout: Optional[float]
+    priority: Optional[Priority]
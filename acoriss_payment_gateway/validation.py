@@ -0,0 +1,312 @@
+"""Client-side validation of payment session requests.
+
+Checks are compiled once from the TypedDicts in :mod:`acoriss_payment_gateway.types`.
+A generated function with every check inlined answers "is this valid?" without
+calls or allocations per field; only when it says no does a second, slower
+pass walk the request again to build error messages with field paths.
+
+On top of the declared field types, a few gateway rules are enforced:
+required fields, a positive integer ``amount``, a known ISO 4217
+``currency``, a customer ``email``, and services whose ``price * quantity``
+add up to ``amount`` (all in integer minor units).
+"""
+
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
+
+from acoriss_payment_gateway.errors import ValidationError
+from acoriss_payment_gateway.types import CustomerInfo, PaymentSessionRequest, ServiceItem
+
+# Appends problems with ``value`` (found at ``path``) to ``errors``
+Check = Callable[[Any, str, List[str]], None]
+
+CURRENCIES: FrozenSet[str] = frozenset(
+    """
+    AED AFN ALL AMD ANG AOA ARS AUD AWG AZN BAM BBD BDT BGN BHD BIF BMD BND BOB BRL BSD BTN BWP BYN BZD
+    CAD CDF CHF CLP CNY COP CRC CUP CVE CZK DJF DKK DOP DZD EGP ERN ETB EUR FJD FKP GBP GEL GHS GIP GMD
+    GNF GTQ GYD HKD HNL HTG HUF IDR ILS INR IQD IRR ISK JMD JOD JPY KES KGS KHR KMF KPW KRW KWD KYD KZT
+    LAK LBP LKR LRD LSL LYD MAD MDL MGA MKD MMK MNT MOP MRU MUR MVR MWK MXN MYR MZN NAD NGN NIO NOK NPR
+    NZD OMR PAB PEN PGK PHP PKR PLN PYG QAR RON RSD RUB RWF SAR SBD SCR SDG SEK SGD SHP SLE SOS SRD SSP
+    STN SVC SYP SZL THB TJS TMT TND TOP TRY TTD TWD TZS UAH UGX USD UYU UZS VES VND VUV WST XAF XCD XCG
+    XOF XPF YER ZAR ZMW ZWG
+    """.split()
+)
+"""ISO 4217 codes of circulating currencies."""
+
+# Fields that must be present, beyond what the (total=False) TypedDicts declare
+_REQUIRED: Dict[type, Tuple[str, ...]] = {
+    PaymentSessionRequest: ("amount", "currency", "customer"),
+    CustomerInfo: ("email",),
+    ServiceItem: ("name", "price"),
+}
+
+# Value rule applied to a field once its type check passes: (expression over ``{}``, message)
+Rule = Tuple[str, str]
+
+_RULES: Dict[Tuple[type, str], Rule] = {
+    (PaymentSessionRequest, "amount"): ("{} > 0", "must be a positive integer"),
+    (PaymentSessionRequest, "currency"): ("{} in currencies", "must be a known ISO 4217 currency code"),
+    (CustomerInfo, "email"): ('"@" in {}', "must be an email address"),
+    (ServiceItem, "price"): ("{} >= 0", "must not be negative"),
+    (ServiceItem, "quantity"): ("{} >= 1", "must be at least 1"),
+}
+
+_TYPE_NAMES = {int: "an integer", str: "a string", float: "a number", bool: "a boolean"}
+
+
+def _is_typed_dict(tp: Any) -> bool:
+    return isinstance(tp, type) and hasattr(tp, "__total__")
+
+
+def _required(td: type) -> Tuple[str, ...]:
+    return _REQUIRED.get(td, tuple(getattr(td, "__required_keys__", ())))
+
+
+class _FastPath:
+    """Generates the source of a single inlined ``valid(value) -> bool`` function."""
+
+    def __init__(self, namespace: Dict[str, Any]) -> None:
+        self.namespace = namespace
+        self.lines: List[str] = []
+        self.names = 0
+
+    def name(self, prefix: str) -> str:
+        self.names += 1
+        return f"_{prefix}{self.names}"
+
+    def emit(self, line: str, depth: int) -> None:
+        self.lines.append("    " * depth + line)
+
+    def block(self, header: str, depth: int, body: Callable[[], None]) -> None:
+        """Emit ``header`` followed by the statements ``body`` emits one level deeper."""
+        self.emit(header, depth)
+        start = len(self.lines)
+        body()
+        if len(self.lines) == start:
+            self.emit("pass", depth + 1)
+
+    def check(self, tp: Any, expr: str, depth: int) -> None:
+        """Emit statements returning False when ``expr`` is not a valid ``tp``."""
+        origin = get_origin(tp)
+        if origin is Union:
+            args = [arg for arg in get_args(tp) if arg is not type(None)]
+            if len(args) == 1:
+                self.block(f"if {expr} is not None:", depth, lambda: self.check(args[0], expr, depth + 1))
+        elif origin is Literal:
+            allowed = self.name("allowed")
+            self.namespace[allowed] = frozenset(get_args(tp))
+            self.emit(f"if {expr} not in {allowed}: return False", depth)
+        elif origin in (list, List):
+            item = self.name("item")
+            self.emit(f"if type({expr}) is not list: return False", depth)
+            self.block(f"for {item} in {expr}:", depth, lambda: self.check(get_args(tp)[0], item, depth + 1))
+        elif _is_typed_dict(tp):
+            self.typed_dict(tp, expr, depth)
+        elif tp is float:
+            self.emit(f"if type({expr}) not in (int, float): return False", depth)
+        elif tp in _TYPE_NAMES:
+            # Exact type checks: bool (an int subclass) and other subclasses fall through to the slow pass
+            self.emit(f"if type({expr}) is not {tp.__name__}: return False", depth)
+
+    def typed_dict(self, td: type, expr: str, depth: int) -> None:
+        required = _required(td)
+        self.emit(f"if type({expr}) is not dict: return False", depth)
+        for name, tp in get_type_hints(td).items():
+            var = self.name("v")
+            rule = _RULES.get((td, name))
+            if get_origin(tp) is Union and type(None) in get_args(tp):
+                # None was handled by the presence check below
+                args = [arg for arg in get_args(tp) if arg is not type(None)]
+                tp = args[0] if len(args) == 1 else Any
+
+            def field(tp: Any = tp, var: str = var, rule: Optional[Rule] = rule, depth: int = depth) -> None:
+                self.check(tp, var, depth)
+                if rule is not None:
+                    self.emit(f"if not ({rule[0].format(var)}): return False", depth)
+
+            self.emit(f"{var} = {expr}.get({name!r})", depth)
+            if name in required:
+                self.emit(f"if {var} is None: return False", depth)
+                field()
+            else:
+                self.block(f"if {var} is not None:", depth, lambda: field(depth=depth + 1))
+
+    def compile(self, td: type) -> Callable[[Any], bool]:
+        self.emit("def valid(value):", 0)
+        self.typed_dict(td, "value", 1)
+        self.emit("return True", 1)
+        exec(compile("\n".join(self.lines), f"<validator {td.__name__}>", "exec"), self.namespace)
+        return self.namespace["valid"]  # type: ignore[no-any-return]
+
+
+def _compile_type(tp: Any, namespace: Dict[str, Any]) -> Check:
+    """Build a check reporting every problem with values of type ``tp``."""
+    origin = get_origin(tp)
+    if origin is Union:
+        args = [arg for arg in get_args(tp) if arg is not type(None)]
+        inner = _compile_type(args[0] if len(args) == 1 else Any, namespace)
+
+        def check_optional(value: Any, path: str, errors: List[str]) -> None:
+            if value is not None:
+                inner(value, path, errors)
+
+        return check_optional
+
+    if origin is Literal:
+        allowed = frozenset(get_args(tp))
+
+        def check_literal(value: Any, path: str, errors: List[str]) -> None:
+            if value not in allowed:
+                errors.append(f"{path}: must be one of {sorted(allowed)}")
+
+        return check_literal
+
+    if origin in (list, List):
+        item = _compile_type(get_args(tp)[0], namespace)
+
+        def check_list(value: Any, path: str, errors: List[str]) -> None:
+            if not isinstance(value, list):
+                errors.append(f"{path}: must be a list")
+                return
+            for i, element in enumerate(value):
+                item(element, f"{path}[{i}]", errors)
+
+        return check_list
+
+    if _is_typed_dict(tp):
+        return _compile_typed_dict(tp, namespace)
+
+    if tp in _TYPE_NAMES:
+        expected = _TYPE_NAMES[tp]
+        # bool is a subclass of int, but True is not an amount
+        rejected: Tuple[type, ...] = (bool,) if tp in (int, float) else ()
+        accepted: Tuple[type, ...] = (int, float) if tp is float else (tp,)
+
+        def check_type(value: Any, path: str, errors: List[str]) -> None:
+            if not isinstance(value, accepted) or isinstance(value, rejected):
+                errors.append(f"{path}: must be {expected}")
+
+        return check_type
+
+    return lambda value, path, errors: None
+
+
+def _compile_typed_dict(td: type, namespace: Dict[str, Any]) -> Check:
+    """Build a check reporting every problem with mappings shaped like ``td``."""
+    required = _required(td)
+    fields: List[Tuple[str, Check, Optional[Tuple[Callable[[Any], bool], str]]]] = []
+    for name, tp in get_type_hints(td).items():
+        rule = _RULES.get((td, name))
+        checked_rule = None
+        if rule is not None:
+            predicate: Callable[[Any], bool] = eval(f"lambda v: {rule[0].format('v')}", namespace)
+            checked_rule = (predicate, rule[1])
+        fields.append((name, _compile_type(tp, namespace), checked_rule))
+
+    def check_mapping(value: Any, path: str, errors: List[str]) -> None:
+        if not isinstance(value, Mapping):
+            errors.append(f"{path}: must be an object")
+            return
+        prefix = f"{path}." if path else ""
+        for name in required:
+            if value.get(name) is None:
+                errors.append(f"{prefix}{name}: is required")
+        for name, check, rule in fields:
+            field = value.get(name)
+            if field is None:
+                continue
+            count = len(errors)
+            check(field, prefix + name, errors)
+            if rule is not None and len(errors) == count and not rule[0](field):
+                errors.append(f"{prefix}{name}: {rule[1]}")
+
+    return check_mapping
+
+
+class SessionValidator:
+    """Validator for ``create_session`` arguments, compiled once per instance."""
+
+    def __init__(self, currencies: Optional[Iterable[str]] = None, check_totals: bool = True) -> None:
+        """Compile the checks.
+
+        Args:
+            currencies: Accepted currency codes (default: :data:`CURRENCIES`)
+            check_totals: Require service totals to add up to ``amount``
+        """
+        self.currencies = CURRENCIES if currencies is None else frozenset(currencies)
+        self.check_totals = check_totals
+        namespace: Dict[str, Any] = {"currencies": self.currencies}
+        self._valid = _FastPath(namespace).compile(PaymentSessionRequest)
+        self._check = _compile_typed_dict(PaymentSessionRequest, namespace)
+
+    def errors(self, session: Mapping[str, Any], path: str = "") -> List[str]:
+        """Return the problems found in ``session``.
+
+        Args:
+            session: Session request using the same keys as ``create_session``
+            path: Prefix for error paths (e.g. ``"sessions[3]"``)
+
+        Returns:
+            Error messages; empty if the session is valid
+        """
+        if not self._valid(session):
+            errors: List[str] = []
+            self._check(session, path, errors)
+            if errors:
+                return errors
+
+        services = session.get("services")
+        if self.check_totals and services:
+            total = 0
+            for item in services:
+                total += item["price"] * (item.get("quantity") or 1)
+            if total != session["amount"]:
+                prefix = f"{path}." if path else ""
+                return [f"{prefix}services: total {total} does not match amount {session['amount']}"]
+        return []
+
+    def validate(self, session: Mapping[str, Any], path: str = "") -> None:
+        """Check ``session`` and raise if it is invalid.
+
+        Args:
+            session: Session request using the same keys as ``create_session``
+            path: Prefix for error paths
+
+        Raises:
+            ValidationError: If any check fails
+        """
+        errors = self.errors(session, path)
+        if errors:
+            raise ValidationError(errors)
+
+
+_default_validator: Optional[SessionValidator] = None
+
+
+def validate_session(session: Mapping[str, Any]) -> None:
+    """Validate a session request with the default rules.
+
+    Args:
+        session: Session request using the same keys as ``create_session``
+
+    Raises:
+        ValidationError: If any check fails
+    """
+    global _default_validator
+    if _default_validator is None:
+        _default_validator = SessionValidator()
+    _default_validator.validate(session)
@@ -0,0 +1,91 @@
+"""Benchmark the request-path cost of audit logging.
+
+Sends ``--requests`` session creations through ``MockTransport`` (no
+network) without auditing, with a synchronous sink that redacts and writes
+each exchange to a gzip file before returning (syncing to disk with
+``--fsync``), and with ``AuditLog``, which redacts and buffers on the request
+path and leaves the writing to a background thread. Reports the mean and p99
+time per call and, for ``AuditLog``, the time ``close()`` then needs to write
+what is still buffered.
+
+Usage:
+    python benchmarks/bench_audit.py [--requests N] [--fsync]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import tempfile
+import time
+from typing import Optional
+
+from acoriss_payment_gateway.audit import AuditingTransport, AuditLog, AuditRecord, AuditSink, redact
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.transport import MockTransport, Transport, TransportResponse
+
+
+class SyncSink(AuditSink):
+    """Redacts and writes each exchange before the request returns."""
+
+    def __init__(self, path: str, fsync: bool) -> None:
+        self._file = gzip.open(path, "ab")
+        self._fsync = fsync
+
+    def record(self, record: AuditRecord) -> None:
+        self._file.write(json.dumps(redact(record), separators=(",", ":")).encode("utf-8") + b"\n")
+        self._file.flush()
+        if self._fsync and self._file.fileobj is not None:
+            os.fsync(self._file.fileobj.fileno())  # type: ignore[union-attr]
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def run(name: str, transport: Transport, requests: int, sink: Optional[AuditSink]) -> None:
+    client = PaymentGatewayClient(api_key="key", api_secret="secret", transport=transport)
+    timings = []
+    for i in range(requests):
+        start = time.perf_counter()
+        client.create_session(
+            amount=4500,
+            currency="USD",
+            customer={"email": f"user{i}@example.com", "name": "Customer Name", "phone": "+243810000000"},
+            transaction_id=f"tx_{i}",
+            services=[{"name": f"Item {j}", "price": 1500, "quantity": 1} for j in range(3)],
+        )
+        timings.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    client.close()
+    closing = time.perf_counter() - start
+
+    timings.sort()
+    mean = sum(timings) / len(timings)
+    p99 = timings[int(len(timings) * 0.99)]
+    line = f"{name:>10}: mean {mean * 1e6:7.1f} us, p99 {p99 * 1e6:7.1f} us per call"
+    if isinstance(sink, AuditLog):
+        stats = sink.stats()
+        line += f", close {closing * 1000:6.1f} ms, {stats['written']} written, {stats['dropped']} dropped"
+    print(line)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--fsync", action="store_true", help="fsync each entry in the synchronous sink")
+    args = parser.parse_args()
+
+    response = TransportResponse.from_json({"id": "sess_1", "checkoutUrl": "https://checkout.example.com/sess_1"})
+    mock = MockTransport({("POST", "/sessions"): response})
+
+    with tempfile.TemporaryDirectory() as directory:
+        run("none", mock, args.requests, None)
+        sync = SyncSink(os.path.join(directory, "sync.ndjson.gz"), args.fsync)
+        run("sync", AuditingTransport(mock, sync), args.requests, sync)
+        log = AuditLog(os.path.join(directory, "async"), capacity=args.requests)
+        run("AuditLog", AuditingTransport(mock, log), args.requests, log)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark serialization and signing throughput of ``create_sessions``.
+
+Measures the CPU-bound preparation stage only (no network), comparing
+in-process signing with a ``ProcessPoolExecutor`` at increasing worker counts.
+
+Usage:
+    python benchmarks/bench_batch_signing.py [--sessions N] [--services N]
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from acoriss_payment_gateway import PaymentGatewayClient
+
+
+def make_sessions(count: int, services: int) -> List[Dict[str, Any]]:
+    """Build session requests with large ``services`` lists."""
+    return [
+        {
+            "amount": services * 100,
+            "currency": "USD",
+            "customer": {"email": f"user{i}@example.com", "name": f"User {i}"},
+            "transaction_id": f"order_{i}",
+            "services": [
+                {"name": f"Item {j}", "price": 100, "quantity": 1, "description": "x" * 40} for j in range(services)
+            ],
+        }
+        for i in range(count)
+    ]
+
+
+def run(client: PaymentGatewayClient, sessions: List[Dict[str, Any]], workers: Optional[int]) -> float:
+    """Return sessions prepared per second."""
+    if workers is None:
+        start = time.perf_counter()
+        client._prepare_sessions(sessions)  # type: ignore[arg-type]
+        return len(sessions) / (time.perf_counter() - start)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        client._prepare_sessions(sessions[:workers], executor=executor)  # type: ignore[arg-type]  # warm up workers
+        start = time.perf_counter()
+        client._prepare_sessions(sessions, executor=executor)  # type: ignore[arg-type]
+        return len(sessions) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--services", type=int, default=500)
+    args = parser.parse_args()
+
+    client = PaymentGatewayClient(api_key="bench", api_secret="bench-secret")
+    sessions = make_sessions(args.sessions, args.services)
+
+    baseline = run(client, sessions, None)
+    print(f"{'in-process':>12}: {baseline:10.0f} sessions/s")
+    workers = 1
+    cpus = os.cpu_count() or 1
+    while workers <= cpus:
+        rate = run(client, sessions, workers)
+        print(f"{workers:>4} workers: {rate:10.0f} sessions/s  ({rate / baseline:.2f}x)")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark the client's failure path.
+
+Runs ``get_payment`` against the in-memory mock transport while every call
+fails with a 503 carrying a JSON body, and reports the time per failed call
+and the memory held by the raised errors, both when callers only branch on
+``retryable`` and when they read every field (as logging ``repr`` would).
+
+Usage:
+    python benchmarks/bench_error_path.py [--calls N] [--body-size BYTES]
+"""
+
+import argparse
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.errors import APIError
+from acoriss_payment_gateway.transport import MockTransport, TransportResponse
+
+
+def branch_only(error: APIError) -> None:
+    if not error.retryable:
+        raise error
+
+
+def materialize(error: APIError) -> None:
+    repr(error)
+    _ = error.code
+
+
+HANDLERS: Dict[str, Callable[[APIError], None]] = {
+    "branch on retryable": branch_only,
+    "materialize all fields": materialize,
+}
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--body-size", type=int, default=4096)
+    args = parser.parse_args()
+
+    body = {"message": "Service unavailable", "code": "UPSTREAM_DOWN", "detail": "x" * args.body_size}
+    headers = {f"X-Trace-{i}": "0" * 32 for i in range(20)}
+    response = TransportResponse.from_json(body, status=503, headers=headers)
+    client = PaymentGatewayClient(
+        api_key="bench",
+        api_secret="secret",
+        transport=MockTransport({("GET", "/sessions/*"): response}),
+    )
+
+    for name, handle in HANDLERS.items():
+        start = time.perf_counter()
+        for _ in range(args.calls):
+            try:
+                client.get_payment("pay_1")
+            except APIError as e:
+                handle(e)
+        elapsed = time.perf_counter() - start
+
+        # Memory held when errors are kept around (e.g. collected by a batch call)
+        kept: List[APIError] = []
+        tracemalloc.start()
+        for _ in range(1000):
+            try:
+                client.get_payment("pay_1")
+            except APIError as e:
+                handle(e)
+                kept.append(e)
+        held, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"{name:>24}: {elapsed / args.calls * 1e6:7.1f} us/call, {held / len(kept):8.0f} B/error held")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark columnar export against row-by-row conversion.
+
+Generates synthetic payments and compares building a list of flattened row
+dicts (the usual step before creating a dataframe) with streaming them into
+column batches, reporting time and peak traced memory for each, plus CSV
+export and currency totals over the columns.
+
+Usage:
+    python benchmarks/bench_export.py [--payments N] [--chunk-size N]
+"""
+
+import argparse
+import io
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List
+
+from acoriss_payment_gateway.export import CSVWriter, Totals, export_payments, iter_batches
+
+
+def payments(count: int) -> Iterator[Dict[str, Any]]:
+    for i in range(count):
+        yield {
+            "id": f"pay_{i}",
+            "transaction_id": f"tx_{i}",
+            "amount": 4500,
+            "currency": ("USD", "CDF", "EUR")[i % 3],
+            "status": ("P", "S", "C")[i % 3],
+            "expired": False,
+            "service_id": f"srv_{i % 10}",
+            "created_at": f"2025-11-{1 + i % 28:02d}T12:00:00Z",
+            "description": "Order",
+            "customer": {"email": f"user{i}@example.com", "phone": None},
+            "services": [
+                {"id": f"svc_{i}_{j}", "name": "Item", "quantity": 1, "price": 1500, "session_id": f"sess_{i}"}
+                for j in range(3)
+            ],
+        }
+
+
+def row_by_row(count: int, chunk_size: int) -> None:
+    rows: List[Dict[str, Any]] = []
+    service_rows: List[Dict[str, Any]] = []
+    for payment in payments(count):
+        row = {key: value for key, value in payment.items() if key not in ("customer", "services")}
+        row["customer_email"] = payment["customer"]["email"]
+        rows.append(row)
+        for service in payment["services"]:
+            service_rows.append({"payment_id": payment["id"], **service})
+    sums: Dict[str, int] = {}
+    for row in rows:
+        sums[row["currency"]] = sums.get(row["currency"], 0) + row["amount"]
+
+
+def columnar(count: int, chunk_size: int) -> None:
+    aggregation = Totals("currency")
+    for batch, _ in iter_batches(payments(count), chunk_size):
+        aggregation.update(batch)
+
+
+def columnar_csv(count: int, chunk_size: int) -> None:
+    export_payments(payments(count), CSVWriter(io.StringIO()), chunk_size=chunk_size, aggregations=[Totals("currency")])
+
+
+CASES: Dict[str, Callable[[int, int], None]] = {
+    "row dicts + dict totals": row_by_row,
+    "column batches + Totals": columnar,
+    "column batches + CSV": columnar_csv,
+}
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--payments", type=int, default=200_000)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    columnar(10, 10)  # import NumPy (if installed) outside the measurements
+    for name, case in CASES.items():
+        start = time.perf_counter()
+        case(args.payments, args.chunk_size)
+        elapsed = time.perf_counter() - start
+
+        # Separate run: tracing slows allocation-heavy code down
+        tracemalloc.start()
+        case(args.payments, args.chunk_size)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name:>24}: {elapsed:6.2f} s, peak {peak / 1e6:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
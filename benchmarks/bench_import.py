@@ -0,0 +1,49 @@
+"""Benchmark SDK import time using ``python -X importtime``.
+
+Runs each import statement in a fresh interpreter several times and reports
+the median cumulative import time of the top-level module.
+
+Usage:
+    python benchmarks/bench_import.py [--runs N]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import List
+
+STATEMENTS = {
+    "package": ("import acoriss_payment_gateway", "acoriss_payment_gateway"),
+    "signer": ("import acoriss_payment_gateway.signer", "acoriss_payment_gateway.signer"),
+    "client": ("import acoriss_payment_gateway.client", "acoriss_payment_gateway.client"),
+}
+
+
+def cumulative_us(statement: str, module: str) -> int:
+    """Return the cumulative import time of ``module`` in microseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and line.rsplit("|", 1)[1].strip() == module:
+            return int(line.split("|")[1])
+    raise RuntimeError(f"{module} not found in -X importtime output")
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=15)
+    args = parser.parse_args()
+
+    for name, (statement, module) in STATEMENTS.items():
+        samples: List[int] = [cumulative_us(statement, module) for _ in range(args.runs)]
+        print(f"{name:>8}: {statistics.median(samples) / 1000:8.2f} ms  ({statement})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark offline replay of recorded gateway traffic.
+
+Records synthetic session creations and lookups into a cassette (through
+``MockTransport``, so no network is needed), reports the cassette size, then
+replays the recorded requests against a ``ReplayServer`` from several client
+threads and reports throughput. With ``--cassette`` an existing recording is
+replayed instead.
+
+Usage:
+    python benchmarks/bench_replay.py [--requests N] [--threads N] [--speedup X] [--cassette PATH]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List
+
+from acoriss_payment_gateway.cassette import Cassette, Exchange, RecordingTransport, ReplayServer
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.transport import MockRequest, MockTransport, TransportResponse, Urllib3Transport
+
+
+def record(path: str, count: int) -> None:
+    def create(request: MockRequest) -> TransportResponse:
+        payload = json.loads(request.body or "{}")
+        return TransportResponse.from_json(
+            {"id": f"sess_{payload['transactionId']}", "checkoutUrl": "https://checkout.example.com/x", **payload}
+        )
+
+    def lookup(request: MockRequest) -> TransportResponse:
+        payment_id = request.url.rsplit("/", 1)[-1]
+        return TransportResponse.from_json(
+            {"id": payment_id, "amount": 4500, "currency": "USD", "status": "S", "expired": False, "services": []}
+        )
+
+    mock = MockTransport({("POST", "/sessions"): create, ("GET", "/sessions/*"): lookup}, latency=0.0005)
+    client = PaymentGatewayClient(api_key="key", api_secret="secret", transport=RecordingTransport(mock, path))
+    with client:
+        for i in range(count):
+            if i % 4:
+                client.get_payment(f"sess_tx_{i - i % 4}")
+            else:
+                client.create_session(
+                    amount=4500,
+                    currency="USD",
+                    customer={"email": f"user{i}@example.com", "name": "Customer"},
+                    transaction_id=f"tx_{i}",
+                    services=[{"name": f"Item {j}", "price": 1500, "quantity": 1} for j in range(3)],
+                )
+
+
+def replay(path: str, threads: int, speedup: Any) -> None:
+    with Cassette(path) as cassette:
+        exchanges: List[Exchange] = list(cassette)
+    with ReplayServer(path, speedup=speedup) as server:
+        transport = Urllib3Transport(maxsize=threads)
+        base_url = server.url
+
+        def send(exchange: Exchange) -> int:
+            return transport.request(
+                exchange.method, base_url + exchange.path, exchange.request_headers, exchange.request_body
+            ).status
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            statuses = list(pool.map(send, exchanges))
+        elapsed = time.perf_counter() - start
+        transport.close()
+
+    errors = sum(status >= 400 for status in statuses)
+    rate = len(exchanges) / elapsed
+    print(f"replayed {len(exchanges):,} requests on {threads} threads: {rate:,.0f} req/s, {errors} errors")
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--speedup", type=float, default=None)
+    parser.add_argument("--cassette", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.cassette
+        if path is None:
+            path = os.path.join(directory, "traffic.cassette")
+            start = time.perf_counter()
+            record(path, args.requests)
+            elapsed = time.perf_counter() - start
+            with Cassette(path) as cassette:
+                raw = sum(len(e.request_body or "") + len(e.response_body) for e in cassette)
+            size = os.path.getsize(path)
+            print(
+                f"recorded {args.requests:,} exchanges in {elapsed:.2f} s: {size / 1e6:.1f} MB cassette, "
+                f"{raw / 1e6:.1f} MB of bodies ({size / args.requests:.0f} B per exchange)"
+            )
+        replay(path, args.threads, args.speedup)
+
+
+if __name__ == "__main__":
+    main()
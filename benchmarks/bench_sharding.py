@@ -0,0 +1,77 @@
+"""Benchmark sharded bulk lookups by number of worker processes.
+
+Splits ``--records`` payment IDs into ``--shards`` shards, then processes the
+job with 1, 2, 4, ... up to ``--processes`` worker processes, each making
+``--concurrency`` lookups at a time against a gateway that answers in
+``--latency`` seconds (``MockTransport``, no network). Reports the split
+time, and for each worker count the processing throughput and the time
+``merge`` takes to combine the results in input order.
+
+Usage:
+    python benchmarks/bench_sharding.py [--records N] [--shards N] [--processes N]
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from acoriss_payment_gateway.cli import read_ids
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.sharding import create_job, merge, work
+from acoriss_payment_gateway.transport import MockRequest, MockTransport, TransportResponse
+
+
+def worker(directory: str, latency: float, concurrency: int) -> None:
+    def lookup(request: MockRequest) -> TransportResponse:
+        time.sleep(latency)
+        return TransportResponse.from_json({"id": request.url.rsplit("/", 1)[-1], "status": "S"})
+
+    transport = MockTransport({("GET", "/sessions/*"): lookup})
+    client = PaymentGatewayClient(api_key="key", api_secret="secret", transport=transport)
+    work(directory, client, concurrency=concurrency)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--shards", type=int, default=64)
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+    context = multiprocessing.get_context("spawn")
+
+    with tempfile.TemporaryDirectory() as root:
+        processes = 1
+        while processes <= args.processes:
+            directory = os.path.join(root, f"job-{processes}")
+            start = time.perf_counter()
+            create_job(directory, "get", read_ids(iter(f"pay_{i}\n" for i in range(args.records))), args.shards)
+            split = time.perf_counter() - start
+
+            start = time.perf_counter()
+            workers = [
+                context.Process(target=worker, args=(directory, args.latency, args.concurrency))
+                for _ in range(processes)
+            ]
+            for process in workers:
+                process.start()
+            for process in workers:
+                process.join()
+            elapsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            merged = merge(directory, lambda result: None)
+            merging = time.perf_counter() - start
+            print(
+                f"{processes:3d} processes: split {split:5.2f} s, {args.records / elapsed:8.0f} records/s,"
+                f" merge {merging:5.2f} s ({merged} results)"
+            )
+            processes *= 2
+
+
+if __name__ == "__main__":
+    main()
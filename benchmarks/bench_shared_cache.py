@@ -0,0 +1,110 @@
+"""Benchmark per-process payment caches against one shared between processes.
+
+Starts ``--processes`` worker processes, each looking up random payments out
+of ``--payments`` for ``--duration`` seconds through a ``PaymentCache`` over
+a gateway that answers in ``--latency`` seconds (``MockTransport``, no
+network), first with private caches only and then with a
+``SharedPaymentStore`` in ``--directory``. Reports gateway calls summed over
+all processes, the share of lookups answered without the gateway, and the
+p50/p99 lookup latency. Finally it reports the cost of one
+``SharedPaymentStore.get`` hit.
+
+Usage:
+    python benchmarks/bench_shared_cache.py [--processes N] [--payments N] [--duration SECONDS]
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from acoriss_payment_gateway.caching import PaymentCache
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.shm import SharedPaymentStore
+from acoriss_payment_gateway.transport import MockRequest, MockTransport, TransportResponse
+
+PAYMENT: Dict[str, Any] = {
+    "id": "pay_0",
+    "amount": 5000,
+    "currency": "USD",
+    "description": "Order",
+    "transaction_id": "tx_0",
+    "customer": {"email": "customer@example.com", "name": "Customer Name", "phone": "+243810000000"},
+    "created_at": "2026-01-01T00:00:00Z",
+    "expired": False,
+    "services": [{"name": "Item", "price": 2500, "quantity": 2}],
+    "status": "P",
+}
+
+
+def worker(args: argparse.Namespace, store_path: Optional[str], results: Any) -> None:
+    calls = [0]
+
+    def lookup(request: MockRequest) -> TransportResponse:
+        calls[0] += 1
+        time.sleep(args.latency)
+        return TransportResponse.from_json({**PAYMENT, "id": request.url.rsplit("/", 1)[-1]})
+
+    transport = MockTransport({("GET", "/sessions/*"): lookup})
+    client = PaymentGatewayClient(api_key="key", api_secret="secret", transport=transport)
+    shared = SharedPaymentStore(store_path) if store_path else None
+    cache = PaymentCache(client, ttl=args.ttl, shared=shared)
+    timings: List[float] = []
+    deadline = time.monotonic() + args.duration
+    while time.monotonic() < deadline:
+        payment_id = f"pay_{random.randrange(args.payments)}"  # nosec B311 - simulated traffic
+        start = time.perf_counter()
+        cache.get_payment(payment_id)
+        timings.append(time.perf_counter() - start)
+    cache.close()
+    results.put((calls[0], timings))
+
+
+def run(name: str, args: argparse.Namespace, store_path: Optional[str]) -> None:
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(args, store_path, results)) for _ in range(args.processes)]
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    calls = sum(calls for calls, _ in outcomes)
+    timings = sorted(t for _, own in outcomes for t in own)
+    p50, p99 = timings[len(timings) // 2], timings[int(len(timings) * 0.99)]
+    print(
+        f"{name:>7}: {calls:6d} gateway calls, {1 - calls / len(timings):6.1%} of {len(timings)} lookups cached,"
+        f" p50 {p50 * 1e6:6.1f} us, p99 {p99 * 1e6:8.1f} us"
+    )
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--payments", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--ttl", type=float, default=30.0)
+    parser.add_argument("--directory", default="/dev/shm" if os.path.isdir("/dev/shm") else None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.directory) as directory:
+        run("private", args, None)
+        path = os.path.join(directory, "payments")
+        run("shared", args, path)
+
+        with SharedPaymentStore(path) as store:
+            ids = [f"pay_{i}" for i in range(args.payments)]
+            start = time.perf_counter()
+            hits = sum(store.get(payment_id) is not None for payment_id in ids)
+            elapsed = time.perf_counter() - start
+        print(f"SharedPaymentStore.get: {elapsed / len(ids) * 1e6:.1f} us per lookup ({hits} of {len(ids)} hits)")
+
+
+if __name__ == "__main__":
+    main()
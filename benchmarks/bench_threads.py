@@ -0,0 +1,102 @@
+"""Benchmark one client shared by a growing number of threads.
+
+Each thread creates sessions and looks up payments through a shared client on
+an in-memory transport, so the time measured is the SDK's own work: payload
+building, serialization, signing, response decoding and metrics. Throughput
+only scales with threads on a free-threaded interpreter (``python3.13t``,
+``PYTHON_GIL=0``); with the GIL it shows that sharing the client adds no
+contention of its own. A second table compares the sharded request counters
+with a single lock-protected counter under the same thread counts.
+
+Usage:
+    python benchmarks/bench_threads.py [--calls N] [--max-threads N]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.sync import ShardedCounters
+from acoriss_payment_gateway.transport import MockTransport, TransportResponse
+
+
+def run(threads: int, calls: int, func: Callable[[int], None]) -> float:
+    """Return calls per second with ``threads`` threads each making ``calls`` calls."""
+    barrier = threading.Barrier(threads + 1)
+
+    def work(n: int) -> None:
+        barrier.wait()
+        for i in range(calls):
+            func(i)
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = [pool.submit(work, n) for n in range(threads)]
+        barrier.wait()
+        start = time.perf_counter()
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - start
+    return threads * calls / elapsed
+
+
+class LockedCounter:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def add(self) -> None:
+        with self._lock:
+            self.value += 1
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--max-threads", type=int, default=2 * (os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}, {os.cpu_count()} CPUs, GIL {'enabled' if gil else 'disabled'}")
+    counts = [1]
+    while counts[-1] * 2 <= args.max_threads:
+        counts.append(counts[-1] * 2)
+
+    transport = MockTransport(
+        {
+            ("POST", "/sessions"): TransportResponse.from_json({"id": "sess_1", "checkoutUrl": "https://x/sess_1"}),
+            ("GET", "/sessions/*"): TransportResponse.from_json({"id": "pay_1", "amount": 5000, "status": "S"}),
+        }
+    )
+    client = PaymentGatewayClient(api_key="key", api_secret="secret", transport=transport)
+    customer = {"email": "john@example.com", "name": "John Doe"}
+
+    def call(i: int) -> None:
+        if i % 2:
+            client.get_payment(f"pay_{i}")
+        else:
+            client.create_session(amount=5000, currency="USD", customer=customer, transaction_id=f"tx_{i}")
+
+    base = 0.0
+    print("\nshared client")
+    for threads in counts:
+        rate = run(threads, args.calls, call)
+        base = base or rate
+        print(f"{threads:>4} threads: {rate:9.0f} calls/s ({rate / base:4.1f}x)")
+
+    print("\nrequest counter")
+    for threads in counts:
+        locked = LockedCounter()
+        sharded = ShardedCounters(("requests",))
+        locked_rate = run(threads, args.calls * 10, lambda i, counter=locked: counter.add())
+        sharded_rate = run(threads, args.calls * 10, lambda i, counter=sharded: counter.add("requests"))
+        print(f"{threads:>4} threads: locked {locked_rate:11.0f}/s, sharded {sharded_rate:11.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
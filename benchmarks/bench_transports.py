@@ -0,0 +1,103 @@
+"""Benchmark per-call client overhead across transports.
+
+Runs ``get_payment`` sequentially against a local HTTP server (and the
+in-memory mock transport) and reports the mean time per call.
+
+Usage:
+    python benchmarks/bench_transports.py [--calls N]
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict
+
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.transport import (
+    HttpxTransport,
+    MockTransport,
+    RequestsTransport,
+    Transport,
+    TransportResponse,
+    Urllib3Transport,
+)
+
+PAYMENT = {
+    "id": "pay_1",
+    "amount": 5000,
+    "currency": "USD",
+    "transactionId": "tx_1",
+    "customer": {"email": "john@example.com", "phone": None},
+    "createdAt": "2025-11-15T12:00:00Z",
+    "expired": False,
+    "services": [],
+    "status": "S",
+}
+BODY = json.dumps(PAYMENT).encode("utf-8")
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def do_GET(self) -> None:  # noqa: N802
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+
+def requests_session() -> Transport:
+    import requests
+
+    return RequestsTransport(session=requests.Session())
+
+
+def httpx_transport() -> Transport:
+    return HttpxTransport()
+
+
+FACTORIES: Dict[str, Callable[[], Transport]] = {
+    "requests (no session)": RequestsTransport,
+    "requests (session)": requests_session,
+    "urllib3": Urllib3Transport,
+    "httpx": httpx_transport,
+    "mock": lambda: MockTransport({("GET", "/sessions/*"): TransportResponse.from_json(PAYMENT)}),
+}
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/api/v1"
+
+    for name, factory in FACTORIES.items():
+        try:
+            transport = factory()
+        except ImportError as e:
+            print(f"{name:>22}: skipped ({e})")
+            continue
+        with PaymentGatewayClient(api_key="bench", api_secret="secret", base_url=base_url, transport=transport) as c:
+            c.get_payment("pay_1")  # open the connection outside the timed loop
+            start = time.perf_counter()
+            for _ in range(args.calls):
+                c.get_payment("pay_1")
+            elapsed = time.perf_counter() - start
+        print(f"{name:>22}: {elapsed / args.calls * 1e6:8.1f} us/call")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
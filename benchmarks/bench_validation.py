@@ -0,0 +1,55 @@
+"""Benchmark client-side validation against payload serialization.
+
+Times ``SessionValidator.validate`` and the build + JSON serialization that
+``create_session`` performs anyway, for sessions with a growing number of
+service lines, and reports validation cost relative to serialization.
+
+Usage:
+    python benchmarks/bench_validation.py [--calls N]
+"""
+
+import argparse
+import time
+from typing import Any, Callable, Dict
+
+from acoriss_payment_gateway.client import _build_session_payload, _serialize_payload
+from acoriss_payment_gateway.validation import SessionValidator
+
+
+def make_session(services: int) -> Dict[str, Any]:
+    return {
+        "amount": 1500 * max(services, 1),
+        "currency": "USD",
+        "customer": {"email": "john@example.com", "name": "John Doe", "phone": "+243000000000"},
+        "description": "Order 42",
+        "transaction_id": "tx_42",
+        "services": [{"name": f"Service {i}", "price": 1500, "quantity": 1} for i in range(services)],
+    }
+
+
+def per_call(func: Callable[[], object], calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    validator = SessionValidator()
+    for services in (0, 5, 50):
+        session = make_session(services)
+        validate = per_call(lambda s=session: validator.validate(s), args.calls)
+        serialize = per_call(lambda s=session: _serialize_payload(_build_session_payload(**s)), args.calls)
+        print(
+            f"{services:>3} services: validate {validate * 1e6:6.1f} us, serialize {serialize * 1e6:6.1f} us "
+            f"({validate / serialize:.0%} of serialization)"
+        )
+
+
+if __name__ == "__main__":
+    main()
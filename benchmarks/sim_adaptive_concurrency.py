@@ -0,0 +1,126 @@
+"""Simulate adaptive concurrency against a local stub with a capacity knee.
+
+The stub gateway serves ``--capacity`` requests at once at its base latency;
+beyond that latency grows with the number in flight (requests queue), and
+beyond ``--fail-at`` times capacity it answers 503. Each scenario looks up
+``--requests`` payments from a thread pool, first with fixed concurrency and
+then from a wide pool governed by each adaptive limit algorithm, and reports
+throughput, error rate, latency (including time queued for a slot) and where
+the limit settled.
+
+Usage:
+    python benchmarks/sim_adaptive_concurrency.py [--requests N] [--capacity N] [--latency SECONDS]
+"""
+
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.errors import APIError
+from acoriss_payment_gateway.limits import AIMDLimit, ConcurrencyLimiter, GradientLimit
+from acoriss_payment_gateway.transport import Urllib3Transport
+
+
+def knee_server(capacity: int, latency: float, fail_at: float) -> ThreadingHTTPServer:
+    lock = threading.Lock()
+    state = {"active": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+        def do_GET(self) -> None:  # noqa: N802
+            with lock:
+                state["active"] += 1
+                active = state["active"]
+            try:
+                if active > fail_at * capacity:
+                    status, body = 503, {"message": "Overloaded"}
+                else:
+                    time.sleep(latency * max(1.0, active / capacity))
+                    status, body = 200, {"id": self.path.rsplit("/", 1)[-1], "status": "S"}
+            finally:
+                with lock:
+                    state["active"] -= 1
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.request_queue_size = 256
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True).start()
+    return server
+
+
+def scenario(name: str, base_url: str, requests: int, workers: int, limiter: Optional[ConcurrencyLimiter]) -> None:
+    client = PaymentGatewayClient(
+        api_key="key",
+        api_secret="secret",
+        base_url=base_url,
+        transport=Urllib3Transport(maxsize=workers),
+        limiter=limiter,
+    )
+    latencies = []
+
+    def timed(payment_id: str) -> Any:
+        start = time.perf_counter()
+        try:
+            return client.get_payment(payment_id)
+        except APIError as e:
+            return e
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(timed, (f"pay_{i}" for i in range(requests))))
+    elapsed = time.perf_counter() - start
+    client.close()
+
+    errors = sum(isinstance(result, APIError) for result in results)
+    latencies.sort()
+    p50, p99 = latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+    limit = f"limit {limiter.limit:>3}" if limiter is not None else f"fixed {workers:>3}"
+    print(
+        f"{name:>14}: {(requests - errors) / elapsed:7.0f} ok/s, {errors / requests:6.1%} errors,"
+        f" p50 {p50 * 1000:5.1f} ms, p99 {p99 * 1000:6.1f} ms, {limit}"
+    )
+
+
+def main() -> None:
+    """Run the simulation."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--capacity", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--fail-at", type=float, default=2.0)
+    parser.add_argument("--workers", type=int, default=64)
+    args = parser.parse_args()
+
+    server = knee_server(args.capacity, args.latency, args.fail_at)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/api/v1"
+    print(f"stub capacity {args.capacity}, base latency {args.latency * 1000:.0f} ms, 503 beyond {args.fail_at:g}x")
+    try:
+        for workers in (args.capacity // 2, args.capacity, args.workers):
+            scenario("fixed", base_url, args.requests, workers, None)
+        scenario("aimd", base_url, args.requests, args.workers, ConcurrencyLimiter(AIMDLimit()))
+        scenario("gradient", base_url, args.requests, args.workers, ConcurrencyLimiter(GradientLimit()))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Simulate hung gateway calls with static and adaptive timeouts.
+
+A local stub gateway answers lookups in ``--latency`` seconds (plus up to
+50% jitter), except for a ``--hang-rate`` share of requests that it holds
+for ``--hang`` seconds. Each scenario looks up ``--requests`` payments from
+``--workers`` threads, first with the static ``--timeout`` and then with an
+``AdaptiveTimeout`` capped by it, and reports throughput, calls cut off,
+worker time spent in calls that failed, and the timeout the policy settled
+on. Finally it reports the cost of recording one latency sample.
+
+Usage:
+    python benchmarks/sim_adaptive_timeout.py [--requests N] [--hang-rate R] [--hang SECONDS]
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, List, Union
+
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.errors import APIError
+from acoriss_payment_gateway.metrics import LatencyHistogram
+from acoriss_payment_gateway.timeouts import AdaptiveTimeout
+from acoriss_payment_gateway.transport import Urllib3Transport
+
+
+def stub_server(latency: float, hang_rate: float, hang: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+        def do_GET(self) -> None:  # noqa: N802
+            if random.random() < hang_rate:  # nosec B311 - simulated failures, no security use
+                time.sleep(hang)
+            else:
+                time.sleep(latency * (1 + random.random() / 2))  # nosec B311
+            data = json.dumps({"id": self.path.rsplit("/", 1)[-1], "status": "S"}).encode()
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            except OSError:
+                pass  # the client gave up
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.request_queue_size = 256
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True).start()
+    return server
+
+
+def scenario(name: str, base_url: str, args: argparse.Namespace, timeout: Union[float, AdaptiveTimeout]) -> None:
+    client = PaymentGatewayClient(
+        api_key="key",
+        api_secret="secret",
+        base_url=base_url,
+        transport=Urllib3Transport(maxsize=args.workers),
+        timeout=timeout,
+    )
+    failed_time: List[float] = []
+
+    def timed(payment_id: str) -> Any:
+        start = time.perf_counter()
+        try:
+            return client.get_payment(payment_id)
+        except APIError as e:
+            failed_time.append(time.perf_counter() - start)
+            return e
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        list(pool.map(timed, (f"pay_{i}" for i in range(args.requests))))
+    elapsed = time.perf_counter() - start
+    client.close()
+
+    line = (
+        f"{name:>9}: {args.requests / elapsed:6.0f} calls/s, {len(failed_time):4d} cut off,"
+        f" {sum(failed_time):6.1f} worker-s in failed calls"
+    )
+    if isinstance(timeout, AdaptiveTimeout):
+        stats = timeout.snapshot()[base_url]
+        line += f", p99 {stats['p99'] * 1000:.1f} ms -> timeout {stats['timeout'] * 1000:.0f} ms"
+    print(line)
+
+
+def main() -> None:
+    """Run the simulation."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--hang-rate", type=float, default=0.005)
+    parser.add_argument("--hang", type=float, default=3.0)
+    parser.add_argument("--timeout", type=float, default=15.0)
+    args = parser.parse_args()
+
+    server = stub_server(args.latency, args.hang_rate, args.hang)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/api/v1"
+    print(f"stub latency {args.latency * 1000:.0f} ms, {args.hang_rate:.1%} of calls hang for {args.hang:g} s")
+    try:
+        scenario("static", base_url, args, args.timeout)
+        scenario("adaptive", base_url, args, AdaptiveTimeout(min_timeout=0.1, max_timeout=args.timeout))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    histogram = LatencyHistogram()
+    samples = [random.random() for _ in range(100000)]  # nosec B311
+    start = time.perf_counter()
+    for sample in samples:
+        histogram.record(sample)
+    print(f"histogram record: {(time.perf_counter() - start) / len(samples) * 1e9:.0f} ns per sample")
+
+
+if __name__ == "__main__":
+    main()
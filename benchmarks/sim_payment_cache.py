@@ -0,0 +1,91 @@
+"""Simulate hot pending-payment lookups with and without refresh-ahead caching.
+
+``--workers`` threads look up random payments out of ``--payments`` pending
+ones for ``--duration`` seconds, pausing ``--think`` seconds between lookups,
+against a gateway that answers in ``--latency`` seconds (``MockTransport``,
+no network). Three scenarios run: no cache, a
+plain TTL cache (a ``PaymentCache`` without refresh-ahead, stale serving or
+jitter, so callers wait whenever an entry expires), and ``PaymentCache``
+refreshing on ``--refresh-workers`` threads. Reports lookups per second, gateway
+calls, and how many lookups waited for the gateway. Caches are filled before
+the measurement starts.
+
+Usage:
+    python benchmarks/sim_payment_cache.py [--payments N] [--ttl SECONDS] [--latency SECONDS]
+"""
+
+import argparse
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from acoriss_payment_gateway.caching import PaymentCache
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.transport import MockRequest, MockTransport, TransportResponse
+
+
+def run(name: str, args: argparse.Namespace, cache_options: Optional[dict]) -> None:
+    calls = [0]
+
+    def lookup(request: MockRequest) -> TransportResponse:
+        calls[0] += 1
+        time.sleep(args.latency)
+        return TransportResponse.from_json({"id": request.url.rsplit("/", 1)[-1], "status": "P"})
+
+    transport = MockTransport({("GET", "/sessions/*"): lookup})
+    client = PaymentGatewayClient(api_key="key", api_secret="secret", transport=transport)
+    cache = PaymentCache(client, **cache_options) if cache_options is not None else None
+    get_payment = cache.get_payment if cache is not None else client.get_payment
+    if cache is not None:
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            list(pool.map(cache.get_payment, (f"pay_{i}" for i in range(args.payments))))
+    calls[0] = 0
+    timings: List[List[float]] = [[] for _ in range(args.workers)]
+    deadline = time.monotonic() + args.duration
+
+    def worker(index: int) -> None:
+        own = timings[index]
+        while time.monotonic() < deadline:
+            payment_id = f"pay_{random.randrange(args.payments)}"  # nosec B311 - simulated traffic
+            start = time.perf_counter()
+            get_payment(payment_id)
+            own.append(time.perf_counter() - start)
+            time.sleep(args.think)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(args.workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if cache is not None:
+        cache.close()
+
+    samples = [t for own in timings for t in own]
+    waited = sum(1 for t in samples if t >= args.latency / 2)
+    print(
+        f"{name:>13}: {len(samples) / args.duration:9.0f} lookups/s, {calls[0]:5d} gateway calls,"
+        f" {waited:5d} lookups waited for the gateway"
+    )
+
+
+def main() -> None:
+    """Run the simulation."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--payments", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--ttl", type=float, default=1.0)
+    parser.add_argument("--refresh-workers", type=int, default=16)
+    parser.add_argument("--think", type=float, default=0.001, help="seconds each worker pauses between lookups")
+    args = parser.parse_args()
+
+    run("no cache", args, None)
+    run("plain TTL", args, {"ttl": args.ttl, "stale_ttl": 0, "refresh_ahead": 0, "jitter": 0})
+    run("refresh-ahead", args, {"ttl": args.ttl, "stale_ttl": args.ttl, "max_workers": args.refresh_workers})
+
+
+if __name__ == "__main__":
+    main()
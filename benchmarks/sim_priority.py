@@ -0,0 +1,128 @@
+"""Simulate checkout traffic sharing a client with a reconciliation batch.
+
+A local stub gateway serves ``--capacity`` requests at once with ``--latency``
+seconds each, queueing the rest. One client, with a connection pool of the
+same size, runs a batch of ``--lookups`` low-priority ``get_payments`` from a
+wide thread pool while another thread creates a checkout session every
+``--interval`` seconds. The scenario runs without a scheduler, then with a
+``PriorityScheduler`` reserving ``--reserved`` slots for high priority, and
+reports checkout latency, batch throughput and the scheduler's queueing delay
+per class.
+
+Usage:
+    python benchmarks/sim_priority.py [--lookups N] [--capacity N] [--reserved N]
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.scheduling import PriorityScheduler
+from acoriss_payment_gateway.transport import Urllib3Transport
+
+
+def stub_server(capacity: int, latency: float) -> ThreadingHTTPServer:
+    slots = threading.BoundedSemaphore(capacity)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+        def respond(self, body: dict) -> None:
+            with slots:
+                time.sleep(latency)
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self) -> None:  # noqa: N802
+            self.respond({"id": self.path.rsplit("/", 1)[-1], "status": "S"})
+
+        def do_POST(self) -> None:  # noqa: N802
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.respond({"id": "sess_1", "checkoutUrl": "https://checkout.example.com/sess_1"})
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.request_queue_size = 256
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True).start()
+    return server
+
+
+def scenario(name: str, base_url: str, args: argparse.Namespace, scheduler: Optional[PriorityScheduler]) -> None:
+    client = PaymentGatewayClient(
+        api_key="key",
+        api_secret="secret",
+        base_url=base_url,
+        transport=Urllib3Transport(maxsize=args.capacity, block=True),
+        scheduler=scheduler,
+    )
+    client.warmup(args.capacity)
+    done = threading.Event()
+    checkout: List[float] = []
+
+    def checkouts() -> None:
+        while not done.is_set():
+            start = time.perf_counter()
+            client.create_session(amount=1000, currency="USD", customer={"email": "a@example.com"})
+            checkout.append(time.perf_counter() - start)
+            time.sleep(args.interval)
+
+    thread = threading.Thread(target=checkouts)
+    start = time.perf_counter()
+    thread.start()
+    client.get_payments([f"pay_{i}" for i in range(args.lookups)], max_workers=args.workers)
+    elapsed = time.perf_counter() - start
+    done.set()
+    thread.join()
+    client.close()
+
+    checkout.sort()
+    p50, p99 = checkout[len(checkout) // 2], checkout[int(len(checkout) * 0.99)]
+    print(
+        f"{name:>10}: checkout p50 {p50 * 1000:6.1f} ms, p99 {p99 * 1000:6.1f} ms ({len(checkout)} sessions),"
+        f" batch {args.lookups / elapsed:5.0f} lookups/s"
+    )
+    if scheduler is not None:
+        for priority, stats in scheduler.snapshot().items():
+            if stats["requests"]:
+                print(
+                    f"{'':>10}  {priority:>6}: {stats['requests']:5.0f} requests, {stats['queued']:5.0f} queued,"
+                    f" delay p50 {stats['delay_p50'] * 1000:6.1f} ms, p99 {stats['delay_p99'] * 1000:6.1f} ms"
+                )
+
+
+def main() -> None:
+    """Run the simulation."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--capacity", type=int, default=8)
+    parser.add_argument("--reserved", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--interval", type=float, default=0.02)
+    parser.add_argument("--workers", type=int, default=32)
+    args = parser.parse_args()
+
+    server = stub_server(args.capacity, args.latency)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/api/v1"
+    print(f"stub capacity {args.capacity}, latency {args.latency * 1000:.0f} ms, {args.workers} batch threads")
+    try:
+        scenario("shared", base_url, args, None)
+        scenario("scheduled", base_url, args, PriorityScheduler(slots=args.capacity, reserved=args.reserved))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
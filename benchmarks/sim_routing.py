@@ -0,0 +1,103 @@
+"""Simulate routing across gateway edges with different latency profiles.
+
+Starts local stub edges (a fast one, a slow one, and one that goes down part
+way through) and looks up payments through a client routed across all of
+them, then through a client pinned to each edge. Reports throughput, errors,
+latency percentiles and how the routed client spread its requests.
+
+Usage:
+    python benchmarks/sim_routing.py [--requests N] [--workers N]
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Union
+
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.errors import APIError
+from acoriss_payment_gateway.transport import Urllib3Transport
+
+
+def edge(name: str, latency: float, state: Dict[str, bool]) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+        def do_GET(self) -> None:  # noqa: N802
+            time.sleep(latency)
+            status = 200 if state.get(name, True) else 503
+            body = json.dumps({"id": self.path.rsplit("/", 1)[-1], "edge": name, "status": "S"}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True).start()
+    return server
+
+
+def scenario(name: str, base_url: Union[str, List[str]], requests: int, workers: int, state: Dict[str, bool]) -> None:
+    client = PaymentGatewayClient(
+        api_key="key", api_secret="secret", base_url=base_url, transport=Urllib3Transport(maxsize=workers)
+    )
+    state["failing"] = True
+    latencies: List[float] = []
+    edges: Counter = Counter()
+
+    def lookup(i: int) -> Any:
+        if i == requests // 3:
+            state["failing"] = False  # the failing edge goes down a third of the way in
+        start = time.perf_counter()
+        try:
+            edges[client.get_payment(f"pay_{i}")["edge"]] += 1  # type: ignore[typeddict-item]
+        except APIError:
+            edges["error"] += 1
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lookup, range(requests)))
+    elapsed = time.perf_counter() - start
+    client.close()
+
+    latencies.sort()
+    p50, p99 = latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+    spread = ", ".join(f"{edge} {count}" for edge, count in sorted(edges.items()))
+    print(f"{name:>8}: {requests / elapsed:6.0f} req/s, p50 {p50 * 1000:5.1f} ms, p99 {p99 * 1000:6.1f} ms ({spread})")
+
+
+def main() -> None:
+    """Run the simulation."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    state: Dict[str, bool] = {}
+    profiles = {"fast": 0.002, "slow": 0.02, "failing": 0.002}
+    servers = {name: edge(name, latency, state) for name, latency in profiles.items()}
+    urls = {name: f"http://127.0.0.1:{server.server_address[1]}/api/v1" for name, server in servers.items()}
+    print("edges: fast 2 ms, slow 20 ms, failing 2 ms until a third of the way in, then 503")
+    try:
+        scenario("routed", list(urls.values()), args.requests, args.workers, state)
+        for name, url in urls.items():
+            scenario(name, url, args.requests, args.workers, state)
+    finally:
+        for server in servers.values():
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
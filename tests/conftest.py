@@ -0,0 +1,78 @@
+"""Shared fixtures for the test suite."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+import pytest
+
+
+class StubGatewayHandler(BaseHTTPRequestHandler):
+    """Minimal stand-in for the gateway's session endpoints."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def _send_json(self, status: int, data: object) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:  # noqa: N802
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length))
+        self._send_json(
+            200,
+            {
+                "id": f"sess_{payload.get('transactionId', '1')}",
+                "amount": payload["amount"],
+                "currency": payload["currency"],
+                "checkoutUrl": "https://checkout.example.com/sess_1",
+                "customer": payload["customer"],
+                "createdAt": "2025-11-15T12:00:00Z",
+                "signature": self.headers.get("X-SIGNATURE"),
+            },
+        )
+
+    def do_GET(self) -> None:  # noqa: N802
+        payment_id = self.path.rsplit("/", 1)[-1]
+        if payment_id == "pay_missing":
+            self._send_json(404, {"message": "Payment not found"})
+            return
+        if payment_id == "pay_slow":
+            time.sleep(0.5)
+        self._send_json(
+            200,
+            {
+                "id": payment_id,
+                "amount": 5000,
+                "currency": "USD",
+                "transactionId": "tx_123",
+                "customer": {"email": "john@example.com", "phone": None},
+                "createdAt": "2025-11-15T12:00:00Z",
+                "expired": False,
+                "services": [],
+                "status": "P",
+            },
+        )
+
+
+@pytest.fixture
+def gateway_server() -> Iterator[str]:
+    """Run a local stub gateway and yield its base URL."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubGatewayHandler)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/api/v1"
+    finally:
+        server.shutdown()
+        server.server_close()
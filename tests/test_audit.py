@@ -0,0 +1,169 @@
+"""Tests for the asynchronous audit log."""
+
+import gzip
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from acoriss_payment_gateway.audit import AuditingTransport, AuditLog, AuditRecord, redact
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.errors import APIError
+from acoriss_payment_gateway.transport import MockTransport, TransportResponse
+
+CUSTOMER = {"email": "jane.doe@example.com", "name": "Jane Doe", "phone": "+243810000000"}
+
+
+def _record(i: int = 0) -> AuditRecord:
+    return AuditRecord(0.0, 0.01, "GET", f"https://gw/api/v1/sessions/pay_{i}", {}, None, 200, b'{"id": "x"}')
+
+
+def _entries(log: AuditLog) -> List[Dict[str, Any]]:
+    return [json.loads(line) for path in log.files() for line in gzip.open(path).read().splitlines()]
+
+
+def test_redact() -> None:
+    """Test that credentials are removed and customer PII is masked in both bodies."""
+    record = AuditRecord(
+        1.0,
+        0.02,
+        "POST",
+        "https://gw/api/v1/sessions",
+        {"X-API-KEY": "live-key", "X-SIGNATURE": "abc123", "Content-Type": "application/json"},
+        json.dumps({"amount": 100, "customer": CUSTOMER}),
+        200,
+        json.dumps({"id": "pay_1", "customer": CUSTOMER, "services": [{"name": "Plan"}]}).encode(),
+    )
+
+    entry = redact(record)
+
+    assert entry["request_headers"] == {"X-API-KEY": "[REDACTED]", "Content-Type": "application/json"}
+    assert entry["request_body"]["customer"] == {"email": "j***@example.com", "name": "***oe", "phone": "***00"}
+    assert entry["response_body"]["customer"] == entry["request_body"]["customer"]
+    assert entry["response_body"]["services"] == [{"name": "Plan"}]
+    assert redact(record._replace(response_body=b"<html>jane</html>"))["response_body"] == "[REDACTED] 17 bytes"
+
+
+def test_client_exchanges_are_written(tmp_path: Path) -> None:
+    """Test that successes, error statuses and failures reach the compressed log without secrets."""
+
+    def unreachable(request: Any) -> TransportResponse:
+        raise APIError(message="Connection refused")
+
+    transport = MockTransport(
+        {
+            ("POST", "/sessions"): TransportResponse.from_json({"id": "sess_1", "customer": CUSTOMER}),
+            ("GET", "/sessions/pay_missing"): TransportResponse.from_json({"message": "Not found"}, status=404),
+            ("GET", "/sessions/pay_down"): unreachable,
+        }
+    )
+    log = AuditLog(str(tmp_path))
+    client = PaymentGatewayClient(
+        api_key="live-key", api_secret="live-secret", transport=AuditingTransport(transport, log)
+    )
+
+    client.create_session(amount=100, currency="USD", customer=CUSTOMER)
+    for payment_id in ("pay_missing", "pay_down"):
+        with pytest.raises(APIError):
+            client.get_payment(payment_id)
+    client.close()
+
+    entries = _entries(log)
+    assert [(e["method"], e["status"]) for e in entries] == [("POST", 200), ("GET", 404), ("GET", None)]
+    assert "Connection refused" in entries[2]["error"]
+    raw = b"".join(gzip.open(path).read() for path in log.files())
+    assert not any(secret in raw for secret in (b"live-key", b"live-secret", b"jane.doe", b"Jane Doe"))
+    assert log.stats() == {"recorded": 3, "dropped": 0, "written": 3, "write_errors": 0, "buffered": 0}
+
+
+class TestBackpressure:
+    """Test behavior when the buffer is full."""
+
+    def test_drop_when_full(self, tmp_path: Path) -> None:
+        """Test that entries beyond capacity are dropped and counted."""
+        log = AuditLog(str(tmp_path), capacity=2)
+        log.stop()
+
+        for i in range(5):
+            log.record(_record(i))
+        log.close()
+
+        assert log.stats()["dropped"] == 3
+        assert [e["url"][-5:] for e in _entries(log)] == ["pay_0", "pay_1"]
+
+    def test_block_when_full(self, tmp_path: Path) -> None:
+        """Test that blocking producers wait for the writer instead of dropping."""
+        log = AuditLog(str(tmp_path), capacity=4, batch_size=2, when_full="block", flush_interval=0.01)
+
+        def produce(start: int) -> None:
+            for i in range(start, start + 50):
+                log.record(_record(i))
+
+        threads = [threading.Thread(target=produce, args=(n * 50,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        log.close()
+
+        assert log.stats()["dropped"] == 0
+        assert len({e["url"] for e in _entries(log)}) == 200
+
+    def test_invalid_when_full(self, tmp_path: Path) -> None:
+        """Test that an unknown full-buffer policy is rejected."""
+        with pytest.raises(ValueError):
+            AuditLog(str(tmp_path), when_full="wait")
+
+
+def test_rotation_keeps_newest_files(tmp_path: Path) -> None:
+    """Test that a new file is started past max_file_bytes and old files are deleted."""
+    log = AuditLog(str(tmp_path), max_file_bytes=1, max_files=2)
+    for i in range(5):
+        log.record(_record(i))
+        log.flush()
+    log.close()
+
+    assert len(log.files()) == 2
+    assert [e["url"][-5:] for e in _entries(log)] == ["pay_3", "pay_4"]
+
+
+def test_buffer_holds_only_redacted_entries(tmp_path: Path) -> None:
+    """Test that credentials and PII are removed before entries are buffered."""
+    log = AuditLog(str(tmp_path))
+    log.stop()
+    record = AuditRecord(
+        0.0,
+        0.01,
+        "POST",
+        "https://gw/api/v1/sessions",
+        {"X-API-KEY": "live-key", "X-SIGNATURE": "abc123"},
+        json.dumps({"customer": CUSTOMER}),
+        200,
+        b"{}",
+    )
+
+    log.record(record)
+    log.record(record._replace(request_headers=None))  # type: ignore[arg-type]
+
+    buffered = json.dumps(list(log._buffer))
+    assert not any(secret in buffered for secret in ("live-key", "abc123", "jane.doe", "Jane Doe"))
+    assert log.stats()["buffered"] == 1 and log.stats()["write_errors"] == 1
+    log.close()
+
+
+def test_prune_leaves_other_processes_files(tmp_path: Path) -> None:
+    """Test that rotation only deletes files this process wrote."""
+    other = tmp_path / f"audit-20250101T000000-{os.getpid() + 1}-0001.ndjson.gz"
+    other.write_bytes(gzip.compress(b""))
+    os.utime(other, (0, 0))
+    log = AuditLog(str(tmp_path), max_file_bytes=1, max_files=1)
+    for i in range(3):
+        log.record(_record(i))
+        log.flush()
+    log.close()
+
+    assert other.exists()
+    assert len(log.files()) == 2
@@ -0,0 +1,161 @@
+"""Tests for cached payment lookups."""
+
+import threading
+import time
+from typing import Dict, List
+
+import pytest
+
+from acoriss_payment_gateway.caching import PaymentCache
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.errors import APIError
+from acoriss_payment_gateway.transport import MockRequest, MockTransport, TransportResponse
+
+
+class FakeGateway:
+    """Serves payments from a dict and records the lookups it receives."""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.payments: Dict[str, Dict[str, str]] = {"pay_1": {"id": "pay_1", "status": "P"}}
+        self.lookups: List[str] = []
+        self.delay = delay
+        self.fail = False
+
+    def __call__(self, request: MockRequest) -> TransportResponse:
+        payment_id = request.url.rsplit("/", 1)[-1]
+        self.lookups.append(payment_id)
+        time.sleep(self.delay)
+        if self.fail:
+            return TransportResponse.from_json({"message": "Unavailable"}, status=503)
+        if payment_id not in self.payments:
+            return TransportResponse.from_json({"message": "Not found"}, status=404)
+        return TransportResponse.from_json(dict(self.payments[payment_id]))
+
+    def client(self) -> PaymentGatewayClient:
+        transport = MockTransport({("GET", "/sessions/*"): self})
+        return PaymentGatewayClient(api_key="test-key", api_secret="test-secret", transport=transport)
+
+
+def _wait_for_refreshes(cache: PaymentCache) -> None:
+    deadline = time.monotonic() + 2
+    while cache.stats()["refreshing"] and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+class TestPaymentCache:
+    """Test fresh, refresh-ahead and stale lookups."""
+
+    def test_fresh_entries_are_served_from_cache(self) -> None:
+        """Test that a fresh entry is looked up once."""
+        gateway = FakeGateway()
+        with PaymentCache(gateway.client()) as cache:
+            first = cache.get_payment("pay_1")
+            second = cache.get_payment("pay_1")
+
+        assert first is second
+        assert gateway.lookups == ["pay_1"]
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    def test_refresh_ahead_serves_cached_value(self) -> None:
+        """Test that an entry near expiry is served at once and refreshed in the background."""
+        gateway = FakeGateway(delay=0.05)
+        with PaymentCache(gateway.client(), ttl=0.1, refresh_ahead=0.5, jitter=0) as cache:
+            cache.get_payment("pay_1")
+            gateway.payments["pay_1"]["status"] = "S"
+            time.sleep(0.06)
+
+            start = time.perf_counter()
+            payment = cache.get_payment("pay_1")
+            assert time.perf_counter() - start < 0.03
+            assert payment["status"] == "P"
+
+            _wait_for_refreshes(cache)
+            assert cache.get_payment("pay_1")["status"] == "S"
+
+        assert gateway.lookups == ["pay_1", "pay_1"]
+        assert cache.stats()["refreshes"] == 1
+
+    def test_one_refresh_per_entry(self) -> None:
+        """Test that concurrent lookups of a stale entry trigger a single refresh."""
+        gateway = FakeGateway(delay=0.05)
+        with PaymentCache(gateway.client(), ttl=0.01, stale_ttl=10, jitter=0) as cache:
+            cache.get_payment("pay_1")
+            time.sleep(0.02)
+
+            threads = [threading.Thread(target=cache.get_payment, args=("pay_1",)) for _ in range(20)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            _wait_for_refreshes(cache)
+
+        assert len(gateway.lookups) == 2
+        assert cache.stats()["stale_hits"] == 20
+
+    def test_concurrent_misses_load_once(self) -> None:
+        """Test that concurrent misses of one payment share a single lookup."""
+        gateway = FakeGateway(delay=0.05)
+        with PaymentCache(gateway.client()) as cache:
+            threads = [threading.Thread(target=cache.get_payment, args=("pay_1",)) for _ in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert gateway.lookups == ["pay_1"]
+
+    def test_failed_refresh_keeps_stale_entry(self) -> None:
+        """Test that a failing refresh keeps serving the entry until stale_ttl runs out."""
+        gateway = FakeGateway()
+        with PaymentCache(gateway.client(), ttl=0.01, stale_ttl=0.1, jitter=0) as cache:
+            cache.get_payment("pay_1")
+            gateway.fail = True
+            time.sleep(0.02)
+
+            assert cache.get_payment("pay_1")["status"] == "P"
+            _wait_for_refreshes(cache)
+            assert cache.stats()["refresh_errors"] == 1
+
+            time.sleep(0.1)
+            with pytest.raises(APIError):
+                cache.get_payment("pay_1")
+
+    def test_settled_payments_live_longer(self) -> None:
+        """Test that settled payments use settled_ttl and jitter shortens lifetimes."""
+        gateway = FakeGateway()
+        gateway.payments["pay_2"] = {"id": "pay_2", "status": "S"}
+        with PaymentCache(gateway.client(), ttl=10, settled_ttl=1000, jitter=0.5) as cache:
+            cache.get_payment("pay_1")
+            cache.get_payment("pay_2")
+            now = time.monotonic()
+            pending, settled = cache._entries["pay_1"], cache._entries["pay_2"]
+
+        assert 5 - 0.1 <= pending.expires_at - now <= 10
+        assert 500 - 1 <= settled.expires_at - now <= 1000
+
+    def test_eviction_and_invalidate(self) -> None:
+        """Test that the oldest entries are dropped beyond max_entries."""
+        gateway = FakeGateway()
+        gateway.payments.update({f"pay_{i}": {"id": f"pay_{i}", "status": "P"} for i in range(2, 5)})
+        with PaymentCache(gateway.client(), max_entries=2) as cache:
+            for i in range(1, 5):
+                cache.get_payment(f"pay_{i}")
+            assert sorted(cache._entries) == ["pay_3", "pay_4"]
+
+            cache.invalidate("pay_3")
+            assert list(cache._entries) == ["pay_4"]
+            cache.invalidate()
+            assert len(cache) == 0
+
+    def test_missing_payment_is_not_cached(self) -> None:
+        """Test that a 404 propagates and nothing is cached."""
+        gateway = FakeGateway()
+        with PaymentCache(gateway.client()) as cache:
+            with pytest.raises(APIError):
+                cache.get_payment("pay_missing")
+            assert len(cache) == 0
+
+    def test_invalid_arguments(self) -> None:
+        """Test that out-of-range shares are rejected."""
+        with pytest.raises(ValueError):
+            PaymentCache(FakeGateway().client(), jitter=2)
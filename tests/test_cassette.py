@@ -0,0 +1,221 @@
+"""Tests for traffic recording and replay."""
+
+import threading
+import time
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+
+from acoriss_payment_gateway.cassette import (
+    REDACTED,
+    REPLAY_SECRET,
+    Cassette,
+    CassetteWriter,
+    Exchange,
+    RecordingTransport,
+    ReplayServer,
+    ReplayTransport,
+)
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.errors import APIError
+from acoriss_payment_gateway.signer import HmacSha256Signer
+from acoriss_payment_gateway.transport import MockTransport, RequestsTransport, TransportResponse, Urllib3Transport
+
+CUSTOMER = {"email": "john@example.com", "name": "John Doe"}
+
+
+def _record(gateway_server: str, path: Path) -> str:
+    cassette = str(path / "traffic.cassette")
+    client = PaymentGatewayClient(
+        api_key="live-key",
+        api_secret="live-secret",
+        base_url=gateway_server,
+        transport=RecordingTransport(RequestsTransport(), cassette),
+    )
+    with client:
+        client.create_session(amount=5000, currency="USD", customer=CUSTOMER, transaction_id="tx_1")
+        client.get_payment("pay_1")
+        with pytest.raises(APIError):
+            client.get_payment("pay_missing")
+    return cassette
+
+
+def _client(transport: Any = None, **kwargs: Any) -> PaymentGatewayClient:
+    return PaymentGatewayClient(api_key="any-key", api_secret=REPLAY_SECRET, transport=transport, **kwargs)
+
+
+class TestRecording:
+    """Test RecordingTransport and the cassette format."""
+
+    def test_records_exchanges(self, gateway_server: str, tmp_path: Path) -> None:
+        """Test that requests and responses are captured in order."""
+        with Cassette(_record(gateway_server, tmp_path)) as cassette:
+            exchanges = list(cassette)
+
+        assert [(e.method, e.path, e.status) for e in exchanges] == [
+            ("POST", "/api/v1/sessions", 200),
+            ("GET", "/api/v1/sessions/pay_1", 200),
+            ("GET", "/api/v1/sessions/pay_missing", 404),
+        ]
+        assert b'"id": "sess_tx_1"' in exchanges[0].response_body
+        assert exchanges[0].request_body is not None and '"transactionId":"tx_1"' in exchanges[0].request_body
+        assert all(e.elapsed > 0 for e in exchanges)
+
+    def test_secrets_are_redacted_and_signatures_resigned(self, gateway_server: str, tmp_path: Path) -> None:
+        """Test that no credential is stored and signatures verify with the replay secret."""
+        cassette_path = _record(gateway_server, tmp_path)
+        live = HmacSha256Signer("live-secret")
+        replay = HmacSha256Signer(REPLAY_SECRET)
+
+        with Cassette(cassette_path) as cassette:
+            post, get, _ = list(cassette)
+
+        assert post.request_headers["X-API-KEY"] == REDACTED
+        assert post.request_body is not None
+        assert post.request_headers["X-SIGNATURE"] == replay.sign(post.request_body)
+        assert get.request_headers["X-SIGNATURE"] == replay.sign("pay_1")
+        raw = Path(cassette_path).read_bytes()
+        assert b"live-key" not in raw
+        assert live.sign("pay_1").encode() not in raw
+
+    def test_transport_errors_are_recorded(self, tmp_path: Path) -> None:
+        """Test that failures without a response are recorded and replayed."""
+
+        def fail(request: Any) -> TransportResponse:
+            raise APIError(message="Connection refused")
+
+        path = str(tmp_path / "errors.cassette")
+        client = _client(RecordingTransport(MockTransport({("GET", "/sessions/*"): fail}), path))
+        with client, pytest.raises(APIError):
+            client.get_payment("pay_1")
+
+        with pytest.raises(APIError, match="Connection refused"):
+            _client(ReplayTransport(path)).get_payment("pay_1")
+
+    def test_unclosed_cassette_is_readable(self, tmp_path: Path) -> None:
+        """Test that the index is rebuilt when the writer did not finish."""
+        path = str(tmp_path / "partial.cassette")
+        writer = CassetteWriter(path)
+        for i in range(3):
+            writer.write(Exchange(0.0, 0.01, "GET", f"/sessions/pay_{i}", {}, None, 200, {}, b"\xff{}"))
+        writer._file.flush()
+
+        with Cassette(path) as cassette:
+            assert len(cassette) == 3
+            assert cassette[2].path == "/sessions/pay_2"
+            assert cassette[2].response_body == b"\xff{}"
+        writer.close()
+
+    def test_rejects_other_files(self, tmp_path: Path) -> None:
+        """Test that non-cassette files are refused."""
+        path = tmp_path / "other.json"
+        path.write_text("{}")
+
+        with pytest.raises(ValueError, match="not a cassette"):
+            Cassette(str(path))
+
+
+class TestReplayTransport:
+    """Test in-process replay."""
+
+    def test_replays_recorded_responses(self, gateway_server: str, tmp_path: Path) -> None:
+        """Test that the client gets the recorded responses back."""
+        client = _client(ReplayTransport(_record(gateway_server, tmp_path)))
+
+        session = client.create_session(amount=5000, currency="USD", customer=CUSTOMER, transaction_id="tx_1")
+
+        assert session["id"] == "sess_tx_1"
+        assert client.get_payment("pay_1")["status"] == "P"
+        with pytest.raises(APIError) as exc_info:
+            client.get_payment("pay_missing")
+        assert exc_info.value.status == 404
+
+    def test_unrecorded_ids_use_sibling_paths(self, gateway_server: str, tmp_path: Path) -> None:
+        """Test that lookups cycle through responses recorded for the same route."""
+        client = _client(ReplayTransport(_record(gateway_server, tmp_path)))
+        statuses: List[Any] = []
+        for _ in range(4):
+            try:
+                statuses.append(client.get_payment("pay_other")["id"])
+            except APIError as e:
+                statuses.append(e.status)
+
+        assert statuses == ["pay_1", 404, "pay_1", 404]
+
+    def test_verify_signatures(self, gateway_server: str, tmp_path: Path) -> None:
+        """Test that requests signed with another secret are rejected."""
+        transport = ReplayTransport(
+            _record(gateway_server, tmp_path), verify_signatures=HmacSha256Signer(REPLAY_SECRET)
+        )
+
+        assert _client(transport).get_payment("pay_1")["id"] == "pay_1"
+        wrong = PaymentGatewayClient(api_key="k", api_secret="wrong", transport=transport)
+        with pytest.raises(APIError) as exc_info:
+            wrong.get_payment("pay_1")
+        assert exc_info.value.status == 401
+
+    def test_speedup(self, tmp_path: Path) -> None:
+        """Test that recorded latency is replayed, divided by the speed-up."""
+        path = str(tmp_path / "slow.cassette")
+        with CassetteWriter(path) as writer:
+            writer.write(Exchange(0.0, 1.0, "GET", "/api/v1/sessions/pay_1", {}, None, 200, {}, b'{"id":"pay_1"}'))
+        client = _client(ReplayTransport(path, speedup=20))
+
+        start = time.monotonic()
+        client.get_payment("pay_1")
+
+        assert 0.04 <= time.monotonic() - start < 0.5
+
+    def test_decoded_cache_is_bounded(self, tmp_path: Path) -> None:
+        """Test that at most cache_size decoded recordings are kept, concurrent replays included."""
+        path = str(tmp_path / "many.cassette")
+        with CassetteWriter(path) as writer:
+            for i in range(50):
+                body = f'{{"id":"pay_{i}"}}'.encode()
+                writer.write(Exchange(0.0, 0.0, "GET", f"/api/v1/sessions/pay_{i}", {}, None, 200, {}, body))
+        transport = ReplayTransport(path, cache_size=8)
+        client = _client(transport)
+
+        def replay() -> None:
+            for i in range(50):
+                assert client.get_payment(f"pay_{i}")["id"] == f"pay_{i}"
+
+        threads = [threading.Thread(target=replay) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(transport._replayer._cache) == 8
+        assert sorted(transport._replayer._cache) == list(range(42, 50))
+
+
+class TestReplayServer:
+    """Test replay over HTTP."""
+
+    def test_serves_cassette(self, gateway_server: str, tmp_path: Path) -> None:
+        """Test that a client pointed at the server gets recorded responses."""
+        with ReplayServer(_record(gateway_server, tmp_path)) as server:
+            client = _client(Urllib3Transport(), base_url=server.url + "/api/v1")
+
+            assert client.get_payment("pay_1")["id"] == "pay_1"
+            session = client.create_session(amount=5000, currency="USD", customer=CUSTOMER)
+            assert session["checkout_url"] == "https://checkout.example.com/sess_1"
+
+    def test_max_concurrency(self, tmp_path: Path) -> None:
+        """Test that requests beyond the concurrency cap wait their turn."""
+        path = str(tmp_path / "slow.cassette")
+        with CassetteWriter(path) as writer:
+            writer.write(Exchange(0.0, 0.1, "GET", "/api/v1/sessions/pay_1", {}, None, 200, {}, b'{"id":"pay_1"}'))
+
+        with ReplayServer(path, speedup=1, max_concurrency=2) as server:
+            client = _client(Urllib3Transport(maxsize=4), base_url=server.url + "/api/v1")
+            threads = [threading.Thread(target=client.get_payment, args=("pay_1",)) for _ in range(4)]
+            start = time.monotonic()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert time.monotonic() - start >= 0.2
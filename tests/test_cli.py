@@ -0,0 +1,191 @@
+"""Tests for the bulk command-line tool."""
+
+import csv
+import io
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from acoriss_payment_gateway.cli import Item, RateLimiter, Result, main, read_requests, run
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.transport import MockRequest, MockTransport, TransportResponse
+
+
+def _lines(path: Path) -> List[Dict[str, Any]]:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+@pytest.fixture
+def credentials(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("ACORISS_API_KEY", "test-key")
+    monkeypatch.setenv("ACORISS_API_SECRET", "test-secret")
+
+
+class TestGet:
+    """Test bulk payment lookups."""
+
+    def test_ndjson_output(self, gateway_server: str, credentials: None, tmp_path: Path) -> None:
+        """Test that every ID is looked up and reported."""
+        ids = tmp_path / "ids.txt"
+        ids.write_text("pay_1\n\npay_missing\n# comment\npay_2\n")
+        output = tmp_path / "out.ndjson"
+
+        status = main(["get", str(ids), "-o", str(output), "--base-url", gateway_server, "--progress", "0"])
+
+        results = sorted(_lines(output), key=lambda r: r["position"])
+        assert status == 1
+        assert [(r["key"], r["ok"], r["http_status"]) for r in results] == [
+            ("pay_1", True, None),
+            ("pay_missing", False, 404),
+            ("pay_2", True, None),
+        ]
+        assert results[0]["response"]["transaction_id"] == "tx_123"
+        assert results[1]["error"] == "Payment not found"
+
+    def test_csv_output_from_stdin(
+        self, gateway_server: str, credentials: None, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+    ) -> None:
+        """Test reading IDs from stdin and writing CSV to stdout, with a final stats line."""
+        monkeypatch.setattr("sys.stdin", io.StringIO("pay_1\npay_2\n"))
+
+        assert main(["get", "--format", "csv", "--base-url", gateway_server, "--progress", "0"]) == 0
+
+        captured = capsys.readouterr()
+        rows = list(csv.DictReader(io.StringIO(captured.out)))
+        assert sorted(row["id"] for row in rows) == ["pay_1", "pay_2"]
+        assert rows[0]["status"] == "P"
+        assert rows[0]["expired"] == "0"
+        assert "2 done, 0 failed" in captured.err
+        assert "p95" in captured.err
+
+    def test_resumes_from_checkpoint(self, gateway_server: str, credentials: None, tmp_path: Path) -> None:
+        """Test that completed records are skipped and output is appended."""
+        ids = tmp_path / "ids.txt"
+        ids.write_text("pay_1\npay_2\npay_3\n")
+        output = tmp_path / "out.csv"
+        checkpoint = tmp_path / "checkpoint"
+        checkpoint.write_text("1\n3\n")
+        args = ["get", str(ids), "-o", str(output), "--format", "csv", "--checkpoint", str(checkpoint)]
+
+        main([*args, "--base-url", gateway_server, "--progress", "0"])
+        main([*args, "--base-url", gateway_server, "--progress", "0"])
+
+        rows = list(csv.DictReader(output.open()))
+        assert [row["key"] for row in rows] == ["pay_2"]
+        assert checkpoint.read_text().split() == ["1", "3", "2"]
+
+    def test_requires_api_key(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that missing credentials are a usage error."""
+        monkeypatch.delenv("ACORISS_API_KEY", raising=False)
+
+        with pytest.raises(SystemExit) as exc_info:
+            main(["get"])
+
+        assert exc_info.value.code == 2
+
+
+def _client() -> PaymentGatewayClient:
+    def create(request: MockRequest) -> TransportResponse:
+        payload = json.loads(request.body or "{}")
+        return TransportResponse.from_json({"id": f"sess_{payload.get('transactionId')}", **payload})
+
+    transport = MockTransport({("POST", "/sessions"): create})
+    return PaymentGatewayClient(api_key="test-key", api_secret="test-secret", transport=transport, validate=True)
+
+
+class TestCreate:
+    """Test bulk session creation."""
+
+    def test_from_csv(self, tmp_path: Path) -> None:
+        """Test CSV requests, including rows that fail parsing or validation."""
+        requests = tmp_path / "sessions.csv"
+        requests.write_text(
+            "amount,currency,customer_email,customer_name,transaction_id\n"
+            "5000,USD,john@example.com,John,order_1\n"
+            "lots,USD,jane@example.com,Jane,order_2\n"
+            "5000,XXX,jim@example.com,Jim,order_3\n"
+        )
+        output = tmp_path / "out.ndjson"
+
+        status = main(["create", str(requests), "-o", str(output), "--progress", "0"], client=_client())
+
+        results = {r["key"]: r for r in _lines(output)}
+        assert status == 1
+        assert results["order_1"]["response"]["id"] == "sess_order_1"
+        assert results["order_1"]["response"]["customer"] == {"email": "john@example.com", "name": "John"}
+        assert results["order_2"]["error"].startswith("Invalid row")
+        assert "currency" in results["order_3"]["error"]
+
+    def test_from_ndjson(self, tmp_path: Path) -> None:
+        """Test NDJSON requests with the same keys as create_session."""
+        requests = tmp_path / "sessions.ndjson"
+        requests.write_text(
+            json.dumps({"amount": 5000, "currency": "USD", "customer": {"email": "a@example.com"}}) + "\n[]\n"
+        )
+        output = tmp_path / "out.ndjson"
+
+        main(["create", str(requests), "-o", str(output), "--progress", "0"], client=_client())
+
+        results = sorted(_lines(output), key=lambda r: r["position"])
+        assert results[0]["ok"] is True
+        assert results[1]["error"] == "Invalid JSON: expected an object"
+
+
+class TestRun:
+    """Test concurrency, rate limiting and streaming."""
+
+    def test_rate_limit(self, tmp_path: Path) -> None:
+        """Test that --rate spaces requests out."""
+        requests = tmp_path / "sessions.ndjson"
+        request = {"amount": 5000, "currency": "USD", "customer": {"email": "a@example.com"}}
+        requests.write_text((json.dumps(request) + "\n") * 7)
+        args = ["create", str(requests), "-o", str(tmp_path / "out"), "--rate", "5", "--progress", "0"]
+
+        start = time.monotonic()
+        main(args, client=_client())
+
+        # One second's worth of tokens (5) goes out at once, then one request every 0.2 s
+        assert time.monotonic() - start >= 0.35
+
+    def test_rate_limiter_paces_after_burst(self) -> None:
+        """Test that acquisitions beyond the burst wait for tokens."""
+        limiter = RateLimiter(rate=50, burst=1)
+
+        start = time.monotonic()
+        for _ in range(6):
+            limiter.acquire()
+
+        assert time.monotonic() - start >= 0.09
+
+    def test_reads_input_lazily(self) -> None:
+        """Test that requests are parsed as they are consumed."""
+        consumed: List[int] = []
+
+        def lines() -> Any:
+            for i in range(1000):
+                consumed.append(i)
+                yield json.dumps({"amount": i}) + "\n"
+
+        items = read_requests(lines(), "ndjson")
+        next(items)
+
+        assert consumed == [0]
+
+    def test_unexpected_errors_fail_the_item(self) -> None:
+        """Test that an unexpected exception fails its item and the run goes on."""
+
+        def operation(value: str) -> Dict[str, str]:
+            if value == "bad":
+                raise RuntimeError("connection reset")
+            return {"id": value}
+
+        results: List[Result] = []
+        items = iter([Item(1, "ok", "ok"), Item(2, "bad", "bad"), Item(3, "ok", "ok")])
+        stats = run(operation, items, results.append)
+
+        assert sorted((result.position, result.ok) for result in results) == [(1, True), (2, False), (3, True)]
+        assert [result.error for result in results if not result.ok] == ["RuntimeError: connection reset"]
+        assert stats.failed == 1
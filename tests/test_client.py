@@ -1,12 +1,16 @@
 """Tests for the client module."""
 
+import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict
+
 import pytest
 import requests
 from pytest_mock import MockerFixture
 
 from acoriss_payment_gateway.client import PaymentGatewayClient
 from acoriss_payment_gateway.errors import APIError
-from acoriss_payment_gateway.signer import SignerInterface
+from acoriss_payment_gateway.signer import HmacSha256Signer, SignerInterface
 
 
 class TestClientInitialization:
@@ -78,6 +82,7 @@ class TestCreateSession:
             },
             "createdAt": "2025-11-15T12:00:00Z",
         }
+        mock_response.content = json.dumps(mock_response.json.return_value).encode()
         mock_post = mocker.patch("requests.post", return_value=mock_response)
 
         client = PaymentGatewayClient(
@@ -115,6 +120,7 @@ class TestCreateSession:
             },
             "createdAt": "2025-11-15T12:00:00Z",
         }
+        mock_response.content = json.dumps(mock_response.json.return_value).encode()
         mocker.patch("requests.post", return_value=mock_response)
 
         client = PaymentGatewayClient(
@@ -170,6 +176,7 @@ class TestCreateSession:
             "customer": {"email": "test@example.com", "name": "Test"},
             "createdAt": "2025-11-15T12:00:00Z",
         }
+        mock_response.content = json.dumps(mock_response.json.return_value).encode()
         mock_post = mocker.patch("requests.post", return_value=mock_response)
 
         client = PaymentGatewayClient(api_key="test-key")
@@ -191,6 +198,7 @@ class TestCreateSession:
         mock_response = mocker.Mock()
         mock_response.status_code = 400
         mock_response.json.return_value = {"message": "Invalid request"}
+        mock_response.content = json.dumps(mock_response.json.return_value).encode()
         mock_response.headers = {"content-type": "application/json"}
 
         http_error = requests.HTTPError()
@@ -215,6 +223,107 @@ class TestCreateSession:
         assert exc_info.value.message == "Invalid request"
 
 
+class TestCreateSessions:
+    """Test create_sessions batch method."""
+
+    SESSIONS = [
+        {
+            "amount": 1000 * (i + 1),
+            "currency": "USD",
+            "customer": {"email": f"user{i}@example.com", "name": f"User {i}"},
+            "transaction_id": f"tx_{i}",
+            "services": [{"name": "Service", "price": 1000 * (i + 1), "quantity": 1}],
+        }
+        for i in range(3)
+    ]
+
+    def _mock_post(self, mocker: MockerFixture) -> Any:
+        def post(url: str, data: str, headers: Dict[str, str], timeout: float) -> Any:
+            body = json.loads(data)
+            response = mocker.Mock()
+            response.status_code = 200
+            response.json.return_value = {"id": f"sess_{body['transactionId']}", "checkoutUrl": "https://x"}
+            response.content = json.dumps(response.json.return_value).encode()
+            return response
+
+        return mocker.patch("requests.post", side_effect=post)
+
+    def test_create_sessions_signs_each_body(self, mocker: MockerFixture) -> None:
+        """Test that every session body is serialized and signed independently."""
+        mock_post = self._mock_post(mocker)
+        client = PaymentGatewayClient(api_key="test-key", api_secret="test-secret")
+
+        results = client.create_sessions(self.SESSIONS)
+
+        assert [r["id"] for r in results] == ["sess_tx_0", "sess_tx_1", "sess_tx_2"]
+        signer = HmacSha256Signer("test-secret")
+        for call in mock_post.call_args_list:
+            assert call[1]["headers"]["X-SIGNATURE"] == signer.sign(call[1]["data"])
+            assert json.loads(call[1]["data"])["transactionId"].startswith("tx_")
+
+    def test_create_sessions_matches_create_session_body(self, mocker: MockerFixture) -> None:
+        """Test that batch bodies are byte-identical to single-call bodies."""
+        mock_post = self._mock_post(mocker)
+        client = PaymentGatewayClient(api_key="test-key", api_secret="test-secret")
+
+        client.create_session(**self.SESSIONS[0])
+        client.create_sessions(self.SESSIONS[:1])
+
+        first, second = mock_post.call_args_list
+        assert first[1]["data"] == second[1]["data"]
+        assert first[1]["headers"] == second[1]["headers"]
+
+    @pytest.mark.parametrize("executor_cls", [ThreadPoolExecutor, ProcessPoolExecutor])
+    def test_create_sessions_with_executor(self, mocker: MockerFixture, executor_cls: Any) -> None:
+        """Test offloading serialization and signing to an executor."""
+        self._mock_post(mocker)
+        client = PaymentGatewayClient(api_key="test-key", api_secret="test-secret")
+
+        with executor_cls(max_workers=2) as executor:
+            prepared = client._prepare_sessions(self.SESSIONS, executor=executor)
+            results = client.create_sessions(self.SESSIONS, executor=executor, max_workers=2)
+
+        assert prepared == client._prepare_sessions(self.SESSIONS)
+        assert [r["id"] for r in results] == ["sess_tx_0", "sess_tx_1", "sess_tx_2"]
+
+    def test_create_sessions_return_exceptions(self, mocker: MockerFixture) -> None:
+        """Test collecting failures instead of raising."""
+        ok = mocker.Mock(status_code=200)
+        ok.json.return_value = {"id": "sess_ok"}
+        ok.content = json.dumps(ok.json.return_value).encode()
+        failed = mocker.Mock(status_code=500, headers={})
+        failed.json.return_value = {"message": "boom"}
+        failed.content = json.dumps(failed.json.return_value).encode()
+        http_error = requests.HTTPError()
+        http_error.response = failed
+        failed.raise_for_status.side_effect = http_error
+        mocker.patch("requests.post", side_effect=[ok, failed])
+        client = PaymentGatewayClient(api_key="test-key", api_secret="test-secret")
+
+        results = client.create_sessions(self.SESSIONS[:2], return_exceptions=True)
+
+        assert results[0]["id"] == "sess_ok"
+        assert isinstance(results[1], APIError)
+        assert results[1].status == 500
+
+    def test_create_sessions_without_signer_raises(self) -> None:
+        """Test that batch creation requires a signer."""
+        client = PaymentGatewayClient(api_key="test-key")
+
+        with pytest.raises(ValueError, match="No signer available"):
+            client.create_sessions(self.SESSIONS)
+
+    def test_create_sessions_rejects_call_options(self, mocker: MockerFixture) -> None:
+        """Test that per-call options in a session are rejected before anything is sent."""
+        post = mocker.patch("requests.post")
+        client = PaymentGatewayClient(api_key="test-key", api_secret="test-secret")
+        sessions = [self.SESSIONS[0], {**self.SESSIONS[1], "priority": "high", "signature_override": "sig"}]
+
+        with pytest.raises(ValueError, match=r"sessions\[1\] .*: priority, signature_override"):
+            client.create_sessions(sessions)  # type: ignore[list-item]
+        post.assert_not_called()
+
+
 class TestGetPayment:
     """Test get_payment method."""
 
@@ -248,6 +357,7 @@ class TestGetPayment:
             ],
             "status": "P",
         }
+        mock_response.content = json.dumps(mock_response.json.return_value).encode()
         mock_get = mocker.patch("requests.get", return_value=mock_response)
 
         client = PaymentGatewayClient(
@@ -286,6 +396,7 @@ class TestGetPayment:
             "services": [],
             "status": "S",
         }
+        mock_response.content = json.dumps(mock_response.json.return_value).encode()
         mock_get = mocker.patch("requests.get", return_value=mock_response)
 
         client = PaymentGatewayClient(api_key="test-key")
@@ -302,6 +413,7 @@ class TestGetPayment:
         mock_response = mocker.Mock()
         mock_response.status_code = 404
         mock_response.json.return_value = {"message": "Payment not found"}
+        mock_response.content = json.dumps(mock_response.json.return_value).encode()
         mock_response.headers = {"content-type": "application/json"}
 
         http_error = requests.HTTPError()
@@ -0,0 +1,259 @@
+"""Tests for response compression negotiation and decoding."""
+
+import gzip
+import json
+import threading
+import tracemalloc
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Iterator, List
+
+import pytest
+
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.compression import (
+    DecompressionError,
+    accept_encoding_header,
+    available_encodings,
+    read_body,
+)
+from acoriss_payment_gateway.errors import APIError
+from acoriss_payment_gateway.transport import (
+    HttpxTransport,
+    MockTransport,
+    RequestsTransport,
+    Transport,
+    TransportResponse,
+    Urllib3Transport,
+)
+
+PAYMENT = {
+    "id": "pay_1",
+    "amount": 100000,
+    "currency": "USD",
+    "transactionId": "tx_1",
+    "customer": {"email": "john@example.com", "phone": None},
+    "createdAt": "2025-11-15T12:00:00Z",
+    "expired": False,
+    "services": [
+        {"id": f"srv_{i}", "name": "Service", "quantity": 1, "price": 100, "sessionId": "sess_1"} for i in range(1000)
+    ],
+    "status": "S",
+}
+PAYMENT_BODY = json.dumps(PAYMENT).encode("utf-8")
+
+
+def _chunked(data: bytes, size: int = 1000) -> List[bytes]:
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def _compress(encoding: str, body: bytes) -> bytes:
+    if encoding == "br":
+        brotli: Any = pytest.importorskip("brotli")
+        return brotli.compress(body, quality=5)  # type: ignore[no-any-return]
+    zstandard: Any = pytest.importorskip("zstandard")
+    return zstandard.ZstdCompressor().compress(body)  # type: ignore[no-any-return]
+
+
+class TestReadBody:
+    """Test streamed decoding of response bodies."""
+
+    def test_identity(self) -> None:
+        """Test that unencoded bodies pass through."""
+        assert read_body(_chunked(PAYMENT_BODY)) == (PAYMENT_BODY, len(PAYMENT_BODY))
+
+    @pytest.mark.parametrize(
+        "encoding,compress",
+        [
+            ("gzip", gzip.compress),
+            ("deflate", zlib.compress),
+            ("deflate", lambda data: zlib.compress(data)[2:-4]),  # raw deflate, no zlib header
+        ],
+    )
+    def test_stdlib_encodings(self, encoding: str, compress: Callable[[bytes], bytes]) -> None:
+        """Test gzip, zlib deflate and raw deflate bodies."""
+        wire = compress(PAYMENT_BODY)
+
+        body, wire_size = read_body(_chunked(wire), encoding)
+
+        assert body == PAYMENT_BODY
+        assert wire_size == len(wire) < len(PAYMENT_BODY)
+
+    def test_brotli(self) -> None:
+        """Test brotli bodies when a brotli package is installed."""
+        brotli = pytest.importorskip("brotli")
+
+        assert read_body(_chunked(brotli.compress(PAYMENT_BODY)), "br")[0] == PAYMENT_BODY
+
+    def test_zstd(self) -> None:
+        """Test zstd bodies when zstandard is installed."""
+        zstandard = pytest.importorskip("zstandard")
+
+        assert read_body(_chunked(zstandard.ZstdCompressor().compress(PAYMENT_BODY)), "zstd")[0] == PAYMENT_BODY
+
+    def test_max_size_stops_decompression_bomb(self) -> None:
+        """Test that a highly compressible body is cut off at the limit."""
+        bomb = gzip.compress(b"\0" * 50_000_000)
+
+        with pytest.raises(DecompressionError, match="max_response_size"):
+            read_body(_chunked(bomb), "gzip", max_size=1_000_000)
+
+    @pytest.mark.parametrize("encoding", ["br", "zstd"])
+    def test_max_size_bounds_memory(self, encoding: str) -> None:
+        """Test that brotli and zstd stop decoding near the limit rather than after each chunk."""
+        bomb = _compress(encoding, b"\0" * 50_000_000)
+
+        tracemalloc.start()
+        try:
+            with pytest.raises(DecompressionError, match="max_response_size"):
+                read_body(_chunked(bomb), encoding, max_size=1_000_000)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        assert peak < 5_000_000
+
+    @pytest.mark.parametrize("encoding", ["br", "zstd"])
+    def test_max_size_allows_streamed_body_at_limit(self, encoding: str) -> None:
+        """Test that brotli and zstd bodies of exactly max_size are accepted."""
+        body = PAYMENT_BODY * 2000
+
+        assert read_body(_chunked(_compress(encoding, body)), encoding, max_size=len(body))[0] == body
+
+    def test_max_size_allows_body_at_limit(self) -> None:
+        """Test that a body of exactly max_size is accepted."""
+        body, _ = read_body(_chunked(gzip.compress(PAYMENT_BODY)), "gzip", max_size=len(PAYMENT_BODY))
+
+        assert body == PAYMENT_BODY
+
+    def test_max_size_for_identity(self) -> None:
+        """Test that the limit also applies to uncompressed bodies."""
+        with pytest.raises(DecompressionError):
+            read_body(_chunked(PAYMENT_BODY), None, max_size=100)
+
+    def test_unsupported_encoding(self) -> None:
+        """Test that unknown encodings are rejected."""
+        with pytest.raises(DecompressionError, match="Unsupported"):
+            read_body([b"x"], "compress")
+
+    def test_corrupt_body(self) -> None:
+        """Test that corrupt data raises DecompressionError."""
+        with pytest.raises(DecompressionError, match="Could not decode"):
+            read_body([b"not gzip at all"], "gzip")
+
+
+class TestAcceptEncoding:
+    """Test Accept-Encoding negotiation."""
+
+    def test_auto_lists_available_encodings(self) -> None:
+        """Test that auto offers everything installed."""
+        assert accept_encoding_header("auto") == ", ".join(available_encodings())
+        assert {"gzip", "deflate"} <= set(available_encodings())
+
+    def test_explicit_encodings(self) -> None:
+        """Test an explicit preference list."""
+        assert accept_encoding_header(["gzip"]) == "gzip"
+
+    def test_unavailable_encoding_raises(self) -> None:
+        """Test that encodings without a decoder are refused."""
+        with pytest.raises(ValueError, match="Unsupported"):
+            accept_encoding_header(["lzma"])
+
+
+class CompressingHandler(BaseHTTPRequestHandler):
+    """Serve a large payment, gzip-compressed when the client accepts it."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def do_GET(self) -> None:  # noqa: N802
+        accepted = self.headers.get("Accept-Encoding", "")
+        body = PAYMENT_BODY
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if "gzip" in accepted:
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def compressing_server() -> Iterator[str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CompressingHandler)
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/api/v1"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _httpx(**kwargs: object) -> Transport:
+    pytest.importorskip("httpx")
+    return HttpxTransport(**kwargs)  # type: ignore[arg-type]
+
+
+TRANSPORTS = {
+    "requests": RequestsTransport,
+    "urllib3": Urllib3Transport,
+    "httpx": _httpx,
+}
+
+
+@pytest.mark.parametrize("factory", TRANSPORTS.values(), ids=TRANSPORTS.keys())
+class TestTransportCompression:
+    """Test compression through each HTTP transport."""
+
+    def test_compressed_response_is_decoded_and_measured(
+        self, compressing_server: str, factory: Callable[..., Transport]
+    ) -> None:
+        """Test that gzip responses are decoded and wire bytes are reported."""
+        client = PaymentGatewayClient(
+            api_key="test-key",
+            api_secret="test-secret",
+            base_url=compressing_server,
+            transport=factory(accept_encoding=["gzip"]),
+        )
+
+        payment = client.get_payment("pay_1")
+
+        assert len(payment["services"]) == 1000
+        assert client.metrics.bytes_decoded == len(PAYMENT_BODY)
+        assert client.metrics.bytes_received == len(gzip.compress(PAYMENT_BODY))
+        assert client.metrics.compression_ratio > 5
+
+    def test_max_response_size(self, compressing_server: str, factory: Callable[..., Transport]) -> None:
+        """Test that oversized decoded bodies raise APIError."""
+        client = PaymentGatewayClient(
+            api_key="test-key",
+            api_secret="test-secret",
+            base_url=compressing_server,
+            transport=factory(accept_encoding="auto", max_response_size=1024),
+        )
+
+        with pytest.raises(APIError, match="max_response_size") as exc_info:
+            client.get_payment("pay_1")
+
+        assert exc_info.value.status == 200
+        assert client.metrics.errors == 1
+
+
+def test_metrics_for_mock_transport() -> None:
+    """Test that client metrics count requests, errors and bytes."""
+    transport = MockTransport({("GET", "/sessions/pay_1"): TransportResponse(200, {}, PAYMENT_BODY, wire_size=2000)})
+    client = PaymentGatewayClient(api_key="test-key", api_secret="test-secret", transport=transport)
+
+    client.get_payment("pay_1")
+    with pytest.raises(APIError):
+        client.get_payment("pay_2")
+
+    snapshot = client.metrics.snapshot()
+    assert snapshot["requests"] == 2
+    assert snapshot["errors"] == 1
+    assert snapshot["bytes_received"] > 2000
+    assert snapshot["bytes_decoded"] > len(PAYMENT_BODY)
@@ -41,3 +41,68 @@ def test_api_error_repr() -> None:
     assert "APIError" in repr_str
     assert "Test" in repr_str
     assert "500" in repr_str
+
+
+def test_api_error_from_body_is_lazy() -> None:
+    """Test that body-backed errors decode data, message and code on access."""
+    error = APIError(status=422, body=b'{"message": "Invalid amount", "code": "AMOUNT_INVALID"}')
+
+    assert error._data_loaded is False
+    assert error.message == "Invalid amount"
+    assert error.code == "AMOUNT_INVALID"
+    assert error.data == {"message": "Invalid amount", "code": "AMOUNT_INVALID"}
+    assert str(error) == "APIError(422): Invalid amount"
+
+
+def test_api_error_non_json_body() -> None:
+    """Test that non-JSON bodies become text with a default message."""
+    error = APIError(status=502, body=b"<html>Bad Gateway</html>")
+
+    assert error.data == "<html>Bad Gateway</html>"
+    assert error.message == "HTTP 502 error"
+    assert error.code is None
+
+
+def test_api_error_body_is_capped() -> None:
+    """Test that only max_body_size bytes of the body are kept."""
+    error = APIError(status=500, body=b"x" * (APIError.max_body_size + 10))
+
+    assert error.body is not None and len(error.body) == APIError.max_body_size
+    assert error.body_truncated is True
+
+
+def test_api_error_headers_converted_on_access() -> None:
+    """Test that header mappings are copied to a dict only when read."""
+    from requests.structures import CaseInsensitiveDict
+
+    raw = CaseInsensitiveDict({"Retry-After": "1"})
+    error = APIError(status=503, headers=raw)
+
+    assert error._headers is raw
+    assert error.headers == {"Retry-After": "1"}
+    assert type(error.headers) is dict
+
+
+def test_api_error_retryable() -> None:
+    """Test retryability by status."""
+    assert APIError("timeout").retryable is True
+    assert APIError("throttled", status=429).retryable is True
+    assert APIError("down", status=503).retryable is True
+    assert APIError("bad", status=400).retryable is False
+    assert APIError("missing", status=404).retryable is False
+
+
+def test_api_error_repr_is_bounded() -> None:
+    """Test that repr truncates large bodies."""
+    error = APIError(status=500, body=b'{"detail": "' + b"x" * 5000 + b'"}')
+
+    assert len(repr(error)) < 600
+
+
+def test_api_error_pickles() -> None:
+    """Test that errors survive pickling (e.g. across process pools)."""
+    import pickle
+
+    error = pickle.loads(pickle.dumps(APIError(status=409, body=b'{"message": "Duplicate"}')))
+
+    assert (error.status, error.message) == (409, "Duplicate")
@@ -0,0 +1,221 @@
+"""Tests for columnar payment export."""
+
+import csv
+import io
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from acoriss_payment_gateway import export
+from acoriss_payment_gateway.export import (
+    PAYMENT_SCHEMA,
+    SERVICE_SCHEMA,
+    CSVWriter,
+    NDJSONWriter,
+    ParquetWriter,
+    Totals,
+    export_payments,
+    iter_batches,
+    totals,
+)
+
+
+def _payments(count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": f"pay_{i}",
+            "transaction_id": f"tx_{i}",
+            "amount": 1000 * (i + 1),
+            "currency": "USD" if i % 2 else "CDF",
+            "status": "S" if i % 3 else "P",
+            "expired": i == 4,
+            "service_id": None if i % 4 == 0 else "srv_tickets",
+            "created_at": f"2025-11-{15 + i % 2}T12:00:00Z",
+            "description": None,
+            "customer": {"email": f"user{i}@example.com", "phone": None},
+            "services": [
+                {
+                    "id": f"svc_{i}_{j}",
+                    "name": "Ticket",
+                    "description": None,
+                    "quantity": 2,
+                    "price": 250 * (i + 1),
+                    "currency": None,
+                    "session_id": f"sess_{i}",
+                    "created_at": "2025-11-15T12:00:00Z",
+                    "service_id": None,
+                }
+                for j in range(2)
+            ],
+        }
+        for i in range(count)
+    ]
+
+
+class TestBatches:
+    """Test conversion to column batches."""
+
+    def test_batches_are_bounded_by_chunk_size(self) -> None:
+        """Test that payments are emitted in chunks."""
+        sizes = [(len(p), len(s)) for p, s in iter_batches(_payments(7), chunk_size=3)]
+
+        assert sizes == [(3, 6), (3, 6), (1, 2)]
+
+    def test_columns_and_flattened_services(self) -> None:
+        """Test column values, derived columns and inherited service fields."""
+        payments, services = next(iter_batches(_payments(2)))
+
+        assert list(payments.columns) == list(PAYMENT_SCHEMA)
+        assert list(services.columns) == list(SERVICE_SCHEMA)
+        assert list(payments.columns["amount"]) == [1000, 2000]
+        assert payments.columns["day"] == ["2025-11-15", "2025-11-16"]
+        assert payments.columns["customer_email"] == ["user0@example.com", "user1@example.com"]
+        assert services.columns["payment_id"] == ["pay_0", "pay_0", "pay_1", "pay_1"]
+        assert list(services.columns["total"]) == [500, 500, 1000, 1000]
+        assert services.columns["currency"] == ["CDF", "CDF", "USD", "USD"]
+        assert services.columns["service_id"] == [None, None, "srv_tickets", "srv_tickets"]
+
+    def test_rows(self) -> None:
+        """Test row-wise access to a batch."""
+        payments, _ = next(iter_batches(_payments(5)))
+
+        row = list(payments.rows())[4]
+        assert row["id"] == "pay_4"
+        assert row["expired"] is True
+
+    def test_to_numpy(self) -> None:
+        """Test conversion to NumPy arrays."""
+        np = pytest.importorskip("numpy")
+        payments, _ = next(iter_batches(_payments(3)))
+
+        arrays = payments.to_numpy()
+
+        assert arrays["amount"].dtype == np.int64
+        assert arrays["amount"].sum() == 6000
+        assert arrays["expired"].dtype == bool
+        assert list(arrays["currency"]) == ["CDF", "USD", "CDF"]
+
+    def test_to_arrow(self) -> None:
+        """Test conversion to an Arrow record batch."""
+        pytest.importorskip("pyarrow")
+        payments, _ = next(iter_batches(_payments(3)))
+
+        batch = payments.to_arrow()
+
+        assert batch.num_rows == 3
+        assert batch.column("amount").to_pylist() == [1000, 2000, 3000]
+        assert batch.column("description").null_count == 3
+
+
+class TestWriters:
+    """Test the batch writers."""
+
+    def test_csv(self) -> None:
+        """Test CSV output with a single header row across chunks."""
+        output = io.StringIO()
+
+        assert export_payments(_payments(5), CSVWriter(output), chunk_size=2) == 5
+
+        rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+        assert len(rows) == 5
+        assert rows[4]["amount"] == "5000"
+        assert rows[4]["expired"] == "1"
+        assert rows[0]["service_id"] == ""
+
+    def test_ndjson_services(self) -> None:
+        """Test NDJSON output of the services table."""
+        payments, services = io.StringIO(), io.StringIO()
+
+        export_payments(_payments(3), NDJSONWriter(payments), NDJSONWriter(services), chunk_size=2)
+
+        lines = [json.loads(line) for line in services.getvalue().splitlines()]
+        assert len(lines) == 6
+        assert lines[0] == {
+            "payment_id": "pay_0",
+            "id": "svc_0_0",
+            "name": "Ticket",
+            "description": None,
+            "quantity": 2,
+            "price": 250,
+            "total": 500,
+            "currency": "CDF",
+            "service_id": None,
+            "created_at": "2025-11-15T12:00:00Z",
+            "day": "2025-11-15",
+        }
+        assert json.loads(payments.getvalue().splitlines()[0])["expired"] is False
+
+    def test_parquet(self, tmp_path: Path) -> None:
+        """Test Parquet output with one row group per chunk."""
+        pytest.importorskip("pyarrow")
+        import pyarrow.parquet as pq
+
+        path = str(tmp_path / "payments.parquet")
+        with ParquetWriter(path, PAYMENT_SCHEMA) as writer:
+            export_payments(_payments(5), writer, chunk_size=2)
+
+        parquet = pq.ParquetFile(path)
+        assert parquet.metadata.num_rows == 5
+        assert parquet.metadata.num_row_groups == 3
+        assert parquet.read().column("amount").to_pylist() == [1000, 2000, 3000, 4000, 5000]
+
+
+@pytest.fixture(params=["numpy", "python"])
+def numpy_mode(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> str:
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        real = export.optional_module
+        monkeypatch.setattr(export, "optional_module", lambda name: None if name == "numpy" else real(name))
+    return str(request.param)
+
+
+class TestTotals:
+    """Test aggregations over columns, with and without NumPy."""
+
+    def test_totals_by_currency(self, numpy_mode: str) -> None:
+        """Test sums grouped by one column across batches."""
+        batches = [p for p, _ in iter_batches(_payments(6), chunk_size=4)]
+
+        assert totals(batches, "currency") == {"CDF": 9000, "USD": 12000}
+
+    def test_totals_by_several_columns(self, numpy_mode: str) -> None:
+        """Test tuple keys, including None values."""
+        aggregation = Totals(("currency", "service_id"))
+        export_payments(_payments(6), CSVWriter(io.StringIO()), chunk_size=4, aggregations=[aggregation])
+
+        assert aggregation.result() == {
+            ("CDF", None): 6000,
+            ("CDF", "srv_tickets"): 3000,
+            ("USD", "srv_tickets"): 12000,
+        }
+        assert aggregation.counts[("USD", "srv_tickets")] == 3
+
+    def test_totals_by_status_and_day(self, numpy_mode: str) -> None:
+        """Test grouping by status and by day."""
+        batches = [p for p, _ in iter_batches(_payments(6))]
+
+        assert totals(batches, "status") == {"P": 5000, "S": 16000}
+        assert totals(batches, "day") == {"2025-11-15": 9000, "2025-11-16": 12000}
+
+    def test_int_and_bool_keys_keep_their_type(self, numpy_mode: str) -> None:
+        """Test that integer and boolean key columns give the same keys with and without NumPy."""
+        batches = [p for p, _ in iter_batches(_payments(6))]
+
+        assert totals(batches, "expired") == {False: 16000, True: 5000}
+        assert totals(batches, ("currency", "service_count")) == {("CDF", 2): 9000, ("USD", 2): 12000}
+        assert all(isinstance(key, int) for key in totals(batches, "service_count"))
+
+    def test_service_totals(self, numpy_mode: str) -> None:
+        """Test summing service line totals by service_id."""
+        services = [s for _, s in iter_batches(_payments(4))]
+
+        assert totals(services, "service_id", value="total") == {None: 1000, "srv_tickets": 9000}
+
+    def test_large_sums_are_exact(self, numpy_mode: str) -> None:
+        """Test that sums beyond float precision stay exact."""
+        payments = [{"id": "p", "amount": 2**53 + 1, "currency": "USD"}] * 3
+
+        assert totals([p for p, _ in iter_batches(payments)], "currency") == {"USD": 3 * (2**53 + 1)}
@@ -0,0 +1,247 @@
+"""Tests for using a client in processes forked after it was created."""
+
+import gzip
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Any, Callable, List, Tuple
+
+import pytest
+
+from acoriss_payment_gateway import forking
+from acoriss_payment_gateway.audit import AuditLog, AuditRecord
+from acoriss_payment_gateway.caching import PaymentCache
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.dns import DNSCache
+from acoriss_payment_gateway.limits import AIMDLimit, ConcurrencyLimiter
+from acoriss_payment_gateway.outbox import SENT, SessionOutbox
+from acoriss_payment_gateway.sync import ShardedCounters
+from acoriss_payment_gateway.transport import MockTransport, TransportResponse, Urllib3Transport
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+
+
+def _in_child(check: Callable[[], None], timeout: float = 10.0) -> None:
+    """Run ``check`` in a forked child; fail if it raises or hangs."""
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            check()
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        os._exit(code)
+
+    deadline = time.monotonic() + timeout
+    while True:
+        done, status = os.waitpid(pid, os.WNOHANG)
+        if done:
+            break
+        if time.monotonic() > deadline:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            pytest.fail("child process hung")
+        time.sleep(0.01)
+    assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0, "check failed in child process"
+
+
+def _resolver(host: str, port: int, *args: Any) -> List[Tuple[Any, ...]]:
+    return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("127.0.0.1", port))]
+
+
+def _wait_for(condition: Callable[[], bool], timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_locks_held_at_fork_are_replaced() -> None:
+    """Test that locks held by the parent at fork time do not block the child."""
+    limiter = ConcurrencyLimiter(AIMDLimit(initial=1))
+    counters = ShardedCounters(("requests",))
+    dns = DNSCache(refresh=False, resolver=_resolver)
+    key = ("api.example.com", 443)
+    limiter.acquire()
+    counters.add("requests")
+
+    def check() -> None:
+        assert limiter.in_flight == 0
+        assert limiter.acquire(timeout=1)
+        assert counters.value("requests") == 1
+        assert dns.resolve(*key) == "127.0.0.1"
+
+    with counters._lock, dns._resolving.for_key(key):
+        _in_child(check)
+    limiter.release(0.01)
+
+
+class _Paused:
+    """Registered object recording its fork hooks."""
+
+    def __init__(self, name: str, calls: List[str], fail: bool = False) -> None:
+        self.name = name
+        self.calls = calls
+        self.fail = fail
+        self.lock = threading.Lock()
+        forking.register(self)
+
+    def _before_fork(self) -> None:
+        if self.fail:
+            raise RuntimeError("cannot pause")
+        self.lock.acquire()
+        self.calls.append(f"before {self.name}")
+
+    def _after_fork_in_parent(self) -> None:
+        self.lock.release()
+        self.calls.append(f"after {self.name}")
+
+    def _after_fork(self) -> None:
+        self.lock = threading.Lock()
+
+
+def test_failed_before_fork_hook_is_not_undone() -> None:
+    """Test that the parent only undoes the before-fork hooks that succeeded, newest first."""
+    calls: List[str] = []
+    objects = [_Paused("a", calls), _Paused("b", calls, fail=True), _Paused("c", calls)]
+
+    with pytest.warns(RuntimeWarning, match="_Paused"):
+        forking._before_fork()
+    forking._after_fork_in_parent()
+
+    assert calls == ["before a", "before c", "after c", "after a"]
+    assert not any(obj.lock.locked() for obj in objects)
+    with pytest.warns(RuntimeWarning, match="_Paused"):
+        _in_child(lambda: None)
+    assert not any(obj.lock.locked() for obj in objects)
+
+
+def test_client_reconnects_in_child(gateway_server: str) -> None:
+    """Test that a child gets fresh pools and metrics but shares the prepared signer."""
+    transport = Urllib3Transport(maxsize=2)
+    client = PaymentGatewayClient(
+        api_key="test-key", api_secret="test-secret", base_url=gateway_server, transport=transport
+    )
+    client.get_payment("pay_1")
+    pool_manager = transport.pool_manager
+    mac = client.signer._mac  # type: ignore[union-attr]
+
+    def check() -> None:
+        assert transport.pool_manager is not pool_manager
+        assert client.signer._mac is mac  # type: ignore[union-attr]
+        assert client.metrics.requests == 0
+        assert client.get_payment("pay_2")["id"] == "pay_2"
+
+    _in_child(check)
+
+    # The parent's pooled connection was left untouched by the child
+    assert client.get_payment("pay_3")["id"] == "pay_3"
+    assert client.metrics.requests == 2
+
+
+def test_warmup_after_fork(gateway_server: str) -> None:
+    """Test that children open connections in the background when asked to."""
+    transport = Urllib3Transport(maxsize=2)
+    client = PaymentGatewayClient(api_key="test-key", base_url=gateway_server, transport=transport, warmup_after_fork=2)
+
+    def check() -> None:
+        pool = transport.pool_manager.connection_from_url(gateway_server)
+        assert _wait_for(lambda: pool.num_connections == 2)
+
+    _in_child(check)
+    assert transport.pool_manager.connection_from_url(client.base_url).num_connections == 0
+
+
+def test_dns_refresh_restarts_in_child() -> None:
+    """Test that the DNS refresh thread is restarted and cached entries are kept."""
+    calls: List[str] = []
+
+    def resolver(host: str, port: int, *args: Any) -> List[Tuple[Any, ...]]:
+        calls.append(host)
+        return _resolver(host, port)
+
+    dns = DNSCache(ttl=60, resolver=resolver)
+    dns.resolve("api.example.com", 443)
+
+    def check() -> None:
+        assert dns._thread is not None and dns._thread.is_alive()
+        dns.resolve("api.example.com", 443)
+        assert calls == ["api.example.com"]
+
+    try:
+        _in_child(check)
+    finally:
+        dns.stop()
+
+
+def test_outbox_enqueues_in_child_and_parent_sends(tmp_path: Path) -> None:
+    """Test that a child writes through its own connection and leaves sending to the parent."""
+    transport = MockTransport({("POST", "/sessions"): TransportResponse.from_json({"id": "sess_1"})})
+    client = PaymentGatewayClient(api_key="test-key", api_secret="test-secret", transport=transport)
+    outbox = SessionOutbox(client, str(tmp_path / "outbox.db"), poll_interval=0.05)
+
+    def check() -> None:
+        assert outbox._thread is None
+        entry_id = outbox.enqueue(
+            amount=5000, currency="USD", customer={"email": "a@example.com"}, transaction_id="tx_1"
+        )
+        # The parent's sender may already have picked the entry up
+        assert outbox.result(entry_id) is not None
+
+    try:
+        _in_child(check)
+        assert outbox.flush(timeout=5)
+        result = outbox.result(1)
+        assert result is not None and result.state == SENT and result.transaction_id == "tx_1"
+    finally:
+        outbox.close()
+
+
+def test_audit_log_writes_own_file_in_child(tmp_path: Path) -> None:
+    """Test that a child writes its entries to a file of its own, leaving the parent's intact."""
+    log = AuditLog(str(tmp_path))
+    record = ("GET", "https://gw/api/v1/sessions/pay_1", {}, None, 200, b"{}")
+    log.record(AuditRecord(0.0, 0.01, *record))
+    log.flush()
+
+    def check() -> None:
+        log.record(AuditRecord(0.0, 0.01, *record))
+        log.close()
+        assert len(log.files()) == 2
+
+    try:
+        _in_child(check)
+        log.record(AuditRecord(0.0, 0.01, *record))
+    finally:
+        log.close()
+    assert sum(len(gzip.open(path).read().splitlines()) for path in log.files()) == 3
+
+
+def test_payment_cache_refreshes_in_child() -> None:
+    """Test that a child keeps the cached payments and starts refresh threads of its own."""
+    transport = MockTransport({("GET", "/sessions/*"): TransportResponse.from_json({"id": "pay_1", "status": "P"})})
+    client = PaymentGatewayClient(api_key="test-key", api_secret="test-secret", transport=transport)
+    cache = PaymentCache(client, ttl=0.01, stale_ttl=10, jitter=0)
+    cache.get_payment("pay_1")
+    time.sleep(0.02)
+    cache.get_payment("pay_1")  # starts the parent's refresh pool
+
+    def check() -> None:
+        assert _wait_for(lambda: not cache.stats()["refreshing"])
+        refreshes = cache.stats()["refreshes"]
+        time.sleep(0.02)
+        assert cache.get_payment("pay_1")["id"] == "pay_1"
+        assert _wait_for(lambda: cache.stats()["refreshes"] > refreshes and not cache.stats()["refreshing"])
+        cache.close()
+
+    try:
+        _in_child(check)
+    finally:
+        cache.close()
@@ -0,0 +1,173 @@
+"""Tests for HTTP/2 multiplexing in HttpxTransport."""
+
+import json
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List
+
+import pytest
+
+pytest.importorskip("httpx")
+h2_config = pytest.importorskip("h2.config")
+h2_connection = pytest.importorskip("h2.connection")
+h2_events = pytest.importorskip("h2.events")
+
+from acoriss_payment_gateway.client import PaymentGatewayClient  # noqa: E402
+from acoriss_payment_gateway.transport import HttpxTransport  # noqa: E402
+
+
+class H2StubServer:
+    """Cleartext HTTP/2 server answering ``GET /sessions/{id}`` after a delay."""
+
+    def __init__(self, delay: float = 0.05) -> None:
+        self.delay = delay
+        self.connections = 0
+        self.open_streams = 0
+        self.max_open_streams = 0
+        self._lock = threading.Lock()
+        self._sock = socket.socket()
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.listen()
+        self.port = self._sock.getsockname()[1]
+        self._closed = False
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def close(self) -> None:
+        self._closed = True
+        self._sock.close()
+
+    def _accept_loop(self) -> None:
+        while not self._closed:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            with self._lock:
+                self.connections += 1
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, sock: socket.socket) -> None:
+        h2 = h2_connection.H2Connection(config=h2_config.H2Configuration(client_side=False))
+        send_lock = threading.Lock()
+        h2.initiate_connection()
+        sock.sendall(h2.data_to_send())
+        paths: Dict[int, str] = {}
+
+        def respond(stream_id: int) -> None:
+            payment_id = paths.pop(stream_id).rsplit("/", 1)[-1]
+            body = json.dumps({"id": payment_id, "status": "P"}).encode("utf-8")
+            with self._lock:
+                self.open_streams -= 1
+            with send_lock:
+                h2.send_headers(stream_id, [(":status", "200"), ("content-type", "application/json")])
+                h2.send_data(stream_id, body, end_stream=True)
+                sock.sendall(h2.data_to_send())
+
+        while True:
+            try:
+                data = sock.recv(65535)
+            except OSError:
+                return
+            if not data:
+                return
+            with send_lock:
+                events = h2.receive_data(data)
+                sock.sendall(h2.data_to_send())
+            for event in events:
+                if isinstance(event, h2_events.RequestReceived):
+                    paths[event.stream_id] = dict(event.headers)[b":path"].decode()
+                    with self._lock:
+                        self.open_streams += 1
+                        self.max_open_streams = max(self.max_open_streams, self.open_streams)
+                if isinstance(event, h2_events.StreamEnded):
+                    threading.Timer(self.delay, respond, args=(event.stream_id,)).start()
+
+
+@pytest.fixture
+def h2_server() -> Iterator[H2StubServer]:
+    server = H2StubServer()
+    try:
+        yield server
+    finally:
+        server.close()
+
+
+def _lookup_concurrently(client: PaymentGatewayClient, count: int) -> List[Any]:
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        return list(pool.map(client.get_payment, [f"pay_{i}" for i in range(count)]))
+
+
+def test_concurrent_lookups_share_one_connection(h2_server: H2StubServer) -> None:
+    """Test that concurrent lookups are multiplexed over a single connection."""
+    transport = HttpxTransport(http2_prior_knowledge=True)
+    with PaymentGatewayClient(
+        api_key="test-key",
+        api_secret="test-secret",
+        base_url=f"http://127.0.0.1:{h2_server.port}/api/v1",
+        transport=transport,
+    ) as client:
+        client.get_payment("pay_warm")
+        payments = _lookup_concurrently(client, 20)
+
+    assert [p["id"] for p in payments] == [f"pay_{i}" for i in range(20)]
+    assert h2_server.connections == 1
+    assert h2_server.max_open_streams > 1
+
+
+def test_max_concurrent_streams_caps_in_flight_requests(h2_server: H2StubServer) -> None:
+    """Test that the stream limit bounds requests in flight."""
+    transport = HttpxTransport(http2_prior_knowledge=True, max_concurrent_streams=3)
+    with PaymentGatewayClient(
+        api_key="test-key",
+        api_secret="test-secret",
+        base_url=f"http://127.0.0.1:{h2_server.port}/api/v1",
+        transport=transport,
+    ) as client:
+        _lookup_concurrently(client, 12)
+
+    assert h2_server.max_open_streams <= 3
+
+
+def test_response_reports_http_version(h2_server: H2StubServer) -> None:
+    """Test that responses record the negotiated protocol."""
+    transport = HttpxTransport(http2_prior_knowledge=True)
+
+    response = transport.request("GET", f"http://127.0.0.1:{h2_server.port}/api/v1/sessions/pay_1", headers={})
+    transport.close()
+
+    assert response.http_version == "HTTP/2"
+    assert response.json() == {"id": "pay_1", "status": "P"}
+
+
+def test_http2_falls_back_to_http1_for_http1_servers(gateway_server: str) -> None:
+    """Test that HTTP/2 mode still works against HTTP/1.1-only servers."""
+    transport = HttpxTransport(http2=True)
+
+    response = transport.request("GET", f"{gateway_server}/sessions/pay_1", headers={})
+    transport.close()
+
+    assert response.status == 200
+    assert response.http_version == "HTTP/1.1"
+
+
+def test_http2_without_h2_package_falls_back(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test the fallback when the h2 package is missing."""
+    import httpx
+
+    created: Dict[str, Any] = {}
+    real_client = httpx.Client
+
+    def client_factory(**kwargs: Any) -> httpx.Client:
+        created.update(kwargs)
+        return real_client(**kwargs)
+
+    monkeypatch.setattr("acoriss_payment_gateway.transport._h2_available", lambda: False)
+    monkeypatch.setattr(httpx, "Client", client_factory)
+
+    with pytest.warns(RuntimeWarning, match="falling back to HTTP/1.1"):
+        transport = HttpxTransport(http2_prior_knowledge=True)
+    transport.close()
+
+    assert created["http2"] is False
+    assert "http1" not in created
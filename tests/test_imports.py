@@ -0,0 +1,68 @@
+"""Tests for package import footprint."""
+
+import subprocess
+import sys
+from typing import List
+
+import pytest
+
+import acoriss_payment_gateway
+
+# Modules that must not be loaded by a bare ``import acoriss_payment_gateway``
+HEAVY_MODULES = (
+    "acoriss_payment_gateway.client",
+    "requests",
+    "urllib3",
+    "charset_normalizer",
+    "http.client",
+    "ssl",
+    "json",
+    "concurrent.futures",
+)
+
+
+def _imported_modules(code: str) -> List[str]:
+    """Run ``code`` in a fresh interpreter and return the modules it imported."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            modules.append(line.rsplit("|", 1)[1].strip())
+    return modules
+
+
+def test_package_import_is_light() -> None:
+    """Test that importing the package does not load the HTTP stack."""
+    modules = _imported_modules("import acoriss_payment_gateway")
+
+    assert "acoriss_payment_gateway" in modules
+    assert [m for m in HEAVY_MODULES if m in modules] == []
+
+
+def test_types_and_signer_imports_are_light() -> None:
+    """Test that type-only and signing users do not load the HTTP stack."""
+    modules = _imported_modules(
+        "from acoriss_payment_gateway import APIError, PaymentSessionRequest\n"
+        "from acoriss_payment_gateway.signer import HmacSha256Signer"
+    )
+
+    assert [m for m in HEAVY_MODULES if m in modules] == []
+
+
+def test_lazy_client_attribute() -> None:
+    """Test that the client is importable from the package root."""
+    from acoriss_payment_gateway.client import PaymentGatewayClient
+
+    assert acoriss_payment_gateway.PaymentGatewayClient is PaymentGatewayClient
+    assert "PaymentGatewayClient" in dir(acoriss_payment_gateway)
+
+
+def test_unknown_attribute_raises() -> None:
+    """Test that unknown attributes still raise AttributeError."""
+    with pytest.raises(AttributeError, match="DoesNotExist"):
+        acoriss_payment_gateway.DoesNotExist  # noqa: B018
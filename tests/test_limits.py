@@ -0,0 +1,188 @@
+"""Tests for adaptive concurrency limits."""
+
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+import pytest
+
+from acoriss_payment_gateway.cli import main
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.errors import APIError
+from acoriss_payment_gateway.limits import AIMDLimit, ConcurrencyLimiter, GradientLimit, is_overload
+from acoriss_payment_gateway.transport import MockRequest, MockTransport, TransportResponse
+
+
+class KneeGateway:
+    """Stub whose latency grows past ``capacity`` requests in flight and fails past twice that."""
+
+    def __init__(self, capacity: int = 4, latency: float = 0.005) -> None:
+        self.capacity = capacity
+        self.latency = latency
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, request: MockRequest) -> TransportResponse:
+        with self._lock:
+            self.active += 1
+            active = self.active
+            self.peak = max(self.peak, active)
+        try:
+            if active > 2 * self.capacity:
+                return TransportResponse.from_json({"message": "Overloaded"}, status=503)
+            time.sleep(self.latency * max(1.0, active / self.capacity))
+            return TransportResponse.from_json({"id": "pay_1", "status": "S"})
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def _client(gateway: Any, limiter: Optional[ConcurrencyLimiter] = None) -> PaymentGatewayClient:
+    transport = MockTransport({("GET", "/sessions/*"): gateway})
+    return PaymentGatewayClient(api_key="test-key", api_secret="test-secret", transport=transport, limiter=limiter)
+
+
+class TestAlgorithms:
+    """Test limit updates."""
+
+    def test_is_overload(self) -> None:
+        """Test which statuses count as overload."""
+        assert [is_overload(s) for s in (None, 200, 404, 408, 429, 500, 503)] == [
+            True,
+            False,
+            False,
+            True,
+            True,
+            True,
+            True,
+        ]
+
+    def test_aimd_increases_by_one_per_window(self) -> None:
+        """Test additive increase while the limit is in use."""
+        algorithm = AIMDLimit(initial=10)
+        for _ in range(10):
+            algorithm.update(0.01, in_flight=10, dropped=False)
+
+        assert algorithm.limit == pytest.approx(11, abs=0.1)
+
+    def test_aimd_ignores_idle_capacity(self) -> None:
+        """Test that the limit does not grow while mostly unused."""
+        algorithm = AIMDLimit(initial=10)
+        algorithm.update(0.01, in_flight=2, dropped=False)
+
+        assert algorithm.limit == 10
+
+    def test_aimd_backs_off_once_per_round_trip(self) -> None:
+        """Test multiplicative decrease on overload, not repeated for the same burst."""
+        algorithm = AIMDLimit(initial=10, backoff=0.5)
+        algorithm.update(1.0, in_flight=10, dropped=True)
+        algorithm.update(1.0, in_flight=9, dropped=True)
+
+        assert algorithm.limit == 5
+
+    def test_aimd_latency_threshold(self) -> None:
+        """Test that slow requests count as overload when a threshold is set."""
+        algorithm = AIMDLimit(initial=10, backoff=0.5, latency_threshold=0.5)
+        algorithm.update(0.6, in_flight=10, dropped=False)
+
+        assert algorithm.limit == 5
+
+    def test_gradient_grows_while_latency_is_flat(self) -> None:
+        """Test growth at constant latency."""
+        algorithm = GradientLimit(initial=4)
+        for _ in range(100):
+            algorithm.update(0.01, in_flight=int(algorithm.limit), dropped=False)
+
+        assert algorithm.limit > 15
+
+    def test_gradient_shrinks_when_latency_rises(self) -> None:
+        """Test that queueing latency pulls the limit down without any errors."""
+        algorithm = GradientLimit(initial=20)
+        algorithm.update(0.01, in_flight=20, dropped=False)
+        for _ in range(100):
+            algorithm.update(0.04, in_flight=20, dropped=False)
+
+        assert algorithm.limit < 10
+
+    def test_bounds(self) -> None:
+        """Test min/max clamping and argument checks."""
+        algorithm = GradientLimit(initial=2, min_limit=2, max_limit=3)
+        for _ in range(100):
+            algorithm.update(0.01, in_flight=3, dropped=False)
+        assert algorithm.limit == 3
+        algorithm.update(1.0, in_flight=3, dropped=True)
+        assert algorithm.limit == 2.7
+
+        with pytest.raises(ValueError):
+            AIMDLimit(initial=10, max_limit=5)
+
+
+class TestConcurrencyLimiter:
+    """Test the limiter and its client integration."""
+
+    def test_blocks_at_limit(self) -> None:
+        """Test that acquire waits for a free slot."""
+        limiter = ConcurrencyLimiter(AIMDLimit(initial=1))
+
+        assert limiter.acquire()
+        assert not limiter.acquire(timeout=0.01)
+        limiter.release(0.01)
+        assert limiter.acquire(timeout=0.01)
+
+    def test_client_records_outcomes(self) -> None:
+        """Test that every request feeds the limiter, with 5xx counted as drops."""
+        limiter = ConcurrencyLimiter(AIMDLimit())
+        responses = iter([TransportResponse.from_json({"id": "pay_1"}), TransportResponse.from_json({}, status=503)])
+        client = _client(lambda request: next(responses), limiter)
+
+        client.get_payment("pay_1")
+        with pytest.raises(APIError):
+            client.get_payment("pay_2")
+
+        snapshot = limiter.snapshot()
+        assert snapshot["in_flight"] == 0
+        assert snapshot["dropped"] == 1
+        assert len(limiter.samples()) == 2
+
+    def test_releases_on_transport_error(self) -> None:
+        """Test that failures without a response free the slot."""
+
+        def fail(request: MockRequest) -> TransportResponse:
+            raise APIError(message="Connection refused")
+
+        limiter = ConcurrencyLimiter()
+        with pytest.raises(APIError):
+            _client(fail, limiter).get_payment("pay_1")
+
+        assert limiter.in_flight == 0
+        assert limiter.dropped == 1
+
+    @pytest.mark.parametrize("algorithm", [AIMDLimit, GradientLimit])
+    def test_settles_below_failure_point(self, algorithm: Any) -> None:
+        """Test that a wide thread pool is held near the stub's capacity knee."""
+        gateway = KneeGateway(capacity=4)
+        limiter = ConcurrencyLimiter(algorithm())
+
+        results = _client(gateway, limiter).get_payments(
+            [f"pay_{i}" for i in range(400)], max_workers=32, return_exceptions=True
+        )
+
+        errors = sum(isinstance(result, APIError) for result in results)
+        assert errors < 80
+        assert gateway.peak < 32
+        assert 2 <= limiter.limit <= 12
+
+
+def test_cli_adaptive(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    """Test that --adaptive installs a limiter capped by --concurrency."""
+    ids = tmp_path / "ids.txt"
+    ids.write_text("".join(f"pay_{i}\n" for i in range(20)))
+    client = _client(KneeGateway())
+
+    main(["get", str(ids), "-o", str(tmp_path / "out"), "-c", "6", "--adaptive", "--progress", "0"], client=client)
+
+    assert client.limiter is not None
+    assert client.limiter.algorithm.max_limit == 6
+    assert "| limit " in capsys.readouterr().err
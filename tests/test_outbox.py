@@ -0,0 +1,279 @@
+"""Tests for the outbox module."""
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.outbox import FAILED, PENDING, SENT, OutboxEntry, SessionOutbox
+from acoriss_payment_gateway.scheduling import PriorityScheduler
+from acoriss_payment_gateway.signer import HmacSha256Signer
+from acoriss_payment_gateway.transport import MockRequest, MockTransport, TransportResponse
+
+CUSTOMER = {"email": "john@example.com", "name": "John Doe"}
+
+
+class ScriptedGateway:
+    """Session endpoint answering with queued statuses per transaction id."""
+
+    def __init__(self) -> None:
+        self.statuses: Dict[str, List[int]] = {}
+        self.success_status = 200
+        self.received: List[Dict[str, object]] = []
+
+    def __call__(self, request: MockRequest) -> TransportResponse:
+        payload = json.loads(request.body or "{}")
+        self.received.append(payload)
+        queued = self.statuses.get(payload.get("transactionId", ""), [])
+        status = queued.pop(0) if queued else 200
+        if status != 200:
+            return TransportResponse.from_json({"message": f"status {status}"}, status=status)
+        return TransportResponse.from_json(
+            {"id": f"sess_{len(self.received)}", "checkoutUrl": "https://x"}, status=self.success_status
+        )
+
+
+@pytest.fixture
+def gateway() -> ScriptedGateway:
+    return ScriptedGateway()
+
+
+@pytest.fixture
+def client(gateway: ScriptedGateway) -> PaymentGatewayClient:
+    transport = MockTransport({("POST", "/sessions"): gateway})
+    return PaymentGatewayClient(api_key="test-key", api_secret="test-secret", transport=transport)
+
+
+def _outbox(client: PaymentGatewayClient, tmp_path: Path, **kwargs: object) -> SessionOutbox:
+    options: Dict[str, object] = {"autostart": False, "retry_backoff": 0.0, "max_workers": 1}
+    options.update(kwargs)
+    return SessionOutbox(client, str(tmp_path / "outbox.db"), **options)  # type: ignore[arg-type]
+
+
+def test_enqueue_then_drain(client: PaymentGatewayClient, gateway: ScriptedGateway, tmp_path: Path) -> None:
+    """Test that enqueued sessions are signed, stored and sent."""
+    with _outbox(client, tmp_path) as outbox:
+        entry_id = outbox.enqueue(amount=5000, currency="USD", customer=CUSTOMER, transaction_id="tx_1")
+
+        assert outbox.result(entry_id) == OutboxEntry(entry_id, "tx_1", PENDING, 0, None, None, None)
+        assert outbox.drain_once() == 1
+
+        entry = outbox.result(entry_id)
+        assert entry is not None
+        assert entry.state == SENT
+        assert entry.response == {"id": "sess_1", "checkout_url": "https://x"}
+        assert gateway.received[0]["transactionId"] == "tx_1"
+
+    request = client.transport.requests[0]  # type: ignore[attr-defined]
+    assert request.headers["X-SIGNATURE"] == HmacSha256Signer("test-secret").sign(request.body)
+
+
+def test_pending_entries_survive_reopen(client: PaymentGatewayClient, gateway: ScriptedGateway, tmp_path: Path) -> None:
+    """Test that entries persist across outbox instances."""
+    outbox = _outbox(client, tmp_path)
+    entry_id = outbox.enqueue(amount=100, currency="USD", customer=CUSTOMER)
+    outbox.close()
+
+    with _outbox(client, tmp_path) as reopened:
+        assert reopened.pending() == 1
+        reopened.drain_once()
+        entry = reopened.result(entry_id)
+
+    assert entry is not None and entry.state == SENT
+    assert len(gateway.received) == 1
+
+
+def test_ordering_per_transaction_id(client: PaymentGatewayClient, gateway: ScriptedGateway, tmp_path: Path) -> None:
+    """Test that later entries wait while an earlier one for the same transaction is retried."""
+    gateway.statuses["tx_a"] = [503]
+    with _outbox(client, tmp_path) as outbox:
+        first = outbox.enqueue(amount=1, currency="USD", customer=CUSTOMER, transaction_id="tx_a")
+        second = outbox.enqueue(amount=2, currency="USD", customer=CUSTOMER, transaction_id="tx_a")
+        other = outbox.enqueue(amount=3, currency="USD", customer=CUSTOMER, transaction_id="tx_b")
+
+        assert outbox.drain_once() == 2  # head of tx_a and tx_b only
+        assert [p["amount"] for p in gateway.received] == [1, 3]
+        assert outbox.result(first).state == PENDING  # type: ignore[union-attr]
+        assert outbox.result(second).attempts == 0  # type: ignore[union-attr]
+        assert outbox.result(other).state == SENT  # type: ignore[union-attr]
+
+        outbox.drain_once()
+        outbox.drain_once()
+
+        assert [p["amount"] for p in gateway.received] == [1, 3, 1, 2]
+        assert outbox.pending() == 0
+
+
+def test_retry_until_max_attempts(client: PaymentGatewayClient, gateway: ScriptedGateway, tmp_path: Path) -> None:
+    """Test that retryable failures give up after max_attempts."""
+    gateway.statuses["tx_1"] = [500, 500, 500]
+    with _outbox(client, tmp_path, max_attempts=3) as outbox:
+        entry_id = outbox.enqueue(amount=1, currency="USD", customer=CUSTOMER, transaction_id="tx_1")
+        for _ in range(5):
+            outbox.drain_once()
+        entry = outbox.result(entry_id)
+
+    assert entry is not None
+    assert entry.state == FAILED
+    assert entry.attempts == 3
+    assert entry.status == 500
+
+
+def test_client_errors_fail_immediately(client: PaymentGatewayClient, gateway: ScriptedGateway, tmp_path: Path) -> None:
+    """Test that 4xx responses are not retried."""
+    gateway.statuses["tx_1"] = [400]
+    with _outbox(client, tmp_path) as outbox:
+        entry_id = outbox.enqueue(amount=1, currency="USD", customer=CUSTOMER, transaction_id="tx_1")
+        outbox.drain_once()
+        entry = outbox.result(entry_id)
+
+    assert entry is not None
+    assert (entry.state, entry.attempts, entry.error) == (FAILED, 1, "APIError(400): status 400")
+
+
+def test_retry_backoff_delays_next_attempt(
+    client: PaymentGatewayClient, gateway: ScriptedGateway, tmp_path: Path
+) -> None:
+    """Test that a failed entry is not retried before its backoff elapses."""
+    gateway.statuses["tx_1"] = [503]
+    with _outbox(client, tmp_path, retry_backoff=60.0) as outbox:
+        outbox.enqueue(amount=1, currency="USD", customer=CUSTOMER, transaction_id="tx_1")
+        outbox.drain_once()
+
+        assert outbox.drain_once() == 0
+        assert outbox.pending() == 1
+
+
+def test_background_sender_invokes_callback(client: PaymentGatewayClient, tmp_path: Path) -> None:
+    """Test the background sender and result callback."""
+    results: List[OutboxEntry] = []
+    done = threading.Event()
+
+    def on_result(entry: OutboxEntry) -> None:
+        results.append(entry)
+        if len(results) == 10:
+            done.set()
+
+    with _outbox(client, tmp_path, autostart=True, on_result=on_result, max_workers=4) as outbox:
+        for i in range(10):
+            outbox.enqueue(amount=i + 1, currency="USD", customer=CUSTOMER, transaction_id=f"tx_{i}")
+
+        assert outbox.flush(timeout=5)
+        assert done.wait(5)
+
+    assert sorted(r.transaction_id or "" for r in results) == sorted(f"tx_{i}" for i in range(10))
+    assert all(r.state == SENT for r in results)
+
+
+def test_enqueue_without_signer_raises(tmp_path: Path) -> None:
+    """Test that entries cannot be queued without a signature."""
+    client = PaymentGatewayClient(api_key="test-key", transport=MockTransport())
+
+    with _outbox(client, tmp_path) as outbox, pytest.raises(ValueError, match="No signature available"):
+        outbox.enqueue(amount=1, currency="USD", customer=CUSTOMER)
+
+
+def test_records_response_status(client: PaymentGatewayClient, gateway: ScriptedGateway, tmp_path: Path) -> None:
+    """Test that a sent entry keeps the status the gateway answered with."""
+    gateway.success_status = 201
+    with _outbox(client, tmp_path) as outbox:
+        entry_id = outbox.enqueue(amount=1, currency="USD", customer=CUSTOMER)
+        outbox.drain_once()
+
+        assert outbox.result(entry_id).status == 201  # type: ignore[union-attr]
+
+
+def test_unexpected_send_errors_are_retried(tmp_path: Path) -> None:
+    """Test that an exception other than APIError counts as a failed attempt."""
+    calls: List[int] = []
+
+    def flaky(request: MockRequest) -> TransportResponse:
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return TransportResponse.from_json({"id": "sess_1"})
+
+    transport = MockTransport({("POST", "/sessions"): flaky})
+    client = PaymentGatewayClient(api_key="test-key", api_secret="test-secret", transport=transport)
+    with _outbox(client, tmp_path) as outbox:
+        entry_id = outbox.enqueue(amount=1, currency="USD", customer=CUSTOMER)
+        outbox.drain_once()
+        failed = outbox.result(entry_id)
+        outbox.drain_once()
+        sent = outbox.result(entry_id)
+
+    assert failed is not None and (failed.state, failed.attempts, failed.error) == (PENDING, 1, "RuntimeError: boom")
+    assert sent is not None and sent.state == SENT
+
+
+def test_failing_callback_keeps_sender_running(client: PaymentGatewayClient, tmp_path: Path) -> None:
+    """Test that the sender goes on after on_result raises."""
+
+    def on_result(entry: OutboxEntry) -> None:
+        raise ValueError("callback bug")
+
+    with _outbox(client, tmp_path, autostart=True, poll_interval=0.01, on_result=on_result) as outbox:
+        outbox.enqueue(amount=1, currency="USD", customer=CUSTOMER)
+        assert outbox.flush(timeout=5)
+        outbox.enqueue(amount=2, currency="USD", customer=CUSTOMER)
+        assert outbox.flush(timeout=5)
+        assert outbox._thread is not None and outbox._thread.is_alive()
+
+
+def test_senders_sharing_a_file_claim_entries(
+    client: PaymentGatewayClient, gateway: ScriptedGateway, tmp_path: Path
+) -> None:
+    """Test that outboxes opened on one file send each entry once, and claims run out."""
+    first = _outbox(client, tmp_path, batch_size=10)
+    second = _outbox(client, tmp_path, batch_size=10)
+    try:
+        for i in range(30):
+            first.enqueue(amount=i + 1, currency="USD", customer=CUSTOMER)
+        threads = [threading.Thread(target=outbox.drain_once) for outbox in (first, second, first, second)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        while first.drain_once() or second.drain_once():
+            pass
+
+        assert sorted(p["amount"] for p in gateway.received) == list(range(1, 31))
+
+        # A claim left by a sender that died is taken over once it runs out
+        entry_id = second.enqueue(amount=99, currency="USD", customer=CUSTOMER)
+        second.claim_ttl = 0.0
+        second._claim()
+        assert first.drain_once() == 1
+        assert first.result(entry_id).state == SENT  # type: ignore[union-attr]
+    finally:
+        first.close()
+        second.close()
+
+
+def test_sends_leave_reserved_slots_free(gateway: ScriptedGateway, tmp_path: Path) -> None:
+    """Test that outbox sends are low priority and wait rather than take the reserved slots."""
+    scheduler = PriorityScheduler(slots=2, reserved=1)
+    transport = MockTransport({("POST", "/sessions"): gateway})
+    client = PaymentGatewayClient(
+        api_key="test-key", api_secret="test-secret", transport=transport, scheduler=scheduler
+    )
+    with _outbox(client, tmp_path) as outbox:
+        outbox.enqueue(amount=1, currency="USD", customer=CUSTOMER)
+        assert scheduler.acquire("normal")  # takes the only unreserved slot
+        sender = threading.Thread(target=outbox.drain_once)
+        sender.start()
+        deadline = time.monotonic() + 5
+        while scheduler.snapshot()["low"]["waiting"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert scheduler.snapshot()["low"]["waiting"] == 1
+        assert scheduler.acquire("high", timeout=0)
+        scheduler.release("high")
+        scheduler.release("normal")
+        sender.join(timeout=5)
+
+    assert gateway.received and scheduler.snapshot()["high"]["requests"] == 1
@@ -0,0 +1,202 @@
+"""Tests for ledger reconciliation."""
+
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.errors import APIError
+from acoriss_payment_gateway.reconcile import (
+    AMOUNT_MISMATCH,
+    CURRENCY_MISMATCH,
+    DUPLICATE_LEDGER_ENTRY,
+    DUPLICATE_PAYMENT,
+    EXPIRED_BUT_PAID,
+    LOOKUP_FAILED,
+    MISSING_AT_GATEWAY,
+    MISSING_IN_LEDGER,
+    STATUS_DRIFT,
+    Reconciler,
+    reconcile_with_client,
+)
+from acoriss_payment_gateway.transport import MockRequest, MockTransport, TransportResponse
+
+
+def _payment(tx: str, amount: int = 5000, currency: str = "USD", status: str = "S", **extra: Any) -> Dict[str, Any]:
+    payment = {"id": f"pay_{tx}", "transaction_id": tx, "amount": amount, "currency": currency, "status": status}
+    payment.update(extra)
+    return payment
+
+
+def _row(
+    tx: str, amount: int = 5000, currency: str = "USD", status: Optional[str] = "S", **extra: Any
+) -> Dict[str, Any]:
+    row = {"transaction_id": tx, "amount": amount, "currency": currency, "status": status}
+    row.update(extra)
+    return row
+
+
+LEDGER = [
+    _row("tx_ok"),
+    _row("tx_missing"),
+    _row("tx_amount", amount=4000),
+    _row("tx_currency", currency="CDF"),
+    _row("tx_drift", status="S"),
+    _row("tx_expired"),
+    _row("tx_ok"),
+]
+
+GATEWAY = [
+    _payment("tx_ok"),
+    _payment("tx_amount"),
+    _payment("tx_currency"),
+    _payment("tx_drift", status="P"),
+    _payment("tx_expired", expired=True),
+    _payment("tx_extra"),
+]
+
+EXPECTED = {
+    ("tx_missing", MISSING_AT_GATEWAY),
+    ("tx_amount", AMOUNT_MISMATCH),
+    ("tx_currency", CURRENCY_MISMATCH),
+    ("tx_drift", STATUS_DRIFT),
+    ("tx_expired", EXPIRED_BUT_PAID),
+    ("tx_ok", DUPLICATE_LEDGER_ENTRY),
+    ("tx_extra", MISSING_IN_LEDGER),
+}
+
+
+class TestReconciler:
+    """Test the hash-join reconciler."""
+
+    @pytest.mark.parametrize("partitions", [1, 4])
+    def test_classifies_mismatches(self, partitions: int, tmp_path: Path) -> None:
+        """Test every mismatch kind, in memory and with spilled partitions."""
+        reconciler = Reconciler(partitions=partitions, spill_dir=str(tmp_path))
+
+        found = {(m.transaction_id, m.kind) for m in reconciler.run(LEDGER, GATEWAY)}
+
+        assert found == EXPECTED
+        assert reconciler.summary["matched"] == 1
+        assert reconciler.summary[MISSING_AT_GATEWAY] == 1
+        assert list(tmp_path.iterdir()) == []
+
+    def test_currency_mismatch_skips_amount_comparison(self) -> None:
+        """Test that amounts in different currencies are not compared."""
+        mismatches = list(Reconciler().run([_row("tx", 1, "CDF")], [_payment("tx", 2, "USD")]))
+
+        assert [m.kind for m in mismatches] == [CURRENCY_MISMATCH]
+        assert mismatches[0].detail == "ledger CDF, gateway USD"
+
+    def test_status_is_optional_in_ledger(self) -> None:
+        """Test that rows without a status only compare amounts."""
+        reconciler = Reconciler()
+
+        assert list(reconciler.run([_row("tx", status=None)], [_payment("tx", status="C")])) == []
+        assert reconciler.summary == Counter(matched=1)
+
+    def test_duplicate_gateway_sessions(self) -> None:
+        """Test that a retried session is fine but two successful ones are reported."""
+        gateway = [
+            _payment("tx_retried", status="C", id="pay_1"),
+            _payment("tx_retried", status="S", id="pay_2"),
+            _payment("tx_double", id="pay_3"),
+            _payment("tx_double", id="pay_4"),
+        ]
+
+        mismatches = list(Reconciler().run([_row("tx_retried"), _row("tx_double")], gateway))
+
+        assert [(m.transaction_id, m.kind) for m in mismatches] == [("tx_double", DUPLICATE_PAYMENT)]
+        assert mismatches[0].detail == "sessions pay_3 and pay_4 both succeeded"
+
+    def test_streams_inputs(self) -> None:
+        """Test that the ledger is consumed lazily as mismatches are read."""
+        consumed: List[str] = []
+
+        def ledger() -> Any:
+            for i in range(100):
+                consumed.append(str(i))
+                yield _row(f"tx_{i}")
+
+        mismatches = Reconciler().run(ledger(), [])
+        next(mismatches)
+
+        assert consumed == ["0"]
+
+    def test_to_dict(self) -> None:
+        """Test that reports are JSON-serializable."""
+        mismatch = next(Reconciler().run([_row("tx", amount=1)], [_payment("tx", expired=False)]))
+
+        assert json.loads(json.dumps(mismatch.to_dict()))["gateway"]["payment_id"] == "pay_tx"
+
+    def test_invalid_partitions(self) -> None:
+        """Test that at least one partition is required."""
+        with pytest.raises(ValueError):
+            Reconciler(partitions=0)
+
+
+def _client() -> PaymentGatewayClient:
+    payments = {p["id"]: p for p in GATEWAY}
+
+    def lookup(request: MockRequest) -> TransportResponse:
+        payment_id = request.url.rsplit("/", 1)[-1]
+        if payment_id == "pay_error":
+            return TransportResponse.from_json({"message": "Unavailable"}, status=503)
+        if payment_id not in payments:
+            return TransportResponse.from_json({"message": "Not found"}, status=404)
+        return TransportResponse.from_json(payments[payment_id])
+
+    transport = MockTransport({("GET", "/sessions/*"): lookup})
+    return PaymentGatewayClient(api_key="test-key", api_secret="test-secret", transport=transport)
+
+
+class TestGetPayments:
+    """Test bulk payment lookups."""
+
+    def test_preserves_order(self) -> None:
+        """Test that results line up with the requested IDs."""
+        payments = _client().get_payments(["pay_tx_ok", "pay_tx_extra", "pay_tx_amount"], max_workers=3)
+
+        assert [p["transaction_id"] for p in payments] == ["tx_ok", "tx_extra", "tx_amount"]  # type: ignore[index]
+
+    def test_raises_first_error(self) -> None:
+        """Test that errors propagate by default."""
+        with pytest.raises(APIError) as exc_info:
+            _client().get_payments(["pay_tx_ok", "pay_unknown"])
+
+        assert exc_info.value.status == 404
+
+    def test_return_exceptions(self) -> None:
+        """Test that failed lookups are returned in place."""
+        results = _client().get_payments(["pay_unknown", "pay_tx_ok"], return_exceptions=True)
+
+        assert isinstance(results[0], APIError)
+        assert results[0].status == 404
+        assert not isinstance(results[1], APIError)
+
+
+class TestReconcileWithClient:
+    """Test reconciliation against live lookups."""
+
+    def test_classifies_lookups(self) -> None:
+        """Test mismatches found by looking up each ledger payment_id."""
+        ledger = [dict(row, payment_id=f"pay_{row['transaction_id']}") for row in LEDGER[:-1]]
+        ledger.append(_row("tx_no_id"))
+        ledger.append(_row("tx_error", payment_id="pay_error"))
+        summary: Counter = Counter()
+
+        mismatches = list(reconcile_with_client(_client(), ledger, batch_size=3, summary=summary))
+
+        assert [(m.transaction_id, m.kind) for m in mismatches] == [
+            ("tx_missing", MISSING_AT_GATEWAY),
+            ("tx_amount", AMOUNT_MISMATCH),
+            ("tx_currency", CURRENCY_MISMATCH),
+            ("tx_drift", STATUS_DRIFT),
+            ("tx_expired", EXPIRED_BUT_PAID),
+            ("tx_no_id", MISSING_AT_GATEWAY),
+            ("tx_error", LOOKUP_FAILED),
+        ]
+        assert summary["matched"] == 1
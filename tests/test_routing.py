@@ -0,0 +1,197 @@
+"""Tests for routing across several gateway endpoints."""
+
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterator, List
+
+import pytest
+
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.errors import APIError
+from acoriss_payment_gateway.routing import EndpointRouter
+from acoriss_payment_gateway.transport import Urllib3Transport
+
+
+class Edge:
+    """Local stub gateway edge with adjustable latency and failure status."""
+
+    def __init__(self, name: str, latency: float = 0.0) -> None:
+        self.name = name
+        self.latency = latency
+        self.status = 200
+        edge = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format: str, *args: object) -> None:
+                pass
+
+            def do_GET(self) -> None:  # noqa: N802
+                time.sleep(edge.latency)
+                payment_id = self.path.rsplit("/", 1)[-1]
+                body = json.dumps({"id": payment_id, "edge": edge.name, "status": "S"}).encode()
+                self.send_response(edge.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self) -> None:  # noqa: N802
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                self.do_GET()
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/api/v1"
+        threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True).start()
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def edges() -> Iterator[Callable[..., Edge]]:
+    started: List[Edge] = []
+
+    def start(name: str, latency: float = 0.0) -> Edge:
+        edge = Edge(name, latency)
+        started.append(edge)
+        return edge
+
+    yield start
+    for edge in started:
+        edge.stop()
+
+
+def _client(router: EndpointRouter) -> PaymentGatewayClient:
+    return PaymentGatewayClient(
+        api_key="test-key", api_secret="test-secret", router=router, transport=Urllib3Transport(maxsize=16)
+    )
+
+
+def _lookups(client: PaymentGatewayClient, count: int, workers: int = 1) -> Counter:
+    results = client.get_payments([f"pay_{i}" for i in range(count)], max_workers=workers, return_exceptions=True)
+    return Counter(result.get("edge") if isinstance(result, dict) else "error" for result in results)
+
+
+def _unused_url() -> str:
+    edge = Edge("gone")
+    edge.stop()
+    return edge.url
+
+
+class TestSelection:
+    """Test latency- and load-aware endpoint choice."""
+
+    def test_prefers_faster_endpoint(self, edges: Callable[..., Edge]) -> None:
+        """Test that most traffic goes to the endpoint with the lowest latency."""
+        fast, slow = edges("fast", 0.002), edges("slow", 0.03)
+        client = _client(EndpointRouter([slow.url, fast.url]))
+
+        counts = _lookups(client, 100)
+
+        assert counts["fast"] >= 90
+        assert counts["error"] == 0
+
+    def test_spreads_concurrent_load(self, edges: Callable[..., Edge]) -> None:
+        """Test that outstanding requests push work to equally fast endpoints."""
+        a, b = edges("a", 0.02), edges("b", 0.02)
+        client = _client(EndpointRouter([a.url, b.url]))
+
+        counts = _lookups(client, 80, workers=8)
+
+        assert counts["a"] >= 20 and counts["b"] >= 20
+
+    def test_idle_endpoint_is_retried(self) -> None:
+        """Test that an endpoint's latency weighs less the longer it goes unsampled."""
+        router = EndpointRouter(["http://a", "http://b"], decay_time=0.05)
+        a, b = router.endpoints
+        router.release(router.acquire(exclude=[b]), 0.5, failed=False)
+        router.release(router.acquire(exclude=[a]), 0.01, failed=False)
+
+        assert router.acquire() is b
+        time.sleep(0.4)
+        router.release(b, 0.01, failed=False)  # keeps b's average fresh
+        assert router.acquire() is a
+
+
+class TestHealth:
+    """Test passive health checks, ejection and re-admission."""
+
+    def test_failover_and_ejection(self, edges: Callable[..., Edge]) -> None:
+        """Test that lookups fail over from a dead endpoint, which is then ejected."""
+        # Slow enough that the dead endpoint's fast failures keep it the cheapest until ejected
+        alive = edges("alive", 0.02)
+        router = EndpointRouter([_unused_url(), alive.url], failure_threshold=2)
+        client = _client(router)
+
+        counts = _lookups(client, 30)
+
+        dead, _ = router.snapshot()
+        assert counts == Counter({"alive": 30})
+        assert dead["ejected"] is True
+        assert dead["requests"] == 2
+
+    def test_readmission(self, edges: Callable[..., Edge]) -> None:
+        """Test that a failing endpoint is ejected, re-admitted when the ejection ends, and restored."""
+        flaky, steady = edges("flaky"), edges("steady", 0.01)
+        router = EndpointRouter([flaky.url, steady.url], failure_threshold=2, ejection_time=0.2, failover=0)
+        client = _client(router)
+
+        flaky.status = 503
+        _lookups(client, 10)
+        assert router.snapshot()[0]["ejected"] is True
+        assert _lookups(client, 10) == Counter({"steady": 10})
+
+        flaky.status = 200
+        time.sleep(0.25)
+        counts = _lookups(client, 20)
+
+        assert counts["flaky"] >= 10
+        assert router.snapshot()[0]["ejections"] == 0
+
+    def test_probation_failure_doubles_ejection(self) -> None:
+        """Test that a re-admitted endpoint is ejected again after one failure, for longer."""
+        router = EndpointRouter(["http://a"], failure_threshold=3, ejection_time=0.05)
+        (endpoint,) = router.endpoints
+        for _ in range(3):
+            router.release(router.acquire(), 0.01, failed=True)
+        first = endpoint.ejected_until
+        time.sleep(0.06)
+
+        router.release(router.acquire(), 0.01, failed=True)
+
+        assert endpoint.ejections == 2
+        assert endpoint.ejected_until - first >= 0.1
+
+    def test_sessions_are_not_resent(self, edges: Callable[..., Edge]) -> None:
+        """Test that session creation does not fail over, while the failure still counts."""
+        router = EndpointRouter([_unused_url(), edges("alive").url])
+        dead, _ = router.endpoints
+        router.release(router.acquire(exclude=[dead]), 1.0, failed=False)  # make the dead endpoint the first choice
+        client = _client(router)
+
+        with pytest.raises(APIError):
+            client.create_session(amount=100, currency="USD", customer={"email": "a@example.com"})
+
+        assert [e["requests"] for e in router.snapshot()] == [1, 1]
+
+
+def test_client_options(edges: Callable[..., Edge]) -> None:
+    """Test base_url lists, warm-up across endpoints and argument checks."""
+    a, b = edges("a"), edges("b")
+    client = PaymentGatewayClient(
+        api_key="test-key", base_url=[a.url, _unused_url(), b.url], transport=Urllib3Transport(maxsize=2)
+    )
+
+    assert client.router is not None
+    assert client.base_url == a.url
+    assert client.warmup(connections=1) == 2
+    with pytest.raises(ValueError):
+        EndpointRouter([])
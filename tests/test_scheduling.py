@@ -0,0 +1,153 @@
+"""Tests for priority scheduling of requests."""
+
+import threading
+import time
+from typing import Callable, List
+
+import pytest
+
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.scheduling import PriorityScheduler
+from acoriss_payment_gateway.transport import MockRequest, MockTransport, TransportResponse
+from acoriss_payment_gateway.types import Priority
+
+
+def _wait_for(condition: Callable[[], bool], timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+def _queue(scheduler: PriorityScheduler, priority: Priority, order: List[str]) -> threading.Thread:
+    """Start a thread that takes a slot, records its priority and frees the slot."""
+
+    def run() -> None:
+        scheduler.acquire(priority)
+        order.append(priority)
+        scheduler.release(priority)
+
+    waiting = scheduler.snapshot()[priority]["waiting"]
+    thread = threading.Thread(target=run)
+    thread.start()
+    _wait_for(lambda: scheduler.snapshot()[priority]["waiting"] > waiting)
+    return thread
+
+
+class TestScheduler:
+    """Test admission order and reserved capacity."""
+
+    def test_reserved_slots(self) -> None:
+        """Test that reserved slots are only used by high-priority requests."""
+        scheduler = PriorityScheduler(slots=2, reserved=1)
+
+        assert scheduler.acquire("low")
+        assert not scheduler.acquire("normal", timeout=0.05)
+        assert scheduler.acquire("high", timeout=0.05)
+        assert scheduler.in_flight == 2
+
+    def test_highest_priority_first(self) -> None:
+        """Test that a freed slot goes to the highest priority waiting, not the first to arrive."""
+        scheduler = PriorityScheduler(slots=1, reserved=0, aging=60)
+        order: List[str] = []
+        scheduler.acquire("low")
+        threads = [_queue(scheduler, priority, order) for priority in ("low", "normal", "high")]
+
+        scheduler.release("low")
+        for thread in threads:
+            thread.join(5)
+
+        assert order == ["high", "normal", "low"]
+
+    def test_aging_prevents_starvation(self) -> None:
+        """Test that a request waiting long enough is admitted ahead of newer high-priority ones."""
+        scheduler = PriorityScheduler(slots=1, reserved=0, aging=0.05)
+        order: List[str] = []
+        scheduler.acquire("high")
+        threads = [_queue(scheduler, "low", order)]
+        time.sleep(0.12)
+        threads.append(_queue(scheduler, "high", order))
+
+        scheduler.release("high")
+        for thread in threads:
+            thread.join(5)
+
+        assert order == ["low", "high"]
+
+    def test_snapshot_reports_queueing_delay(self) -> None:
+        """Test per-class counts and queueing delay."""
+        scheduler = PriorityScheduler(slots=1, reserved=0)
+        order: List[str] = []
+        scheduler.acquire("normal")
+        thread = _queue(scheduler, "low", order)
+        time.sleep(0.05)
+        scheduler.release("normal")
+        thread.join(5)
+
+        snapshot = scheduler.snapshot()
+
+        assert snapshot["normal"]["requests"] == 1 and snapshot["normal"]["queued"] == 0
+        assert snapshot["low"]["requests"] == 1 and snapshot["low"]["queued"] == 1
+        assert snapshot["low"]["delay_max"] >= 0.05
+        assert snapshot["low"]["in_flight"] == snapshot["low"]["waiting"] == 0
+
+    def test_invalid_arguments(self) -> None:
+        """Test that bad settings and unknown priorities are rejected."""
+        with pytest.raises(ValueError):
+            PriorityScheduler(slots=2, reserved=2)
+        with pytest.raises(ValueError):
+            PriorityScheduler(aging=0)
+        with pytest.raises(ValueError):
+            PriorityScheduler().acquire("urgent")  # type: ignore[arg-type]
+
+
+class TestClient:
+    """Test scheduling of client requests."""
+
+    def test_checkout_not_blocked_by_batch(self) -> None:
+        """Test that sessions use the reserved slot while a lookup batch fills the others."""
+        gate = threading.Event()
+
+        def slow_lookup(request: MockRequest) -> TransportResponse:
+            gate.wait(5)
+            return TransportResponse.from_json({"id": request.url.rsplit("/", 1)[-1], "status": "S"})
+
+        transport = MockTransport(
+            {
+                ("GET", "/sessions/*"): slow_lookup,
+                ("POST", "/sessions"): TransportResponse.from_json({"id": "sess_1"}),
+            }
+        )
+        scheduler = PriorityScheduler(slots=2, reserved=1)
+        client = PaymentGatewayClient(
+            api_key="test-key", api_secret="test-secret", transport=transport, scheduler=scheduler
+        )
+        batch = threading.Thread(target=client.get_payments, args=([f"pay_{i}" for i in range(4)],))
+        batch.start()
+        _wait_for(lambda: scheduler.snapshot()["low"]["waiting"] == 3)
+
+        session = client.create_session(amount=100, currency="USD", customer={"email": "a@example.com"})
+
+        assert session["id"] == "sess_1"
+        gate.set()
+        batch.join(5)
+        snapshot = scheduler.snapshot()
+        assert snapshot["high"]["requests"] == 1 and snapshot["high"]["queued"] == 0
+        assert snapshot["low"]["requests"] == 4
+
+    def test_priority_defaults_and_overrides(self) -> None:
+        """Test per-call priorities and a per-client default."""
+        transport = MockTransport({("GET", "/sessions/*"): TransportResponse.from_json({"id": "pay_1"})})
+        scheduler = PriorityScheduler()
+        client = PaymentGatewayClient(
+            api_key="test-key", api_secret="test-secret", transport=transport, scheduler=scheduler
+        )
+        batch = PaymentGatewayClient(
+            api_key="test-key", api_secret="test-secret", transport=transport, scheduler=scheduler, priority="low"
+        )
+
+        client.get_payment("pay_1")
+        client.get_payment("pay_1", priority="high")
+        batch.get_payment("pay_1")
+
+        assert {p: s["requests"] for p, s in scheduler.snapshot().items()} == {"high": 1, "normal": 1, "low": 1}
@@ -0,0 +1,200 @@
+"""Tests for sharded bulk jobs."""
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from acoriss_payment_gateway.cli import Item, Result, main, read_ids
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.sharding import HashRing, ShardLease, create_job, job_status, load_job, merge, work
+from acoriss_payment_gateway.transport import MockRequest, MockTransport, TransportResponse
+
+
+def _client(lookups: List[str]) -> PaymentGatewayClient:
+    def lookup(request: MockRequest) -> TransportResponse:
+        payment_id = request.url.rsplit("/", 1)[-1]
+        lookups.append(payment_id)
+        if payment_id == "pay_missing":
+            return TransportResponse.from_json({"message": "Not found"}, status=404)
+        return TransportResponse.from_json({"id": payment_id, "status": "S"})
+
+    transport = MockTransport({("GET", "/sessions/*"): lookup})
+    return PaymentGatewayClient(api_key="test-key", api_secret="test-secret", transport=transport)
+
+
+def _ids(count: int) -> List[Item]:
+    return list(read_ids(iter(f"pay_{i}\n" for i in range(count))))
+
+
+def _merged(directory: str, **kwargs: Any) -> List[Result]:
+    results: List[Result] = []
+    merge(directory, results.append, **kwargs)
+    return results
+
+
+class TestHashRing:
+    """Test key placement."""
+
+    def test_spreads_keys_and_moves_few_on_resize(self) -> None:
+        """Test that keys spread evenly and adding a node only moves keys onto it."""
+        keys = [f"pay_{i}" for i in range(20000)]
+        ring = HashRing([f"node{i}" for i in range(8)])
+        placement = {key: ring.node_for(key) for key in keys}
+        counts = Counter(placement.values())
+        assert max(counts.values()) < 1.3 * len(keys) / 8
+
+        grown = HashRing([f"node{i}" for i in range(9)])
+        moved = [key for key in keys if grown.node_for(key) != placement[key]]
+
+        assert all(grown.node_for(key) == "node8" for key in moved)
+        assert len(moved) < 1.5 * len(keys) / 9
+
+    def test_requires_nodes(self) -> None:
+        """Test that an empty ring is rejected."""
+        with pytest.raises(ValueError):
+            HashRing([])
+
+
+class TestShardLease:
+    """Test lease exclusivity and expiry."""
+
+    def test_exclusive_until_released(self, tmp_path: Path) -> None:
+        """Test that a held lease cannot be acquired by another worker."""
+        first, second = ShardLease(str(tmp_path), "a", 60), ShardLease(str(tmp_path), "b", 60)
+
+        assert first.acquire()
+        assert not second.acquire()
+        assert first.renew()
+        first.release()
+        assert second.acquire()
+        assert sorted(os.listdir(tmp_path)) == ["lease"]
+
+    def test_expired_lease_is_taken_over(self, tmp_path: Path) -> None:
+        """Test that an expired lease is taken over once and its former holder notices."""
+        stale = ShardLease(str(tmp_path), "stale", 0.01)
+        assert stale.acquire()
+        time.sleep(0.02)
+        contenders = [ShardLease(str(tmp_path), f"w{i}", 60) for i in range(8)]
+        outcomes: List[bool] = []
+        threads = [
+            threading.Thread(target=lambda lease=lease: outcomes.append(lease.acquire())) for lease in contenders
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert outcomes.count(True) == 1
+        winner = json.loads((tmp_path / "lease").read_text())
+        assert not stale.renew()
+        stale.release()
+        assert json.loads((tmp_path / "lease").read_text()) == winner
+        assert sorted(os.listdir(tmp_path)) == ["lease"]
+
+
+class TestJob:
+    """Test splitting, processing and merging jobs."""
+
+    def test_roundtrip_in_input_order(self, tmp_path: Path) -> None:
+        """Test that every record is processed once and merged in input order."""
+        lookups: List[str] = []
+        items = _ids(200) + [Item(201, "pay_missing", "pay_missing")]
+        assert create_job(str(tmp_path), "get", items, shards=8) == 201
+
+        stats = work(str(tmp_path), _client(lookups))
+        results = _merged(str(tmp_path))
+
+        assert sorted(lookups) == sorted(item.key for item in items)
+        assert [result.position for result in results] == list(range(1, 202))
+        assert results[0].response == {"id": "pay_0", "status": "S"}
+        assert not results[-1].ok and results[-1].http_status == 404
+        assert stats.done == 201 and stats.failed == 1
+        assert job_status(str(tmp_path)) == {"items": 201, "shards": 8, "done": 8, "leased": 0}
+        assert not list(tmp_path.glob(".merge-*"))  # sorted shard files are removed
+
+    def test_same_key_same_shard(self, tmp_path: Path) -> None:
+        """Test that records sharing a key land in one shard in input order."""
+        items = [Item(i, f"tx_{i % 3}", {"transaction_id": f"tx_{i % 3}"}) for i in range(1, 31)]
+        create_job(str(tmp_path), "create", items, shards=16)
+
+        shards: Dict[str, List[int]] = {}
+        for name in sorted(os.listdir(tmp_path)):
+            input_path = tmp_path / name / "input.ndjson"
+            if input_path.exists():
+                for line in input_path.read_text().splitlines():
+                    record = json.loads(line)
+                    shards.setdefault(record["key"], []).append(record["position"])
+        assert shards == {f"tx_{k}": [i for i in range(1, 31) if i % 3 == k] for k in range(3)}
+
+    def test_concurrent_workers_share_shards(self, tmp_path: Path) -> None:
+        """Test that workers running together each take different shards."""
+        lookups: List[str] = []
+        create_job(str(tmp_path), "get", _ids(300), shards=16)
+
+        workers = [threading.Thread(target=work, args=(str(tmp_path), _client(lookups))) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        assert sorted(lookups) == sorted(f"pay_{i}" for i in range(300))
+        owners = {path.name for path in tmp_path.glob("*/results-*.ndjson")}
+        assert len(owners) > 1
+        assert len(_merged(str(tmp_path))) == 300
+
+    def test_takes_over_dead_worker(self, tmp_path: Path) -> None:
+        """Test that a dead worker's expired shard is resumed after its last recorded result."""
+        create_job(str(tmp_path), "get", _ids(20), shards=1)
+        shard = tmp_path / "0000"
+        ShardLease(str(shard), "dead", 0.3).acquire()
+        with open(shard / "results-dead.ndjson", "w") as file:
+            for position in range(1, 11):
+                record = Result(position, f"pay_{position - 1}", True, None, 1.0, None, {"id": f"pay_{position - 1}"})
+                file.write(json.dumps(record._asdict()) + "\n")
+            file.write('{"position": 11, "key"')  # cut short by the crash
+        lookups: List[str] = []
+
+        assert not work(str(tmp_path), _client(lookups), wait=False).done  # lease not expired yet
+        time.sleep(0.3)
+        work(str(tmp_path), _client(lookups), lease_ttl=0.5)
+
+        assert lookups == [f"pay_{i}" for i in range(10, 20)]
+        assert [result.position for result in _merged(str(tmp_path))] == list(range(1, 21))
+
+    def test_incomplete_and_invalid_jobs(self, tmp_path: Path) -> None:
+        """Test that unfinished jobs only merge with partial=True and jobs are not overwritten."""
+        create_job(str(tmp_path), "get", _ids(5), shards=2)
+
+        with pytest.raises(ValueError):
+            _merged(str(tmp_path))
+        assert _merged(str(tmp_path), partial=True) == []
+        with pytest.raises(ValueError):
+            create_job(str(tmp_path), "get", _ids(5))
+        with pytest.raises(ValueError):
+            load_job(str(tmp_path / "missing"))
+
+
+def test_cli_split_work_merge(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test a job run through the split, work and merge commands."""
+    monkeypatch.delenv("ACORISS_API_KEY", raising=False)
+    ids = tmp_path / "ids.txt"
+    ids.write_text("".join(f"pay_{i}\n" for i in range(50)))
+    job = str(tmp_path / "job")
+    lookups: List[str] = []
+
+    assert main(["split", job, "get", str(ids), "--shards", "4"]) == 0
+    assert main(["work", job, "--progress", "0"], client=_client(lookups)) == 0
+    assert main(["merge", job, "-o", str(tmp_path / "out.csv"), "--format", "csv"]) == 0
+
+    rows = (tmp_path / "out.csv").read_text().splitlines()
+    assert rows[0].startswith("position,key,ok") and len(rows) == 51
+    assert [row.split(",")[1] for row in rows[1:]] == [f"pay_{i}" for i in range(50)]
+    assert len(lookups) == 50
+    with pytest.raises(SystemExit):
+        main(["merge", str(tmp_path / "missing")])
@@ -0,0 +1,154 @@
+"""Tests for the shared-memory payment store."""
+
+import multiprocessing
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+import pytest
+
+from acoriss_payment_gateway.caching import PaymentCache
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.shm import SharedPaymentStore
+from acoriss_payment_gateway.transport import MockRequest, MockTransport, TransportResponse
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="requires fcntl")
+
+PAYMENT: Dict[str, Any] = {"id": "pay_1", "amount": 5000, "currency": "USD", "status": "P"}
+
+
+def _writer(path: str, start: int, count: int) -> None:
+    with SharedPaymentStore(path) as store:
+        for i in range(start, start + count):
+            store.put(f"pay_{i}", {**PAYMENT, "id": f"pay_{i}", "amount": i}, 60)
+
+
+def _rewriter(path: str, duration: float) -> None:
+    with SharedPaymentStore(path) as store:
+        deadline = time.monotonic() + duration
+        i = 0
+        while time.monotonic() < deadline:
+            i += 1
+            store.put("pay_1", {**PAYMENT, "amount": i, "description": str(i) * (i % 50)}, 60)
+
+
+class TestSharedPaymentStore:
+    """Test storing, expiring and sharing payments."""
+
+    def test_put_and_get(self, tmp_path: Path) -> None:
+        """Test that a stored payment is returned with its refresh and expiry times."""
+        with SharedPaymentStore(str(tmp_path / "store"), slots=64) as store:
+            assert store.get("pay_1") is None
+            assert store.put("pay_1", PAYMENT, 10, refresh_in=8)
+
+            entry = store.get("pay_1")
+
+        assert entry is not None and entry.payment == PAYMENT
+        assert 7 < entry.refresh_in <= 8 and 9 < entry.expires_in <= 10
+        assert store.stats()["hits"] == 1 and store.stats()["misses"] == 1
+
+    def test_expired_and_invalidated(self, tmp_path: Path) -> None:
+        """Test that expired and invalidated payments are not returned, and the slot is reused."""
+        with SharedPaymentStore(str(tmp_path / "store"), slots=1, max_probes=1) as store:
+            store.put("pay_1", PAYMENT, 0.01)
+            time.sleep(0.02)
+            assert store.get("pay_1") is None
+
+            store.put("pay_2", {**PAYMENT, "id": "pay_2"}, 60)
+            assert store.get("pay_2") is not None
+            store.invalidate("pay_2")
+            assert store.get("pay_2") is None
+            assert store.stats()["evictions"] == 0
+
+    def test_eviction_and_clear(self, tmp_path: Path) -> None:
+        """Test that a full probe range evicts the payment expiring first."""
+        with SharedPaymentStore(str(tmp_path / "store"), slots=2, max_probes=2) as store:
+            store.put("pay_1", PAYMENT, 60)
+            store.put("pay_2", PAYMENT, 30)
+            store.put("pay_3", PAYMENT, 60)
+
+            assert [store.get(f"pay_{i}") is not None for i in (1, 2, 3)] == [True, False, True]
+            assert store.stats()["evictions"] == 1
+            store.invalidate()
+            assert store.get("pay_1") is None and store.get("pay_3") is None
+
+    def test_large_payments(self, tmp_path: Path) -> None:
+        """Test that payments are compressed to fit a slot and rejected when they still do not."""
+        services = [{"name": "Service", "price": 100, "quantity": 1}] * 40
+        with SharedPaymentStore(str(tmp_path / "store"), slot_size=256) as store:
+            assert store.put("pay_1", {**PAYMENT, "services": services}, 60)
+            entry = store.get("pay_1")
+            assert entry is not None and entry.payment["services"] == services
+
+            assert not store.put("pay_2", {**PAYMENT, "description": os.urandom(200).hex()}, 60)
+            assert store.stats()["too_large"] == 1
+
+    def test_shared_between_processes(self, tmp_path: Path) -> None:
+        """Test that payments written by several processes are read by another."""
+        path = str(tmp_path / "store")
+        SharedPaymentStore(path, slots=8192).close()
+        context = multiprocessing.get_context("spawn")
+        processes = [context.Process(target=_writer, args=(path, i * 100, 100)) for i in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(30)
+            assert process.exitcode == 0
+
+        with SharedPaymentStore(path) as store:
+            amounts = [store.get(f"pay_{i}") for i in range(400)]
+
+        assert [entry.payment["amount"] if entry else None for entry in amounts] == list(range(400))
+
+    def test_reads_during_writes_are_consistent(self, tmp_path: Path) -> None:
+        """Test that a reader never sees a payment half written by another process."""
+        path = str(tmp_path / "store")
+        with SharedPaymentStore(path, slots=16) as store:
+            store.put("pay_1", {**PAYMENT, "amount": 0, "description": ""}, 60)
+            process = multiprocessing.get_context("spawn").Process(target=_rewriter, args=(path, 0.5))
+            process.start()
+            amounts = set()
+            while process.is_alive():
+                entry = store.get("pay_1")
+                if entry is not None:
+                    amount = entry.payment["amount"]
+                    assert entry.payment["description"] == str(amount) * (amount % 50)
+                    amounts.add(amount)
+            process.join()
+
+        assert process.exitcode == 0 and len(amounts) > 1
+
+    def test_existing_file_layout_wins(self, tmp_path: Path) -> None:
+        """Test that the layout of an existing store is used and foreign files are rejected."""
+        path = tmp_path / "store"
+        SharedPaymentStore(str(path), slots=32, slot_size=512).close()
+        with SharedPaymentStore(str(path), slots=4096) as store:
+            assert (store.slots, store.slot_size) == (32, 512)
+
+        (tmp_path / "other").write_bytes(b"not a store at all")
+        with pytest.raises(ValueError):
+            SharedPaymentStore(str(tmp_path / "other"))
+
+
+def test_payment_cache_uses_shared_store(tmp_path: Path) -> None:
+    """Test that a second cache on the same store is served without a gateway call."""
+    lookups = []
+
+    def lookup(request: MockRequest) -> TransportResponse:
+        lookups.append(request.url)
+        return TransportResponse.from_json(PAYMENT)
+
+    transport = MockTransport({("GET", "/sessions/*"): lookup})
+    client = PaymentGatewayClient(api_key="test-key", api_secret="test-secret", transport=transport)
+    path = str(tmp_path / "store")
+    with PaymentCache(client, shared=SharedPaymentStore(path)) as first:
+        first.get_payment("pay_1")
+    with PaymentCache(client, shared=SharedPaymentStore(path)) as second:
+        assert second.get_payment("pay_1") == PAYMENT
+        assert second.stats()["shared_hits"] == 1
+
+        second.invalidate("pay_1")
+        assert second.shared is not None and second.shared.get("pay_1") is None
+
+    assert len(lookups) == 1
@@ -0,0 +1,150 @@
+"""Tests for sharing one client across threads.
+
+These run on any interpreter; on a free-threaded build (``python3.13t``)
+threads also execute the SDK's Python code in parallel.
+"""
+
+import hashlib
+import hmac
+import json
+import pickle
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Tuple
+
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.dns import DNSCache
+from acoriss_payment_gateway.errors import APIError
+from acoriss_payment_gateway.signer import HmacSha256Signer
+from acoriss_payment_gateway.sync import ShardedCounters, StripedLock
+from acoriss_payment_gateway.transport import MockRequest, MockTransport, TransportResponse
+
+THREADS = 16
+CALLS = 200
+
+
+def _hammer(target: Any, threads: int = THREADS) -> None:
+    """Run ``target(thread_number)`` on many threads released at once."""
+    barrier = threading.Barrier(threads)
+
+    def run(n: int) -> None:
+        barrier.wait()
+        target(n)
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(run, range(threads)))
+
+
+class TestShardedCounters:
+    """Test per-thread counters."""
+
+    def test_concurrent_adds_are_exact(self) -> None:
+        """Test that no increment is lost across threads."""
+        counters = ShardedCounters(("calls", "bytes"))
+
+        def work(n: int) -> None:
+            for _ in range(CALLS):
+                counters.add("calls")
+                counters.shard()[1] += 10
+
+        _hammer(work)
+
+        assert counters.totals() == {"calls": THREADS * CALLS, "bytes": THREADS * CALLS * 10}
+
+    def test_exited_threads_are_folded(self) -> None:
+        """Test that shards of finished threads are kept in the totals but not as shards."""
+        counters = ShardedCounters(("calls",))
+        for _ in range(5):
+            thread = threading.Thread(target=counters.add, args=("calls", 2))
+            thread.start()
+            thread.join()
+        counters.add("calls")
+
+        assert counters.value("calls") == 11
+        assert len(counters._shards) == 1  # only the main thread
+
+
+def test_striped_lock_is_stable_per_key() -> None:
+    """Test that a key always maps to the same lock."""
+    locks = StripedLock(stripes=4)
+
+    assert locks.for_key(("api.example.com", 443)) is locks.for_key(("api.example.com", 443))
+    assert len({id(locks.for_key(i)) for i in range(100)}) == 4
+
+
+def test_signer_is_thread_safe_and_picklable() -> None:
+    """Test that concurrent signatures match a fresh HMAC, and that the signer pickles."""
+    signer = HmacSha256Signer("test-secret")
+    mismatches: List[str] = []
+
+    def work(n: int) -> None:
+        for i in range(CALLS):
+            data = f"payload-{n}-{i}"
+            expected = hmac.new(b"test-secret", data.encode(), hashlib.sha256).hexdigest()
+            if signer.sign(data) != expected:
+                mismatches.append(data)
+
+    _hammer(work)
+
+    assert mismatches == []
+    assert pickle.loads(pickle.dumps(signer)).sign("x") == signer.sign("x")
+    signer.secret = "other-secret"
+    assert signer.sign("x") == hmac.new(b"other-secret", b"x", hashlib.sha256).hexdigest()
+
+
+def test_shared_client() -> None:
+    """Test one client used by many threads: every response matches its request, metrics are exact."""
+    signer = HmacSha256Signer("test-secret")
+
+    def create(request: MockRequest) -> TransportResponse:
+        assert request.headers["X-SIGNATURE"] == signer.sign(request.body or "")
+        payload = json.loads(request.body or "{}")
+        return TransportResponse.from_json({"id": f"sess_{payload['transactionId']}"})
+
+    def get(request: MockRequest) -> TransportResponse:
+        payment_id = request.url.rsplit("/", 1)[-1]
+        if payment_id.endswith("_0"):
+            return TransportResponse.from_json({"message": "Payment not found"}, status=404)
+        return TransportResponse.from_json({"id": payment_id})
+
+    transport = MockTransport({("POST", "/sessions"): create, ("GET", "/sessions/*"): get})
+    client = PaymentGatewayClient(api_key="test-key", api_secret="test-secret", transport=transport)
+    wrong: List[Tuple[str, str]] = []
+
+    def work(n: int) -> None:
+        for i in range(CALLS // 2):
+            session = client.create_session(
+                amount=100, currency="USD", customer={"email": "a@example.com"}, transaction_id=f"tx_{n}_{i}"
+            )
+            if session["id"] != f"sess_tx_{n}_{i}":
+                wrong.append((f"tx_{n}_{i}", session["id"]))
+            try:
+                payment = client.get_payment(f"pay_{n}_{i}")
+            except APIError:
+                continue
+            if payment["id"] != f"pay_{n}_{i}":
+                wrong.append((f"pay_{n}_{i}", payment["id"]))
+
+    _hammer(work)
+
+    assert wrong == []
+    snapshot = client.metrics.snapshot()
+    assert snapshot["requests"] == THREADS * CALLS
+    assert snapshot["errors"] == THREADS
+
+
+def test_dns_cache_resolves_once_per_host() -> None:
+    """Test that concurrent misses for a host share one resolution."""
+    calls: List[str] = []
+
+    def resolver(host: str, port: int, *args: Any) -> List[Tuple[Any, ...]]:
+        calls.append(host)
+        time.sleep(0.05)
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("10.0.0.1", port))]
+
+    cache = DNSCache(resolver=resolver, refresh=False)
+    _hammer(lambda n: cache.resolve(f"host{n % 2}.example.com", 443))
+
+    assert sorted(calls) == ["host0.example.com", "host1.example.com"]
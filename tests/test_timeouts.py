@@ -0,0 +1,143 @@
+"""Tests for latency histograms and adaptive timeouts."""
+
+import time
+from pathlib import Path
+
+import pytest
+
+from acoriss_payment_gateway.cli import main
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.errors import APIError
+from acoriss_payment_gateway.metrics import LatencyHistogram
+from acoriss_payment_gateway.timeouts import AdaptiveTimeout
+from acoriss_payment_gateway.transport import MockTransport, TransportResponse, Urllib3Transport
+
+ENDPOINT = "https://gw.example.com/api/v1"
+
+
+class TestLatencyHistogram:
+    """Test percentile accuracy and ageing of samples."""
+
+    def test_percentiles_within_precision(self) -> None:
+        """Test that percentiles are accurate to the bucket precision."""
+        histogram = LatencyHistogram(precision=0.02)
+        for ms in range(1, 1001):
+            histogram.record(ms / 1000)
+
+        p50, p99 = histogram.percentiles(0.5, 0.99)
+
+        assert p50 == pytest.approx(0.5, rel=0.02)
+        assert p99 == pytest.approx(0.99, rel=0.02)
+        assert histogram.snapshot()["max"] == 1.0
+        assert histogram.count == 1000
+
+    def test_buckets_and_range(self) -> None:
+        """Test that buckets are exposed in order and out-of-range values are clamped."""
+        histogram = LatencyHistogram(lowest=0.001, highest=1.0)
+        for value in (0.0, 0.01, 0.01, 5.0):
+            histogram.record(value)
+
+        buckets = histogram.buckets()
+
+        assert [count for _, count in buckets] == [1, 2, 1]
+        assert buckets[0][0] == pytest.approx(0.001)
+        assert buckets[-1][0] >= 1.0
+        assert histogram.percentile(1.0) == 5.0  # the exact maximum caps the last bucket
+
+    def test_samples_age_out(self) -> None:
+        """Test that samples count for one to two windows."""
+        histogram = LatencyHistogram(window=0.1)
+        histogram.record(0.5)
+        time.sleep(0.12)
+        histogram.record(0.01)
+
+        assert histogram.count == 2
+        time.sleep(0.12)
+        assert histogram.count == 1
+        assert histogram.percentile(0.99) == pytest.approx(0.01, rel=0.02)
+        time.sleep(0.2)
+        assert histogram.count == 0 and histogram.percentile(0.5) == 0.0
+
+
+class TestAdaptiveTimeout:
+    """Test timeout derivation from recorded latency."""
+
+    def test_adapts_after_min_samples(self) -> None:
+        """Test that the maximum applies until enough samples, then a multiple of the percentile."""
+        policy = AdaptiveTimeout(multiplier=3, min_timeout=0.01, max_timeout=10, min_samples=20, refresh=0)
+        for _ in range(19):
+            policy.record(ENDPOINT, 0.05, 10, responded=True)
+        assert policy.timeout(ENDPOINT) == 10
+
+        policy.record(ENDPOINT, 0.05, 10, responded=True)
+
+        assert policy.timeout(ENDPOINT) == pytest.approx(0.15, rel=0.02)
+        assert policy.timeout("https://other.example.com") == 10
+
+    def test_bounds_and_refresh(self) -> None:
+        """Test the minimum bound and that timeouts are recomputed only every refresh interval."""
+        policy = AdaptiveTimeout(min_timeout=0.5, min_samples=1, refresh=60)
+        policy.record(ENDPOINT, 0.001, 15, responded=True)
+        assert policy.timeout(ENDPOINT) == 0.5
+
+        for _ in range(100):
+            policy.record(ENDPOINT, 1.0, 15, responded=True)
+
+        assert policy.timeout(ENDPOINT) == 0.5
+
+    def test_timeouts_raise_the_percentile(self) -> None:
+        """Test that timed-out calls count at their timeout, while fast failures are ignored."""
+        policy = AdaptiveTimeout(min_timeout=0.01, min_samples=1, refresh=0)
+        for _ in range(50):
+            policy.record(ENDPOINT, 0.01, 1.0, responded=True)
+        policy.record(ENDPOINT, 0.002, 1.0, responded=False)  # e.g. connection refused
+        assert policy.histogram(ENDPOINT).count == 50
+
+        for _ in range(5):
+            policy.record(ENDPOINT, 1.0, 1.0, responded=False)
+
+        assert policy.timeout(ENDPOINT) == pytest.approx(3.0, rel=0.02)
+        assert policy.snapshot()[ENDPOINT]["count"] == 55
+
+    def test_invalid_arguments(self) -> None:
+        """Test that inconsistent bounds are rejected."""
+        with pytest.raises(ValueError):
+            AdaptiveTimeout(min_timeout=5, max_timeout=1)
+        with pytest.raises(ValueError):
+            AdaptiveTimeout(percentile=0)
+
+
+def test_client_cuts_off_slow_calls(gateway_server: str) -> None:
+    """Test that a hung call is abandoned at the adaptive timeout instead of the static one."""
+    policy = AdaptiveTimeout(min_timeout=0.1, max_timeout=5.0, min_samples=20, refresh=0)
+    client = PaymentGatewayClient(
+        api_key="test-key",
+        api_secret="test-secret",
+        base_url=gateway_server,
+        transport=Urllib3Transport(maxsize=2),
+        timeout=policy,
+    )
+    for i in range(20):
+        client.get_payment(f"pay_{i}")
+    assert client.timeout == 5.0
+
+    start = time.perf_counter()
+    with pytest.raises(APIError):
+        client.get_payment("pay_slow")
+
+    assert time.perf_counter() - start < 0.4
+    assert policy.snapshot()[gateway_server]["count"] == 21
+
+
+def test_cli_adaptive_timeout(tmp_path: Path) -> None:
+    """Test that --adaptive-timeout installs a policy capped by --timeout."""
+    transport = MockTransport({("GET", "/sessions/*"): TransportResponse.from_json({"id": "pay_1"})})
+    client = PaymentGatewayClient(api_key="test-key", api_secret="test-secret", transport=transport)
+    ids = tmp_path / "ids.txt"
+    ids.write_text("pay_1\npay_2\n")
+
+    main(["get", str(ids), "-o", str(tmp_path / "out"), "--adaptive-timeout", "--timeout", "4"], client=client)
+
+    assert client.adaptive_timeout is not None
+    assert client.adaptive_timeout.max_timeout == 4
+    assert client.adaptive_timeout.histogram(client.base_url).count == 2
@@ -0,0 +1,191 @@
+"""Tests for the transport module."""
+
+from typing import Any, Callable
+
+import pytest
+
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.errors import APIError
+from acoriss_payment_gateway.signer import HmacSha256Signer
+from acoriss_payment_gateway.transport import (
+    HttpxTransport,
+    MockRequest,
+    MockTransport,
+    RequestsTransport,
+    Transport,
+    TransportResponse,
+    Urllib3Transport,
+)
+
+
+def _requests_transport() -> Transport:
+    import requests
+
+    return RequestsTransport(session=requests.Session())
+
+
+def _httpx_transport() -> Transport:
+    pytest.importorskip("httpx")
+    return HttpxTransport()
+
+
+TRANSPORT_FACTORIES = {
+    "requests": RequestsTransport,
+    "requests-session": _requests_transport,
+    "urllib3": Urllib3Transport,
+    "httpx": _httpx_transport,
+}
+
+
+class TestTransportResponse:
+    """Test TransportResponse."""
+
+    def test_from_json(self) -> None:
+        """Test building a JSON response."""
+        response = TransportResponse.from_json({"id": "pay_1"}, status=201, headers={"X-Test": "1"})
+
+        assert response.status == 201
+        assert response.json() == {"id": "pay_1"}
+        assert response.text == '{"id":"pay_1"}'
+        assert response.headers["Content-Type"] == "application/json"
+        assert response.headers["X-Test"] == "1"
+
+    def test_invalid_json_raises_value_error(self) -> None:
+        """Test that invalid JSON raises ValueError."""
+        response = TransportResponse(200, {}, b"not json")
+
+        with pytest.raises(ValueError):
+            response.json()
+
+
+class TestMockTransport:
+    """Test MockTransport with the client."""
+
+    def test_routes_and_records_requests(self) -> None:
+        """Test that requests are routed by method and path pattern."""
+        transport = MockTransport(
+            {
+                ("POST", "/sessions"): TransportResponse.from_json({"id": "sess_1", "checkoutUrl": "https://x"}),
+                ("GET", "/sessions/*"): lambda request: TransportResponse.from_json(
+                    {"id": request.url.rsplit("/", 1)[-1], "status": "S"}
+                ),
+            }
+        )
+        client = PaymentGatewayClient(api_key="test-key", api_secret="test-secret", transport=transport)
+
+        session = client.create_session(amount=100, currency="USD", customer={"email": "a@b.c", "name": "A"})
+        payment = client.get_payment("pay_42")
+
+        assert session["checkout_url"] == "https://x"
+        assert payment["id"] == "pay_42"
+        assert [(r.method, r.url.rsplit("/api/v1", 1)[1]) for r in transport.requests] == [
+            ("POST", "/sessions"),
+            ("GET", "/sessions/pay_42"),
+        ]
+        post = transport.requests[0]
+        assert post.headers["X-SIGNATURE"] == HmacSha256Signer("test-secret").sign(post.body or "")
+
+    def test_unmatched_route_returns_404(self) -> None:
+        """Test that unknown routes surface as APIError."""
+        client = PaymentGatewayClient(api_key="test-key", api_secret="test-secret", transport=MockTransport())
+
+        with pytest.raises(APIError) as exc_info:
+            client.get_payment("pay_1")
+
+        assert exc_info.value.status == 404
+        assert "No mock response" in exc_info.value.message
+
+    def test_error_response_without_json(self) -> None:
+        """Test error responses whose body is not JSON."""
+        transport = MockTransport({("GET", "/sessions/*"): TransportResponse(502, {"Server": "edge"}, b"Bad Gateway")})
+        client = PaymentGatewayClient(api_key="test-key", api_secret="test-secret", transport=transport)
+
+        with pytest.raises(APIError) as exc_info:
+            client.get_payment("pay_1")
+
+        assert exc_info.value.status == 502
+        assert exc_info.value.message == "HTTP 502 error"
+        assert exc_info.value.data == "Bad Gateway"
+        assert exc_info.value.headers == {"Server": "edge"}
+
+    def test_invalid_json_success_response(self) -> None:
+        """Test that an undecodable success body raises APIError."""
+        transport = MockTransport({("GET", "/sessions/*"): TransportResponse(200, {}, b"<html>")})
+        client = PaymentGatewayClient(api_key="test-key", api_secret="test-secret", transport=transport)
+
+        with pytest.raises(APIError, match="Invalid JSON"):
+            client.get_payment("pay_1")
+
+    def test_callable_receives_request(self) -> None:
+        """Test that callable responders get the recorded request."""
+        seen = []
+
+        def responder(request: MockRequest) -> TransportResponse:
+            seen.append(request)
+            return TransportResponse.from_json({"id": "pay_1"})
+
+        transport = MockTransport(latency=0.001)
+        transport.add("get", "/sessions/*", responder)
+        client = PaymentGatewayClient(api_key="test-key", signer=None, transport=transport)
+
+        client.get_payment("pay_1", signature_override="sig")
+
+        assert seen[0].method == "GET"
+        assert seen[0].headers["X-SIGNATURE"] == "sig"
+        assert seen[0].body is None
+
+
+@pytest.mark.parametrize("factory", TRANSPORT_FACTORIES.values(), ids=TRANSPORT_FACTORIES.keys())
+class TestHTTPTransports:
+    """Test real HTTP transports against a local stub gateway."""
+
+    def test_create_session_and_get_payment(self, gateway_server: str, factory: Callable[[], Transport]) -> None:
+        """Test both endpoints through each backend."""
+        with PaymentGatewayClient(
+            api_key="test-key",
+            api_secret="test-secret",
+            base_url=gateway_server,
+            transport=factory(),
+        ) as client:
+            session: Any = client.create_session(
+                amount=5000,
+                currency="USD",
+                customer={"email": "jose@example.com", "name": "José"},
+                transaction_id="tx_1",
+            )
+            payment = client.get_payment("pay_123")
+
+        assert session["id"] == "sess_tx_1"
+        assert session["customer"]["name"] == "José"
+        assert payment["id"] == "pay_123"
+        assert payment["transaction_id"] == "tx_123"
+
+    def test_error_status(self, gateway_server: str, factory: Callable[[], Transport]) -> None:
+        """Test that error statuses become APIError."""
+        client = PaymentGatewayClient(
+            api_key="test-key",
+            api_secret="test-secret",
+            base_url=gateway_server,
+            transport=factory(),
+        )
+
+        with pytest.raises(APIError) as exc_info:
+            client.get_payment("pay_missing")
+
+        assert exc_info.value.status == 404
+        assert exc_info.value.message == "Payment not found"
+
+    def test_connection_error(self, factory: Callable[[], Transport]) -> None:
+        """Test that connection failures become APIError without status."""
+        client = PaymentGatewayClient(
+            api_key="test-key",
+            api_secret="test-secret",
+            base_url="http://127.0.0.1:9/api/v1",
+            transport=factory(),
+            timeout=2.0,
+        )
+
+        with pytest.raises(APIError) as exc_info:
+            client.get_payment("pay_1")
+
+        assert exc_info.value.status is None
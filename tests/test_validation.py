@@ -0,0 +1,162 @@
+"""Tests for client-side session validation."""
+
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.errors import ValidationError
+from acoriss_payment_gateway.outbox import SessionOutbox
+from acoriss_payment_gateway.transport import MockRequest, MockTransport, TransportResponse
+from acoriss_payment_gateway.validation import SessionValidator, validate_session
+
+
+def _session(**overrides: Any) -> Dict[str, Any]:
+    session: Dict[str, Any] = {
+        "amount": 5000,
+        "currency": "USD",
+        "customer": {"email": "john@example.com", "name": "John Doe"},
+        "services": [
+            {"name": "Ticket", "price": 2000, "quantity": 2},
+            {"name": "Fee", "price": 1000},
+        ],
+    }
+    session.update(overrides)
+    return session
+
+
+class TestSessionValidator:
+    """Test SessionValidator rules."""
+
+    def test_valid_session(self) -> None:
+        """Test that a well-formed session passes."""
+        assert SessionValidator().errors(_session()) == []
+
+    @pytest.mark.parametrize(
+        "overrides,expected",
+        [
+            ({"amount": -5}, "amount: must be a positive integer"),
+            ({"amount": 50.0}, "amount: must be an integer"),
+            ({"amount": True}, "amount: must be an integer"),
+            ({"currency": "ABC"}, "currency: must be a known ISO 4217 currency code"),
+            ({"customer": {"name": "John"}}, "customer.email: is required"),
+            ({"customer": {"email": "john"}}, "customer.email: must be an email address"),
+            ({"customer": "john@example.com"}, "customer: must be an object"),
+            ({"services": [{"name": "Ticket", "price": 49.99}]}, "services[0].price: must be an integer"),
+            (
+                {"services": [{"name": "Ticket", "price": 5000, "quantity": 0}]},
+                "services[0].quantity: must be at least 1",
+            ),
+            ({"services": [{"price": 5000}]}, "services[0].name: is required"),
+            ({"description": 42}, "description: must be a string"),
+        ],
+    )
+    def test_invalid_fields(self, overrides: Dict[str, Any], expected: str) -> None:
+        """Test that each rule reports its field path."""
+        assert expected in SessionValidator().errors(_session(**overrides))
+
+    def test_missing_required_fields(self) -> None:
+        """Test that amount, currency and customer are required."""
+        errors = SessionValidator().errors({})
+
+        assert errors == ["amount: is required", "currency: is required", "customer: is required"]
+
+    def test_services_total_must_match_amount(self) -> None:
+        """Test integer minor-unit total checking."""
+        errors = SessionValidator().errors(_session(amount=5001))
+
+        assert errors == ["services: total 5000 does not match amount 5001"]
+
+    def test_total_check_can_be_disabled(self) -> None:
+        """Test check_totals=False."""
+        assert SessionValidator(check_totals=False).errors(_session(amount=5001)) == []
+
+    def test_custom_currencies(self) -> None:
+        """Test restricting accepted currencies."""
+        validator = SessionValidator(currencies=frozenset({"CDF"}))
+
+        assert validator.errors(_session(currency="CDF")) == []
+        assert validator.errors(_session()) == ["currency: must be a known ISO 4217 currency code"]
+
+    def test_non_exact_types_use_the_detailed_pass(self) -> None:
+        """Test that int subclasses and non-dict mappings are still accepted."""
+        from collections import OrderedDict
+        from enum import IntEnum
+
+        class Amount(IntEnum):
+            TEN = 10
+
+        session = OrderedDict(amount=Amount.TEN, currency="USD", customer={"email": "john@example.com"})
+
+        assert SessionValidator().errors(session) == []
+
+    def test_unknown_keys_are_allowed(self) -> None:
+        """Test that extra fields pass through for forward compatibility."""
+        assert SessionValidator().errors(_session(metadata={"order": 1})) == []
+
+    def test_validate_session_raises(self) -> None:
+        """Test the module-level helper."""
+        with pytest.raises(ValidationError) as exc_info:
+            validate_session(_session(amount=0))
+
+        assert exc_info.value.errors == ["amount: must be a positive integer"]
+        assert isinstance(exc_info.value, ValueError)
+
+
+def _client(**kwargs: Any) -> PaymentGatewayClient:
+    transport = MockTransport({("POST", "/sessions"): TransportResponse.from_json({"id": "sess_1"})})
+    return PaymentGatewayClient(api_key="test-key", api_secret="test-secret", transport=transport, **kwargs)
+
+
+def _sent(client: PaymentGatewayClient) -> List[MockRequest]:
+    assert isinstance(client.transport, MockTransport)
+    return client.transport.requests
+
+
+class TestClientValidation:
+    """Test validation in the client."""
+
+    def test_invalid_session_is_not_sent(self) -> None:
+        """Test that create_session rejects bad input before signing."""
+        client = _client(validate=True)
+
+        with pytest.raises(ValidationError, match="customer.email"):
+            client.create_session(amount=5000, currency="USD", customer={"name": "John"})
+
+        assert _sent(client) == []
+
+    def test_valid_session_is_sent(self) -> None:
+        """Test that valid sessions go through."""
+        client = _client(validate=True)
+
+        assert client.create_session(**_session())["id"] == "sess_1"
+
+    def test_validation_is_off_by_default(self) -> None:
+        """Test that the gateway stays the judge unless validation is enabled."""
+        client = _client()
+
+        client.create_session(amount=-1, currency="USD", customer={})
+
+        assert len(_sent(client)) == 1
+
+    def test_batch_reports_all_invalid_sessions(self) -> None:
+        """Test that create_sessions validates every session before sending any."""
+        client = _client(validate=SessionValidator(check_totals=False))
+
+        with pytest.raises(ValidationError) as exc_info:
+            client.create_sessions([_session(), _session(amount=0), _session(currency="usd")])
+
+        assert exc_info.value.errors == [
+            "sessions[1].amount: must be a positive integer",
+            "sessions[2].currency: must be a known ISO 4217 currency code",
+        ]
+        assert _sent(client) == []
+
+    def test_outbox_enqueue_validates(self, tmp_path: Path) -> None:
+        """Test that the outbox rejects invalid sessions at enqueue time."""
+        with SessionOutbox(_client(validate=True), str(tmp_path / "outbox.db"), autostart=False) as outbox:
+            with pytest.raises(ValidationError):
+                outbox.enqueue(**_session(amount=1))
+
+            assert outbox.pending() == 0
@@ -0,0 +1,272 @@
+"""Tests for connection warm-up, DNS caching and TLS session resumption."""
+
+import shutil
+import socket
+import ssl
+import subprocess
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Iterator, List, Tuple
+
+import pytest
+
+from acoriss_payment_gateway.client import PaymentGatewayClient
+from acoriss_payment_gateway.dns import DNSCache
+from acoriss_payment_gateway.errors import APIError
+from acoriss_payment_gateway.transport import HttpxTransport, MockTransport, RequestsTransport, Urllib3Transport
+
+from .conftest import StubGatewayHandler
+
+
+class CountingServer(ThreadingHTTPServer):
+    """Stub gateway that counts accepted connections."""
+
+    daemon_threads = True
+    connections = 0
+
+    def get_request(self) -> Tuple[socket.socket, Any]:
+        request = super().get_request()
+        self.connections += 1
+        return request
+
+
+def _serve(server: ThreadingHTTPServer) -> None:
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True).start()
+
+
+@pytest.fixture
+def counting_server() -> Iterator[CountingServer]:
+    server = CountingServer(("127.0.0.1", 0), StubGatewayHandler)
+    _serve(server)
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _wait_for(predicate: Any, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class FakeResolver:
+    """``getaddrinfo`` stand-in returning scripted addresses."""
+
+    def __init__(self, *answers: Any) -> None:
+        self.answers = list(answers)
+        self.calls = 0
+
+    def __call__(self, host: str, port: int, *args: Any) -> List[Tuple[Any, ...]]:
+        self.calls += 1
+        answer = self.answers[min(self.calls, len(self.answers)) - 1]
+        if isinstance(answer, Exception):
+            raise answer
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, port)) for address in answer]
+
+
+class TestWarmup:
+    """Test PaymentGatewayClient.warmup."""
+
+    def test_urllib3_opens_pooled_connections(self, counting_server: CountingServer) -> None:
+        """Test that warm-up pre-opens connections later reused by requests."""
+        base_url = f"http://127.0.0.1:{counting_server.server_address[1]}/api/v1"
+        client = PaymentGatewayClient(
+            api_key="test-key", api_secret="test-secret", base_url=base_url, transport=Urllib3Transport(maxsize=4)
+        )
+
+        assert client.warmup(connections=4) == 4
+        assert _wait_for(lambda: counting_server.connections == 4)
+
+        for _ in range(3):
+            client.get_payment("pay_1")
+        client.close()
+
+        assert counting_server.connections == 4
+
+    def test_warmup_is_capped_by_pool_size(self, counting_server: CountingServer) -> None:
+        """Test that warm-up never opens more connections than the pool keeps."""
+        base_url = f"http://127.0.0.1:{counting_server.server_address[1]}/api/v1"
+        client = PaymentGatewayClient(
+            api_key="test-key", api_secret="test-secret", base_url=base_url, transport=Urllib3Transport(maxsize=2)
+        )
+
+        assert client.warmup(connections=10) == 2
+
+    def test_requests_session_warmup(self, counting_server: CountingServer) -> None:
+        """Test warm-up through a pooled requests session."""
+        import requests
+
+        base_url = f"http://127.0.0.1:{counting_server.server_address[1]}/api/v1"
+        transport = RequestsTransport(session=requests.Session())
+        client = PaymentGatewayClient(
+            api_key="test-key", api_secret="test-secret", base_url=base_url, transport=transport
+        )
+
+        assert client.warmup(connections=3) == 3
+        client.get_payment("pay_1")
+
+        assert _wait_for(lambda: counting_server.connections == 3)
+
+    def test_non_pooling_transports_return_zero(self) -> None:
+        """Test that transports without pools skip warm-up."""
+        assert PaymentGatewayClient(api_key="k", transport=MockTransport()).warmup(4) == 0
+        assert PaymentGatewayClient(api_key="k", transport=RequestsTransport()).warmup(4) == 0
+
+    def test_unreachable_gateway_raises(self) -> None:
+        """Test that warm-up failures surface as APIError."""
+        client = PaymentGatewayClient(api_key="k", base_url="http://127.0.0.1:9/api/v1", transport=Urllib3Transport())
+
+        with pytest.raises(APIError, match="warm-up failed"):
+            client.warmup()
+
+    def test_httpx_warmup_times_out(self) -> None:
+        """Test that httpx warm-up gives up after the client's timeout on a silent gateway."""
+        pytest.importorskip("httpx")
+        with socket.socket() as silent:
+            silent.bind(("127.0.0.1", 0))
+            silent.listen()
+            url = f"http://127.0.0.1:{silent.getsockname()[1]}/api/v1"
+            transport = HttpxTransport(timeout=0.2)
+            started = time.monotonic()
+
+            with pytest.raises(APIError, match="warm-up failed"):
+                transport.warmup(url)
+            assert time.monotonic() - started < 5
+            transport.close()
+
+
+class TestDNSCache:
+    """Test DNSCache."""
+
+    def test_hits_within_ttl(self) -> None:
+        """Test that fresh entries are served without resolving."""
+        resolver = FakeResolver(["10.0.0.1", "10.0.0.2"])
+        cache = DNSCache(ttl=60, refresh=False, resolver=resolver)
+
+        assert cache.resolve("gateway.test", 443) == "10.0.0.1"
+        assert cache.resolve_all("gateway.test", 443) == ["10.0.0.1", "10.0.0.2"]
+        assert resolver.calls == 1
+
+    def test_expired_entries_are_resolved_again(self) -> None:
+        """Test that entries are re-resolved after the TTL."""
+        resolver = FakeResolver(["10.0.0.1"], ["10.0.0.9"])
+        cache = DNSCache(ttl=0.01, refresh=False, resolver=resolver)
+
+        cache.resolve("gateway.test", 443)
+        time.sleep(0.02)
+
+        assert cache.resolve("gateway.test", 443) == "10.0.0.9"
+        assert resolver.calls == 2
+
+    def test_stale_entry_served_when_resolution_fails(self) -> None:
+        """Test serving the last good answer while DNS is failing."""
+        resolver = FakeResolver(["10.0.0.1"], socket.gaierror("temporary failure"))
+        cache = DNSCache(ttl=0.01, stale_ttl=60, refresh=False, resolver=resolver)
+
+        cache.resolve("gateway.test", 443)
+        time.sleep(0.02)
+
+        assert cache.resolve("gateway.test", 443) == "10.0.0.1"
+
+    def test_failure_without_entry_raises(self) -> None:
+        """Test that unresolvable hosts raise OSError."""
+        cache = DNSCache(refresh=False, resolver=FakeResolver(socket.gaierror("no such host")))
+
+        with pytest.raises(OSError):
+            cache.resolve("missing.test", 443)
+
+    def test_background_refresh(self) -> None:
+        """Test that the refresher updates entries before they expire."""
+        resolver = FakeResolver(["10.0.0.1"], ["10.0.0.2"])
+        cache = DNSCache(ttl=0.2, resolver=resolver)
+        try:
+            cache.resolve("gateway.test", 443)
+
+            assert _wait_for(lambda: resolver.calls >= 2)
+            assert cache.resolve("gateway.test", 443) == "10.0.0.2"
+        finally:
+            cache.stop()
+
+    def test_invalidate(self) -> None:
+        """Test dropping cached entries."""
+        resolver = FakeResolver(["10.0.0.1"])
+        cache = DNSCache(refresh=False, resolver=resolver)
+        cache.resolve("gateway.test", 443)
+
+        cache.invalidate("gateway.test")
+        cache.resolve("gateway.test", 443)
+
+        assert resolver.calls == 2
+
+    def test_transport_connects_through_cache(self, counting_server: CountingServer) -> None:
+        """Test that the urllib3 transport resolves hosts through the cache."""
+        resolver = FakeResolver(["127.0.0.1"])
+        cache = DNSCache(refresh=False, resolver=resolver)
+        base_url = f"http://gateway.invalid:{counting_server.server_address[1]}/api/v1"
+        client = PaymentGatewayClient(
+            api_key="test-key",
+            api_secret="test-secret",
+            base_url=base_url,
+            transport=Urllib3Transport(dns_cache=cache),
+        )
+
+        assert client.get_payment("pay_1")["id"] == "pay_1"
+        client.close()
+        assert client.get_payment("pay_2")["id"] == "pay_2"
+        assert resolver.calls == 1
+
+
+@pytest.fixture(scope="module")
+def certificate(tmp_path_factory: pytest.TempPathFactory) -> Tuple[str, str]:
+    if shutil.which("openssl") is None:
+        pytest.skip("openssl is required to create a test certificate")
+    directory: Path = tmp_path_factory.mktemp("tls")
+    cert, key = str(directory / "cert.pem"), str(directory / "key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+            "-keyout", key, "-out", cert, "-subj", "/CN=localhost",
+            "-addext", "subjectAltName=DNS:localhost",
+        ],
+        check=True,
+        capture_output=True,
+    )  # fmt: skip
+    return cert, key
+
+
+@pytest.mark.parametrize("version", [ssl.TLSVersion.TLSv1_2, ssl.TLSVersion.TLSv1_3])
+def test_tls_session_resumption(certificate: Tuple[str, str], version: ssl.TLSVersion) -> None:
+    """Test that reconnects resume the previous TLS session."""
+    cert, key = certificate
+    server = CountingServer(("127.0.0.1", 0), StubGatewayHandler)
+    server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    server_context.load_cert_chain(cert, key)
+    server.socket = server_context.wrap_socket(server.socket, server_side=True)
+    _serve(server)
+
+    transport = Urllib3Transport(tls_session_resumption=True, ca_certs=cert)
+    context: Any = transport.pool_manager.connection_pool_kw["ssl_context"]
+    context.maximum_version = version
+    client = PaymentGatewayClient(
+        api_key="test-key",
+        api_secret="test-secret",
+        base_url=f"https://localhost:{server.server_address[1]}/api/v1",
+        transport=transport,
+    )
+    try:
+        for _ in range(3):
+            assert client.get_payment("pay_1")["id"] == "pay_1"
+            transport.pool_manager.clear()  # force a reconnect
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert context.handshakes == 3
+    assert context.resumed >= 1